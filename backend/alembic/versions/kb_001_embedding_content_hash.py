@@ -0,0 +1,47 @@
+"""knowledge base: chunk content hashes and tuned HNSW index
+
+Revision ID: kb_001
+Revises: notif_001
+Create Date: 2026-10-18 18:00:00.000000
+
+Chunks are re-embedded only when their text or the embedding model
+changes. content_hash identifies the two together, indexed so a chunk
+already embedded for another article can reuse that vector;
+embedding_model keeps vectors of different models out of each other's
+searches. Existing rows have no hash and are re-embedded on their
+article's next save.
+
+The HNSW index is rebuilt with ef_construction = 128 (default 64): the
+knowledge base is small and rarely rewritten, so a slower build for a
+better graph is cheap. Search-time recall is set per query with
+hnsw.ef_search (kb_hnsw_ef_search).
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = 'kb_001'
+down_revision: Union[str, None] = 'notif_001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('kb_embeddings', sa.Column('content_hash', sa.String(64), nullable=True))
+    op.add_column('kb_embeddings', sa.Column('embedding_model', sa.String(100), nullable=True))
+    op.create_index('ix_kb_embeddings_content_hash', 'kb_embeddings', ['content_hash'])
+
+    op.execute("DROP INDEX IF EXISTS ix_kb_embedding_vector")
+    op.execute(
+        "CREATE INDEX ix_kb_embedding_vector ON kb_embeddings "
+        "USING hnsw (embedding vector_cosine_ops) WITH (m = 16, ef_construction = 128)"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_kb_embedding_vector")
+    op.execute("CREATE INDEX ix_kb_embedding_vector ON kb_embeddings USING hnsw (embedding vector_cosine_ops)")
+    op.drop_index('ix_kb_embeddings_content_hash', table_name='kb_embeddings')
+    op.drop_column('kb_embeddings', 'embedding_model')
+    op.drop_column('kb_embeddings', 'content_hash')
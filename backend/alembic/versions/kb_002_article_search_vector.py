@@ -0,0 +1,35 @@
+"""knowledge base: full-text search vector on articles
+
+Revision ID: kb_002
+Revises: kb_001
+Create Date: 2026-10-18 20:00:00.000000
+
+Agent suggestions rank articles lexically as well as by embedding
+similarity. search_vector holds the article's title (weight A) and body
+(weight B) as an English tsvector, generated by PostgreSQL so it never
+drifts from the text, and GIN-indexed for @@ matches ranked with
+ts_rank_cd.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = 'kb_002'
+down_revision: Union[str, None] = 'kb_001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute(
+        "ALTER TABLE kb_articles ADD COLUMN search_vector tsvector GENERATED ALWAYS AS ("
+        "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+        "setweight(to_tsvector('english', coalesce(body, '')), 'B')"
+        ") STORED"
+    )
+    op.execute("CREATE INDEX ix_kb_articles_search_vector ON kb_articles USING gin (search_vector)")
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_kb_articles_search_vector")
+    op.execute("ALTER TABLE kb_articles DROP COLUMN IF EXISTS search_vector")
@@ -0,0 +1,98 @@
+"""instructor earnings: materialised balances and monthly buckets
+
+Revision ID: ledger_001
+Revises: kb_002
+Create Date: 2026-10-19 09:00:00.000000
+
+Balance checks, payout requests and the earnings dashboard summed every
+earning and payout of the instructor. instructor_balances keeps one
+running row per instructor and instructor_earning_periods keeps monthly
+sums per earning type and course; both are maintained by the earnings
+ledger flush hook and backfilled here from the existing rows.
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+revision: str = 'ledger_001'
+down_revision: Union[str, None] = 'kb_002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'instructor_balances',
+        sa.Column('instructor_id', sa.UUID(), nullable=False),
+        sa.Column('total_earned', sa.Numeric(precision=12, scale=2), server_default='0', nullable=False),
+        sa.Column('pending_earnings', sa.Numeric(precision=12, scale=2), server_default='0', nullable=False),
+        sa.Column('total_paid_out', sa.Numeric(precision=12, scale=2), server_default='0', nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['instructor_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('instructor_id'),
+    )
+    op.create_table(
+        'instructor_earning_periods',
+        sa.Column('id', sa.UUID(), nullable=False),
+        sa.Column('instructor_id', sa.UUID(), nullable=False),
+        sa.Column('period_start', sa.Date(), nullable=False),
+        sa.Column('earning_type', postgresql.ENUM(name='earningtype', create_type=False), nullable=False),
+        sa.Column('course_id', sa.UUID(), nullable=True),
+        sa.Column('gross_amount', sa.Numeric(precision=12, scale=2), server_default='0', nullable=False),
+        sa.Column('net_amount', sa.Numeric(precision=12, scale=2), server_default='0', nullable=False),
+        sa.Column('earned_net', sa.Numeric(precision=12, scale=2), server_default='0', nullable=False),
+        sa.Column('earnings_count', sa.Integer(), server_default='0', nullable=False),
+        sa.ForeignKeyConstraint(['instructor_id'], ['users.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['course_id'], ['courses.id'], ondelete='SET NULL'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(
+        'ix_instructor_earning_periods_instructor_period',
+        'instructor_earning_periods',
+        ['instructor_id', 'period_start'],
+    )
+
+    op.execute("""
+        INSERT INTO instructor_balances (instructor_id, total_earned, pending_earnings, total_paid_out, updated_at)
+        SELECT instructor_id, sum(earned), sum(pending), sum(paid_out), now()
+        FROM (
+            SELECT instructor_id,
+                   CASE WHEN status IN ('CONFIRMED', 'PAID') THEN net_amount ELSE 0 END AS earned,
+                   CASE WHEN status = 'PENDING' THEN net_amount ELSE 0 END AS pending,
+                   0 AS paid_out
+            FROM instructor_earnings
+            UNION ALL
+            SELECT instructor_id, 0, 0,
+                   CASE WHEN status IN ('REQUESTED', 'PROCESSING', 'COMPLETED') THEN amount ELSE 0 END
+            FROM instructor_payouts
+        ) AS entries
+        GROUP BY instructor_id
+    """)
+    op.execute("""
+        INSERT INTO instructor_earning_periods (
+            id, instructor_id, period_start, earning_type, course_id,
+            gross_amount, net_amount, earned_net, earnings_count
+        )
+        SELECT gen_random_uuid(), instructor_id, period_start, earning_type, course_id,
+               gross_amount, net_amount, earned_net, earnings_count
+        FROM (
+            SELECT instructor_id,
+                   date_trunc('month', created_at)::date AS period_start,
+                   earning_type,
+                   course_id,
+                   sum(gross_amount) AS gross_amount,
+                   sum(net_amount) AS net_amount,
+                   sum(CASE WHEN status IN ('CONFIRMED', 'PAID') THEN net_amount ELSE 0 END) AS earned_net,
+                   count(*) AS earnings_count
+            FROM instructor_earnings
+            GROUP BY 1, 2, 3, 4
+        ) AS buckets
+    """)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_instructor_earning_periods_instructor_period', table_name='instructor_earning_periods')
+    op.drop_table('instructor_earning_periods')
+    op.drop_table('instructor_balances')
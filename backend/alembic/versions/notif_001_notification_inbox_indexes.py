@@ -0,0 +1,42 @@
+"""notifications: inbox keyset and unread indexes
+
+Revision ID: notif_001
+Revises: store_001
+Create Date: 2026-10-18 12:00:00.000000
+
+The inbox is now keyset-paginated on (created_at, id) per user. The
+composite index matches that ordering and includes is_read and type, so
+filtered pages do not visit rows they skip.
+
+Unread counts are cached in Redis; the partial index keeps the recount
+on a cache miss (and the periodic reconciliation) to the unread rows.
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = 'notif_001'
+down_revision: Union[str, None] = 'store_001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        'ix_notifications_user_created_id',
+        'notifications',
+        ['user_id', sa.text('created_at DESC'), sa.text('id DESC')],
+        postgresql_include=['is_read', 'type'],
+    )
+    op.create_index(
+        'ix_notifications_user_unread',
+        'notifications',
+        ['user_id'],
+        postgresql_where=sa.text('is_read = false'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_notifications_user_unread', table_name='notifications')
+    op.drop_index('ix_notifications_user_created_id', table_name='notifications')
@@ -0,0 +1,40 @@
+"""store: add reserved_until to orders
+
+Revision ID: store_001
+Revises: ait_001
+Create Date: 2026-10-18 10:00:00.000000
+
+Checkout now reserves stock by decrementing inventory when the order is
+created. A pending order holds that stock until reserved_until; the
+reservation sweeper cancels expired unpaid orders and restocks them.
+
+The partial index keeps the sweep query cheap: only pending orders with
+a live reservation are indexed.
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = 'store_001'
+down_revision: Union[str, None] = 'ait_001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        'orders',
+        sa.Column('reserved_until', sa.DateTime(), nullable=True)
+    )
+    op.create_index(
+        'ix_orders_pending_reserved_until',
+        'orders',
+        ['reserved_until'],
+        postgresql_where=sa.text("status = 'pending' AND reserved_until IS NOT NULL"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_orders_pending_reserved_until', table_name='orders')
+    op.drop_column('orders', 'reserved_until')
@@ -0,0 +1,56 @@
+"""payment webhooks: durable inbox table
+
+Revision ID: webhook_001
+Revises: ledger_001
+Create Date: 2026-10-19 11:00:00.000000
+
+Gateway callbacks were processed inside the HTTP request, so a slow or
+failing handler made M-Pesa, PayPal and Stripe retry and re-apply the same
+event. webhook_events stores each callback once per (gateway, event_key)
+and the job queue applies them per payment, oldest first.
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+revision: str = 'webhook_001'
+down_revision: Union[str, None] = 'ledger_001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'webhook_events',
+        sa.Column('id', sa.UUID(), nullable=False),
+        sa.Column('gateway', sa.String(length=20), nullable=False),
+        sa.Column('event_key', sa.String(length=255), nullable=False),
+        sa.Column('event_type', sa.String(length=100), nullable=True),
+        sa.Column('ordering_key', sa.String(length=255), nullable=False),
+        sa.Column('payload', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.Column('status', sa.String(length=20), server_default='received', nullable=False),
+        sa.Column('attempts', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('received_at', sa.DateTime(), nullable=False),
+        sa.Column('processed_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('gateway', 'event_key', name='uq_webhook_events_gateway_event_key'),
+    )
+    op.create_index(
+        'ix_webhook_events_ordering',
+        'webhook_events',
+        ['gateway', 'ordering_key', 'received_at'],
+    )
+    op.create_index(
+        'ix_webhook_events_status_received',
+        'webhook_events',
+        ['status', 'received_at'],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_webhook_events_status_received', table_name='webhook_events')
+    op.drop_index('ix_webhook_events_ordering', table_name='webhook_events')
+    op.drop_table('webhook_events')
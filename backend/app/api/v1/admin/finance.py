@@ -7,19 +7,24 @@ Provides REST endpoints for the admin finance dashboard:
 - Payout queue management
 - Subscription plan listing
 - Invoice listing
+- Payment webhook inbox listing and replay
 
 All endpoints require admin or staff role access.
 """
 
 import logging
-from typing import Any, Dict, Optional
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from uuid import UUID
 
 from fastapi import APIRouter, Depends, HTTPException, Query, status
+from pydantic import BaseModel
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.database import get_db
 from app.utils.permissions import require_permission
 from app.services.admin.finance_service import FinanceService
+from app.services import webhook_inbox
 
 logger = logging.getLogger(__name__)
 
@@ -189,3 +194,81 @@ async def list_invoices(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to list invoices.",
         ) from exc
+
+
+# ------------------------------------------------------------------
+# GET /finance/webhooks - payment webhook inbox
+# ------------------------------------------------------------------
+@router.get("/finance/webhooks")
+async def list_webhook_events(
+    page: int = Query(1, ge=1),
+    page_size: int = Query(20, ge=1, le=100),
+    status_filter: Optional[str] = Query(None, alias="status"),
+    gateway: Optional[str] = Query(None),
+    current_user: dict = Depends(require_permission("finance.transactions.read")),
+    db: AsyncSession = Depends(get_db),
+) -> Dict[str, Any]:
+    """
+    Paginated list of stored gateway webhooks, newest first.
+
+    Supports filtering by status (received, processed, failed) and gateway;
+    includes event counts per status.
+    Requires finance.transactions.read permission.
+    """
+    try:
+        data = await webhook_inbox.list_events(
+            db,
+            status=status_filter,
+            gateway=gateway,
+            page=page,
+            page_size=page_size,
+        )
+        return {"status": "success", "data": data}
+    except Exception as exc:
+        logger.exception("Failed to list webhook events")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to list webhook events.",
+        ) from exc
+
+
+class WebhookReplayRequest(BaseModel):
+    event_ids: Optional[List[UUID]] = None
+    gateway: Optional[str] = None
+    status: str = "failed"
+    since: Optional[datetime] = None
+    limit: int = 500
+
+
+# ------------------------------------------------------------------
+# POST /finance/webhooks/replay - re-process stored webhooks
+# ------------------------------------------------------------------
+@router.post("/finance/webhooks/replay")
+async def replay_webhook_events(
+    body: WebhookReplayRequest,
+    current_user: dict = Depends(require_permission("finance.transactions.manage")),
+    db: AsyncSession = Depends(get_db),
+) -> Dict[str, Any]:
+    """
+    Queue stored webhooks for processing again.
+
+    Replays the listed event_ids, or up to ``limit`` events with the given
+    status (default failed), optionally filtered by gateway and receipt time.
+    Requires finance.transactions.manage permission.
+    """
+    try:
+        replayed = await webhook_inbox.replay_events(
+            db,
+            event_ids=body.event_ids,
+            gateway=body.gateway,
+            status=body.status,
+            since=body.since,
+            limit=min(body.limit, 5000),
+        )
+        return {"status": "success", "data": {"replayed": replayed}}
+    except Exception as exc:
+        logger.exception("Failed to replay webhook events")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to replay webhook events.",
+        ) from exc
@@ -5,26 +5,25 @@ Provides REST endpoints for the admin operations dashboard:
 - Support ticket listing and detail
 - Content moderation queue
 - System configuration management
-- Audit log search and CSV export
+- Audit log search and CSV/Excel export
 
 All endpoints require admin or staff role access.
 """
 
-import io
 import logging
 from datetime import datetime
 from typing import Any, Dict, Optional
 
 from fastapi import APIRouter, Depends, HTTPException, Query, status
-from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.database import get_db
 from app.utils.permissions import verify_admin_access
-from app.services.admin.audit_service import AuditService
+from app.services.admin.audit_service import AuditService, AUDIT_EXPORT_COLUMNS
 from app.services.admin.ticket_service import TicketService
 from app.services.admin.moderation_service import ModerationService
 from app.services.admin.config_service import ConfigService
+from app.utils.export import export_response, start_export_job, stream_rows
 
 logger = logging.getLogger(__name__)
 
@@ -209,37 +208,52 @@ async def search_audit_logs(
 
 
 # ------------------------------------------------------------------
-# GET /operations/audit-logs/export - export audit logs as CSV
+# GET /operations/audit-logs/export - export audit logs as CSV / Excel
 # ------------------------------------------------------------------
 @router.get("/operations/audit-logs/export")
 async def export_audit_logs(
     date_from: Optional[str] = Query(None),
     date_to: Optional[str] = Query(None),
     resource_type: Optional[str] = Query(None),
+    format: str = Query("csv", pattern="^(csv|xlsx)$"),
+    mode: str = Query("stream", pattern="^(stream|async)$"),
     current_user: dict = Depends(verify_admin_access()),
     db: AsyncSession = Depends(get_db),
 ):
     """
-    Export audit logs as a CSV file download.
+    Export audit logs as a CSV or Excel file download.
 
     Supports filtering by date range and resource type before export.
+    ``mode=stream`` (default) streams the file directly; ``mode=async``
+    runs the export as a background job and returns a download handle.
     """
     try:
         parsed_from = datetime.fromisoformat(date_from) if date_from else None
         parsed_to = datetime.fromisoformat(date_to) if date_to else None
 
-        csv_string = await AuditService.export_logs_csv(
-            db,
+        query = AuditService.export_query(
             date_from=parsed_from,
             date_to=parsed_to,
             resource_type=resource_type,
         )
 
-        buffer = io.BytesIO(csv_string.encode("utf-8"))
-        return StreamingResponse(
-            buffer,
-            media_type="text/csv",
-            headers={"Content-Disposition": "attachment; filename=audit_logs_export.csv"},
+        if mode == "async":
+            job = await start_export_job(
+                query,
+                AUDIT_EXPORT_COLUMNS,
+                filename="audit_logs_export",
+                export_format=format,
+                owner_id=current_user.get("id") or current_user.get("user_id"),
+                sheet_title="Audit Logs",
+            )
+            return {"status": "success", "data": job}
+
+        return await export_response(
+            stream_rows(db, query),
+            AUDIT_EXPORT_COLUMNS,
+            filename="audit_logs_export",
+            export_format=format,
+            sheet_title="Audit Logs",
         )
     except Exception as exc:
         logger.exception("Failed to export audit logs")
@@ -8,7 +8,7 @@ Provides REST endpoints for managing platform users:
 - Update user role
 - Activity timeline from audit logs
 - Bulk actions (deactivate / reactivate)
-- Export users as CSV
+- Export users as CSV / Excel (streamed or background job)
 
 All endpoints require admin or staff role access.
 """
@@ -17,14 +17,17 @@ import logging
 from typing import Any, Dict, List, Optional
 
 from fastapi import APIRouter, Depends, HTTPException, Query, status
-from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.database import get_db
 from app.utils.permissions import verify_admin_access
-from app.services.admin.user_management_service import user_management_service
+from app.services.admin.user_management_service import (
+    user_management_service,
+    USER_EXPORT_COLUMNS,
+)
 from app.services.admin.audit_service import audit_service
+from app.utils.export import export_response, start_export_job, stream_rows
 
 logger = logging.getLogger(__name__)
 
@@ -82,20 +85,26 @@ async def list_users(
 
 
 # ------------------------------------------------------------------
-# GET /export - export users CSV
+# GET /export - export users CSV / Excel
 # ------------------------------------------------------------------
 @router.get("/export")
 async def export_users(
     role: Optional[str] = Query(None),
     status_filter: Optional[str] = Query(None, alias="status"),
     search: Optional[str] = Query(None),
+    format: str = Query("csv", pattern="^(csv|xlsx)$"),
+    mode: str = Query("stream", pattern="^(stream|async)$"),
     current_user: dict = Depends(verify_admin_access()),
     db: AsyncSession = Depends(get_db),
 ):
-    """Export users as CSV download."""
+    """
+    Export users as a CSV or Excel download.
+
+    ``mode=async`` runs the export as a background job and returns a
+    download handle instead of streaming the file inline.
+    """
     try:
-        csv_string = await user_management_service.export_users(
-            db,
+        query = user_management_service.export_query(
             role_filter=role,
             status_filter=status_filter,
             search=search,
@@ -110,15 +119,26 @@ async def export_users(
             actor_role=current_user.get("role", ""),
             action="export_users",
             resource_type="user",
-            details={"role": role, "status": status_filter, "search": search},
+            details={"role": role, "status": status_filter, "search": search, "format": format},
         )
 
-        import io
-        buffer = io.BytesIO(csv_string.encode("utf-8"))
-        return StreamingResponse(
-            buffer,
-            media_type="text/csv",
-            headers={"Content-Disposition": "attachment; filename=users_export.csv"},
+        if mode == "async":
+            job = await start_export_job(
+                query,
+                USER_EXPORT_COLUMNS,
+                filename="users_export",
+                export_format=format,
+                owner_id=actor_id,
+                sheet_title="Users",
+            )
+            return {"status": "success", "data": job}
+
+        return await export_response(
+            stream_rows(db, query),
+            USER_EXPORT_COLUMNS,
+            filename="users_export",
+            export_format=format,
+            sheet_title="Users",
         )
     except Exception as exc:
         logger.exception("Failed to export users")
@@ -28,7 +28,7 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
-from app.database import get_db
+from app.database import get_db, release_db
 from app.models import Student, AITutor, User
 from app.schemas.ai_tutor_schemas import (
     ChatRequest,
@@ -39,7 +39,7 @@ from app.schemas.ai_tutor_schemas import (
     TutorStatus
 )
 from app.utils.security import get_current_user
-from app.services.ai_orchestrator import AIOrchestrator
+from app.services.ai_orchestrator import get_orchestrator
 
 
 # Create API router
@@ -180,12 +180,15 @@ async def chat_with_tutor(
     # Get user's response mode preference
     response_mode = tutor.response_mode
 
+    # No DB work until the reply is saved: free the connection meanwhile
+    await release_db(db)
+
     # Route query to AI orchestrator
     ai_message = ""
     audio_url = None
 
     try:
-        orchestrator = AIOrchestrator(db)
+        orchestrator = await get_orchestrator(None)
         ai_response = await orchestrator.route_query(
             query=request.message,
             context={
@@ -11,7 +11,7 @@ from typing import Optional
 from uuid import UUID
 
 from fastapi import APIRouter, Depends, HTTPException, Query, status
-from fastapi.responses import Response
+from fastapi.responses import JSONResponse, Response
 from sqlalchemy import select, func
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -221,10 +221,16 @@ async def revoke_certificate(
 )
 async def download_certificate_pdf(
     certificate_id: UUID,
+    mode: str = Query("sync", pattern="^(sync|async)$"),
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ) -> Response:
-    """Generate and stream a certificate PDF (owner or admin)."""
+    """
+    Generate and stream a certificate PDF (owner or admin).
+
+    ``mode=async`` renders the PDF in a background job and returns 202
+    with the job; its result carries the export ``download_url``.
+    """
     result = await db.execute(
         select(Certificate).where(Certificate.id == certificate_id)
     )
@@ -251,6 +257,16 @@ async def download_certificate_pdf(
             detail="Certificate has been revoked and cannot be downloaded",
         )
 
+    if mode == "async":
+        from app.services.background_jobs import certificate_pdf
+
+        job = await certificate_pdf.enqueue(
+            {"certificate_id": certificate.id, "requested_by": current_user.id},
+            owner_id=current_user.id,
+            idempotency_key=f"{certificate.id}:{current_user.id}",
+        )
+        return JSONResponse(status_code=status.HTTP_202_ACCEPTED, content={"status": "success", "data": job})
+
     try:
         from app.services.certificate_pdf_service import generate_certificate_pdf
 
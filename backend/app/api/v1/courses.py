@@ -20,7 +20,7 @@ import logging
 from typing import List, Optional
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, Header, HTTPException, Response, status, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 
 logger = logging.getLogger(__name__)
@@ -42,6 +42,7 @@ from app.schemas.enrollment_schemas import (
     StudentEnrollmentListResponse,
     EnrollmentWithCourseDetails
 )
+from app.services.course_catalog import catalog_page, etag_matches
 from app.services.course_service import CourseService
 from app.utils.security import get_current_user
 
@@ -119,8 +120,11 @@ async def create_course(
     description="Get paginated list of courses with optional filters for grade level, learning area, etc."
 )
 async def list_courses(
+    response: Response,
     skip: int = Query(0, ge=0, description="Number of records to skip"),
     limit: int = Query(20, ge=1, le=100, description="Maximum number of records"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page (replaces skip)"),
+    sort: str = Query("newest", description="newest, popular, rating, price_low or price_high"),
     grade_level: Optional[str] = Query(None, description="Filter by grade level (e.g., 'Grade 1')"),
     learning_area: Optional[str] = Query(None, description="Filter by CBC learning area"),
     is_featured: Optional[bool] = Query(None, description="Filter featured courses"),
@@ -129,47 +133,51 @@ async def list_courses(
     audience: Optional[str] = Query(None, description="Filter by audience: 'students', 'teachers', or 'revision'"),
     is_free: Optional[bool] = Query(None, description="True = free courses only, False = paid only"),
     course_code: Optional[str] = Query(None, description="Filter by short unique course code e.g. 'ENV-G2'"),
+    if_none_match: Optional[str] = Header(None),
     db: AsyncSession = Depends(get_db)
-) -> dict:
+):
     """
     List published courses with optional filtering.
 
     Query Parameters:
     - skip: Pagination offset (default: 0)
     - limit: Max results per page (default: 20, max: 100)
+    - cursor: Keyset cursor (next_cursor of the previous page)
+    - sort: Card order (default: newest)
     - grade_level: Filter by CBC grade level
     - learning_area: Filter by learning area (Mathematics, Science, etc.)
     - is_featured: Show only featured courses
     - search: Search query for title/description
     - instructor_id: Filter courses by specific instructor
 
+    Pages are served from the catalog cache with an ETag; a matching
+    If-None-Match gets 304 Not Modified.
+
     Returns:
-        Dictionary with courses list, total count, and pagination info
+        Dictionary with course cards, total count, and pagination info
     """
     try:
-        courses, total = await CourseService.list_courses(
-            db=db,
+        page = await catalog_page(
+            db,
+            sort=sort,
+            cursor=cursor,
             skip=skip,
             limit=limit,
             grade_level=grade_level,
             learning_area=learning_area,
             is_published=True,
             is_featured=is_featured,
-            search_query=search,
+            search=search,
             instructor_id=instructor_id,
             audience=audience,
             is_free=is_free,
             course_code=course_code,
         )
-
-        return {
-            "courses": [CourseResponse.model_validate(course) for course in courses],
-            "total": total,
-            "skip": skip,
-            "limit": limit,
-            "has_more": (skip + limit) < total
-        }
-
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     except Exception as e:
         logger.error(f"Failed to list courses: {type(e).__name__}: {e}", exc_info=True)
         raise HTTPException(
@@ -177,6 +185,12 @@ async def list_courses(
             detail=f"Failed to list courses: {type(e).__name__}: {e}"
         )
 
+    headers = {"ETag": page["etag"], "Cache-Control": "no-cache"}
+    if etag_matches(if_none_match, page["etag"]):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
+    return {key: value for key, value in page.items() if key != "etag"}
+
 
 @router.get(
     "/{course_id}",
@@ -0,0 +1,69 @@
+"""
+Export Job API Endpoints
+
+Status polling and file download for exports held in the export file
+store: background CSV/Excel jobs started with ``mode=async`` and files
+produced by the staff report builder and partner report exports.
+Only the user who started an export (or an admin) can see or download it.
+"""
+
+from typing import Any, Dict
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
+
+from app.utils.export import (
+    CSV_MEDIA_TYPE,
+    EXPORT_MEDIA_TYPES,
+    export_job_path,
+    get_export_job,
+    iter_export_file,
+    public_job_view,
+)
+from app.utils.security import get_current_active_user
+
+router = APIRouter(prefix="/exports", tags=["Exports"])
+
+
+async def _get_owned_job(job_id: str, current_user: dict) -> Dict[str, Any]:
+    job = await get_export_job(job_id)
+    if not job:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Export not found.")
+
+    user_id = str(current_user.get("id") or current_user.get("user_id") or "")
+    if current_user.get("role") != "admin" and job.get("owner_id") != user_id:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Export not found.")
+    return job
+
+
+@router.get("/{job_id}")
+async def get_export_status(
+    job_id: str,
+    current_user: dict = Depends(get_current_active_user),
+) -> Dict[str, Any]:
+    """Return the status of an export job (queued, running, completed, failed)."""
+    job = await _get_owned_job(job_id, current_user)
+    return {"status": "success", "data": public_job_view(job)}
+
+
+@router.get("/{job_id}/download")
+async def download_export(
+    job_id: str,
+    current_user: dict = Depends(get_current_active_user),
+):
+    """Stream a completed export file from the export store."""
+    job = await _get_owned_job(job_id, current_user)
+
+    path = export_job_path(job)
+    if path is None:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Export is not ready (status: {job.get('status')}).",
+        )
+
+    media_type = EXPORT_MEDIA_TYPES.get(job.get("format") or "", CSV_MEDIA_TYPE)
+    return StreamingResponse(
+        iter_export_file(path),
+        media_type=media_type,
+        headers={"Content-Disposition": f"attachment; filename={job['filename']}"},
+    )
@@ -0,0 +1,31 @@
+"""
+Background Job API Endpoints
+
+Status polling for jobs on the background job queue (AI weekly
+summaries, parent reports, certificate PDFs started with ``mode=async``).
+Status changes are also pushed to the owner's WebSocket connections as
+``job.status`` events. Only the user who started a job (or an admin) can
+see it.
+"""
+
+from typing import Any, Dict
+
+from fastapi import APIRouter, Depends, HTTPException, status
+
+from app.utils.job_queue import get_job, public_job_view
+from app.utils.security import get_current_active_user
+
+router = APIRouter(prefix="/jobs", tags=["Jobs"])
+
+
+@router.get("/{job_id}")
+async def get_job_status(
+    job_id: str,
+    current_user: dict = Depends(get_current_active_user),
+) -> Dict[str, Any]:
+    """Return a job's status (queued, running, retrying, succeeded, failed) and result."""
+    job = await get_job(job_id)
+    user_id = str(current_user.get("id") or current_user.get("user_id") or "")
+    if not job or (current_user.get("role") != "admin" and job.get("owner_id") != user_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found.")
+    return {"status": "success", "data": public_job_view(job)}
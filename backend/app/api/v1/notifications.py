@@ -30,31 +30,39 @@ router = APIRouter(prefix="/notifications", tags=["Notifications"])
     response_model=NotificationListResponse,
     status_code=status.HTTP_200_OK,
     summary="List notifications",
-    description="Get paginated notifications with optional filtering by read status and type.",
+    description=(
+        "Get notifications newest first with optional filtering by read status and type. "
+        "Pass next_cursor from the previous response as cursor to get the next page."
+    ),
 )
 async def list_notifications(
     is_read: Optional[bool] = Query(None, description="Filter by read status"),
     type: Optional[str] = Query(None, description="Filter by notification type"),
-    page: int = Query(1, ge=1),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
     limit: int = Query(20, ge=1, le=100),
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ) -> NotificationListResponse:
     """List the current user's notifications with optional read-status and type filters."""
-    data = await notification_service.get_notifications(
-        db=db,
-        user_id=current_user.id,
-        is_read=is_read,
-        notification_type=type,
-        page=page,
-        limit=limit,
-    )
+    try:
+        data = await notification_service.get_notifications(
+            db=db,
+            user_id=current_user.id,
+            is_read=is_read,
+            notification_type=type,
+            cursor=cursor,
+            limit=limit,
+        )
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor",
+        )
 
     return NotificationListResponse(
         notifications=[NotificationResponse.model_validate(n) for n in data["notifications"]],
-        total=data["total"],
+        next_cursor=data["next_cursor"],
         unread_count=data["unread_count"],
-        page=data["page"],
         limit=data["limit"],
     )
 
@@ -64,7 +72,10 @@ async def list_notifications(
     response_model=UnreadCountResponse,
     status_code=status.HTTP_200_OK,
     summary="Get unread notification count",
-    description="Quick count of unread notifications for badge display.",
+    description=(
+        "Quick count of unread notifications for badge display. Connected clients also "
+        "receive unread_count events over their WebSocket whenever it changes."
+    ),
 )
 async def unread_count(
     current_user: User = Depends(get_current_user),
@@ -7,6 +7,7 @@ API endpoints for M-Pesa payments.
 from fastapi import APIRouter, Depends, HTTPException, status, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.api.v1.payments import mpesa_callback as record_mpesa_callback
 from app.database import get_db
 from app.models import User
 from app.utils.security import get_current_user
@@ -58,11 +59,11 @@ async def mpesa_callback(
     """
     M-Pesa callback endpoint (public).
 
-    This endpoint receives payment confirmations from Safaricom.
+    This endpoint receives payment confirmations from Safaricom. It shares
+    the payments callback handler, so the callback goes through the same IP
+    check and webhook inbox as /payments/mpesa/callback.
     """
-    callback_data = await request.json()
-    result = await mpesa_service.process_callback(callback_data)
-    return result
+    return await record_mpesa_callback(request, db)
 
 
 @router.get("/status/{checkout_request_id}", response_model=MpesaPaymentStatusResponse)
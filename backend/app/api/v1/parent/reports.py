@@ -5,6 +5,7 @@ API endpoints for reports and portfolio exports.
 """
 
 from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi.responses import JSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional
 from uuid import UUID
@@ -17,6 +18,7 @@ from app.schemas.parent.reports_schemas import (
     TermSummaryResponse, TranscriptResponse, PortfolioExportRequest,
     PortfolioExportResponse
 )
+from app.services.background_jobs import parent_report
 from app.services.parent.reports_service import parent_reports_service
 
 router = APIRouter(prefix="/parent/reports", tags=["parent-reports"])
@@ -51,10 +53,23 @@ async def get_reports(
 @router.post("/generate", response_model=ReportDetailResponse)
 async def generate_report(
     request: GenerateReportRequest,
+    mode: str = Query("sync", pattern="^(sync|async)$"),
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(require_parent_role)
 ):
-    """Generate a new report."""
+    """
+    Generate a new report.
+
+    ``mode=async`` queues the report as a background job and returns 202
+    with the job; its result is the report detail.
+    """
+    if mode == "async":
+        job = await parent_report.enqueue(
+            {"parent_id": current_user.id, **request.model_dump()},
+            owner_id=current_user.id,
+        )
+        return JSONResponse(status_code=status.HTTP_202_ACCEPTED, content={"status": "success", "data": job})
+
     try:
         return await parent_reports_service.generate_report(
             db=db,
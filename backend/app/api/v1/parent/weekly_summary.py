@@ -7,6 +7,7 @@ contextualized to each child's recent learning.
 """
 import logging
 from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import JSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Dict, List
 from uuid import UUID
@@ -15,6 +16,7 @@ logger = logging.getLogger(__name__)
 
 from app.database import get_db
 from app.models.user import User
+from app.services.background_jobs import weekly_summary
 from app.services.parent.weekly_summary_service import ParentWeeklySummaryService
 from app.utils.security import get_current_user
 
@@ -51,11 +53,25 @@ async def get_weekly_summaries(
 @router.post("/{child_id}/generate")
 async def generate_weekly_summary(
     child_id: UUID,
+    mode: str = Query("sync", pattern="^(sync|async)$"),
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ) -> Dict:
-    """Generate a new weekly summary for a child."""
+    """
+    Generate a new weekly summary for a child.
+
+    ``mode=async`` queues the generation as a background job and returns
+    202 with the job; poll ``GET /jobs/{id}`` or wait for the
+    ``job.status`` WebSocket event.
+    """
     _assert_parent(current_user)
+    if mode == "async":
+        job = await weekly_summary.enqueue(
+            {"parent_id": current_user.id, "child_id": child_id},
+            owner_id=current_user.id,
+        )
+        return JSONResponse(status_code=status.HTTP_202_ACCEPTED, content={"status": "success", "data": job})
+
     service = ParentWeeklySummaryService(db)
 
     try:
@@ -4,7 +4,7 @@ Partner Analytics API Endpoints
 ROI metrics, custom reports, and data export.
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Any, Dict
 
@@ -28,3 +28,20 @@ async def roi_metrics(
     user_id = current_user.get("id") or current_user.get("user_id")
     data = await get_roi_metrics(db, user_id)
     return {"status": "success", "data": data}
+
+
+@router.get("/reports/{report_id}/export")
+async def export_impact_report(
+    report_id: str,
+    format: str = Query("pdf", pattern="^(pdf|csv|xlsx)$"),
+    current_user: dict = Depends(verify_partner_or_admin_access()),
+    db: AsyncSession = Depends(get_db),
+) -> Dict[str, Any]:
+    """Export an impact report; CSV/XLSX return a download URL."""
+    user_id = current_user.get("id") or current_user.get("user_id")
+    try:
+        data = await export_report(db, user_id, report_id, format)
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(exc))
+    await db.commit()
+    return {"status": "success", "data": data}
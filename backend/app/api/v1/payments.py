@@ -8,7 +8,8 @@ Multi-gateway payment processing system supporting:
 
 Features:
 - Payment initiation and processing
-- Webhook handlers for gateway callbacks
+- Webhook endpoints for gateway callbacks (stored in the webhook inbox,
+  processed on the job queue)
 - Wallet management and transaction history
 - Saved payment methods
 - Instructor revenue tracking
@@ -16,6 +17,7 @@ Features:
 
 import hmac
 import hashlib
+import json
 import logging
 from typing import List, Optional
 from uuid import UUID
@@ -29,7 +31,6 @@ from app.database import get_db
 from app.config import settings
 from app.schemas import (
     PaymentInitiateRequest,
-    MpesaCallbackRequest,
     TransactionResponse,
     PaymentStatusResponse,
     WalletResponse,
@@ -38,6 +39,8 @@ from app.schemas import (
 )
 from app.models.payment import Transaction, Wallet, PaymentMethod
 from app.models.user import User
+from app.services import webhook_inbox
+from app.utils.payments import PayPalClient
 from app.utils.security import get_current_user, get_current_active_user, RateLimitExceeded
 
 logger = logging.getLogger(__name__)
@@ -180,18 +183,18 @@ async def initiate_payment(
 )
 async def mpesa_callback(
     request: Request,
-    callback_data: MpesaCallbackRequest,
     db: AsyncSession = Depends(get_db)
 ) -> dict:
     """
     Handle M-Pesa STK Push callback.
 
     This endpoint receives payment confirmation from Safaricom's M-Pesa API.
-    Validates request source IP against Safaricom's known IP ranges.
+    Validates request source IP against Safaricom's known IP ranges, stores
+    the callback in the webhook inbox and acknowledges it; the payment is
+    updated by the webhook_events job.
 
     Args:
-        request: FastAPI request for IP verification
-        callback_data: M-Pesa callback payload
+        request: FastAPI request (source IP and callback payload)
         db: Database session
 
     Returns:
@@ -208,24 +211,32 @@ async def mpesa_callback(
             detail="Unauthorized callback source"
         )
 
-    await verify_payment_service()
+    try:
+        payload = await request.json()
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid callback payload"
+        )
+    # Daraja wraps the result as {"Body": {"stkCallback": {...}}}
+    if isinstance(payload, dict) and "Body" not in payload:
+        payload = {"Body": {"stkCallback": payload}}
 
     try:
-        payment_service = PaymentService(db)
-        await payment_service.handle_mpesa_callback(callback_data)
+        await webhook_inbox.record_event(db, "mpesa", payload)
 
         return {
             "ResultCode": 0,
-            "ResultDesc": "Callback processed successfully"
+            "ResultDesc": "Accepted"
         }
 
     except Exception as e:
-        logger.error(f"M-Pesa callback processing error: {str(e)}", exc_info=True)
+        logger.error(f"M-Pesa callback could not be stored: {str(e)}", exc_info=True)
         # CRITICAL: Return error result code so Safaricom retries the callback
         # ResultCode != 0 signals failure and triggers automatic retry
         return {
             "ResultCode": 1,
-            "ResultDesc": f"Callback processing failed: {str(e)}"
+            "ResultDesc": "Callback could not be stored"
         }
 
 
@@ -296,8 +307,8 @@ async def paypal_webhook(
     """
     Handle PayPal webhook events.
 
-    Processes PayPal webhook notifications for payment events.
-    Verifies webhook signature using PayPal transmission headers.
+    Verifies the transmission signature with PayPal, stores the event in
+    the webhook inbox and acknowledges it; the webhook_events job applies it.
 
     Args:
         request: FastAPI request containing webhook payload
@@ -307,12 +318,18 @@ async def paypal_webhook(
         Acknowledgment response
 
     Raises:
-        HTTPException 400: If signature verification fails
+        HTTPException 400: If the signature or payload is invalid
+        HTTPException 503: If the signature could not be checked or the
+            event could not be stored (PayPal retries)
     """
-    await verify_payment_service()
+    if not settings.paypal_webhook_id:
+        # Nothing can be verified, so nothing is stored
+        logger.error("PayPal webhook ignored: PAYPAL_WEBHOOK_ID is not configured")
+        return {"status": "ignored"}
 
     # Verify required PayPal signature headers are present
     required_headers = [
+        "paypal-auth-algo",
         "paypal-transmission-id",
         "paypal-transmission-time",
         "paypal-transmission-sig",
@@ -328,21 +345,37 @@ async def paypal_webhook(
         )
 
     try:
-        # Get raw body for signature verification
-        body = await request.body()
+        payload = json.loads(await request.body())
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid webhook payload"
+        )
 
-        payment_service = PaymentService(db)
-        await payment_service.handle_paypal_webhook(body, headers)
+    try:
+        verified = await PayPalClient().verify_webhook_signature(request.headers, payload)
+    except Exception as e:
+        logger.error(f"PayPal webhook signature could not be checked: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Webhook signature could not be verified"
+        )
+    if not verified:
+        logger.warning(f"PayPal webhook rejected: invalid signature for {payload.get('id')}")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid webhook signature"
+        )
 
-        return {"status": "success"}
+    try:
+        await webhook_inbox.record_event(db, "paypal", payload)
+        return {"status": "received"}
 
-    except HTTPException:
-        raise
     except Exception as e:
-        logger.error(f"PayPal webhook processing error: {str(e)}", exc_info=True)
+        logger.error(f"PayPal webhook could not be stored: {str(e)}", exc_info=True)
         raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Webhook processing failed"
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Webhook could not be stored"
         )
 
 
@@ -414,8 +447,9 @@ async def stripe_webhook(
     """
     Handle Stripe webhook events.
 
-    Processes Stripe webhook notifications for payment events.
-    Verifies webhook signature for security.
+    Verifies the webhook signature against the raw body, stores the event
+    in the webhook inbox and acknowledges it; the webhook_events job
+    applies it.
 
     Args:
         request: FastAPI request containing webhook payload
@@ -424,23 +458,40 @@ async def stripe_webhook(
 
     Returns:
         Acknowledgment response
+
+    Raises:
+        HTTPException 400: If the signature does not verify
+        HTTPException 503: If the event could not be stored (Stripe retries)
     """
-    await verify_payment_service()
+    import stripe
 
-    try:
-        # Get raw body for signature verification
-        body = await request.body()
+    if not settings.stripe_webhook_secret:
+        # Nothing can be verified, so nothing is stored (as before, the
+        # event is acknowledged without effect)
+        logger.error("Stripe webhook ignored: STRIPE_WEBHOOK_SECRET is not configured")
+        return {"status": "ignored"}
 
-        payment_service = PaymentService(db)
-        await payment_service.handle_stripe_webhook(body, stripe_signature)
+    # Verify against the raw body, exactly as Stripe signed it
+    body = await request.body()
+    try:
+        stripe.Webhook.construct_event(body, stripe_signature, settings.stripe_webhook_secret)
+        payload = json.loads(body)
+    except (ValueError, stripe.error.SignatureVerificationError) as e:
+        logger.warning(f"Stripe webhook rejected: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid webhook signature"
+        )
 
-        return {"status": "success"}
+    try:
+        await webhook_inbox.record_event(db, "stripe", payload)
+        return {"status": "received"}
 
     except Exception as e:
-        logger.error(f"Stripe webhook processing error: {str(e)}", exc_info=True)
+        logger.error(f"Stripe webhook could not be stored: {str(e)}", exc_info=True)
         raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Webhook processing failed"
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Webhook could not be stored"
         )
 
 
@@ -17,10 +17,12 @@ from fastapi import APIRouter, Depends, HTTPException, Query, status
 from pydantic import BaseModel
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.database import get_db
+from app.database import get_db, read_only
 from app.utils.permissions import verify_staff_or_admin_access
 
+from app.services.staff.kb_retrieval import KB_CACHE_TAG
 from app.services.staff.knowledge_base_service import KnowledgeBaseService
+from app.utils.cache import invalidate_tags
 
 logger = logging.getLogger(__name__)
 
@@ -65,7 +67,9 @@ class SearchRequest(BaseModel):
 class SuggestionRequest(BaseModel):
     """Payload for AI-suggested articles based on ticket context."""
     ticket_id: str
+    ticket_text: Optional[str] = None
     additional_context: Optional[str] = None
+    include_summary: bool = False
 
 
 # ------------------------------------------------------------------
@@ -153,6 +157,7 @@ async def create_article(
             tags=body.tags,
             is_published=body.is_published,
         )
+        await db.commit()
         return {"status": "success", "data": data}
     except Exception as exc:
         logger.exception("Failed to create KB article")
@@ -172,7 +177,7 @@ async def update_article(
     current_user: dict = Depends(verify_staff_or_admin_access()),
     db: AsyncSession = Depends(get_db),
 ) -> Dict[str, Any]:
-    """Update an existing knowledge-base article."""
+    """Update an existing knowledge-base article and drop cached suggestions."""
     try:
         updates = body.model_dump(exclude_unset=True)
         data = await KnowledgeBaseService.update_article(
@@ -183,6 +188,9 @@ async def update_article(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Article not found.",
             )
+        await db.commit()
+        # Cached suggestions carry titles and only published articles
+        await invalidate_tags(KB_CACHE_TAG)
         return {"status": "success", "data": data}
     except HTTPException:
         raise
@@ -213,6 +221,8 @@ async def delete_article(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Article not found.",
             )
+        await db.commit()
+        await invalidate_tags(KB_CACHE_TAG)
         return {"status": "success", "message": "Article deleted."}
     except HTTPException:
         raise
@@ -274,6 +284,7 @@ async def create_category(
 # POST /search
 # ------------------------------------------------------------------
 @router.post("/search")
+@read_only
 async def vector_search(
     body: SearchRequest,
     current_user: dict = Depends(verify_staff_or_admin_access()),
@@ -313,14 +324,18 @@ async def get_article_suggestions(
     """
     AI-suggested articles based on ticket context.
 
-    Analyses the ticket's conversation history and returns the most
-    relevant KB articles that may help resolve the issue.
+    Ranks KB articles against the ticket's subject and description (or
+    ``ticket_text``) with hybrid lexical + vector retrieval. The LLM
+    summary of the matches is only generated when ``include_summary`` is
+    set, so the article list itself comes back without waiting on it.
     """
     try:
         data = await KnowledgeBaseService.get_suggestions(
             db,
             ticket_id=body.ticket_id,
             additional_context=body.additional_context,
+            ticket_text=body.ticket_text,
+            include_summary=body.include_summary,
         )
         return {"status": "success", "data": data}
     except Exception as exc:
@@ -5,6 +5,7 @@ Provides REST endpoints for managing staff notifications:
 - Paginated notification listing
 - Mark individual or all notifications as read
 - Push notification subscription management
+- Bulk notification sends (run in the background)
 - Notification deletion
 
 All endpoints require staff or admin role access.
@@ -14,10 +15,11 @@ import logging
 from typing import Any, Dict, List, Optional
 
 from fastapi import APIRouter, Depends, HTTPException, Query, status
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.database import get_db
+from app.models.notification import NotificationType
 from app.utils.permissions import verify_staff_or_admin_access
 
 from app.services.staff.notification_service import NotificationService
@@ -47,6 +49,18 @@ class PushUnsubscribeRequest(BaseModel):
     endpoint: str
 
 
+class BulkNotificationRequest(BaseModel):
+    """Payload for sending one notification to many users."""
+    title: str = Field(..., max_length=255)
+    message: str
+    notification_type: NotificationType = NotificationType.system
+    action_url: Optional[str] = Field(None, max_length=500)
+    action_label: Optional[str] = Field(None, max_length=100)
+    data: Dict[str, Any] = Field(default_factory=dict)
+    user_ids: Optional[List[str]] = None
+    roles: Optional[List[str]] = None
+
+
 # ------------------------------------------------------------------
 # GET /
 # ------------------------------------------------------------------
@@ -189,6 +203,37 @@ async def push_unsubscribe(
         ) from exc
 
 
+# ------------------------------------------------------------------
+# POST /bulk
+# ------------------------------------------------------------------
+@router.post("/bulk", status_code=status.HTTP_202_ACCEPTED)
+async def send_bulk_notification(
+    body: BulkNotificationRequest,
+    current_user: dict = Depends(verify_staff_or_admin_access()),
+) -> Dict[str, Any]:
+    """
+    Send a notification to a list of users and/or every user with a role.
+
+    The fan-out runs in the background; progress is reported to the
+    caller over the staff WebSocket as ``bulk_notification_progress``.
+    """
+    if body.user_ids is None and not body.roles:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Provide user_ids, roles or both.",
+        )
+    user_id = current_user.get("id") or current_user.get("user_id")
+    notification = body.model_dump(exclude={"user_ids", "roles"})
+    notification["notification_type"] = body.notification_type.value
+    data = NotificationService.start_bulk_notification(
+        notification=notification,
+        user_ids=body.user_ids,
+        roles=body.roles,
+        initiated_by=user_id,
+    )
+    return {"status": "success", "data": data}
+
+
 # ------------------------------------------------------------------
 # DELETE /{notification_id}
 # ------------------------------------------------------------------
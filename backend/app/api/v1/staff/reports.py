@@ -3,6 +3,7 @@ Staff Reports API Endpoints
 
 Provides REST endpoints for report generation and scheduling:
 - CRUD operations on report definitions
+- Running report widget queries (aggregate data per widget)
 - Report export (CSV, Excel, PDF)
 - Scheduled report management (create, update, delete schedules)
 
@@ -19,6 +20,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.database import get_db
 from app.utils.permissions import verify_staff_or_admin_access
 
+from app.services.staff.report_query_engine import ReportQueryError
 from app.services.staff.report_service import ReportService
 
 logger = logging.getLogger(__name__)
@@ -224,6 +226,43 @@ async def delete_report(
         ) from exc
 
 
+# ------------------------------------------------------------------
+# GET /{report_id}/data
+# ------------------------------------------------------------------
+@router.get("/{report_id}/data")
+async def get_report_data(
+    report_id: str,
+    date_from: Optional[str] = Query(None),
+    date_to: Optional[str] = Query(None),
+    current_user: dict = Depends(verify_staff_or_admin_access()),
+    db: AsyncSession = Depends(get_db),
+) -> Dict[str, Any]:
+    """Run the report's widget queries and return aggregated rows per widget."""
+    try:
+        data = await ReportService.get_report_data(
+            db, report_id=report_id, date_from=date_from, date_to=date_to,
+        )
+        if data is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Report not found.",
+            )
+        return {"status": "success", "data": data}
+    except HTTPException:
+        raise
+    except ReportQueryError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(exc),
+        ) from exc
+    except Exception as exc:
+        logger.exception("Failed to run report %s", report_id)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to run report.",
+        ) from exc
+
+
 # ------------------------------------------------------------------
 # POST /{report_id}/export
 # ------------------------------------------------------------------
@@ -259,6 +298,11 @@ async def export_report(
         return {"status": "success", "data": data}
     except HTTPException:
         raise
+    except ReportQueryError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(exc),
+        ) from exc
     except Exception as exc:
         logger.exception("Failed to export report %s", report_id)
         raise HTTPException(
@@ -314,6 +358,12 @@ async def create_schedule(
             is_active=body.is_active,
         )
         return {"status": "success", "data": data}
+    except ValueError as exc:
+        # Invalid cron expression
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(exc),
+        ) from exc
     except Exception as exc:
         logger.exception("Failed to create report schedule")
         raise HTTPException(
@@ -346,6 +396,12 @@ async def update_schedule(
         return {"status": "success", "data": data}
     except HTTPException:
         raise
+    except ValueError as exc:
+        # Invalid cron expression
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(exc),
+        ) from exc
     except Exception as exc:
         logger.exception("Failed to update schedule %s", schedule_id)
         raise HTTPException(
@@ -366,8 +366,11 @@ async def checkout(
             payment_method=checkout_data.payment_method,
             notes=checkout_data.notes,
         )
+        # Commit so the stock reservation is visible to other checkouts
+        await db.commit()
         return OrderResponse.model_validate(order)
     except ValueError as e:
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e),
@@ -2,19 +2,20 @@
 Student Learning API Routes - Courses, Enrollments, Live Sessions, Assessments
 """
 from datetime import datetime, timedelta
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, and_, or_
 from typing import Dict, List, Optional
 from uuid import UUID
 from pydantic import BaseModel
 
-from app.database import get_db
+from app.database import get_db, read_only
 from app.models.user import User
 from app.models.assessment import Assessment, AssessmentSubmission
 from app.models.enrollment import Enrollment
 from app.models.course import Course
-from app.services.student.learning_service import LearningService
+from app.services.course_catalog import etag_matches
+from app.services.student.learning_service import LearningService, StudentNotFoundError
 from app.utils.security import get_current_user
 
 
@@ -105,15 +106,19 @@ async def get_ai_recommended_courses(
 
 
 @router.get("/browse")
+@read_only
 async def browse_courses(
+    response: Response,
     search: Optional[str] = None,
     subject: Optional[str] = None,
     sort_by: str = "popular",
     limit: int = 20,
     offset: int = 0,
+    cursor: Optional[str] = None,
+    if_none_match: Optional[str] = Header(None),
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
-) -> Dict:
+):
     """
     Browse course marketplace filtered to student's grade level.
 
@@ -123,9 +128,11 @@ async def browse_courses(
     - sort_by: Sort method (popular, rating, newest, price_low, price_high)
     - limit: Results per page (default: 20)
     - offset: Pagination offset (default: 0)
+    - cursor: next_cursor from the previous page (replaces offset)
 
     Grade is automatically applied from the student's profile.
     Teacher-only courses (Teacher's Guide, Diploma) are excluded.
+    Responses carry an ETag; a matching If-None-Match gets 304.
     """
     if current_user.role != "student":
         raise HTTPException(
@@ -154,20 +161,26 @@ async def browse_courses(
             subject=subject,
             sort_by=sort_by,
             limit=limit,
-            offset=offset
+            offset=offset,
+            cursor=cursor
         )
-        return result
+    except StudentNotFoundError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
     except ValueError as e:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=str(e)
-        )
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to browse courses: {str(e)}"
         )
 
+    etag = result.pop("etag")
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
+    return result
+
 
 @router.get("/course/{course_id}/preview")
 async def get_course_preview(
@@ -98,6 +98,7 @@ async def get_badges(
 async def get_leaderboard(
     scope: str = "class",
     limit: int = 10,
+    period: str = "all_time",
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ) -> List[Dict]:
@@ -107,6 +108,7 @@ async def get_leaderboard(
     Query params:
     - scope: "class" | "grade" | "school" (default: "class")
     - limit: Number of entries (default: 10)
+    - period: "all_time" | "weekly" | "monthly" (default: "all_time")
     """
     if current_user.role != "student":
         raise HTTPException(
@@ -126,13 +128,20 @@ async def get_leaderboard(
             detail="Invalid scope. Must be 'class', 'grade', or 'school'"
         )
 
+    if period not in ["all_time", "weekly", "monthly"]:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid period. Must be 'all_time', 'weekly', or 'monthly'"
+        )
+
     service = GamificationService(db)
 
     try:
         leaderboard = await service.get_leaderboard(
             student_id=current_user.student_id,
             scope=scope,
-            limit=limit
+            limit=limit,
+            period=period
         )
         return leaderboard
     except Exception as e:
@@ -142,6 +151,63 @@ async def get_leaderboard(
         )
 
 
+@router.get("/leaderboard/me")
+async def get_my_leaderboard_standing(
+    scope: str = "class",
+    limit: int = 10,
+    period: str = "all_time",
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+) -> Dict:
+    """
+    Get the leaderboard top together with the student's own rank and the
+    students just above and below them
+
+    Query params:
+    - scope: "class" | "grade" | "school" (default: "class")
+    - limit: Number of top entries (default: 10)
+    - period: "all_time" | "weekly" | "monthly" (default: "all_time")
+    """
+    if current_user.role != "student":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only students can access this endpoint"
+        )
+
+    if not current_user.student_id:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Student profile not found"
+        )
+
+    if scope not in ["class", "grade", "school"]:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid scope. Must be 'class', 'grade', or 'school'"
+        )
+
+    if period not in ["all_time", "weekly", "monthly"]:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid period. Must be 'all_time', 'weekly', or 'monthly'"
+        )
+
+    service = GamificationService(db)
+
+    try:
+        return await service.get_leaderboard_standing(
+            student_id=current_user.student_id,
+            scope=scope,
+            limit=limit,
+            period=period
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to fetch leaderboard standing: {str(e)}"
+        )
+
+
 @router.get("/goals")
 async def get_goals(
     current_user: User = Depends(get_current_user),
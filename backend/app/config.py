@@ -86,6 +86,42 @@ class Settings(BaseSettings):
         default=60000,
         description="PostgreSQL idle_in_transaction_session_timeout in milliseconds"
     )
+    database_background_pool_size: int = Field(
+        default=5,
+        description="Connections reserved per worker for scheduled and queued jobs (0 = share the request pool)"
+    )
+    database_background_max_overflow: int = Field(
+        default=5,
+        description="Burst connections per worker for scheduled and queued jobs"
+    )
+    database_websocket_pool_size: int = Field(
+        default=3,
+        description="Connections reserved per worker for WebSocket persistence (0 = share the request pool)"
+    )
+    database_websocket_max_overflow: int = Field(
+        default=2,
+        description="Burst connections per worker for WebSocket persistence"
+    )
+    database_slow_checkout_ms: int = Field(
+        default=500,
+        description="Log a warning, with the routes holding the pool, when a checkout waits this long"
+    )
+    database_replica_auto_reads: bool = Field(
+        default=False,
+        description="Send the reads of every GET/HEAD request to the read replica; off, routes opt in with @read_only"
+    )
+    database_replica_max_lag_seconds: float = Field(
+        default=2.0,
+        description="Reads go to the primary while measured replica lag exceeds this"
+    )
+    database_replica_lag_check_seconds: int = Field(
+        default=2,
+        description="Seconds between replica lag measurements (per worker)"
+    )
+    database_replica_write_window_seconds: int = Field(
+        default=60,
+        description="How long a user's last-write token is kept for read-your-writes routing"
+    )
 
     # Redis Configuration
     redis_url: str = Field(
@@ -96,6 +132,18 @@ class Settings(BaseSettings):
         default=300,
         description="Default Redis cache TTL in seconds"
     )
+    cache_local_max_entries: int = Field(
+        default=2048,
+        description="Entries kept in each worker's in-process cache tier"
+    )
+    cache_local_ttl: int = Field(
+        default=5,
+        description="Seconds a value may be served from the in-process tier (bounds cross-worker staleness)"
+    )
+    cache_lock_ttl_ms: int = Field(
+        default=5000,
+        description="Lifetime of the Redis single-flight lock while one worker recomputes a key"
+    )
     redis_session_ttl: int = Field(
         default=86400,
         description="Redis session TTL in seconds (24 hours)"
@@ -426,6 +474,10 @@ class Settings(BaseSettings):
         default=60,
         description="Rate limit time window in seconds"
     )
+    rate_limit_local_batch: int = Field(
+        default=10,
+        description="Max tokens a worker leases from Redis per sync (1 = check Redis on every request)"
+    )
 
     # Logging Configuration
     log_level: str = Field(
@@ -699,6 +751,245 @@ class Settings(BaseSettings):
         description="VAPID claims email"
     )
 
+    # Data Export Configuration
+    export_batch_size: int = Field(
+        default=2000,
+        description="Rows fetched per server-side cursor batch during CSV/Excel exports"
+    )
+    export_dir: Optional[str] = Field(
+        default=None,
+        description="File store for background export jobs (defaults to <upload_dir>/exports)"
+    )
+
+    # Staff Report Builder
+    report_widget_row_limit: int = Field(
+        default=5000,
+        description="Maximum aggregate rows a single report widget query may return"
+    )
+    report_cache_bucket_seconds: int = Field(
+        default=300,
+        description="Time bucket (and TTL) for cached report widget results"
+    )
+    report_schedule_concurrency: int = Field(
+        default=4,
+        description="Scheduled reports generated concurrently per scheduler run"
+    )
+
+    # Audit / Error Log Writer
+    log_writer_queue_size: int = Field(
+        default=10000,
+        description="Audit/error log rows buffered in memory before spilling to Redis"
+    )
+    log_writer_batch_size: int = Field(
+        default=200,
+        description="Maximum rows written per multi-row INSERT"
+    )
+    log_writer_flush_ms: int = Field(
+        default=500,
+        description="Maximum time a buffered log row waits before being flushed"
+    )
+
+    # Store Checkout
+    store_reservation_minutes: int = Field(
+        default=30,
+        description="Minutes a pending (unpaid) order holds its stock before it is released"
+    )
+    store_reservation_sweep_seconds: int = Field(
+        default=60,
+        description="Interval of the background sweep that releases expired reservations"
+    )
+    store_reservation_sweep_enabled: bool = Field(
+        default=True,
+        description=(
+            "Schedule the reservation sweep that cancels and restocks unpaid orders. "
+            "Completed gateway payments confirm their order first"
+        )
+    )
+
+    # Authorization Cache
+    authz_matrix_max_age: int = Field(
+        default=300,
+        description="Seconds before the compiled role/plan access matrix is rebuilt even without an invalidation"
+    )
+    authz_principal_ttl: int = Field(
+        default=60,
+        description="Seconds a user's permission overrides and active plan stay cached"
+    )
+
+    # Notification Fan-out
+    notification_fanout_batch_size: int = Field(
+        default=1000,
+        description="Recipients resolved and inserted per batch when sending bulk notifications"
+    )
+    push_concurrency: int = Field(
+        default=64,
+        description="Maximum Web Push requests in flight during a bulk send"
+    )
+    push_timeout_seconds: float = Field(
+        default=10.0,
+        description="Timeout for a single Web Push request"
+    )
+    push_ttl_seconds: int = Field(
+        default=3600,
+        description="How long push services keep a bulk notification for offline devices"
+    )
+
+    # Notification Inbox
+    notification_unread_ttl: int = Field(
+        default=86400,
+        description="Seconds a user's cached unread notification count lives in Redis"
+    )
+    notification_unread_reconcile_seconds: int = Field(
+        default=900,
+        description="Interval of the job that recounts cached unread counters from the database"
+    )
+
+    # Leaderboards
+    leaderboard_retention_days: int = Field(
+        default=7,
+        description="Days a weekly/monthly leaderboard bucket is kept after its window closes"
+    )
+    leaderboard_neighbours: int = Field(
+        default=2,
+        description="Entries shown above and below the caller when returning their own rank"
+    )
+
+    # Student XP Ledger
+    xp_ledger_queue_size: int = Field(
+        default=50000,
+        description="XP events buffered in memory before spilling to Redis"
+    )
+    xp_ledger_batch_size: int = Field(
+        default=500,
+        description="Maximum XP events applied to student levels per transaction"
+    )
+    xp_ledger_flush_ms: int = Field(
+        default=250,
+        description="Maximum time a buffered XP event waits before being applied"
+    )
+
+    # Support Chat
+    support_chat_ring_size: int = Field(
+        default=200,
+        description="Recent messages kept per ticket chat for replay after a reconnect"
+    )
+    support_chat_ring_ttl: int = Field(
+        default=604800,
+        description="Seconds an idle ticket chat's sequence counter and replay buffer are kept"
+    )
+
+    # Course Catalog
+    catalog_cache_ttl: int = Field(
+        default=300,
+        description="Seconds a cached course listing page is served before it is recomputed"
+    )
+    catalog_cache_stale_ttl: int = Field(
+        default=60,
+        description="Extra seconds an expired listing page is served while it is refreshed"
+    )
+
+    # Content Safety
+    content_safety_reload_seconds: int = Field(
+        default=600,
+        description="Maximum age of a worker's compiled keyword filters before they are reloaded"
+    )
+
+    # Scheduler
+    scheduler_enabled: bool = Field(
+        default=True,
+        description="Run periodic background jobs in this process"
+    )
+    scheduler_tick_seconds: float = Field(
+        default=1.0,
+        description="Seconds between scheduler checks for due jobs"
+    )
+    scheduler_lease_seconds: int = Field(
+        default=15,
+        description="Lifetime of the scheduler leader lease; a dead leader is replaced after this"
+    )
+    weekly_summary_shards: int = Field(
+        default=8,
+        description="Partitions of the weekly parent summary job, claimed by any worker"
+    )
+
+    # Job Queue
+    job_worker_concurrency: int = Field(
+        default=4,
+        description="Jobs a worker process (worker.py) runs at the same time"
+    )
+    job_visibility_timeout: int = Field(
+        default=120,
+        description="Seconds a claimed job may go without a heartbeat before another worker reclaims it"
+    )
+    job_result_ttl: int = Field(
+        default=86400,
+        description="Seconds job status, results and idempotency keys are kept"
+    )
+    job_retry_backoff_max: int = Field(
+        default=1800,
+        description="Upper bound in seconds of the exponential delay between job retries"
+    )
+
+    # Knowledge Base Embeddings
+    kb_embedding_backend: str = Field(
+        default="auto",
+        description="Embedding backend: openai, local (hashed, offline) or auto (openai when a key is set)"
+    )
+    kb_embedding_model: str = Field(
+        default="text-embedding-ada-002",
+        description="OpenAI embedding model for knowledge base chunks and queries"
+    )
+    kb_embedding_batch_size: int = Field(
+        default=64,
+        description="Chunks sent per embedding request"
+    )
+    kb_query_embedding_cache_size: int = Field(
+        default=1024,
+        description="Search query embeddings kept per worker (LRU)"
+    )
+    kb_hnsw_ef_search: int = Field(
+        default=40,
+        description="HNSW candidate list size for knowledge base vector search (recall vs. speed)"
+    )
+    kb_suggestion_budget_ms: int = Field(
+        default=100,
+        description="Time KB suggestions wait for slower rankers before answering with the others"
+    )
+
+    # CoPilot
+    copilot_context_ttl: int = Field(
+        default=300,
+        description="Seconds a user's rendered CoPilot system prompt is reused before its data is re-read"
+    )
+    session_counter_flush_seconds: int = Field(
+        default=60,
+        description="Interval for writing Redis AI session counters to student_session_logs"
+    )
+
+    # Earnings ledger
+    earnings_ledger_reconcile_seconds: int = Field(
+        default=3600,
+        description="Interval for checking materialised instructor balances and partner wallets against their raw rows"
+    )
+
+    # Payment webhook inbox
+    webhook_max_attempts: int = Field(
+        default=8,
+        description="Processing attempts for a stored gateway webhook before it is marked failed (replayable)"
+    )
+    webhook_lock_seconds: int = Field(
+        default=120,
+        description="Lease on a payment's webhook events while one worker processes them in order"
+    )
+    webhook_sweep_seconds: int = Field(
+        default=60,
+        description="Interval for re-queueing stalled webhook events and refreshing inbox backlog metrics"
+    )
+    webhook_stale_seconds: int = Field(
+        default=300,
+        description="Age after which an unprocessed webhook event is re-queued by the sweep"
+    )
+
 
 # Create global settings instance
 settings = Settings()
@@ -3,21 +3,68 @@ Database connection and session management.
 
 This module provides SQLAlchemy 2.0 async engine configuration,
 session management, and database utilities for the application.
+
+Connections to the primary are split by workload class, each with its
+own pool, so one class cannot take the connections another needs:
+
+- ``interactive``: HTTP requests (get_db); ``database_pool_size``
+- ``background``: scheduled and queued jobs and the batched log
+  writers; ``database_background_pool_size``
+- ``websocket``: persistence from WebSocket handlers (document state,
+  chat messages); ``database_websocket_pool_size``
+
+AsyncSessionLocal is still the one session factory: a session connects
+through the pool of the workload active when it is created (see
+use_workload()). Every pool, the read replica's included, records its
+checkout wait, connection hold time per route and checkout timeouts in
+Prometheus, and a slow checkout logs the routes holding the pool.
+
+When DATABASE_READ_URL is set, sessions that read send plain SELECTs to
+the replica statement by statement:
+
+- Reads are sessions of routes and service methods marked ``@read_only``
+  and of get_read_db() / AsyncReadSessionLocal. ``@read_primary`` opts a
+  route or method out. Unmarked GET/HEAD requests read from the primary,
+  since many of them get-or-create rows, unless
+  ``database_replica_auto_reads`` is on.
+- Flushes, DML, locking SELECTs and every statement after the session's
+  first write go to the primary.
+- Each commit that wrote records a last-write token for the user (Redis,
+  ``db:last_write:<user>``). Until the replica has replayed past it, that
+  user's reads stay on the primary (read-your-writes).
+- Each worker measures replica lag every
+  ``database_replica_lag_check_seconds``. Above
+  ``database_replica_max_lag_seconds``, or without a recent sample,
+  reads go to the primary.
+
+Work that must only happen once a transaction is durable (cache
+invalidation, counters, queued jobs) registers with on_commit() from a
+session hook rather than listening for commit and rollback itself.
 """
 
-from typing import AsyncGenerator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, AsyncGenerator, Awaitable, Callable, Dict, Iterator, Optional, Set, Tuple, TypeVar
+import asyncio
+import functools
+import inspect
 import logging
+import time
 
+from starlette.requests import HTTPConnection
 from sqlalchemy.ext.asyncio import (
     AsyncSession,
     AsyncEngine,
     create_async_engine,
     async_sessionmaker,
 )
-from sqlalchemy.orm import declarative_base
-from sqlalchemy.exc import SQLAlchemyError
-from sqlalchemy.pool import NullPool
-from sqlalchemy import text
+from sqlalchemy.orm import Session, declarative_base
+from sqlalchemy.exc import SQLAlchemyError, TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool
+from sqlalchemy.sql.dml import UpdateBase
+from sqlalchemy.sql.elements import TextClause
+from sqlalchemy.sql.selectable import Select
+from sqlalchemy import event, text
 
 from app.config import settings
 
@@ -35,6 +82,455 @@ AsyncSessionLocal: async_sessionmaker[AsyncSession] = None  # type: ignore
 read_engine: AsyncEngine = None  # type: ignore
 AsyncReadSessionLocal: async_sessionmaker[AsyncSession] = None  # type: ignore
 
+# Workload classes; ``engine`` is the interactive pool
+INTERACTIVE = "interactive"
+BACKGROUND = "background"
+WEBSOCKET = "websocket"
+
+# Primary pools of the other classes (``engine`` itself when sized 0)
+background_engine: AsyncEngine = None  # type: ignore
+websocket_engine: AsyncEngine = None  # type: ignore
+
+# Pool each workload's sessions connect through, filled by init_db()
+_workload_engines: Dict[str, AsyncEngine] = {}
+
+# Workload and route of the running code: new sessions take the
+# workload's pool, connection checkouts are attributed to the route
+_workload: ContextVar[str] = ContextVar("db_workload", default=INTERACTIVE)
+_route: ContextVar[str] = ContextVar("db_route", default="-")
+
+# Connections checked out per pool: id(connection record) -> (since, route)
+_holders: Dict[str, Dict[int, Tuple[float, str]]] = {}
+
+# Replica preference forced by @read_only (True) / @read_primary (False);
+# None leaves it to the session
+_prefer_replica: ContextVar[Optional[bool]] = ContextVar("db_prefer_replica", default=None)
+
+# Latest replica lag sample (None = unreachable or not measured yet)
+_replica_lag: Optional[float] = None
+_replica_checked_at: float = 0.0
+
+# Last write per user seen by this worker; Redis shares them between workers
+_WRITE_KEY = "db:last_write:"
+_local_writes: Dict[str, float] = {}
+
+# Lag of a standby; 0 when it has replayed everything it received (an
+# idle primary looks lagged by its replay timestamp alone) or is no standby
+_REPLICA_LAG_SQL = """
+SELECT CASE
+    WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+    ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+END
+"""
+
+# Tasks started by on_commit() callbacks, kept referenced until done
+_ON_COMMIT = "on_commit"
+_commit_tasks: Set[asyncio.Task] = set()
+
+F = TypeVar("F", bound=Callable[..., Awaitable[Any]])
+
+
+@contextmanager
+def use_workload(workload: str, route: Optional[str] = None) -> Iterator[None]:
+    """
+    Run a block as ``workload``.
+
+    Sessions created inside the block use that class's pool, and their
+    checkouts are attributed to ``route`` in the pool metrics and slow
+    checkout logs.
+
+    Example:
+        with use_workload(BACKGROUND, "job:weekly_summaries"):
+            async with AsyncSessionLocal() as db:
+                ...
+    """
+    workload_token = _workload.set(workload)
+    route_token = _route.set(route) if route else None
+    try:
+        yield
+    finally:
+        if route_token is not None:
+            _route.reset(route_token)
+        _workload.reset(workload_token)
+
+
+def _mark_reads(func: F, prefer: bool) -> F:
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        token = _prefer_replica.set(prefer)
+        try:
+            return await func(*args, **kwargs)
+        finally:
+            _prefer_replica.reset(token)
+
+    # Read by get_db(), so the route's dependencies follow the mark too
+    wrapper.__db_reads__ = prefer
+    try:
+        # FastAPI resolves string annotations in the wrapper's module
+        wrapper.__signature__ = inspect.signature(func, eval_str=True)
+    except NameError:
+        pass
+    return wrapper  # type: ignore[return-value]
+
+
+def read_only(func: F) -> F:
+    """
+    Mark an async route or service method as a reader: its plain SELECTs
+    go to the read replica while the replica is fresh enough. Writes
+    still go to the primary.
+    """
+    return _mark_reads(func, True)
+
+
+def read_primary(func: F) -> F:
+    """
+    Keep the reads of an async route or service method on the primary,
+    e.g. a GET that must see what other users or jobs just wrote.
+    """
+    return _mark_reads(func, False)
+
+
+def _statement_kind(clause) -> Optional[str]:
+    """``read``, ``lock`` (SELECT ... FOR UPDATE), ``write``, or None if unknown."""
+    if isinstance(clause, Select):
+        return "read" if clause._for_update_arg is None else "lock"
+    if isinstance(clause, UpdateBase):
+        return "write"
+    if isinstance(clause, TextClause):
+        sql = clause.text.lstrip().lower()
+        if sql.startswith("select") and " for " not in sql:
+            return "read"
+        return "write"
+    return None
+
+
+def _record_route(target: str, reason: str) -> None:
+    try:
+        from app.metrics import db_routed_queries_total
+
+        db_routed_queries_total.labels(target=target, reason=reason).inc()
+    except Exception:
+        pass
+
+
+def _replica_block(written_at: Optional[float]) -> Optional[str]:
+    """Why a read cannot use the replica right now, or None if it can."""
+    if _replica_lag is None or time.time() - _replica_checked_at > 3 * settings.database_replica_lag_check_seconds:
+        return "no_lag_sample"
+    if _replica_lag > settings.database_replica_max_lag_seconds:
+        return "lag"
+    # The replica had replayed everything committed before this point
+    if written_at is not None and written_at > _replica_checked_at - _replica_lag:
+        return "recent_write"
+    return None
+
+
+def on_commit(session: Any, key: str, callback: Callable[[Any], Any]) -> None:
+    """
+    Call ``callback(session.info[key])`` once the session's transaction
+    commits.
+
+    ``session.info[key]`` is where the caller collects what the transaction
+    changed (cache tags, counter deltas, jobs). It is cleared on commit and
+    on rollback, and a rollback drops the callback. The callback is skipped
+    when nothing was collected. A coroutine it returns runs as a task
+    (only with a running event loop). Registering ``key`` again in the same
+    transaction keeps the first callback. ``session`` may be sync or async.
+
+    Example:
+        session.info.setdefault("catalog_tags", set()).add(tag)
+        on_commit(session, "catalog_tags", lambda tags: invalidate_tags(*tags))
+    """
+    session.info.setdefault(_ON_COMMIT, {}).setdefault(key, callback)
+
+
+@event.listens_for(Session, "after_commit")
+def _run_commit_callbacks(session: Session) -> None:
+    callbacks = session.info.pop(_ON_COMMIT, None)
+    if not callbacks:
+        return
+    for key, callback in callbacks.items():
+        collected = session.info.pop(key, None)
+        if not collected:
+            continue
+        result = callback(collected)
+        if not inspect.isawaitable(result):
+            continue
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # Sync scripts: nothing in this process to notify
+            result.close()
+            continue
+        task = loop.create_task(result)
+        _commit_tasks.add(task)
+        task.add_done_callback(_commit_tasks.discard)
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_commit_callbacks(session: Session) -> None:
+    for key in session.info.pop(_ON_COMMIT, None) or ():
+        session.info.pop(key, None)
+
+
+class RoutingSession(Session):
+    """
+    Session that connects through the primary pool of its workload class,
+    sending reads to the replica when the session reads (see module docs).
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.info.setdefault("workload", _workload.get())
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if engine is not None and self.bind is engine.sync_engine:
+            kind = _statement_kind(clause)
+            if kind == "write":
+                self._note_write()
+            elif kind == "lock":
+                self.info["wrote"] = True
+            elif kind == "read" and self._reads_replica():
+                return read_engine.sync_engine
+            routed = _workload_engines.get(self.info["workload"])
+            if routed is not None:
+                return routed.sync_engine
+        return super().get_bind(mapper=mapper, clause=clause, **kw)
+
+    def _note_write(self) -> None:
+        """Keep this session on the primary; record the user's write on commit."""
+        self.info["wrote"] = True
+        user_id = self.info.get("user_id")
+        if user_id:
+            self.info["uncommitted_write"] = True
+            on_commit(self, "uncommitted_write", lambda _: _remember_write(user_id, time.time()))
+
+    def _reads_replica(self) -> bool:
+        if read_engine is None or read_engine is engine:
+            return False
+        prefer = _prefer_replica.get()
+        if not (self.info.get("reads") if prefer is None else prefer):
+            return False
+        if self._flushing or self.info.get("wrote"):
+            return False
+
+        written_at = self.info.get("written_at")
+        user_id = self.info.get("user_id")
+        if user_id in _local_writes:
+            written_at = max(written_at or 0.0, _local_writes[user_id])
+        blocked = _replica_block(written_at)
+        _record_route("primary" if blocked else "replica", blocked or "read")
+        return blocked is None
+
+
+@event.listens_for(RoutingSession, "after_flush")
+def _after_flush(session, flush_context) -> None:
+    session._note_write()
+
+
+def _remember_write(user_id: str, written_at: float) -> None:
+    """Record a user's last write here at once and in Redis shortly after."""
+    window = settings.database_replica_write_window_seconds
+    if len(_local_writes) > 10_000:
+        for stale in [u for u, at in _local_writes.items() if at < written_at - window]:
+            del _local_writes[stale]
+    _local_writes[user_id] = written_at
+
+    if read_engine is None or read_engine is engine:
+        return
+    try:
+        from app.redis import get_redis
+
+        redis = get_redis()
+        asyncio.get_running_loop().create_task(
+            redis.set(f"{_WRITE_KEY}{user_id}", repr(written_at), ex=window)
+        )
+    except Exception:
+        # No Redis or no running loop: the local token still covers this worker
+        pass
+
+
+async def _last_write(user_id: str) -> Optional[float]:
+    """A user's last write across workers, or None."""
+    written_at = _local_writes.get(user_id)
+    try:
+        from app.redis import get_redis
+
+        value = await get_redis().get(f"{_WRITE_KEY}{user_id}")
+        if value:
+            written_at = max(written_at or 0.0, float(value))
+    except Exception:
+        pass
+    return written_at
+
+
+async def check_replica_lag() -> Optional[float]:
+    """
+    Measure the read replica's lag in seconds and export it.
+
+    Returns None (reads then stay on the primary) when no replica is
+    configured or it cannot be reached.
+    """
+    global _replica_lag, _replica_checked_at
+
+    if read_engine is None or read_engine is engine:
+        return None
+    try:
+        async with read_engine.connect() as conn:
+            lag = (await conn.execute(text(_REPLICA_LAG_SQL))).scalar()
+        _replica_lag = float(lag or 0.0)
+    except Exception as e:
+        if _replica_lag is not None:
+            logger.warning(f"Read replica unreachable, routing reads to the primary: {e}")
+        _replica_lag = None
+    _replica_checked_at = time.time()
+
+    try:
+        from app.metrics import db_replica_lag
+
+        db_replica_lag.set(_replica_lag if _replica_lag is not None else -1)
+    except Exception:
+        pass
+    return _replica_lag
+
+
+def _record_checkout(pool: str, waited: float, timed_out: bool) -> None:
+    try:
+        from app.metrics import db_pool_checkout_wait, db_pool_timeouts_total
+
+        db_pool_checkout_wait.labels(pool=pool).observe(waited)
+        if timed_out:
+            db_pool_timeouts_total.labels(pool=pool).inc()
+    except Exception:
+        pass
+
+
+def _record_hold(pool: str, route: str, held: float) -> None:
+    try:
+        from app.metrics import db_connection_hold
+
+        db_connection_hold.labels(pool=pool, route=route).observe(held)
+    except Exception:
+        pass
+
+
+def _log_slow_checkout(pool: str, waited: float, timed_out: bool) -> None:
+    """Warn about a slow checkout, naming the routes that hold the pool."""
+    now = time.perf_counter()
+    held: Dict[str, Tuple[int, float]] = {}
+    for since, route in list(_holders.get(pool, {}).values()):
+        count, longest = held.get(route, (0, 0.0))
+        held[route] = (count + 1, max(longest, now - since))
+    top = sorted(held.items(), key=lambda item: item[1][1], reverse=True)[:5]
+    holding = ", ".join(
+        f"{route} x{count} (longest {longest:.1f}s)" for route, (count, longest) in top
+    ) or "nothing"
+    logger.warning(
+        f"{'Timed out' if timed_out else 'Slow'} DB checkout from the {pool} pool "
+        f"for {_route.get()} after {waited * 1000:.0f} ms; held by {holding}"
+    )
+
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """
+    Queue pool that times every checkout.
+
+    The pool is named by the engine's ``pool_logging_name``; the name
+    labels the wait (which includes opening a new connection) and timeout
+    metrics.
+    """
+
+    def _do_get(self):
+        start = time.perf_counter()
+        timed_out = False
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            timed_out = True
+            raise
+        finally:
+            waited = time.perf_counter() - start
+            name = self._orig_logging_name or INTERACTIVE
+            _record_checkout(name, waited, timed_out)
+            if timed_out or waited * 1000 >= settings.database_slow_checkout_ms:
+                _log_slow_checkout(name, waited, timed_out)
+
+
+def _watch_pool(async_engine: AsyncEngine, name: str) -> None:
+    """Track which route holds each connection of the pool, and for how long."""
+    holders = _holders.setdefault(name, {})
+
+    @event.listens_for(async_engine.sync_engine, "checkout")
+    def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+        holders[id(connection_record)] = (time.perf_counter(), _route.get())
+
+    @event.listens_for(async_engine.sync_engine, "checkin")
+    def _on_checkin(dbapi_connection, connection_record):
+        checked_out = holders.pop(id(connection_record), None)
+        if checked_out is not None:
+            since, route = checked_out
+            _record_hold(name, route, time.perf_counter() - since)
+
+
+def _create_engine(
+    url: str,
+    name: str,
+    pool_size: int,
+    max_overflow: int,
+    connect_args: dict,
+) -> AsyncEngine:
+    """Create an engine whose pool (``name``) is instrumented."""
+    async_engine = create_async_engine(
+        url,
+        echo=settings.database_echo,  # Use dedicated setting, not debug flag
+        poolclass=InstrumentedPool,
+        pool_logging_name=name,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_timeout=settings.database_pool_timeout,  # Default: 10s fail-fast
+        pool_pre_ping=True,  # Verify connections before using
+        pool_recycle=settings.database_pool_recycle,  # Default: 1800s
+        connect_args=connect_args,
+    )
+    _watch_pool(async_engine, name)
+    return async_engine
+
+
+def pool_engines() -> Dict[str, AsyncEngine]:
+    """Initialised engines by pool name, each distinct pool once."""
+    candidates = {
+        INTERACTIVE: engine,
+        BACKGROUND: background_engine,
+        WEBSOCKET: websocket_engine,
+        "read": read_engine,
+    }
+    engines: Dict[str, AsyncEngine] = {}
+    for name, candidate in candidates.items():
+        if candidate is not None and all(candidate is not seen for seen in engines.values()):
+            engines[name] = candidate
+    return engines
+
+
+def _register_vector_codec(async_engine: AsyncEngine) -> None:
+    """
+    Exchange pgvector values with asyncpg in binary form.
+
+    Vectors are bound as Python lists / arrays instead of being formatted
+    into '[...]' strings and cast. Skipped where pgvector is unavailable.
+    """
+    try:
+        from pgvector.asyncpg import register_vector
+    except ImportError:
+        return
+
+    @event.listens_for(async_engine.sync_engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        try:
+            dbapi_connection.run_async(register_vector)
+        except ValueError:
+            # The vector extension is not installed in this database
+            pass
+
 
 def get_database_url() -> str:
     """
@@ -67,37 +563,62 @@ async def init_db() -> None:
     Raises:
         SQLAlchemyError: If database connection fails
     """
-    global engine, AsyncSessionLocal
+    global engine, AsyncSessionLocal, background_engine, websocket_engine
 
     try:
         db_url = get_database_url()
 
         logger.info("Initializing database connection...")
 
+        connect_args = {
+            "server_settings": {
+                "statement_timeout": str(settings.database_statement_timeout),
+                "idle_in_transaction_session_timeout": str(
+                    settings.database_idle_in_transaction_timeout
+                ),
+            }
+        }
+
         # Create async engine with production-grade connection pooling
         # CRITICAL FIX (H-04): Use config values instead of hardcoded pool settings
-        engine = create_async_engine(
+        engine = _create_engine(
             db_url,
-            echo=settings.database_echo,  # Use dedicated setting, not debug flag
+            INTERACTIVE,
             pool_size=settings.database_pool_size,  # Default: 20 per worker
             max_overflow=settings.database_max_overflow,  # Default: 30 burst capacity
-            pool_timeout=settings.database_pool_timeout,  # Default: 10s fail-fast
-            pool_pre_ping=True,  # Verify connections before using
-            pool_recycle=settings.database_pool_recycle,  # Default: 1800s
-            connect_args={
-                "server_settings": {
-                    "statement_timeout": str(settings.database_statement_timeout),
-                    "idle_in_transaction_session_timeout": str(
-                        settings.database_idle_in_transaction_timeout
-                    ),
-                }
-            },
+            connect_args=connect_args,
+        )
+        _register_vector_codec(engine)
+
+        # Separate pools for jobs and WebSocket persistence (0 = share)
+        def workload_engine(name: str, pool_size: int, max_overflow: int) -> AsyncEngine:
+            if pool_size <= 0:
+                return engine
+            workload = _create_engine(db_url, name, pool_size, max_overflow, connect_args)
+            _register_vector_codec(workload)
+            return workload
+
+        background_engine = workload_engine(
+            BACKGROUND,
+            settings.database_background_pool_size,
+            settings.database_background_max_overflow,
         )
+        websocket_engine = workload_engine(
+            WEBSOCKET,
+            settings.database_websocket_pool_size,
+            settings.database_websocket_max_overflow,
+        )
+        _workload_engines.update({
+            INTERACTIVE: engine,
+            BACKGROUND: background_engine,
+            WEBSOCKET: websocket_engine,
+        })
 
-        # Create async session maker
+        # Create async session maker; sessions pick their workload's pool
         AsyncSessionLocal = async_sessionmaker(
             engine,
             class_=AsyncSession,
+            sync_session_class=RoutingSession,
             expire_on_commit=False,  # Don't expire objects after commit
             autocommit=False,
             autoflush=False,
@@ -135,14 +656,11 @@ async def _init_read_engine() -> None:
         if read_url.startswith("postgresql://"):
             read_url = read_url.replace("postgresql://", "postgresql+asyncpg://", 1)
 
-        read_engine = create_async_engine(
+        read_engine = _create_engine(
             read_url,
-            echo=settings.database_echo,
+            "read",
             pool_size=settings.database_pool_size,
             max_overflow=settings.database_max_overflow,
-            pool_timeout=settings.database_pool_timeout,
-            pool_pre_ping=True,
-            pool_recycle=settings.database_pool_recycle,
             connect_args={
                 "server_settings": {
                     "statement_timeout": str(settings.database_statement_timeout),
@@ -150,18 +668,23 @@ async def _init_read_engine() -> None:
                 }
             },
         )
+        _register_vector_codec(read_engine)
 
+        # Reading sessions: SELECTs go to the replica while it is fresh
         AsyncReadSessionLocal = async_sessionmaker(
-            read_engine,
+            engine,
             class_=AsyncSession,
+            sync_session_class=RoutingSession,
             expire_on_commit=False,
             autocommit=False,
             autoflush=False,
+            info={"reads": True},
         )
 
         async with read_engine.begin() as conn:
             await conn.execute(text("SELECT 1"))
         logger.info("Read replica engine initialized successfully")
+        await check_replica_lag()
     else:
         # No replica configured — reuse write engine for reads
         read_engine = engine
@@ -169,13 +692,37 @@ async def _init_read_engine() -> None:
         logger.info("No read replica configured; reads use the primary engine")
 
 
-async def get_read_db() -> AsyncGenerator[AsyncSession, None]:
+async def _request_info(connection: HTTPConnection) -> Dict[str, Any]:
+    """
+    Session info for a request: its workload, whether it reads from the
+    replica, and the user's last write. Also attributes the request's
+    connection checkouts to its route template.
+    """
+    route = connection.scope.get("route")
+    _route.set(getattr(route, "path", None) or "-")
+
+    reads = getattr(getattr(route, "endpoint", None), "__db_reads__", None)
+    if reads is None:
+        reads = settings.database_replica_auto_reads and connection.scope.get("method") in ("GET", "HEAD")
+    user_id = connection.scope.get("state", {}).get("user_id")
+    info = {
+        "workload": WEBSOCKET if connection.scope["type"] == "websocket" else INTERACTIVE,
+        "reads": reads,
+        "user_id": user_id,
+    }
+    if user_id and read_engine is not None and read_engine is not engine:
+        info["written_at"] = await _last_write(user_id)
+    return info
+
+
+async def get_read_db(connection: HTTPConnection) -> AsyncGenerator[AsyncSession, None]:
     """
     Dependency for read-only database sessions.
 
     Routes to the read replica when configured, otherwise falls back to the
     primary engine.  Use this for dashboard queries, catalog listings, and
-    other read-heavy endpoints to offload the primary.
+    other read-heavy endpoints to offload the primary. Routes marked
+    ``@read_only`` read from the replica through get_db() as well.
 
     Example:
         @router.get("/courses")
@@ -187,7 +734,9 @@ async def get_read_db() -> AsyncGenerator[AsyncSession, None]:
             "Database not initialized. Call init_db() during startup."
         )
 
-    async with AsyncReadSessionLocal() as session:
+    info = await _request_info(connection)
+    info["reads"] = True
+    async with AsyncReadSessionLocal(info=info) as session:
         try:
             yield session
         except SQLAlchemyError as e:
@@ -204,13 +753,21 @@ async def close_db() -> None:
 
     This should be called during application shutdown.
     """
-    global engine, read_engine
+    global engine, read_engine, background_engine, websocket_engine, _replica_lag
 
     # Close read replica first (if it's a separate engine)
     if read_engine and read_engine is not engine:
         logger.info("Closing read replica connection...")
         await read_engine.dispose()
-        read_engine = None
+    read_engine = None
+    _replica_lag = None
+
+    # Then the job and WebSocket pools (if separate)
+    for workload in (background_engine, websocket_engine):
+        if workload and workload is not engine:
+            await workload.dispose()
+    background_engine = websocket_engine = None
+    _workload_engines.clear()
 
     if engine:
         logger.info("Closing database connection...")
@@ -219,13 +776,15 @@ async def close_db() -> None:
         engine = None
 
 
-async def get_db() -> AsyncGenerator[AsyncSession, None]:
+async def get_db(connection: HTTPConnection) -> AsyncGenerator[AsyncSession, None]:
     """
     Dependency function to get database session.
 
     This is used as a FastAPI dependency to inject database sessions
     into route handlers. The session is automatically closed after the
-    request is complete.
+    request is complete. HTTP routes use the interactive pool, WebSocket
+    routes the WebSocket pool; the reads of GET routes and ``@read_only``
+    routes go to the read replica when one is configured and fresh.
 
     CRITICAL FIX (M-01): Removed auto-commit logic. Route handlers must
     explicitly call await db.commit() when they intend to persist changes.
@@ -247,7 +806,7 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
             "Database not initialized. Call init_db() during startup."
         )
 
-    async with AsyncSessionLocal() as session:
+    async with AsyncSessionLocal(info=await _request_info(connection)) as session:
         try:
             yield session
             # REMOVED (M-01): Auto-commit logic removed for safety
@@ -264,6 +823,24 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
             await session.close()
 
 
+async def release_db(db: AsyncSession) -> None:
+    """
+    Return a session's connection to the pool before a long wait.
+
+    A request session holds its connection from its first statement (the
+    auth lookup) until it is closed, so an endpoint waiting 2-30 s on an
+    AI provider would keep a pooled connection idle in a transaction for
+    all of it. Call this at the end of the read phase, before the slow
+    call: the transaction is committed, loaded objects stay usable
+    (sessions don't expire on commit) and the next statement checks a
+    connection out again for the write phase.
+
+    Anything the session wrote so far is committed with it.
+    """
+    if db.in_transaction():
+        await db.commit()
+
+
 async def check_db_connection() -> bool:
     """
     Check if database connection is healthy.
@@ -22,10 +22,14 @@ async def lifespan(app: FastAPI) -> AsyncGenerator:
     Startup tasks:
     - Initialize database connection
     - Check database connectivity
-    - Start SLA background monitor
+    - Start batched audit/error log writers
+    - Start the write-behind XP ledger
+    - Start the periodic job scheduler
+    - Relay background job status to WebSocket clients
 
     Shutdown tasks:
     - Stop background tasks
+    - Drain audit/error log writers
     - Close database connections
     """
     # Startup
@@ -55,41 +59,49 @@ async def lifespan(app: FastAPI) -> AsyncGenerator:
         await init_redis()
         logger.info("Redis connection: HEALTHY")
 
+        # Start batched audit/error log writers (need DB + Redis)
+        from app.utils.log_writer import start_log_writers
+        start_log_writers()
+
+        # Start the write-behind XP ledger (applies XP events in batches)
+        from app.services.student.xp_ledger import xp_ledger
+        xp_ledger.start()
+
+        # Start the batched support chat message writer
+        from app.websocket.live_chat_handler import chat_message_writer
+        chat_message_writer.start()
+
+        # Drop compiled permission/plan data when another worker changes it
+        from app.utils.access_matrix import start_access_listener
+        start_access_listener()
+
+        # Compile keyword filters, follow changes and batch moderation items
+        from app.services.content_safety import moderation_queue_writer, start_safety_listener
+        moderation_queue_writer.start()
+        start_safety_listener()
+
+        # Push background job status changes to connected owners
+        from app.utils.job_queue import start_job_status_listener
+        start_job_status_listener()
+
         logger.info("-" * 70)
         logger.info("Application startup complete")
         logger.info("=" * 70)
 
-        # Start SLA background monitor
-        async def sla_monitor_loop():
-            """Periodically check for SLA breaches every 60 seconds."""
-            from app.database import AsyncSessionLocal
-            from app.services.staff.sla_engine import check_sla_breaches
-            while True:
-                try:
-                    await asyncio.sleep(60)
-                    if AsyncSessionLocal is not None:
-                        async with AsyncSessionLocal() as db:
-                            result = await check_sla_breaches(db)
-                            if result.get("breaches_detected", 0) > 0:
-                                logger.info(
-                                    f"SLA monitor: {result['breaches_detected']} breaches detected, "
-                                    f"{result.get('escalations_triggered', 0)} escalations triggered"
-                                )
-                except asyncio.CancelledError:
-                    break
-                except Exception as e:
-                    logger.error(f"SLA monitor error: {str(e)}")
-                    await asyncio.sleep(10)
-
-        sla_task = asyncio.create_task(sla_monitor_loop())
-        logger.info("SLA background monitor started (60s interval)")
+        # Start the periodic job scheduler (SLA checks, reservation sweeps,
+        # counter reconciliation, reports, summaries, leaderboard recovery)
+        from app.utils.scheduler import scheduler
+        if settings.scheduler_enabled:
+            from app.services import scheduled_jobs  # noqa: F401  (registers the jobs)
+            scheduler.start()
+            logger.info(f"Scheduler started ({len(scheduler.jobs)} jobs)")
 
         # Start DB pool metrics collector (for Prometheus)
         pool_metrics_task = None
         if settings.enable_metrics:
             async def pool_metrics_loop():
                 """Collect DB connection pool stats every 10 seconds."""
-                from app.database import engine as db_engine
+                from app.database import pool_engines
                 from app.metrics import (
                     db_pool_size, db_pool_checked_in,
                     db_pool_checked_out, db_pool_overflow,
@@ -97,12 +109,14 @@ async def lifespan(app: FastAPI) -> AsyncGenerator:
                 while True:
                     try:
                         await asyncio.sleep(10)
-                        if db_engine and hasattr(db_engine, 'pool'):
+                        for name, db_engine in pool_engines().items():
                             pool = db_engine.pool
-                            db_pool_size.set(pool.size())
-                            db_pool_checked_in.set(pool.checkedin())
-                            db_pool_checked_out.set(pool.checkedout())
-                            db_pool_overflow.set(pool.overflow())
+                            if not hasattr(pool, 'checkedin'):
+                                continue
+                            db_pool_size.labels(pool=name).set(pool.size())
+                            db_pool_checked_in.labels(pool=name).set(pool.checkedin())
+                            db_pool_checked_out.labels(pool=name).set(pool.checkedout())
+                            db_pool_overflow.labels(pool=name).set(pool.overflow())
                     except asyncio.CancelledError:
                         break
                     except Exception as e:
@@ -119,12 +133,8 @@ async def lifespan(app: FastAPI) -> AsyncGenerator:
     yield
 
     # Shutdown
-    sla_task.cancel()
-    try:
-        await sla_task
-    except asyncio.CancelledError:
-        pass
-    logger.info("SLA background monitor stopped")
+    await scheduler.stop()
+    logger.info("Scheduler stopped")
 
     if pool_metrics_task:
         pool_metrics_task.cancel()
@@ -133,11 +143,42 @@ async def lifespan(app: FastAPI) -> AsyncGenerator:
         except asyncio.CancelledError:
             pass
         logger.info("DB pool metrics collector stopped")
+
+    # Fail any in-flight background exports so pollers stop waiting
+    from app.utils.export import cancel_export_jobs
+    await cancel_export_jobs()
+
+    # Stop relaying job status; jobs running in-process (no Redis) are
+    # marked queued again rather than left "running"
+    from app.utils.job_queue import cancel_local_jobs, stop_job_status_listener
+    await stop_job_status_listener()
+    await cancel_local_jobs()
+
     logger.info("=" * 70)
     logger.info("Shutting down application...")
     logger.info("-" * 70)
 
     try:
+        # Flush queued audit/error log rows while DB and Redis are still open
+        from app.utils.log_writer import stop_log_writers
+        await stop_log_writers()
+
+        # Apply queued XP events
+        from app.services.student.xp_ledger import xp_ledger
+        await xp_ledger.stop()
+
+        # Persist buffered support chat messages
+        from app.websocket.live_chat_handler import chat_message_writer
+        await chat_message_writer.stop()
+
+        from app.utils.access_matrix import stop_access_listener
+        await stop_access_listener()
+
+        # Write queued moderation items
+        from app.services.content_safety import moderation_queue_writer, stop_safety_listener
+        await stop_safety_listener()
+        await moderation_queue_writer.stop()
+
         # Close Redis connection
         await close_redis()
         logger.info("Redis connection closed")
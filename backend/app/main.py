@@ -95,15 +95,11 @@ app = FastAPI(
 
 # ── Middleware (order matters: last added = first executed) ──────────
 
-from app.middleware.security_headers import SecurityHeadersMiddleware
-from app.middleware.cookie_auth import CookieAuthMiddleware
-from app.middleware.csrf import CSRFMiddleware
-from app.middleware.rate_limit import RateLimitMiddleware
+# Security headers, cookie auth, CSRF, rate limiting, error logging and
+# audit logging run as one pure-ASGI pass (see middleware/pipeline.py).
+from app.middleware.pipeline import RequestPipelineMiddleware
 
-app.add_middleware(SecurityHeadersMiddleware)
-app.add_middleware(CookieAuthMiddleware)
-app.add_middleware(CSRFMiddleware)
-app.add_middleware(RateLimitMiddleware)
+app.add_middleware(RequestPipelineMiddleware)
 
 app.add_middleware(
     CORSMiddleware,
@@ -114,12 +110,6 @@ app.add_middleware(
     expose_headers=["Content-Range", "X-Total-Count"],
 )
 
-from app.middleware.error_logging_middleware import ErrorLoggingMiddleware
-app.add_middleware(ErrorLoggingMiddleware)
-
-from app.middleware.audit_middleware import AuditMiddleware
-app.add_middleware(AuditMiddleware)
-
 # ── Exception handlers ──────────────────────────────────────────────
 
 from app.exception_handlers import (
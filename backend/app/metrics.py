@@ -3,10 +3,18 @@ Prometheus metrics configuration.
 
 Exposes /metrics endpoint with:
 - Standard HTTP request metrics (duration, status codes) via instrumentator
-- Custom DB connection pool gauges
+- DB connection pool gauges, checkout wait, connection hold time per
+  route and checkout timeouts, per pool (workload class or read replica)
+- Read replica lag and where routed reads went (and why)
 - AI provider request counters and duration histograms
 - Cache hit/miss counters
 - Rate limit rejection counter
+- Web Push delivery counter
+- Scheduled job runs, run time, start lag and scheduler leadership
+- Queued job outcomes and run time
+- Knowledge base chunk embeddings, query embedding cache hits and
+  retrieval latency per ranker
+- Payment webhook inbox outcomes, processing lag and backlog
 
 Gated by settings.enable_metrics (default: False).
 """
@@ -20,18 +28,48 @@ logger = logging.getLogger(__name__)
 db_pool_size = Gauge(
     "db_pool_size_total",
     "Configured DB connection pool size",
+    labelnames=["pool"],
 )
 db_pool_checked_in = Gauge(
     "db_pool_checked_in",
     "DB connections currently available in the pool",
+    labelnames=["pool"],
 )
 db_pool_checked_out = Gauge(
     "db_pool_checked_out",
     "DB connections currently in use",
+    labelnames=["pool"],
 )
 db_pool_overflow = Gauge(
     "db_pool_overflow",
     "DB connections in overflow beyond pool_size",
+    labelnames=["pool"],
+)
+db_pool_checkout_wait = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time to get a DB connection from the pool (including connecting)",
+    labelnames=["pool"],
+    buckets=[0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0],
+)
+db_connection_hold = Histogram(
+    "db_connection_hold_seconds",
+    "Time a DB connection stays checked out, by the route that took it",
+    labelnames=["pool", "route"],
+    buckets=[0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0],
+)
+db_pool_timeouts_total = Counter(
+    "db_pool_timeouts_total",
+    "DB connection checkouts that timed out waiting for the pool",
+    labelnames=["pool"],
+)
+db_routed_queries_total = Counter(
+    "db_routed_queries_total",
+    "Reads eligible for the replica, by target (replica, primary) and reason",
+    labelnames=["target", "reason"],
+)
+db_replica_lag = Gauge(
+    "db_replica_lag_seconds",
+    "Measured read replica lag (-1 when unreachable)",
 )
 
 # ── AI Providers ──────────────────────────────────────────────────────
@@ -50,12 +88,12 @@ ai_requests_total = Counter(
 # ── Caching ───────────────────────────────────────────────────────────
 cache_hits_total = Counter(
     "cache_hits_total",
-    "Redis cache hits",
-    labelnames=["key_prefix"],
+    "Cache hits by tier (local, redis, stale)",
+    labelnames=["key_prefix", "tier"],
 )
 cache_misses_total = Counter(
     "cache_misses_total",
-    "Redis cache misses",
+    "Cache misses (value recomputed)",
     labelnames=["key_prefix"],
 )
 
@@ -63,6 +101,91 @@ cache_misses_total = Counter(
 rate_limit_rejections_total = Counter(
     "rate_limit_rejections_total",
     "Requests rejected by rate limiter",
+    labelnames=["policy"],
+)
+
+# ── Notifications ─────────────────────────────────────────────────────
+push_deliveries_total = Counter(
+    "push_deliveries_total",
+    "Web Push deliveries by result (sent, expired, failed)",
+    labelnames=["result"],
+)
+
+# ── Scheduler ─────────────────────────────────────────────────────────
+scheduler_job_runs_total = Counter(
+    "scheduler_job_runs_total",
+    "Scheduled job runs by result (success, error, timeout, misfire, overlap)",
+    labelnames=["job", "result"],
+)
+scheduler_job_duration = Histogram(
+    "scheduler_job_duration_seconds",
+    "Scheduled job run time",
+    labelnames=["job"],
+    buckets=[0.1, 0.5, 1.0, 5.0, 15.0, 60.0, 300.0, 1800.0],
+)
+scheduler_job_lag = Histogram(
+    "scheduler_job_lag_seconds",
+    "Delay between a job's due time and its start",
+    labelnames=["job"],
+    buckets=[0.5, 1.0, 2.0, 5.0, 15.0, 60.0, 300.0],
+)
+scheduler_leader = Gauge(
+    "scheduler_leader",
+    "1 while this worker holds the scheduler leader lease",
+)
+
+# ── Job Queue ─────────────────────────────────────────────────────────
+queue_jobs_total = Counter(
+    "queue_jobs_total",
+    "Queued job attempts by type and result (succeeded, retrying, failed)",
+    labelnames=["job_type", "result"],
+)
+queue_job_duration = Histogram(
+    "queue_job_duration_seconds",
+    "Queued job run time",
+    labelnames=["job_type"],
+    buckets=[0.1, 0.5, 1.0, 5.0, 15.0, 60.0, 300.0],
+)
+
+# ── Embeddings ────────────────────────────────────────────────────────
+embedding_chunks_total = Counter(
+    "embedding_chunks_total",
+    "Knowledge base chunks by outcome (embedded, reused)",
+    labelnames=["backend", "result"],
+)
+embedding_query_cache_total = Counter(
+    "embedding_query_cache_total",
+    "Search query embedding lookups by result (hit, miss)",
+    labelnames=["result"],
+)
+kb_retrieval_duration = Histogram(
+    "kb_retrieval_duration_seconds",
+    "Knowledge base suggestion latency per ranker (lexical, vector) and fused",
+    labelnames=["ranker"],
+    buckets=[0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0],
+)
+
+# ── Payment Webhooks ──────────────────────────────────────────────────
+webhook_events_total = Counter(
+    "webhook_events_total",
+    "Gateway webhook events by outcome (received, duplicate, processed, retrying, failed)",
+    labelnames=["gateway", "result"],
+)
+webhook_processing_lag = Histogram(
+    "webhook_processing_lag_seconds",
+    "Delay between storing a webhook event and processing it",
+    labelnames=["gateway"],
+    buckets=[0.1, 0.5, 1.0, 5.0, 15.0, 60.0, 300.0, 1800.0],
+)
+webhook_inbox_pending = Gauge(
+    "webhook_inbox_pending",
+    "Webhook events waiting to be processed",
+    labelnames=["gateway"],
+)
+webhook_inbox_oldest_pending = Gauge(
+    "webhook_inbox_oldest_pending_seconds",
+    "Age of the oldest webhook event waiting to be processed",
+    labelnames=["gateway"],
 )
 
 # ── App Info ──────────────────────────────────────────────────────────
@@ -2,7 +2,9 @@
 Audit Logging Middleware
 
 Automatically logs all mutating admin API requests (POST/PUT/PATCH/DELETE).
-Captures actor, IP, user agent, endpoint, and response status.
+Captures actor, IP, user agent, endpoint, and response status. Rows are
+handed to the batched audit log writer (app/utils/log_writer.py), so the
+request never waits on the insert.
 """
 
 import json
@@ -14,8 +16,7 @@ from typing import Optional
 from fastapi import Request, Response
 from starlette.middleware.base import BaseHTTPMiddleware, RequestResponseEndpoint
 
-from app.database import AsyncSessionLocal
-from app.models.admin.audit_log import AuditLog
+from app.utils.log_writer import audit_log_writer
 
 logger = logging.getLogger(__name__)
 
@@ -106,6 +107,72 @@ def _get_client_ip(request: Request) -> str:
     return request.client.host if request.client else "unknown"
 
 
+def should_audit(method: str, path: str) -> bool:
+    """True for admin/staff API mutations that belong in the audit trail."""
+    return (
+        method in MUTATING_METHODS
+        and path.startswith(MONITORED_PREFIXES)
+        and path not in EXCLUDED_PATHS
+    )
+
+
+def _redact_body(method: str, raw_body: Optional[bytes]) -> Optional[dict]:
+    """Parse a JSON request body and mask credential fields."""
+    if method not in {"POST", "PUT", "PATCH"} or not raw_body:
+        return None
+    try:
+        request_body = json.loads(raw_body)
+        # Sanitize sensitive fields
+        for field in ("password", "secret", "token", "api_key", "secret_key"):
+            if field in request_body:
+                request_body[field] = "***REDACTED***"
+        return request_body
+    except (json.JSONDecodeError, Exception):
+        return None
+
+
+async def write_audit_log(
+    *,
+    method: str,
+    path: str,
+    status_code: int,
+    raw_body: Optional[bytes],
+    query_params: Optional[dict],
+    actor_id: Optional[str],
+    actor_email: Optional[str],
+    actor_role: Optional[str],
+    client_ip: str,
+    user_agent: str,
+) -> None:
+    """Queue one audit_logs row for a completed request. Never raises."""
+    if not actor_id:
+        # audit_logs.actor_id is required; unauthenticated calls are rejected anyway
+        logger.debug(f"Skipping audit log for anonymous {method} {path}")
+        return
+
+    # Determine success/failure
+    status = "success" if 200 <= status_code < 400 else "failure"
+
+    await audit_log_writer.submit(audit_log_writer.new_row(
+        actor_id=actor_id,
+        actor_email=actor_email or "unknown",
+        actor_role=actor_role or "unknown",
+        action=_extract_action(method, path),
+        resource_type=_extract_resource_type(path),
+        resource_id=_extract_resource_id(path),
+        details={
+            "method": method,
+            "path": path,
+            "status_code": status_code,
+            "request_body": _redact_body(method, raw_body),
+            "query_params": query_params,
+        },
+        ip_address=client_ip,
+        user_agent=user_agent[:500],  # Truncate long user agents
+        status=status,
+    ))
+
+
 class AuditMiddleware(BaseHTTPMiddleware):
     """Middleware that logs all mutating admin API requests to the audit_logs table."""
 
@@ -113,13 +180,7 @@ class AuditMiddleware(BaseHTTPMiddleware):
         self, request: Request, call_next: RequestResponseEndpoint
     ) -> Response:
         # Only audit admin/staff API mutation requests
-        if not any(request.url.path.startswith(prefix) for prefix in MONITORED_PREFIXES):
-            return await call_next(request)
-
-        if request.method not in MUTATING_METHODS:
-            return await call_next(request)
-
-        if request.url.path in EXCLUDED_PATHS:
+        if not should_audit(request.method, request.url.path):
             return await call_next(request)
 
         # Capture request details before processing
@@ -131,51 +192,18 @@ class AuditMiddleware(BaseHTTPMiddleware):
         # Process the request
         response = await call_next(request)
 
-        # Try to get cached request body after processing (avoid consuming body before call_next)
-        request_body = None
-        if method in {"POST", "PUT", "PATCH"} and hasattr(request, "_body"):
-            try:
-                request_body = json.loads(request._body)
-                # Sanitize sensitive fields
-                for field in ("password", "secret", "token", "api_key", "secret_key"):
-                    if field in request_body:
-                        request_body[field] = "***REDACTED***"
-            except (json.JSONDecodeError, Exception):
-                request_body = None
-
         # Extract actor info from request state (set by auth middleware)
-        actor_id = getattr(request.state, "user_id", None) if hasattr(request, "state") else None
-        actor_email = getattr(request.state, "user_email", None) if hasattr(request, "state") else None
-        actor_role = getattr(request.state, "user_role", None) if hasattr(request, "state") else None
-
-        # Determine success/failure
-        status = "success" if 200 <= response.status_code < 400 else "failure"
-
-        # Log asynchronously (don't block the response)
-        try:
-            async with AsyncSessionLocal() as session:
-                audit_entry = AuditLog(
-                    actor_id=actor_id,
-                    actor_email=actor_email or "unknown",
-                    actor_role=actor_role or "unknown",
-                    action=_extract_action(method, path),
-                    resource_type=_extract_resource_type(path),
-                    resource_id=_extract_resource_id(path),
-                    details={
-                        "method": method,
-                        "path": path,
-                        "status_code": response.status_code,
-                        "request_body": request_body,
-                        "query_params": dict(request.query_params) if request.query_params else None,
-                    },
-                    ip_address=client_ip,
-                    user_agent=user_agent[:500],  # Truncate long user agents
-                    status=status,
-                )
-                session.add(audit_entry)
-                await session.commit()
-        except Exception as e:
-            # Never let audit logging break the actual request
-            logger.error(f"Failed to write audit log: {e}")
+        await write_audit_log(
+            method=method,
+            path=path,
+            status_code=response.status_code,
+            raw_body=getattr(request, "_body", None),
+            query_params=dict(request.query_params) if request.query_params else None,
+            actor_id=getattr(request.state, "user_id", None),
+            actor_email=getattr(request.state, "user_email", None),
+            actor_role=getattr(request.state, "user_role", None),
+            client_ip=client_ip,
+            user_agent=user_agent,
+        )
 
         return response
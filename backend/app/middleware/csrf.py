@@ -7,6 +7,14 @@ from starlette.middleware.base import BaseHTTPMiddleware
 from app.config import settings
 
 
+def is_trusted_origin(origin: str, referer: str) -> bool:
+    """True if the Origin (or, failing that, Referer) matches an allowed CORS origin."""
+    allowed = settings.cors_origins_list
+    origin_ok = any(origin == o for o in allowed) if origin else False
+    referer_ok = any(referer.startswith(o) for o in allowed) if referer else False
+    return origin_ok or referer_ok
+
+
 class CSRFMiddleware(BaseHTTPMiddleware):
     """
     Prevent cross-site request forgery on cookie-authenticated mutating requests.
@@ -29,11 +37,7 @@ class CSRFMiddleware(BaseHTTPMiddleware):
                 origin = request.headers.get("origin") or ""
                 referer = request.headers.get("referer") or ""
 
-                allowed = settings.cors_origins_list
-                origin_ok = any(origin == o for o in allowed) if origin else False
-                referer_ok = any(referer.startswith(o) for o in allowed) if referer else False
-
-                if not origin_ok and not referer_ok:
+                if not is_trusted_origin(origin, referer):
                     return JSONResponse(
                         status_code=403,
                         content={"detail": "CSRF validation failed: origin not allowed"},
@@ -2,8 +2,8 @@
 Error Logging Middleware
 
 Captures unhandled exceptions and 5xx responses, writing structured
-error logs to the database. Follows the same async pattern as
-audit_middleware.py - never blocks the response.
+error logs to the database through the batched error log writer
+(app/utils/log_writer.py) - never blocks the response.
 """
 
 from __future__ import annotations
@@ -17,7 +17,7 @@ from datetime import datetime
 from fastapi import Request, Response
 from starlette.middleware.base import BaseHTTPMiddleware, RequestResponseEndpoint
 
-from app.database import AsyncSessionLocal
+from app.utils.log_writer import error_log_writer
 
 logger = logging.getLogger(__name__)
 
@@ -149,39 +149,57 @@ class ErrorLoggingMiddleware(BaseHTTPMiddleware):
         user_agent: str,
     ) -> None:
         """Write error log entry to database asynchronously."""
-        try:
-            # Import here to avoid circular imports
-            from app.models.admin.error_log import ErrorLog
-
-            # Extract user info from request state (set by auth middleware)
-            user_id = getattr(request.state, "user_id", None) if hasattr(request, "state") else None
-            user_role = getattr(request.state, "user_role", None) if hasattr(request, "state") else None
-
-            if AsyncSessionLocal is None:
-                logger.warning("Cannot log error: database not initialized")
-                return
-
-            async with AsyncSessionLocal() as session:
-                error_entry = ErrorLog(
-                    level=level,
-                    source="backend",
-                    error_type=error_type,
-                    message=message[:2000],  # Truncate very long messages
-                    stack_trace=stack_trace,
-                    endpoint=endpoint,
-                    method=method,
-                    user_id=user_id,
-                    user_role=user_role,
-                    request_data=request_body,
-                    context={
-                        "ip_address": client_ip,
-                        "user_agent": user_agent[:500],
-                        "query_params": dict(request.query_params) if request.query_params else None,
-                    },
-                )
-                session.add(error_entry)
-                await session.commit()
-
-        except Exception as e:
-            # Never let error logging break the actual request
-            logger.error(f"Failed to write error log: {e}")
+        # Extract user info from request state (set by auth middleware)
+        user_id = getattr(request.state, "user_id", None) if hasattr(request, "state") else None
+        user_role = getattr(request.state, "user_role", None) if hasattr(request, "state") else None
+
+        await write_error_log(
+            level=level,
+            error_type=error_type,
+            message=message,
+            stack_trace=stack_trace,
+            endpoint=endpoint,
+            method=method,
+            user_id=user_id,
+            user_role=user_role,
+            request_body=request_body,
+            client_ip=client_ip,
+            user_agent=user_agent,
+            query_params=dict(request.query_params) if request.query_params else None,
+        )
+
+
+async def write_error_log(
+    *,
+    level: str,
+    error_type: str,
+    message: str,
+    stack_trace: str | None,
+    endpoint: str,
+    method: str,
+    user_id: str | None,
+    user_role: str | None,
+    request_body: dict | None,
+    client_ip: str,
+    user_agent: str,
+    query_params: dict | None,
+) -> None:
+    """Queue one error_logs row. Never raises."""
+    await error_log_writer.submit(error_log_writer.new_row(
+        level=level,
+        source="backend",
+        error_type=error_type,
+        message=message[:2000],  # Truncate very long messages
+        stack_trace=stack_trace,
+        endpoint=endpoint,
+        method=method,
+        user_id=user_id,
+        user_role=user_role,
+        request_data=request_body,
+        context={
+            "ip_address": client_ip,
+            "user_agent": user_agent[:500],
+            "query_params": query_params,
+        },
+        is_resolved=False,
+    ))
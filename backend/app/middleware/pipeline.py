@@ -0,0 +1,284 @@
+"""
+Request Pipeline Middleware
+
+A single pure-ASGI layer that does the work of the former
+BaseHTTPMiddleware stack (security headers, cookie auth, CSRF, rate
+limiting, error logging and audit logging) in one pass per request.
+
+BaseHTTPMiddleware runs every layer's downstream app in its own task and
+pipes the response through a memory stream, which costs a task switch
+per layer and holds SSE/streaming bodies behind the slowest consumer.
+This pipeline only rewrites the ``http.response.start`` message; body
+chunks go straight to the server, so streaming responses are not
+buffered.
+
+The bearer token (Authorization header or ``access_token`` cookie) is
+verified once here. The payload is stored in ``scope["state"]`` where the
+auth dependencies pick it up via ``verify_request_token`` and where
+audit/error logging read the actor fields (``request.state.user_id``...).
+"""
+
+import json
+import logging
+import traceback
+from typing import List, Optional, Tuple
+
+from starlette.datastructures import Headers, QueryParams
+from starlette.requests import cookie_parser
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config import settings
+from app.middleware.audit_middleware import should_audit, write_audit_log
+from app.middleware.csrf import is_trusted_origin
+from app.middleware.error_logging_middleware import (
+    SKIP_PATHS,
+    _sanitize_data,
+    write_error_log,
+)
+from app.middleware.rate_limit import _EXEMPT_PATHS, rate_limited_response
+from app.middleware.security_headers import security_header_items
+from app.utils.rate_limiter import policies_for, rate_limiter
+from app.utils.security import verify_token
+
+logger = logging.getLogger(__name__)
+
+CSRF_METHODS = frozenset({"POST", "PUT", "PATCH", "DELETE"})
+
+# Request bodies are kept (up to this size) for audit and error log entries
+BODY_CAPTURE_METHODS = frozenset({"POST", "PUT", "PATCH"})
+BODY_CAPTURE_LIMIT = 64 * 1024
+
+RawHeaders = List[Tuple[bytes, bytes]]
+
+
+def _client_ip(headers: Headers, scope: Scope) -> str:
+    """Extract client IP, checking proxy headers."""
+    forwarded = headers.get("x-forwarded-for")
+    if forwarded:
+        return forwarded.split(",")[0].strip()
+    real_ip = headers.get("x-real-ip")
+    if real_ip:
+        return real_ip
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
+
+def _rate_limit_ip(headers: Headers, scope: Scope) -> str:
+    """Rate limit key: first X-Forwarded-For hop, else the socket peer."""
+    forwarded = headers.get("x-forwarded-for", "").split(",")[0].strip()
+    if forwarded:
+        return forwarded
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
+
+def _parse_body(raw_body: Optional[bytes]) -> Optional[dict]:
+    """Parse a captured JSON body for the error log, redacting secrets."""
+    if not raw_body:
+        return None
+    try:
+        return _sanitize_data(json.loads(raw_body))
+    except (json.JSONDecodeError, Exception):
+        return None
+
+
+class RequestPipelineMiddleware:
+    """Fused pure-ASGI middleware for every HTTP request (websockets pass through)."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+        self.security_headers: RawHeaders = [
+            (name.lower().encode("latin-1"), value.encode("latin-1"))
+            for name, value in security_header_items()
+        ]
+        self._security_header_names = frozenset(name for name, _ in self.security_headers)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        path = scope["path"]
+        method = scope["method"]
+        headers = Headers(scope=scope)
+        state = scope.setdefault("state", {})
+
+        endpoint: ASGIApp = self.app
+        extra_headers: RawHeaders = []
+
+        # ── Cookie auth + token verification ──
+        auth_header = headers.get("authorization")
+        token = None
+        csrf_exposed = False
+        if auth_header is not None:
+            # Mobile/API clients send the header; it takes precedence
+            if auth_header.startswith("Bearer "):
+                token = auth_header[7:]
+        else:
+            token = cookie_parser(headers.get("cookie", "")).get("access_token")
+            if token:
+                # Only cookie-authenticated mutations are exposed to CSRF
+                csrf_exposed = method in CSRF_METHODS
+                # Inject as Authorization header so HTTPBearer works unchanged
+                scope["headers"] = [
+                    *scope["headers"],
+                    (b"authorization", f"Bearer {token}".encode()),
+                ]
+
+        if token:
+            state["auth_token"] = token
+            try:
+                payload = verify_token(token, token_type="access")
+            except Exception:
+                # Let the auth dependency report the failure
+                payload = None
+            if payload:
+                state["auth_payload"] = payload
+                state["user_id"] = payload.get("sub")
+                state["user_email"] = payload.get("email")
+                state["user_role"] = payload.get("role")
+
+        # ── Rate limiting (fails open when Redis is unavailable) ──
+        if (
+            settings.rate_limit_enabled
+            and path not in _EXEMPT_PATHS
+            and headers.get("upgrade", "").lower() != "websocket"
+        ):
+            user_id = state.get("user_id")
+            identity = f"user:{user_id}" if user_id else f"ip:{_rate_limit_ip(headers, scope)}"
+            try:
+                decision = await rate_limiter.check(
+                    policies_for(path, state.get("user_role")), identity
+                )
+            except Exception as e:
+                logger.warning(f"Rate limit check failed (allowing request): {e}")
+            else:
+                if decision.allowed:
+                    extra_headers = [
+                        (b"x-ratelimit-limit", str(decision.limit).encode()),
+                        (b"x-ratelimit-remaining", str(decision.remaining).encode()),
+                    ]
+                else:
+                    endpoint = rate_limited_response(decision)
+
+        # ── CSRF ──
+        if (
+            csrf_exposed
+            and endpoint is self.app
+            and not is_trusted_origin(headers.get("origin") or "", headers.get("referer") or "")
+        ):
+            endpoint = JSONResponse(
+                status_code=403,
+                content={"detail": "CSRF validation failed: origin not allowed"},
+            )
+
+        # ── Dispatch, recording status and request body for the logs ──
+        log_errors = path not in SKIP_PATHS
+        audit = should_audit(method, path)
+        status_code: Optional[int] = None
+
+        body_chunks: List[bytes] = []
+        body_size = 0
+
+        async def capture_receive() -> Message:
+            nonlocal body_size
+            message = await receive()
+            if message["type"] == "http.request" and body_size <= BODY_CAPTURE_LIMIT:
+                chunk = message.get("body", b"")
+                body_chunks.append(chunk)
+                body_size += len(chunk)
+            return message
+
+        capture = (log_errors or audit) and method in BODY_CAPTURE_METHODS
+        downstream_receive = capture_receive if capture else receive
+
+        async def send_with_headers(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                raw = [
+                    (name, value)
+                    for name, value in message.get("headers", [])
+                    if name.lower() not in self._security_header_names
+                ]
+                raw.extend(self.security_headers)
+                raw.extend(extra_headers)
+                message = {**message, "headers": raw}
+            await send(message)
+
+        def captured_body() -> Optional[bytes]:
+            if not body_chunks or body_size > BODY_CAPTURE_LIMIT:
+                return None
+            return b"".join(body_chunks)
+
+        try:
+            await endpoint(scope, downstream_receive, send_with_headers)
+        except Exception as exc:
+            if log_errors:
+                await self._log_error(
+                    scope, headers, state,
+                    level="CRITICAL",
+                    error_type=type(exc).__name__,
+                    message=str(exc),
+                    stack_trace=traceback.format_exc(),
+                    raw_body=captured_body(),
+                )
+            # Re-raise so FastAPI's exception handlers can process it
+            raise
+
+        if log_errors and status_code is not None and status_code >= 500:
+            await self._log_error(
+                scope, headers, state,
+                level="ERROR",
+                error_type="HTTPServerError",
+                message=f"HTTP {status_code} on {method} {path}",
+                stack_trace=None,
+                raw_body=captured_body(),
+            )
+
+        if audit:
+            await write_audit_log(
+                method=method,
+                path=path,
+                status_code=status_code or 500,
+                raw_body=captured_body(),
+                query_params=self._query_params(scope),
+                actor_id=state.get("user_id"),
+                actor_email=state.get("user_email"),
+                actor_role=state.get("user_role"),
+                client_ip=_client_ip(headers, scope),
+                user_agent=headers.get("user-agent", "unknown"),
+            )
+
+    @staticmethod
+    def _query_params(scope: Scope) -> Optional[dict]:
+        query_string = scope.get("query_string", b"")
+        return dict(QueryParams(query_string)) if query_string else None
+
+    async def _log_error(
+        self,
+        scope: Scope,
+        headers: Headers,
+        state: dict,
+        *,
+        level: str,
+        error_type: str,
+        message: str,
+        stack_trace: Optional[str],
+        raw_body: Optional[bytes],
+    ) -> None:
+        await write_error_log(
+            level=level,
+            error_type=error_type,
+            message=message,
+            stack_trace=stack_trace,
+            endpoint=scope["path"],
+            method=scope["method"],
+            user_id=state.get("user_id"),
+            user_role=state.get("user_role"),
+            request_body=_parse_body(raw_body),
+            client_ip=_client_ip(headers, scope),
+            user_agent=headers.get("user-agent", "unknown"),
+            query_params=self._query_params(scope),
+        )
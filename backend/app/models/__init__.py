@@ -60,6 +60,7 @@ from app.models.analytics import (
     PaymentAnalytics,
 )
 from app.models.notification import Notification, NotificationType
+from app.models.webhook_event import WebhookEvent
 from app.models.forum import ForumPost, ForumReply, ForumLike
 from app.models.category import Category
 from app.models.store import ProductCategory, Product, Cart, CartItem, Order, OrderItem, ShippingAddress
@@ -176,6 +177,8 @@ from app.models.instructor import (
     InstructorEarning,
     InstructorPayout,
     InstructorRevenueSplit,
+    InstructorBalance,
+    InstructorEarningPeriod,
     InstructorBadge,
     InstructorBadgeAward,
     InstructorPoints,
@@ -247,6 +250,9 @@ __all__ = [
     "Notification",
     "NotificationType",
 
+    # Payment gateway webhook inbox
+    "WebhookEvent",
+
     # Forum models
     "ForumPost",
     "ForumReply",
@@ -361,6 +367,8 @@ __all__ = [
     "InstructorEarning",
     "InstructorPayout",
     "InstructorRevenueSplit",
+    "InstructorBalance",
+    "InstructorEarningPeriod",
     "InstructorBadge",
     "InstructorBadgeAward",
     "InstructorPoints",
@@ -9,6 +9,8 @@ from app.models.instructor.instructor_earnings import (
     InstructorEarning,
     InstructorPayout,
     InstructorRevenueSplit,
+    InstructorBalance,
+    InstructorEarningPeriod,
 )
 from app.models.instructor.instructor_gamification import (
     InstructorBadge,
@@ -36,6 +38,8 @@ __all__ = [
     "InstructorEarning",
     "InstructorPayout",
     "InstructorRevenueSplit",
+    "InstructorBalance",
+    "InstructorEarningPeriod",
     "InstructorBadge",
     "InstructorBadgeAward",
     "InstructorPoints",
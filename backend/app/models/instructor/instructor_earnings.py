@@ -8,7 +8,7 @@ import uuid
 from datetime import datetime
 from decimal import Decimal
 
-from sqlalchemy import Column, String, Text, DateTime, UUID, ForeignKey, Numeric, Enum as SQLEnum, Date
+from sqlalchemy import Column, String, Text, DateTime, UUID, ForeignKey, Numeric, Enum as SQLEnum, Date, Integer, Index
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship
 import enum
@@ -134,6 +134,64 @@ class InstructorPayout(Base):
     instructor = relationship("User", foreign_keys=[instructor_id])
 
 
+class InstructorBalance(Base):
+    """
+    Running balance per instructor.
+
+    Kept in step with instructor_earnings and instructor_payouts by
+    app.services.instructor.earnings_ledger, in the same transaction as
+    the rows it summarises, so balance checks read one row instead of
+    summing every earning and payout.
+    """
+
+    __tablename__ = "instructor_balances"
+
+    instructor_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+
+    # Net of confirmed/paid earnings, and of pending ones
+    total_earned = Column(Numeric(12, 2), default=Decimal("0.00"), nullable=False)
+    pending_earnings = Column(Numeric(12, 2), default=Decimal("0.00"), nullable=False)
+
+    # Requested, processing and completed payouts
+    total_paid_out = Column(Numeric(12, 2), default=Decimal("0.00"), nullable=False)
+
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+    @property
+    def available(self) -> Decimal:
+        """Amount the instructor can still request as a payout."""
+        return Decimal(str(self.total_earned)) - Decimal(str(self.total_paid_out))
+
+
+class InstructorEarningPeriod(Base):
+    """
+    Monthly earnings bucket per instructor, earning type and course.
+
+    Sums every earning in the month regardless of status (as the
+    breakdown reports them), plus earned_net for the confirmed/paid ones.
+    Maintained alongside InstructorBalance; a key may have more than one
+    row, so readers always sum.
+    """
+
+    __tablename__ = "instructor_earning_periods"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+
+    instructor_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    period_start = Column(Date, nullable=False)  # First day of the month
+    earning_type = Column(SQLEnum(EarningType), nullable=False)
+    course_id = Column(UUID(as_uuid=True), ForeignKey("courses.id", ondelete="SET NULL"), nullable=True)
+
+    gross_amount = Column(Numeric(12, 2), default=Decimal("0.00"), nullable=False)
+    net_amount = Column(Numeric(12, 2), default=Decimal("0.00"), nullable=False)
+    earned_net = Column(Numeric(12, 2), default=Decimal("0.00"), nullable=False)
+    earnings_count = Column(Integer, default=0, nullable=False)
+
+    __table_args__ = (
+        Index("ix_instructor_earning_periods_instructor_period", "instructor_id", "period_start"),
+    )
+
+
 class InstructorRevenueSplit(Base):
     """Configurable revenue split per instructor or per course"""
 
@@ -8,7 +8,7 @@ course updates, forum replies, payments, and system alerts.
 import uuid
 from datetime import datetime
 
-from sqlalchemy import Column, String, Text, DateTime, Boolean, ForeignKey, Enum as SAEnum
+from sqlalchemy import Column, String, Text, DateTime, Boolean, ForeignKey, Index, Enum as SAEnum, text
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 
 from app.database import Base
@@ -71,5 +71,20 @@ class Notification(Base):
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
     read_at = Column(DateTime, nullable=True)
 
+    __table_args__ = (
+        # Inbox keyset pagination; the included columns cover the read/type filters
+        Index(
+            "ix_notifications_user_created_id",
+            "user_id", created_at.desc(), id.desc(),
+            postgresql_include=["is_read", "type"],
+        ),
+        # Unread counts only scan the unread rows
+        Index(
+            "ix_notifications_user_unread",
+            "user_id",
+            postgresql_where=text("is_read = false"),
+        ),
+    )
+
     def __repr__(self) -> str:
         return f"<Notification(id={self.id}, type={self.type}, is_read={self.is_read})>"
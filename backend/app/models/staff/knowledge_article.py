@@ -50,6 +50,10 @@ class KBArticle(Base):
     Articles can be internal (staff-only) or public. Tags, status, and
     category support filtering and workflow management. View and
     helpful/not-helpful counters drive content quality metrics.
+
+    A generated ``search_vector`` tsvector column (title weighted above
+    body, GIN-indexed) backs full-text ranking; like the embedding vector
+    it is created by migration and only used from raw SQL.
     """
 
     __tablename__ = "kb_articles"
@@ -111,14 +115,13 @@ class KBEmbedding(Base):
     Chunked text embedding for semantic search over knowledge-base articles.
 
     Each row stores a text chunk and its index within the source article.
-    The actual embedding vector column (e.g., vector(1536)) must be added
-    via a raw SQL migration using the pgvector extension, as SQLAlchemy
-    does not natively support the vector type. Example migration SQL:
-
-        ALTER TABLE kb_embeddings
-        ADD COLUMN embedding vector(1536);
-        CREATE INDEX ix_kb_embeddings_vector
-        ON kb_embeddings USING ivfflat (embedding vector_cosine_ops);
+    The embedding vector column (vector(1536), HNSW-indexed for cosine
+    distance) is created by raw SQL migrations using the pgvector
+    extension and is read and written with raw SQL, as SQLAlchemy does
+    not natively support the vector type.
+
+    content_hash identifies the chunk text and embedding_model the model
+    that produced its vector, so unchanged chunks are not re-embedded.
     """
 
     __tablename__ = "kb_embeddings"
@@ -131,10 +134,13 @@ class KBEmbedding(Base):
     )
     chunk_text = Column(Text, nullable=False)
     chunk_index = Column(Integer, nullable=False)
+    content_hash = Column(String(64), nullable=True)
+    embedding_model = Column(String(100), nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
 
     __table_args__ = (
         Index("ix_kb_embeddings_article_id", "article_id"),
+        Index("ix_kb_embeddings_content_hash", "content_hash"),
     )
 
     def __repr__(self) -> str:
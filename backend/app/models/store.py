@@ -276,6 +276,7 @@ class Order(Base):
         payment_reference: External payment reference/transaction ID
         tracking_number: Shipping tracking number
         notes: Optional order notes from the buyer
+        reserved_until: While pending, when the order's reserved stock is released
     """
 
     __tablename__ = "orders"
@@ -320,6 +321,9 @@ class Order(Base):
     # Notes
     notes = Column(Text, nullable=True)
 
+    # Stock reservation (cleared once paid; expired pending orders are cancelled)
+    reserved_until = Column(DateTime, nullable=True)
+
     # Timestamps
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
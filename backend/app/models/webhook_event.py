@@ -0,0 +1,55 @@
+"""
+Webhook Inbox Model
+
+Raw payment gateway callbacks (M-Pesa, PayPal, Stripe), stored as they
+arrive so the endpoint can acknowledge them at once and processing runs
+on the job queue (see app/services/webhook_inbox.py).
+
+Each event is unique per (gateway, event_key), so gateway retries of the
+same event are absorbed at insert. ordering_key groups the events of one
+payment; they are processed oldest first, one at a time.
+"""
+
+import uuid
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, Index, Integer, String, Text, UniqueConstraint
+from sqlalchemy.dialects.postgresql import JSONB, UUID
+
+from app.database import Base
+
+# Event status lifecycle
+RECEIVED = "received"    # Stored, waiting for (or retrying) processing
+PROCESSED = "processed"  # Applied by the gateway handler
+FAILED = "failed"        # Gave up after webhook_max_attempts; replay to retry
+
+
+class WebhookEvent(Base):
+    """A payment gateway callback awaiting or done with processing."""
+
+    __tablename__ = "webhook_events"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+
+    gateway = Column(String(20), nullable=False)
+    event_key = Column(String(255), nullable=False)       # Gateway event id (or payload hash)
+    event_type = Column(String(100), nullable=True)
+    ordering_key = Column(String(255), nullable=False)    # Payment the event belongs to
+
+    payload = Column(JSONB, nullable=False)
+
+    status = Column(String(20), default=RECEIVED, nullable=False)
+    attempts = Column(Integer, default=0, nullable=False)
+    last_error = Column(Text, nullable=True)
+
+    received_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    processed_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        UniqueConstraint("gateway", "event_key", name="uq_webhook_events_gateway_event_key"),
+        Index("ix_webhook_events_ordering", "gateway", "ordering_key", "received_at"),
+        Index("ix_webhook_events_status_received", "status", "received_at"),
+    )
+
+    def __repr__(self) -> str:
+        return f"<WebhookEvent(gateway={self.gateway}, event_key={self.event_key}, status={self.status})>"
@@ -19,7 +19,7 @@ def register_all_routers(app: FastAPI) -> None:
         parents, notifications, forum, categories, store,
         contact, certificates, instructor_applications, partner_applications,
         scholarships, ai_agent_profile, copilot, health,
-        public_chat, avatar,
+        public_chat, avatar, exports, jobs,
     )
     from app.api.v1 import search as global_search
 
@@ -48,6 +48,8 @@ def register_all_routers(app: FastAPI) -> None:
     app.include_router(ai_agent_profile.router, prefix=prefix, tags=["AI Agent Profile"])
     app.include_router(copilot.router, prefix=prefix, tags=["CoPilot"])
     app.include_router(avatar.router, prefix=prefix, tags=["Avatar"])
+    app.include_router(exports.router, prefix=prefix, tags=["Exports"])
+    app.include_router(jobs.router, prefix=prefix, tags=["Jobs"])
 
     from app.api.v1 import withdrawals as shared_withdrawals
     app.include_router(shared_withdrawals.router, prefix=prefix, tags=["Withdrawals"])
@@ -27,11 +27,10 @@ class NotificationResponse(BaseModel):
 
 
 class NotificationListResponse(BaseModel):
-    """Paginated notification list."""
+    """Cursor-paginated notification list."""
     notifications: List[NotificationResponse]
-    total: int
+    next_cursor: Optional[str] = None
     unread_count: int
-    page: int = 1
     limit: int = 20
 
 
@@ -4,20 +4,31 @@ Audit Log Service
 Provides search, export, and manual logging capabilities for the audit system.
 """
 
-import csv
-import io
 import uuid
 import logging
 from datetime import datetime, timedelta
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, AsyncIterator
 
 from sqlalchemy import select, func, and_, desc
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import Select
 
 from app.models.admin.audit_log import AuditLog
+from app.utils.export import ExportColumn, iter_csv, stream_rows
 
 logger = logging.getLogger(__name__)
 
+AUDIT_EXPORT_COLUMNS = [
+    ExportColumn("Timestamp", "created_at"),
+    ExportColumn("Actor Email", "actor_email"),
+    ExportColumn("Actor Role", "actor_role"),
+    ExportColumn("Action", "action"),
+    ExportColumn("Resource Type", "resource_type"),
+    ExportColumn("Resource ID", "resource_id"),
+    ExportColumn("Status", "status"),
+    ExportColumn("IP Address", "ip_address"),
+]
+
 
 class AuditService:
     """Service for querying and managing audit logs."""
@@ -184,15 +195,13 @@ class AuditService:
         ]
 
     @staticmethod
-    async def export_logs_csv(
-        db: AsyncSession,
+    def export_query(
         *,
         date_from: Optional[datetime] = None,
         date_to: Optional[datetime] = None,
         resource_type: Optional[str] = None,
-    ) -> str:
-        """Export audit logs to CSV format."""
-        query = select(AuditLog)
+    ) -> Select:
+        """Column-projected, unbounded select() for audit log exports."""
         conditions = []
 
         if date_from:
@@ -202,34 +211,25 @@ class AuditService:
         if resource_type:
             conditions.append(AuditLog.resource_type == resource_type)
 
+        query = select(*(getattr(AuditLog, c.key) for c in AUDIT_EXPORT_COLUMNS))
         if conditions:
             query = query.where(and_(*conditions))
 
-        query = query.order_by(desc(AuditLog.created_at)).limit(10000)
+        return query.order_by(desc(AuditLog.created_at))
 
-        result = await db.execute(query)
-        logs = result.scalars().all()
-
-        output = io.StringIO()
-        writer = csv.writer(output)
-        writer.writerow([
-            "Timestamp", "Actor Email", "Actor Role", "Action",
-            "Resource Type", "Resource ID", "Status", "IP Address",
-        ])
-
-        for log in logs:
-            writer.writerow([
-                log.created_at.isoformat() if log.created_at else "",
-                log.actor_email,
-                log.actor_role,
-                log.action,
-                log.resource_type,
-                log.resource_id or "",
-                log.status,
-                log.ip_address,
-            ])
-
-        return output.getvalue()
+    @staticmethod
+    def export_logs_csv(
+        db: AsyncSession,
+        *,
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None,
+        resource_type: Optional[str] = None,
+    ) -> AsyncIterator[bytes]:
+        """Stream audit logs as CSV chunks via a server-side cursor."""
+        query = AuditService.export_query(
+            date_from=date_from, date_to=date_to, resource_type=resource_type,
+        )
+        return iter_csv(stream_rows(db, query), AUDIT_EXPORT_COLUMNS)
 
 
 def _log_to_dict(log: AuditLog) -> Dict[str, Any]:
@@ -26,7 +26,7 @@ from app.models.payment import Transaction
 from app.models.ai_tutor import AITutor
 from app.models.admin.operations import SupportTicket, ModerationItem
 
-from app.utils.cache import cache_get, cache_set
+from app.utils.cache import cached
 
 logger = logging.getLogger(__name__)
 
@@ -45,6 +45,7 @@ class DashboardService:
     # Overview
     # ------------------------------------------------------------------
     @staticmethod
+    @cached("admin:dashboard:overview", ttl=60, stale_ttl=60, tags=["admin:dashboard"])
     async def get_overview(db: AsyncSession) -> Dict[str, Any]:
         """
         Return high-level platform metrics:
@@ -52,13 +53,9 @@ class DashboardService:
         new_enrollments_today, ai_sessions_today,
         total_courses, active_courses.
 
-        Cached for 60 seconds to reduce the 7 sequential DB queries.
+        Cached for 60 seconds (then served stale for up to 60 more while it
+        refreshes) to reduce the 7 sequential DB queries.
         """
-        cache_key = "admin:dashboard:overview"
-        cached = await cache_get(cache_key)
-        if cached:
-            return cached
-
         now = datetime.utcnow()
         today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
 
@@ -129,7 +126,6 @@ class DashboardService:
             "active_courses": active_courses,
             "generated_at": now.isoformat(),
         }
-        await cache_set(cache_key, result, ttl=60)
         return result
 
     # ------------------------------------------------------------------
@@ -208,18 +204,15 @@ class DashboardService:
     # Pending items
     # ------------------------------------------------------------------
     @staticmethod
+    @cached("admin:dashboard:pending", ttl=30, stale_ttl=30, tags=["admin:dashboard"])
     async def get_pending_items(db: AsyncSession) -> Dict[str, Any]:
         """
         Count pending approvals, escalations, and flags across the
         platform. Returns a breakdown by category.
 
-        Cached for 30 seconds to reduce the 5 sequential DB queries.
+        Cached for 30 seconds (then served stale for up to 30 more while it
+        refreshes) to reduce the 5 sequential DB queries.
         """
-        cache_key = "admin:dashboard:pending"
-        cached = await cache_get(cache_key)
-        if cached:
-            return cached
-
         # Pending-payment enrollments (awaiting payment confirmation)
         pending_enrollments_q = select(func.count(Enrollment.id)).where(
             and_(
@@ -281,25 +274,21 @@ class DashboardService:
                 "moderation_items": moderation_items,
             },
         }
-        await cache_set(cache_key, result, ttl=30)
         return result
 
     # ------------------------------------------------------------------
     # Revenue snapshot
     # ------------------------------------------------------------------
     @staticmethod
+    @cached("admin:dashboard:revenue", ttl=60, stale_ttl=60, tags=["admin:dashboard"])
     async def get_revenue_snapshot(db: AsyncSession) -> Dict[str, Any]:
         """
         Today's revenue breakdown plus weekly/monthly aggregates and
         the five most recent completed transactions.
 
-        Cached for 60 seconds to reduce the 5 sequential DB queries.
+        Cached for 60 seconds (then served stale for up to 60 more while it
+        refreshes) to reduce the 5 sequential DB queries.
         """
-        cache_key = "admin:dashboard:revenue"
-        cached = await cache_get(cache_key)
-        if cached:
-            return cached
-
         now = datetime.utcnow()
         today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
         week_start = today_start - timedelta(days=today_start.weekday())  # Monday
@@ -363,7 +352,6 @@ class DashboardService:
             "recent_transactions": recent_transactions,
             "generated_at": now.isoformat(),
         }
-        await cache_set(cache_key, result, ttl=60)
         return result
 
     # ------------------------------------------------------------------
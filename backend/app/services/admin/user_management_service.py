@@ -7,24 +7,35 @@ Provides CRUD operations and business logic for admin user management:
 - Activate / deactivate (soft status toggle)
 - Bulk actions (deactivate / reactivate multiple users)
 - Activity timeline via audit logs
-- CSV export
+- CSV / Excel export (streamed)
 """
 
-import csv
-import io
 import logging
 import uuid
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from typing import Any, AsyncIterator, Dict, List, Optional
 
 from sqlalchemy import select, func, and_, or_, desc, asc
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import Select
 
 from app.models.user import User
 from app.models.admin.audit_log import AuditLog
+from app.utils.export import ExportColumn, iter_csv, stream_rows, yes_no
 
 logger = logging.getLogger(__name__)
 
+USER_EXPORT_COLUMNS = [
+    ExportColumn("ID", "id"),
+    ExportColumn("Email", "email"),
+    ExportColumn("Full Name", "full_name"),
+    ExportColumn("Role", "role"),
+    ExportColumn("Active", "is_active", yes_no),
+    ExportColumn("Verified", "is_verified", yes_no),
+    ExportColumn("Created At", "created_at"),
+    ExportColumn("Last Login", "last_login"),
+]
+
 
 def _user_to_dict(user: User) -> Dict[str, Any]:
     """Convert a User model instance to a JSON-serialisable dictionary."""
@@ -307,19 +318,16 @@ class UserManagementService:
         }
 
     # ------------------------------------------------------------------
-    # Export users to CSV
+    # Export users to CSV / Excel
     # ------------------------------------------------------------------
     @staticmethod
-    async def export_users(
-        db: AsyncSession,
+    def export_query(
         *,
         role_filter: Optional[str] = None,
         status_filter: Optional[str] = None,
         search: Optional[str] = None,
-        format: str = "csv",
-    ) -> str:
-        """Generate a CSV string of users matching the given filters."""
-        query = select(User).where(User.is_deleted == False)
+    ) -> Select:
+        """Column-projected, unbounded select() of users matching the filters."""
         conditions: List[Any] = [User.is_deleted == False]
 
         if role_filter:
@@ -337,31 +345,34 @@ class UserManagementService:
                 )
             )
 
-        query = select(User).where(and_(*conditions)).order_by(desc(User.created_at)).limit(10000)
-
-        result = await db.execute(query)
-        users = result.scalars().all()
-
-        output = io.StringIO()
-        writer = csv.writer(output)
-        writer.writerow([
-            "ID", "Email", "Full Name", "Role", "Active", "Verified",
-            "Created At", "Last Login",
-        ])
+        return (
+            select(
+                User.id,
+                User.email,
+                User.profile_data["full_name"].astext.label("full_name"),
+                User.role,
+                User.is_active,
+                User.is_verified,
+                User.created_at,
+                User.last_login,
+            )
+            .where(and_(*conditions))
+            .order_by(desc(User.created_at))
+        )
 
-        for user in users:
-            writer.writerow([
-                str(user.id),
-                user.email,
-                (user.profile_data or {}).get("full_name", ""),
-                user.role,
-                "Yes" if user.is_active else "No",
-                "Yes" if user.is_verified else "No",
-                user.created_at.isoformat() if user.created_at else "",
-                user.last_login.isoformat() if user.last_login else "",
-            ])
-
-        return output.getvalue()
+    @staticmethod
+    def export_users(
+        db: AsyncSession,
+        *,
+        role_filter: Optional[str] = None,
+        status_filter: Optional[str] = None,
+        search: Optional[str] = None,
+    ) -> AsyncIterator[bytes]:
+        """Stream users matching the given filters as CSV chunks."""
+        query = UserManagementService.export_query(
+            role_filter=role_filter, status_filter=status_filter, search=search,
+        )
+        return iter_csv(stream_rows(db, query), USER_EXPORT_COLUMNS)
 
 
 # Singleton instance
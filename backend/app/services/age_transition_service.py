@@ -60,6 +60,40 @@ async def find_students_turning_19(db: AsyncSession) -> list[dict]:
     ]
 
 
+async def notify_students_turning_19(db: AsyncSession) -> int:
+    """
+    Tell students whose 19th birthday is today, and their parents, that the
+    student can now request an independent account. Run once a day.
+    """
+    from app.services.notification_service import create_notification
+
+    today = date.today()
+    notified = 0
+    for student in await find_students_turning_19(db):
+        birthday = date.fromisoformat(student["date_of_birth"])
+        if (birthday.month, birthday.day) != (today.month, today.day):
+            continue
+        await create_notification(
+            db,
+            user_id=UUID(student["user_id"]),
+            type="system",
+            title="You can now manage your own account",
+            message="Happy birthday! You can request to unlink your account from your parent's.",
+            metadata={"event": "age_transition"},
+        )
+        await create_notification(
+            db,
+            user_id=UUID(student["parent_id"]),
+            type="system",
+            title=f"{student['student_name'] or 'Your child'} has turned 19",
+            message="They can now request an independent account, which you will be asked to approve.",
+            metadata={"event": "age_transition", "student_id": student["student_id"]},
+        )
+        notified += 1
+    await db.commit()
+    return notified
+
+
 async def request_delinking(
     db: AsyncSession,
     student_user_id: str,
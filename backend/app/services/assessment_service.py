@@ -140,6 +140,8 @@ async def submit_assessment(
     Checks that the assessment exists and that the student has not exceeded
     the maximum allowed attempts. If the assessment is auto-gradable and has
     questions defined, scores the submission immediately using _auto_grade().
+    A student's first attempt at a quiz earns quiz XP through
+    GamificationService.record_xp().
 
     Returns the created AssessmentSubmission instance.
 
@@ -186,6 +188,14 @@ async def submit_assessment(
     # Update assessment stats
     assessment.total_submissions = (assessment.total_submissions or 0) + 1
 
+    # The first attempt at a quiz earns quiz XP once the submission commits
+    if assessment.is_quiz and attempt_count == 0:
+        from app.services.student.gamification_service import GamificationService
+
+        await GamificationService(db).record_xp(
+            student_id, "quiz_complete", f"Completed quiz: {assessment.title}"
+        )
+
     await db.flush()
     await db.refresh(submission)
     return submission
@@ -295,6 +295,7 @@ async def authenticate_user(credentials: UserLogin, db: AsyncSession) -> TokenRe
             headers={"WWW-Authenticate": "Bearer"},
         )
 
+    student = None
     try:
         # For student users: ensure admission number, AITutor, and AIT code exist
         if user.is_student:
@@ -379,7 +380,17 @@ async def authenticate_user(credentials: UserLogin, db: AsyncSession) -> TokenRe
 
         # Update last_login timestamp
         from datetime import timezone
-        user.last_login = datetime.now(timezone.utc)
+        now = datetime.now(timezone.utc)
+
+        # First login of the day earns the student login XP
+        if student is not None and (
+            user.last_login is None or user.last_login.date() < now.date()
+        ):
+            from app.services.student.gamification_service import GamificationService
+
+            await GamificationService(db).record_xp(student.id, "login", "Daily login")
+
+        user.last_login = now
         await db.commit()
 
         # Return token response
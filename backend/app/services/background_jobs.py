@@ -0,0 +1,177 @@
+"""
+Background Jobs
+
+Handlers for work that runs on the job queue (app/utils/job_queue.py)
+rather than in the request that asked for it: AI weekly summaries,
+parent reports, certificate PDFs, knowledge base embeddings, CoPilot
+session titles and stored payment webhooks. Importing this module registers the handlers; callers
+queue work through the returned job types, e.g.
+``await weekly_summary.enqueue(payload, owner_id=user.id)``.
+
+Each handler opens its own session and returns a JSON-ready result that
+is stored on the job.
+"""
+
+import asyncio
+import logging
+from datetime import date
+from typing import Any, Dict
+from uuid import UUID
+
+from fastapi import HTTPException
+from pydantic import BaseModel
+from sqlalchemy import select
+
+from app import database
+from app.config import settings
+from app.utils.job_queue import JobFailed, job_handler
+
+logger = logging.getLogger(__name__)
+
+
+class WeeklySummaryPayload(BaseModel):
+    parent_id: UUID
+    child_id: UUID
+
+
+class ParentReportPayload(BaseModel):
+    parent_id: UUID
+    child_id: UUID
+    report_type: str
+    period_start: date
+    period_end: date
+    include_ai_summary: bool = True
+
+
+class CertificatePdfPayload(BaseModel):
+    certificate_id: UUID
+    requested_by: UUID
+
+
+class ArticleEmbeddingsPayload(BaseModel):
+    article_id: UUID
+
+
+class CopilotTitlePayload(BaseModel):
+    session_id: UUID
+    first_message: str
+
+
+class WebhookEventsPayload(BaseModel):
+    gateway: str
+    ordering_key: str
+
+
+@job_handler("weekly_summary", WeeklySummaryPayload, timeout=180)
+async def weekly_summary(payload: WeeklySummaryPayload) -> Dict[str, Any]:
+    """Generate a parent's AI weekly summary for one child."""
+    from app.services.parent.weekly_summary_service import ParentWeeklySummaryService
+
+    async with database.AsyncSessionLocal() as db:
+        try:
+            card = await ParentWeeklySummaryService(db).generate_weekly_summary(
+                parent_id=payload.parent_id,
+                child_id=payload.child_id,
+            )
+        except ValueError as e:
+            raise JobFailed(str(e))
+        return {"id": str(card.id), "week_start": card.week_start.isoformat(),
+                "week_end": card.week_end.isoformat()}
+
+
+@job_handler("parent_report", ParentReportPayload, timeout=180)
+async def parent_report(payload: ParentReportPayload) -> Dict[str, Any]:
+    """Aggregate a child's progress into a stored parent report."""
+    from app.schemas.parent.reports_schemas import GenerateReportRequest
+    from app.services.parent.reports_service import parent_reports_service
+
+    request = GenerateReportRequest(**payload.model_dump(exclude={"parent_id"}))
+    async with database.AsyncSessionLocal() as db:
+        try:
+            report = await parent_reports_service.generate_report(
+                db=db, parent_id=payload.parent_id, request=request,
+            )
+        except HTTPException as e:
+            raise JobFailed(e.detail)
+        return report.model_dump(mode="json")
+
+
+@job_handler("certificate_pdf", CertificatePdfPayload, priority="high", timeout=120)
+async def certificate_pdf(payload: CertificatePdfPayload) -> Dict[str, Any]:
+    """Render a certificate PDF into the export store; returns its download handle."""
+    from app.models.certificate import Certificate
+    from app.services.certificate_pdf_service import generate_certificate_pdf
+    from app.utils.export import store_export_bytes
+
+    async with database.AsyncSessionLocal() as db:
+        certificate = (await db.execute(
+            select(Certificate).where(Certificate.id == payload.certificate_id)
+        )).scalar_one_or_none()
+    if certificate is None or not certificate.is_valid:
+        raise JobFailed("Certificate not found or revoked")
+
+    try:
+        # WeasyPrint is CPU-bound; keep the worker's loop free for other jobs
+        pdf_bytes = await asyncio.to_thread(
+            generate_certificate_pdf,
+            student_name=certificate.student_name,
+            course_name=certificate.course_name,
+            grade=certificate.grade,
+            serial_number=certificate.serial_number,
+            completion_date=certificate.completion_date,
+            issued_at=certificate.issued_at,
+        )
+    except RuntimeError as e:
+        raise JobFailed(str(e))
+
+    return await store_export_bytes(
+        pdf_bytes,
+        filename=f"UHS-Certificate-{certificate.serial_number}",
+        export_format="pdf",
+        owner_id=payload.requested_by,
+    )
+
+
+@job_handler("kb_embeddings", ArticleEmbeddingsPayload, priority="low", timeout=600)
+async def kb_embeddings(payload: ArticleEmbeddingsPayload) -> Dict[str, Any]:
+    """Re-chunk and embed a knowledge base article."""
+    from app.models.staff.knowledge_article import KBArticle
+    from app.services.staff.kb_retrieval import KB_CACHE_TAG
+    from app.services.staff.knowledge_base_service import _generate_embeddings
+    from app.utils.cache import invalidate_tags
+
+    async with database.AsyncSessionLocal() as db:
+        article = (await db.execute(
+            select(KBArticle).where(KBArticle.id == payload.article_id)
+        )).scalar_one_or_none()
+        if article is None:
+            raise JobFailed("Article not found")
+        await _generate_embeddings(db, str(article.id), article.body or "")
+        await db.commit()
+    await invalidate_tags(KB_CACHE_TAG)
+    return {"article_id": str(payload.article_id)}
+
+
+@job_handler("copilot_title", CopilotTitlePayload, priority="low", max_attempts=2, timeout=60)
+async def copilot_title(payload: CopilotTitlePayload) -> None:
+    """Title a CoPilot session from its first message."""
+    from app.services.copilot_service import CopilotService
+
+    async with database.AsyncSessionLocal() as db:
+        await CopilotService()._auto_title_session(db, payload.session_id, payload.first_message)
+
+
+@job_handler(
+    "webhook_events",
+    WebhookEventsPayload,
+    priority="high",
+    max_attempts=settings.webhook_max_attempts,
+    timeout=settings.webhook_lock_seconds,
+    backoff=5.0,
+)
+async def webhook_events(payload: WebhookEventsPayload) -> Dict[str, Any]:
+    """Process a payment's stored gateway webhooks in order."""
+    from app.services.webhook_inbox import process_pending
+
+    processed = await process_pending(payload.gateway, payload.ordering_key)
+    return {"processed": processed}
@@ -0,0 +1,455 @@
+"""
+Content Safety Scanner
+
+Applies the admin keyword filters (KeywordFilter, managed through
+admin/moderation_service) to user-generated text on its write path:
+forum posts and replies, student shoutouts (the class wall), support
+chat and AI tutor replies.
+
+- Active filters are compiled into one Aho-Corasick automaton, so a scan
+  is a single pass over the text however many filters exist. The C
+  implementation from ``pyahocorasick`` is used when installed, with a
+  pure-Python automaton as the fallback.
+- Text and keywords go through the same normalisation: NFKD with
+  accents and zero-width characters removed, casefolding, common
+  homoglyphs and leetspeak (``h4t3`` -> ``hate``) mapped back to letters
+  and punctuation collapsed to single spaces. Keywords only match whole
+  words, so "class" does not trip a filter for "ass".
+- Each worker keeps its compiled scanner in memory. A session hook
+  notices committed KeywordFilter changes and broadcasts them on the
+  ``safety:filters`` Redis channel; every worker recompiles. The scanner
+  is also recompiled every ``content_safety_reload_seconds`` as a safety
+  net.
+- Matches become StaffModerationItem rows (with ``ai_risk_score``) through
+  a BatchedLogWriter, so flagged writes never wait on an INSERT.
+
+Usage:
+    from app.services.content_safety import screen_content
+
+    await screen_content("forum_post", post.id, author_id, post.content, title=post.title)
+
+screen_after_commit() defers the same call until the caller's session
+commits, so a rolled-back write is never queued for moderation.
+scan_content() and flag_content() split the two steps for callers that
+need a lookup (e.g. the author's user id) only when something matched.
+"""
+
+import asyncio
+import json
+import logging
+import re
+import string
+import time
+import unicodedata
+import uuid
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+
+from app import database
+from app.config import settings
+from app.models.admin.operations import KeywordFilter
+from app.models.staff.moderation_queue import StaffModerationItem
+from app.utils.log_writer import BatchedLogWriter
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+logger = logging.getLogger(__name__)
+
+RELOAD_CHANNEL = "safety:filters"
+
+# Identifies this worker so it can skip its own broadcasts
+_WORKER_ID = uuid.uuid4().hex
+
+SEVERITY_WEIGHTS = {"low": 0.25, "medium": 0.5, "high": 0.75, "critical": 1.0}
+
+# Leetspeak digits and look-alike letters (Cyrillic/Greek) mapped to ASCII
+_CONFUSABLES = str.maketrans({
+    "0": "o", "1": "i", "3": "e", "4": "a", "5": "s", "7": "t",
+    "а": "a", "е": "e", "о": "o", "р": "p", "с": "c", "у": "y", "х": "x", "і": "i", "ј": "j",
+    "α": "a", "ε": "e", "ι": "i", "κ": "k", "ν": "v", "ο": "o", "ρ": "p", "τ": "t", "υ": "u", "χ": "x",
+})
+# Symbols used as letters: only inside or in front of a word ("sh!t", "$hit"),
+# or "$"/"@" closing one ("a$$"), so "really!!" keeps its punctuation
+_LEET_SYMBOLS = str.maketrans({"@": "a", "$": "s", "!": "i", "|": "i", "+": "t"})
+_SYMBOLS_AS_LETTERS = re.compile(r"[@$!|+]+(?=\w)|(?<=\w)[@$]+")
+_SEPARATORS = re.compile(r"[\W_]+")
+
+
+_ASCII_SEPARATORS = str.maketrans({ch: " " for ch in string.punctuation})
+
+
+def normalize(text: str) -> str:
+    """Fold ``text`` for matching; the result is space-padded so words can be matched whole."""
+    ascii_only = text.isascii()
+    if not ascii_only:
+        text = "".join(
+            ch for ch in unicodedata.normalize("NFKD", text)
+            if unicodedata.category(ch) not in ("Mn", "Cf")
+        )
+        ascii_only = text.isascii()
+    text = text.casefold().translate(_CONFUSABLES)
+    if "@" in text or "$" in text or "!" in text or "|" in text or "+" in text:
+        text = _SYMBOLS_AS_LETTERS.sub(lambda m: m.group().translate(_LEET_SYMBOLS), text)
+    # str methods beat the regex on the common all-ASCII path
+    if ascii_only:
+        return f" {' '.join(text.translate(_ASCII_SEPARATORS).split())} "
+    return f" {_SEPARATORS.sub(' ', text).strip()} "
+
+
+@dataclass(frozen=True)
+class KeywordMatch:
+    keyword: str
+    category: str
+    severity: str
+
+
+@dataclass
+class ScanResult:
+    """The filters a piece of text matched."""
+
+    matches: List[KeywordMatch]
+
+    @property
+    def severity(self) -> str:
+        return max((m.severity for m in self.matches), key=lambda s: SEVERITY_WEIGHTS.get(s, 0))
+
+    @property
+    def category(self) -> str:
+        top = max(self.matches, key=lambda m: SEVERITY_WEIGHTS.get(m.severity, 0))
+        return top.category
+
+    @property
+    def categories(self) -> List[str]:
+        return sorted({m.category for m in self.matches})
+
+    @property
+    def risk_score(self) -> float:
+        """1 - prod(1 - weight) over the distinct matches, so more hits mean more risk."""
+        clean = 1.0
+        for match in self.matches:
+            clean *= 1.0 - SEVERITY_WEIGHTS.get(match.severity, 0.5)
+        return round(1.0 - clean, 3)
+
+
+class _Automaton:
+    """Pure-Python Aho-Corasick automaton (goto/fail/output tables)."""
+
+    def __init__(self, patterns: Dict[str, Any]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[Tuple[Any, ...]] = [()]
+        for pattern, payload in patterns.items():
+            state = 0
+            for ch in pattern:
+                nxt = self._goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[state][ch] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append(())
+                state = nxt
+            self._out[state] += (payload,)
+
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fallback = self._fail[state]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[nxt] = self._goto[fallback].get(ch, 0)
+                self._out[nxt] += self._out[self._fail[nxt]]
+
+    def iter(self, text: str) -> Iterator[Any]:
+        goto, fail, out = self._goto, self._fail, self._out
+        state = 0
+        for ch in text:
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if out[state]:
+                yield from out[state]
+
+
+class SafetyScanner:
+    """Active keyword filters compiled into one automaton."""
+
+    def __init__(self, filters: Iterable[Tuple[str, str, str]] = (), native: Optional[bool] = None):
+        patterns: Dict[str, KeywordMatch] = {}
+        for keyword, category, severity in filters:
+            pattern = normalize(keyword)
+            if not pattern.strip():
+                continue
+            match = KeywordMatch(keyword, category, severity or "medium")
+            current = patterns.get(pattern)
+            if current is None or SEVERITY_WEIGHTS.get(match.severity, 0) > SEVERITY_WEIGHTS.get(current.severity, 0):
+                patterns[pattern] = match
+        self.size = len(patterns)
+        self.loaded_at = time.monotonic()
+
+        if native is None:
+            native = ahocorasick is not None
+        self._native = None
+        self._automaton = None
+        if not patterns:
+            return
+        if native:
+            automaton = ahocorasick.Automaton()
+            for pattern, match in patterns.items():
+                automaton.add_word(pattern, match)
+            automaton.make_automaton()
+            self._native = automaton
+        else:
+            self._automaton = _Automaton(patterns)
+
+    def scan(self, text: Optional[str]) -> Optional[ScanResult]:
+        """Return the matched filters, or None for clean (or empty) text."""
+        if not text or not self.size:
+            return None
+        folded = normalize(text)
+        if self._native is not None:
+            found = (match for _, match in self._native.iter(folded))
+        else:
+            found = self._automaton.iter(folded)
+        matches = list(dict.fromkeys(found))
+        return ScanResult(matches) if matches else None
+
+
+# ── Per-worker scanner ───────────────────────────────────────────────
+
+_scanner = SafetyScanner()
+_loaded = False
+_reload_lock = asyncio.Lock()
+_pending_tasks: Set[asyncio.Task] = set()
+
+
+def get_scanner() -> SafetyScanner:
+    return _scanner
+
+
+async def load_safety_filters() -> SafetyScanner:
+    """Compile the active keyword filters into this worker's scanner."""
+    global _scanner, _loaded
+
+    async with _reload_lock:
+        if database.AsyncSessionLocal is None:
+            raise RuntimeError("database not initialized")
+        async with database.AsyncSessionLocal() as session:
+            rows = (await session.execute(
+                select(KeywordFilter.keyword, KeywordFilter.category, KeywordFilter.severity)
+                .where(KeywordFilter.is_active == True)  # noqa: E712
+            )).all()
+        _scanner = SafetyScanner(rows)
+        _loaded = True
+        logger.info(f"Content safety scanner compiled {_scanner.size} keyword filters")
+        return _scanner
+
+
+def _spawn(coro) -> None:
+    task = asyncio.create_task(coro)
+    _pending_tasks.add(task)
+    task.add_done_callback(_pending_tasks.discard)
+
+
+async def _reload_quietly() -> None:
+    try:
+        await load_safety_filters()
+    except Exception as e:
+        logger.warning(f"Content safety filter reload failed: {e}")
+
+
+async def _ensure_loaded() -> SafetyScanner:
+    global _loaded
+    if not _loaded:
+        # One inline attempt; after a failure the periodic reload retries
+        _loaded = True
+        if database.AsyncSessionLocal is not None:
+            await _reload_quietly()
+    elif time.monotonic() - _scanner.loaded_at > settings.content_safety_reload_seconds:
+        # Keep serving the current scanner while the refresh runs
+        _scanner.loaded_at = time.monotonic()
+        _spawn(_reload_quietly())
+    return _scanner
+
+
+# ── Moderation queue ─────────────────────────────────────────────────
+
+class ModerationQueueWriter(BatchedLogWriter):
+    """Batched writer for scanner-raised StaffModerationItem rows."""
+
+    def new_row(self, **values: Any) -> Dict[str, Any]:
+        row = super().new_row(**values)
+        row.setdefault("updated_at", row["created_at"])
+        return row
+
+
+moderation_queue_writer = ModerationQueueWriter(StaffModerationItem, "moderation")
+
+async def scan_content(text: Optional[str], title: Optional[str] = None) -> Optional[ScanResult]:
+    """Scan text with this worker's filters; never raises."""
+    try:
+        scanner = await _ensure_loaded()
+        return scanner.scan(f"{title}\n{text}" if title else text)
+    except Exception as e:
+        logger.warning(f"Content safety scan failed: {e}")
+        return None
+
+
+async def flag_content(
+    content_type: str,
+    content_id: Any,
+    author_id: Any,
+    text: Optional[str],
+    result: ScanResult,
+    title: Optional[str] = None,
+) -> None:
+    """Queue a moderation item for content that matched the filters."""
+    preview = (text or "")[:500]
+    try:
+        await moderation_queue_writer.submit(moderation_queue_writer.new_row(
+            content_type=content_type,
+            content_id=str(content_id),
+            title=(title or preview or content_type)[:255],
+            description=preview,
+            submitted_by=str(author_id),
+            status="pending",
+            priority=result.severity if result.severity in SEVERITY_WEIGHTS else "medium",
+            ai_flags=result.categories,
+            ai_risk_score=result.risk_score,
+            category=result.category,
+            extra_data={
+                "flag_source": "keyword_filter",
+                "keywords": [m.keyword for m in result.matches],
+            },
+        ))
+    except Exception as e:
+        logger.warning(f"Could not queue moderation item for {content_type} {content_id}: {e}")
+
+
+async def screen_content(
+    content_type: str,
+    content_id: Any,
+    author_id: Any,
+    text: Optional[str],
+    title: Optional[str] = None,
+) -> Optional[ScanResult]:
+    """
+    Scan user-generated text and queue a moderation item when it matches.
+
+    Never raises: scanner or queue failures are logged so the write that
+    produced the content goes through.
+    """
+    result = await scan_content(text, title)
+    if result is not None and content_id is not None and author_id is not None:
+        await flag_content(content_type, content_id, author_id, text, result, title)
+    return result
+
+
+_SCREEN_KEY = "content_to_screen"
+
+
+def screen_after_commit(
+    db: Any,
+    content_type: str,
+    content_id: Any,
+    author_id: Any,
+    text: Optional[str],
+    title: Optional[str] = None,
+) -> None:
+    """Screen content once ``db`` commits; dropped if it rolls back."""
+    db.info.setdefault(_SCREEN_KEY, []).append((content_type, content_id, author_id, text, title))
+    database.on_commit(db, _SCREEN_KEY, _screen_committed)
+
+
+async def _screen_committed(items: List[tuple]) -> None:
+    for content_type, content_id, author_id, text, title in items:
+        await screen_content(content_type, content_id, author_id, text, title=title)
+
+
+# ── Hot reload ───────────────────────────────────────────────────────
+
+_INFO_KEY = "keyword_filters_changed"
+
+
+async def publish_filter_change() -> None:
+    """Recompile here and tell the other workers to do the same."""
+    await _reload_quietly()
+    try:
+        from app.redis import get_redis
+
+        await get_redis().publish(RELOAD_CHANNEL, json.dumps({"origin": _WORKER_ID}))
+    except Exception as e:
+        logger.warning(f"Could not broadcast keyword filter change: {e}")
+
+
+@event.listens_for(Session, "after_flush")
+def _after_flush(session: Session, flush_context) -> None:
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, KeywordFilter):
+            session.info[_INFO_KEY] = True
+            database.on_commit(session, _INFO_KEY, lambda _: publish_filter_change())
+            return
+
+
+_listener_task: Optional[asyncio.Task] = None
+
+
+async def _listen() -> None:
+    from app.redis import get_redis
+
+    while True:
+        pubsub = None
+        try:
+            pubsub = get_redis().pubsub()
+            await pubsub.subscribe(RELOAD_CHANNEL)
+            # Changes may have been missed while disconnected
+            await _reload_quietly()
+            async for message in pubsub.listen():
+                if message["type"] != "message":
+                    continue
+                try:
+                    data = json.loads(message["data"])
+                except (TypeError, ValueError):
+                    logger.error("Invalid keyword filter reload message")
+                    continue
+                if data.get("origin") != _WORKER_ID:
+                    await _reload_quietly()
+        except asyncio.CancelledError:
+            break
+        except Exception as e:
+            logger.warning(f"Keyword filter listener error: {e}")
+            await asyncio.sleep(5)
+        finally:
+            if pubsub is not None:
+                try:
+                    await pubsub.close()
+                except Exception:
+                    pass
+
+
+def start_safety_listener() -> None:
+    """Compile filters and follow changes from other workers (lifespan startup)."""
+    global _listener_task
+    if _listener_task is None or _listener_task.done():
+        _listener_task = asyncio.create_task(_listen(), name="content-safety-listener")
+
+
+async def stop_safety_listener() -> None:
+    global _listener_task
+    if _listener_task is None:
+        return
+    _listener_task.cancel()
+    try:
+        await _listener_task
+    except asyncio.CancelledError:
+        pass
+    _listener_task = None
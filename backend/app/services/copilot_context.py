@@ -0,0 +1,114 @@
+"""
+CoPilot Context Snapshots
+
+CopilotService renders each user's system prompt from their agent profile
+and role-specific data (for a student: profile, mood, streak, level,
+skills and enrollments). The rendered prompt is cached per user for
+``copilot_context_ttl`` seconds, so consecutive messages reuse it instead
+of re-running those queries.
+
+Snapshots are tagged per user (and per student profile), and committed
+ORM writes to the data a prompt shows invalidate them: agent profiles,
+the user's name and role, student profiles and the student tables the
+prompt summarises. Data another user's prompt aggregates (a parent's
+children, an instructor's courses) is picked up when the TTL runs out.
+"""
+
+import logging
+from typing import Any, Iterable, List, Optional
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import on_commit
+from app.models.ai_agent_profile import AIAgentProfile
+from app.models.enrollment import Enrollment
+from app.models.student import Student
+from app.models.student_dashboard import StudentMoodEntry, StudentStreak
+from app.models.student_gamification import StudentLevel, StudentSkillNode
+from app.models.user import User
+from app.utils.cache import cache_get, cache_set, invalidate_tags
+
+logger = logging.getLogger(__name__)
+
+_INFO_KEY = "copilot_context_tags"
+
+# Student-owned rows the student prompt summarises
+_STUDENT_DATA = (StudentMoodEntry, StudentStreak, StudentLevel, StudentSkillNode, Enrollment)
+
+# User columns the prompt reads
+_USER_FIELDS = ("profile_data", "role")
+
+
+def _key(user_id: Any) -> str:
+    return f"copilot:context:{user_id}"
+
+
+def user_tag(user_id: Any) -> str:
+    return f"copilot:user:{user_id}"
+
+
+def student_tag(student_id: Any) -> str:
+    return f"copilot:student:{student_id}"
+
+
+def _tags(user: User) -> List[str]:
+    tags = [user_tag(user.id)]
+    student = user.__dict__.get("student_profile")
+    if student is not None:
+        tags.append(student_tag(student.id))
+    return tags
+
+
+async def get_snapshot(user: User) -> Optional[str]:
+    """The user's cached system prompt, or None."""
+    snapshot = await cache_get(_key(user.id))
+    if not snapshot or snapshot.get("role") != user.role:
+        return None
+    return snapshot["system_prompt"]
+
+
+async def store_snapshot(user: User, system_prompt: str) -> None:
+    await cache_set(
+        _key(user.id),
+        {"role": user.role, "system_prompt": system_prompt},
+        ttl=settings.copilot_context_ttl,
+        tags=_tags(user),
+    )
+
+
+async def invalidate_context(*tags: str) -> None:
+    """Drop the snapshots carrying any of ``tags`` (see user_tag/student_tag)."""
+    await invalidate_tags(*tags)
+
+
+# Session hook: note writes to prompt data, invalidate after commit
+
+
+def _changed(obj: Any, fields: Iterable[str]) -> bool:
+    attrs = inspect(obj).attrs
+    return any(attrs[name].history.has_changes() for name in fields)
+
+
+def _tag_for(obj: Any, state: str) -> Optional[str]:
+    if isinstance(obj, _STUDENT_DATA):
+        return student_tag(obj.student_id)
+    if isinstance(obj, Student):
+        return user_tag(obj.user_id)
+    # A snapshot is only built once the agent profile exists
+    if isinstance(obj, AIAgentProfile) and state != "new":
+        return user_tag(obj.user_id)
+    if isinstance(obj, User) and (state != "dirty" or _changed(obj, _USER_FIELDS)):
+        return user_tag(obj.id)
+    return None
+
+
+@event.listens_for(Session, "after_flush")
+def _after_flush(session: Session, flush_context) -> None:
+    for objects, state in ((session.new, "new"), (session.deleted, "deleted"), (session.dirty, "dirty")):
+        for obj in objects:
+            tag = _tag_for(obj, state)
+            if tag is not None:
+                session.info.setdefault(_INFO_KEY, set()).add(tag)
+                on_commit(session, _INFO_KEY, lambda tags: invalidate_context(*tags))
@@ -26,6 +26,7 @@ from app.schemas.copilot_schemas import (
     CopilotSessionDetail,
     CopilotSessionUpdate,
 )
+from app.services import copilot_context
 from app.services.ai_orchestrator import get_orchestrator
 
 logger = logging.getLogger(__name__)
@@ -368,11 +369,11 @@ class CopilotService:
         Uses a 3-phase pattern to avoid holding a DB connection during the
         AI round-trip (which can take 5-10 seconds and exhaust the pool):
 
-        Phase 1 (DB): Read session, agent profile, build prompt, load history
+        Phase 1 (DB): Read session, cached prompt (or build it), load history
         Phase 2 (No DB): Route query to AI orchestrator
         Phase 3 (DB): Save user message + AI response, update session
         """
-        from app.database import AsyncSessionLocal
+        from app.database import AsyncSessionLocal, release_db
 
         try:
             # ── Phase 1: Pre-AI DB reads ──────────────────────────────
@@ -382,11 +383,9 @@ class CopilotService:
             else:
                 session = await self.create_session(db, user.id, response_mode=request.response_mode)
 
-            # Load agent profile
-            agent_profile = await self.ensure_agent_profile(db, user)
-
-            # Build system prompt with user-specific data context
-            system_prompt = await self._build_system_prompt(db, user, agent_profile)
+            # System prompt with user-specific data context, reused
+            # across messages until that data changes
+            system_prompt = await self._system_prompt(db, user)
 
             # Load conversation context
             context = {}
@@ -434,9 +433,11 @@ class CopilotService:
             session_message_count = session.message_count
             user_id = user.id
 
-            # ── Phase 2: AI call (no DB session held) ─────────────────
+            # ── Phase 2: AI call (no DB connection held) ──────────────
+            # Hand the request session's connection back to the pool;
             # get_orchestrator(None) uses its own short-lived session if
-            # provider reload is needed, so the caller's DB connection is free
+            # provider reload is needed
+            await release_db(db)
             orchestrator = await get_orchestrator(None)
             ai_response = await orchestrator.route_query(
                 query=request.message,
@@ -483,9 +484,14 @@ class CopilotService:
                 await write_db.commit()
                 await write_db.refresh(assistant_message)
 
-                # Auto-title session from first user message
-                if session_message_count == 0:  # First exchange
-                    await self._auto_title_session(write_db, session_id, request.message)
+            # Auto-title session from first user message, off the request path
+            if session_message_count == 0:  # First exchange
+                from app.services.background_jobs import copilot_title
+                await copilot_title.enqueue(
+                    {"session_id": session_id, "first_message": request.message[:200]},
+                    owner_id=user_id,
+                    idempotency_key=str(session_id),
+                )
 
             return CopilotChatResponse(
                 message=assistant_message.content,
@@ -542,6 +548,15 @@ class CopilotService:
             logger.error(f"Error in CoPilot chat_stream: {str(e)}")
             yield json.dumps({"error": str(e), "done": True})
 
+    async def _system_prompt(self, db: AsyncSession, user: User) -> str:
+        """The user's system prompt from their context snapshot, built on a miss."""
+        system_prompt = await copilot_context.get_snapshot(user)
+        if system_prompt is None:
+            agent_profile = await self.ensure_agent_profile(db, user)
+            system_prompt = await self._build_system_prompt(db, user, agent_profile)
+            await copilot_context.store_snapshot(user, system_prompt)
+        return system_prompt
+
     async def _build_system_prompt(
         self, db: AsyncSession, user: User, agent_profile: AIAgentProfile
     ) -> str:
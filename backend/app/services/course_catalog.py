@@ -0,0 +1,302 @@
+"""
+Course Catalog - card projections and cached listing pages
+
+Catalog listings (the public /courses list, the student marketplace and
+recommendations) only render cards, so they never load Course entities:
+
+- card_query() selects the card columns plus the instructor's name
+  fields in one outer join, leaving the syllabus, lessons, competencies
+  and AI metadata JSONB columns on disk and replacing the per-course
+  instructor lookup.
+- Pages are keyset-paginated on (sort value, id): ``next_cursor`` is an
+  opaque token for the row after the last card, so deep pages cost the
+  same as the first one. ``skip`` still works for the first page jump.
+- catalog_page() caches each (filters, sort, cursor) page for
+  ``catalog_cache_ttl`` seconds under the ``catalog`` tag together with
+  an ETag, so unchanged pages can be answered with 304 Not Modified.
+- A session hook drops every cached page when a course is created,
+  deleted, published or has a card field edited. Enrollment and rating
+  counters are left to the TTL so enrollments don't churn the cache.
+"""
+
+import base64
+import hashlib
+import json
+import logging
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import and_, any_, event, func, inspect, literal, not_, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import on_commit
+from app.models.course import Course
+from app.models.user import User
+from app.schemas.course_schemas import CourseResponse
+from app.utils.cache import cached, invalidate_tags
+
+logger = logging.getLogger(__name__)
+
+CATALOG_TAG = "catalog"
+
+PLATFORM_INSTRUCTOR = "Urban Home School"
+UNKNOWN_INSTRUCTOR = "Unknown Instructor"
+
+TEACHER_LABELS = ("Teacher's Guide", "Diploma")
+
+CARD_COLUMNS = (
+    Course.id,
+    Course.course_code,
+    Course.title,
+    Course.description,
+    Course.learning_area,
+    Course.grade_levels,
+    Course.thumbnail_url,
+    Course.instructor_id,
+    Course.is_platform_created,
+    Course.price,
+    Course.currency,
+    Course.is_published,
+    Course.is_featured,
+    Course.enrollment_count,
+    Course.average_rating,
+    Course.total_reviews,
+    Course.estimated_duration_hours,
+    Course.created_at,
+    Course.updated_at,
+    Course.published_at,
+)
+
+# Counters that change on every enrollment/review; cached pages catch up via the TTL
+_COUNTER_FIELDS = {"enrollment_count", "average_rating", "total_reviews"}
+_CARD_FIELDS = {column.key for column in CARD_COLUMNS} - _COUNTER_FIELDS
+
+# sort name -> (column, ascending)
+SORTS = {
+    "newest": (Course.created_at, False),
+    "popular": (Course.enrollment_count, False),
+    "rating": (Course.average_rating, False),
+    "price_low": (Course.price, True),
+    "price_high": (Course.price, False),
+}
+
+
+def card_query():
+    """Select card columns with the instructor's name fields pre-joined."""
+    return (
+        select(*CARD_COLUMNS, User.email.label("instructor_email"), User.profile_data.label("instructor_profile"))
+        .outerjoin(User, User.id == Course.instructor_id)
+    )
+
+
+def instructor_name(row: Any) -> str:
+    if not row.instructor_id:
+        return PLATFORM_INSTRUCTOR
+    if row.instructor_profile:
+        return row.instructor_profile.get("full_name", row.instructor_email)
+    return UNKNOWN_INSTRUCTOR
+
+
+def to_card(row: Any) -> Dict[str, Any]:
+    """A JSON-ready card: the CourseResponse fields plus ``instructor_name``."""
+    card = CourseResponse.model_validate(row).model_dump(mode="json")
+    card["instructor_name"] = instructor_name(row)
+    return card
+
+
+def catalog_filters(
+    grade_level: Optional[str] = None,
+    learning_area: Optional[str] = None,
+    is_published: Optional[bool] = True,
+    is_featured: Optional[bool] = None,
+    search: Optional[str] = None,
+    instructor_id: Optional[Any] = None,
+    audience: Optional[str] = None,
+    is_free: Optional[bool] = None,
+    course_code: Optional[str] = None,
+) -> List[Any]:
+    """WHERE clauses for the catalog's filters."""
+    filters = []
+    if is_published is not None:
+        filters.append(Course.is_published == is_published)
+    if is_featured is not None:
+        filters.append(Course.is_featured == is_featured)
+    if grade_level:
+        # any_() checks if grade_level equals ANY element in the grade_levels array
+        filters.append(literal(grade_level) == any_(Course.grade_levels))
+
+    # Audience filter: separate student courses from teacher resources
+    teacher_resource = or_(*[literal(label) == any_(Course.grade_levels) for label in TEACHER_LABELS])
+    if audience == "students":
+        filters.append(not_(teacher_resource))
+    elif audience == "teachers":
+        filters.append(teacher_resource)
+    elif audience == "revision":
+        filters.append(Course.title.ilike("%Revision%"))
+
+    if is_free is True:
+        filters.append(Course.price == 0)
+    elif is_free is False:
+        filters.append(Course.price > 0)
+    if learning_area:
+        filters.append(Course.learning_area == learning_area)
+    if instructor_id:
+        filters.append(Course.instructor_id == instructor_id)
+    if course_code:
+        filters.append(Course.course_code == course_code)
+    if search:
+        filters.append(or_(
+            Course.title.ilike(f"%{search}%"),
+            Course.description.ilike(f"%{search}%"),
+        ))
+    return filters
+
+
+# ── Keyset cursors ───────────────────────────────────────────────────
+
+def _sort(sort: str):
+    try:
+        return SORTS[sort]
+    except KeyError:
+        raise ValueError(f"Unknown sort: {sort}")
+
+
+def encode_cursor(value: Any, course_id: Any) -> str:
+    """Opaque cursor for the card after (``value``, ``course_id``)."""
+    raw = value.isoformat() if isinstance(value, datetime) else str(value)
+    payload = json.dumps([raw, str(course_id)]).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str):
+    """Inverse of encode_cursor(); raises ValueError for a malformed cursor."""
+    column, _ = _sort(sort)
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        raw, course_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        python_type = column.type.python_type
+        value = datetime.fromisoformat(raw) if python_type is datetime else python_type(raw)
+        return value, Course.id.type.python_type(course_id)
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+
+def _after(sort: str, cursor: str):
+    column, ascending = _sort(sort)
+    value, course_id = decode_cursor(cursor, sort)
+    if ascending:
+        return or_(column > value, and_(column == value, Course.id > course_id))
+    return or_(column < value, and_(column == value, Course.id < course_id))
+
+
+def _order_by(sort: str):
+    column, ascending = _sort(sort)
+    if ascending:
+        return column.asc(), Course.id.asc()
+    return column.desc(), Course.id.desc()
+
+
+def make_etag(*parts: Any) -> str:
+    digest = hashlib.sha1(json.dumps(parts, sort_keys=True, default=str).encode()).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header covers ``etag``."""
+    if not if_none_match:
+        return False
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return "*" in candidates or etag in candidates
+
+
+# ── Pages ────────────────────────────────────────────────────────────
+
+@cached(
+    "catalog:page",
+    ttl=settings.catalog_cache_ttl,
+    stale_ttl=settings.catalog_cache_stale_ttl,
+    tags=[CATALOG_TAG],
+)
+async def catalog_page(
+    db: AsyncSession,
+    sort: str = "newest",
+    cursor: Optional[str] = None,
+    skip: int = 0,
+    limit: int = 20,
+    **filters: Any,
+) -> Dict[str, Any]:
+    """
+    One page of catalog cards for a set of catalog_filters() arguments.
+
+    Returns ``{"courses", "total", "limit", "skip", "has_more",
+    "next_cursor", "etag"}``. With a ``cursor`` the page starts after it
+    and ``skip`` is ignored. Raises ValueError for an unknown sort or a
+    malformed cursor.
+    """
+    order_by = _order_by(sort)
+    conditions = catalog_filters(**filters)
+    total = (await db.execute(
+        select(func.count(Course.id)).where(*conditions)
+    )).scalar_one()
+
+    query = card_query().where(*conditions).order_by(*order_by)
+    if cursor:
+        query = query.where(_after(sort, cursor))
+        skip = 0
+    rows = (await db.execute(query.offset(skip).limit(limit + 1))).all()
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor = None
+    if has_more:
+        column, _ = SORTS[sort]
+        last = rows[-1]
+        next_cursor = encode_cursor(getattr(last, column.key), last.id)
+
+    page = {
+        "courses": [to_card(row) for row in rows],
+        "total": total,
+        "limit": limit,
+        "skip": skip,
+        "has_more": has_more,
+        "next_cursor": next_cursor,
+    }
+    page["etag"] = make_etag(page)
+    return page
+
+
+async def invalidate_catalog() -> None:
+    """Drop every cached catalog page."""
+    await invalidate_tags(CATALOG_TAG)
+
+
+# Session hook: note catalog-visible course changes, invalidate after commit
+
+_INFO_KEY = "catalog_changed"
+
+
+def mark_catalog_changed(db: AsyncSession) -> None:
+    """Invalidate the catalog on commit (for bulk statements the hook can't see)."""
+    db.info[_INFO_KEY] = True
+    on_commit(db, _INFO_KEY, lambda _: invalidate_catalog())
+
+
+def _card_changed(course: Course) -> bool:
+    attrs = inspect(course).attrs
+    return any(attrs[name].history.has_changes() for name in _CARD_FIELDS)
+
+
+@event.listens_for(Session, "after_flush")
+def _after_flush(session: Session, flush_context) -> None:
+    if session.info.get(_INFO_KEY):
+        return
+    for obj in (*session.new, *session.deleted):
+        if isinstance(obj, Course):
+            mark_catalog_changed(session)
+            return
+    for obj in session.dirty:
+        if isinstance(obj, Course) and _card_changed(obj):
+            mark_catalog_changed(session)
+            return
@@ -20,7 +20,7 @@ from decimal import Decimal
 from typing import List, Optional
 from uuid import UUID
 
-from sqlalchemy import select, func, and_, or_, not_, any_, literal
+from sqlalchemy import select, func, and_
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import joinedload
 
@@ -29,6 +29,7 @@ from app.models.enrollment import Enrollment, EnrollmentStatus
 from app.models.user import User
 from app.schemas.course_schemas import CourseCreate, CourseUpdate
 from app.schemas.enrollment_schemas import EnrollmentCreate
+from app.services.course_catalog import catalog_filters
 
 
 class CourseService:
@@ -141,57 +142,18 @@ class CourseService:
         query = select(Course)
         count_query = select(func.count(Course.id))
 
-        # Apply filters
-        filters = []
-
-        if is_published is not None:
-            filters.append(Course.is_published == is_published)
-
-        if is_featured is not None:
-            filters.append(Course.is_featured == is_featured)
-
-        if grade_level:
-            # any_() checks if grade_level equals ANY element in the grade_levels array
-            filters.append(literal(grade_level) == any_(Course.grade_levels))
-
-        # Audience filter: separate student courses from teacher resources
-        if audience == "students":
-            filters.append(
-                not_(or_(
-                    literal("Teacher's Guide") == any_(Course.grade_levels),
-                    literal("Diploma") == any_(Course.grade_levels),
-                ))
-            )
-        elif audience == "teachers":
-            filters.append(
-                or_(
-                    literal("Teacher's Guide") == any_(Course.grade_levels),
-                    literal("Diploma") == any_(Course.grade_levels),
-                )
-            )
-        elif audience == "revision":
-            filters.append(Course.title.ilike("%Revision%"))
-
-        if is_free is True:
-            filters.append(Course.price == 0)
-        elif is_free is False:
-            filters.append(Course.price > 0)
-
-        if learning_area:
-            filters.append(Course.learning_area == learning_area)
-
-        if instructor_id:
-            filters.append(Course.instructor_id == instructor_id)
-
-        if course_code:
-            filters.append(Course.course_code == course_code)
-
-        if search_query:
-            search_filter = or_(
-                Course.title.ilike(f"%{search_query}%"),
-                Course.description.ilike(f"%{search_query}%")
-            )
-            filters.append(search_filter)
+        # Apply filters (shared with the catalog read model)
+        filters = catalog_filters(
+            grade_level=grade_level,
+            learning_area=learning_area,
+            is_published=is_published,
+            is_featured=is_featured,
+            search=search_query,
+            instructor_id=instructor_id,
+            audience=audience,
+            is_free=is_free,
+            course_code=course_code,
+        )
 
         if filters:
             query = query.where(and_(*filters))
@@ -372,6 +334,9 @@ class CourseService:
         """
         Update enrollment progress when a lesson is completed.
 
+        The first completion of a lesson earns lesson XP (queued on the XP
+        ledger when the progress commits).
+
         Args:
             db: Database session
             enrollment_id: Enrollment UUID
@@ -389,7 +354,13 @@ class CourseService:
         if not enrollment:
             return None
 
-        # Mark lesson as complete
+        # Mark lesson as complete; the first completion earns lesson XP
+        if completed_lesson_id not in enrollment.completed_lessons:
+            from app.services.student.gamification_service import GamificationService
+
+            await GamificationService(db).record_xp(
+                enrollment.student_id, "lesson_complete", f"Completed lesson {completed_lesson_id}"
+            )
         enrollment.mark_lesson_complete(completed_lesson_id)
 
         # Update time spent
@@ -496,3 +496,41 @@ def send_contact_notification_email(
         f"[UHS Contact] {subject} — from {sender_name}",
         html,
     )
+
+
+def send_scheduled_report_email(to_email: str, report_name: str, download_url: str) -> bool:
+    """
+    Deliver a scheduled report export to one of the schedule's recipients.
+
+    Args:
+        to_email: Recipient email address
+        report_name: Name of the generated export file
+        download_url: API path of the stored export
+
+    Returns:
+        True if sent successfully, False otherwise
+    """
+    link = f"{FRONTEND_URL}{download_url}"
+
+    html = f"""
+    <html>
+    <body style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto; padding: 20px;">
+        <h2 style="color: #FF0000;">Your Scheduled Report is Ready</h2>
+        <p>The report <strong>{report_name}</strong> has been generated.</p>
+        <p style="text-align: center; margin: 30px 0;">
+            <a href="{link}"
+               style="background-color: #FF0000; color: white; padding: 14px 28px;
+                      text-decoration: none; border-radius: 8px; display: inline-block;
+                      font-weight: bold; font-size: 16px;">
+                Download Report
+            </a>
+        </p>
+        <hr style="border: none; border-top: 1px solid #eee; margin: 20px 0;">
+        <p style="color: #999; font-size: 12px;">
+            You are receiving this because you are a recipient of a report schedule on Urban Home School.
+        </p>
+    </body>
+    </html>
+    """
+
+    return _send_email(to_email, f"Scheduled Report: {report_name} — Urban Home School", html)
@@ -0,0 +1,183 @@
+"""
+Text Embedding Backends
+
+Knowledge base chunks and search queries are embedded by the backend
+named in ``kb_embedding_backend``:
+
+- ``openai``: the OpenAI embeddings API (async client), many texts per
+  request (``kb_embedding_batch_size``).
+- ``local``: signed feature hashing of words and word pairs. No network
+  and deterministic, so search works without an API key and can be
+  benchmarked offline; matches are lexical rather than semantic.
+- ``auto`` (default): openai when an API key is configured, else local.
+
+Further backends are added with register_embedding_backend(). Every
+backend returns EMBEDDING_DIMENSION floats so its vectors fit the
+kb_embeddings.embedding column, and names its ``model``; stored vectors
+record that model so vectors of different models are never compared.
+"""
+
+import hashlib
+import logging
+import math
+import re
+from collections import Counter
+from typing import Callable, Dict, List, Optional
+
+from app.config import settings
+from app.utils.cache import LocalCache
+
+logger = logging.getLogger(__name__)
+
+# Width of the kb_embeddings.embedding column (text-embedding-ada-002)
+EMBEDDING_DIMENSION = 1536
+
+# Query embeddings only change with the model, which is part of the key
+_QUERY_CACHE_TTL = 24 * 3600
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+
+class EmbeddingBackend:
+    """Turns texts into vectors; subclasses implement ``_embed_batch``."""
+
+    model: str = ""
+    batch_size: int = 64
+
+    async def embed(self, texts: List[str]) -> List[List[float]]:
+        """Embed ``texts`` in order, ``batch_size`` texts per call."""
+        vectors: List[List[float]] = []
+        for start in range(0, len(texts), self.batch_size):
+            vectors.extend(await self._embed_batch(texts[start:start + self.batch_size]))
+        return vectors
+
+    async def _embed_batch(self, texts: List[str]) -> List[List[float]]:
+        raise NotImplementedError
+
+
+class OpenAIEmbeddingBackend(EmbeddingBackend):
+    """OpenAI embeddings API."""
+
+    def __init__(self, api_key: str, model: str, batch_size: int):
+        from openai import AsyncOpenAI
+
+        self._client = AsyncOpenAI(api_key=api_key)
+        self.model = model
+        self.batch_size = batch_size
+
+    async def _embed_batch(self, texts: List[str]) -> List[List[float]]:
+        response = await self._client.embeddings.create(
+            model=self.model,
+            input=[t[:8000] for t in texts],
+        )
+        return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+
+
+class LocalEmbeddingBackend(EmbeddingBackend):
+    """Hashed bag of words and word pairs, L2-normalised."""
+
+    model = "local-hash-v1"
+    batch_size = 256
+
+    def __init__(self, dimension: int = EMBEDDING_DIMENSION):
+        self.dimension = dimension
+
+    async def _embed_batch(self, texts: List[str]) -> List[List[float]]:
+        return [self.vector(text) for text in texts]
+
+    def vector(self, text: str) -> List[float]:
+        words = _TOKEN.findall(text.lower())
+        features = Counter(words)
+        features.update(f"{a} {b}" for a, b in zip(words, words[1:]))
+
+        vector = [0.0] * self.dimension
+        for feature, count in features.items():
+            h = int.from_bytes(hashlib.blake2b(feature.encode(), digest_size=8).digest(), "little")
+            # Sublinear term frequency; the top bit picks the sign so
+            # colliding features tend to cancel rather than add up
+            weight = 1.0 + math.log(count)
+            vector[h % self.dimension] += -weight if h >> 63 else weight
+
+        norm = math.sqrt(sum(v * v for v in vector))
+        return [v / norm for v in vector] if norm else vector
+
+
+_factories: Dict[str, Callable[[], EmbeddingBackend]] = {}
+_instances: Dict[str, EmbeddingBackend] = {}
+
+
+def register_embedding_backend(name: str, factory: Callable[[], EmbeddingBackend]) -> None:
+    """Make a backend selectable through ``kb_embedding_backend``."""
+    _factories[name] = factory
+    _instances.pop(name, None)
+
+
+register_embedding_backend("openai", lambda: OpenAIEmbeddingBackend(
+    settings.openai_api_key, settings.kb_embedding_model, settings.kb_embedding_batch_size,
+))
+register_embedding_backend("local", LocalEmbeddingBackend)
+
+
+def get_embedding_backend() -> Optional[EmbeddingBackend]:
+    """The configured backend, or None when it cannot be used."""
+    name = settings.kb_embedding_backend
+    if name == "auto":
+        name = "openai" if settings.openai_api_key else "local"
+    if name == "openai" and not settings.openai_api_key:
+        logger.debug("No OpenAI API key configured for embeddings")
+        return None
+    if name not in _instances:
+        factory = _factories.get(name)
+        if factory is None:
+            logger.warning(f"Unknown embedding backend: {name}")
+            return None
+        _instances[name] = factory()
+    return _instances[name]
+
+
+def content_hash(text: str, model: str) -> str:
+    """Identifies a chunk's vector: same text and model, same vector."""
+    return hashlib.sha256(f"{model}\0{text}".encode()).hexdigest()
+
+
+# ── Query embeddings ─────────────────────────────────────────────────
+
+_query_cache = LocalCache(settings.kb_query_embedding_cache_size)
+
+
+def _record_query(result: str) -> None:
+    try:
+        from app.metrics import embedding_query_cache_total
+
+        embedding_query_cache_total.labels(result=result).inc()
+    except Exception:
+        pass
+
+
+async def embed_query(text: str) -> Optional[List[float]]:
+    """
+    Embed a search query, reusing recent embeddings of the same query.
+
+    Returns None when no backend is available, the call fails or the
+    query has nothing to embed.
+    """
+    backend = get_embedding_backend()
+    if backend is None:
+        return None
+
+    key = content_hash(" ".join(text.split()), backend.model)
+    vector = _query_cache.get(key)
+    if vector is not None:
+        _record_query("hit")
+        return vector
+    _record_query("miss")
+
+    try:
+        vector = (await backend.embed([text]))[0]
+    except Exception as e:
+        logger.warning(f"Query embedding failed: {e}")
+        return None
+    if not any(vector):
+        return None
+    _query_cache.set(key, vector, _QUERY_CACHE_TTL)
+    return vector
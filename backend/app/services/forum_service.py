@@ -26,6 +26,7 @@ from sqlalchemy import select, func, desc, or_
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.forum import ForumPost, ForumReply, ForumLike
+from app.services.content_safety import screen_after_commit
 from app.models.user import User
 
 logger = logging.getLogger(__name__)
@@ -161,6 +162,7 @@ async def create_post(
     )
     db.add(post)
     await db.flush()
+    screen_after_commit(db, "forum_post", post.id, author_id, post.content, title=post.title)
     return post
 
 
@@ -363,6 +365,8 @@ async def update_post(
         post.tags = [sanitize_html(tag) for tag in tags]
 
     await db.flush()
+    if title is not None or content is not None:
+        screen_after_commit(db, "forum_post", post.id, author_id, post.content, title=post.title)
     return post
 
 
@@ -422,6 +426,7 @@ async def create_reply(
 
     post.last_activity_at = datetime.now(timezone.utc)
     await db.flush()
+    screen_after_commit(db, "forum_reply", reply.id, author_id, reply.content)
 
     return reply
 
@@ -449,6 +454,7 @@ async def update_reply(
     # Sanitize updated content to prevent XSS
     reply.content = sanitize_html(content)
     await db.flush()
+    screen_after_commit(db, "forum_reply", reply.id, author_id, reply.content)
     return reply
 
 
@@ -15,9 +15,9 @@ from app.models.course import Course
 from app.models.enrollment import Enrollment
 from app.models.staff.live_session import LiveSession
 from app.models.staff.assessment import AdaptiveAssessment as Assessment
-from app.models.instructor.instructor_earnings import InstructorEarning
 from app.models.instructor.instructor_gamification import InstructorPoints
 from app.services.ai_orchestrator import AIOrchestrator
+from app.services.instructor import earnings_ledger
 
 logger = logging.getLogger(__name__)
 
@@ -75,26 +75,10 @@ async def get_dashboard_stats(
         upcoming_sessions_result = await db.execute(upcoming_sessions_q)
         upcoming_sessions_count: int = upcoming_sessions_result.scalar() or 0
 
-        # Earnings this month
-        earnings_month_q = select(func.sum(InstructorEarning.net_amount)).where(
-            and_(
-                InstructorEarning.instructor_id == instructor_id,
-                InstructorEarning.created_at >= month_start,
-                InstructorEarning.status == "confirmed"
-            )
-        )
-        earnings_month_result = await db.execute(earnings_month_q)
-        earnings_this_month = earnings_month_result.scalar() or 0.0
-
-        # Total earnings (all time)
-        earnings_total_q = select(func.sum(InstructorEarning.net_amount)).where(
-            and_(
-                InstructorEarning.instructor_id == instructor_id,
-                InstructorEarning.status.in_(["confirmed", "paid"])
-            )
-        )
-        earnings_total_result = await db.execute(earnings_total_q)
-        earnings_total = earnings_total_result.scalar() or 0.0
+        # Earnings this month and all time (confirmed/paid), from the ledger
+        month_totals = await earnings_ledger.get_period_totals(db, instructor_id, since=month_start.date())
+        earnings_this_month = month_totals["earned"]
+        earnings_total = (await earnings_ledger.get_balance(db, instructor_id))["total_earned"]
 
         # Average rating and reviews (from courses)
         rating_q = select(
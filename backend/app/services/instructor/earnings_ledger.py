@@ -0,0 +1,435 @@
+"""
+Instructor Earnings Ledger
+
+Materialised totals for instructor earnings, so balance checks and
+dashboards stop summing every earning and payout on each request:
+
+- instructor_balances has one row per instructor: net of confirmed/paid
+  earnings, net of pending ones, and payouts that hold funds (requested,
+  processing, completed). The available balance is earned minus paid out.
+- instructor_earning_periods has monthly buckets per earning type and
+  course, which serve the earnings breakdown and the dashboard totals.
+
+A flush hook turns ORM inserts, updates and deletes of InstructorEarning
+and InstructorPayout into deltas and applies them on the flush's own
+connection, so the ledger commits or rolls back with the rows it
+summarises. Every change touches the instructor's balance row, which
+request_payout() locks for its check. Statements that bypass the ORM are
+not seen; reconcile_earnings_ledger() compares the ledger with the raw
+rows and rebuilds drifted instructors, and the scheduler runs it every
+``earnings_ledger_reconcile_seconds``.
+"""
+
+import logging
+import uuid
+from collections import defaultdict
+from datetime import date, datetime
+from decimal import ROUND_HALF_UP, Decimal
+from typing import Any, Dict, Optional, Set, Tuple
+
+from sqlalchemy import case, delete, event, func, inspect, insert, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.models.instructor.instructor_earnings import (
+    EarningType,
+    InstructorBalance,
+    InstructorEarning,
+    InstructorEarningPeriod,
+    InstructorPayout,
+)
+
+logger = logging.getLogger(__name__)
+
+# Earning statuses that count towards the balance, payout statuses that hold funds
+COUNTED_EARNINGS = ("confirmed", "paid")
+HELD_PAYOUTS = ("requested", "processing", "completed")
+
+_BALANCE_FIELDS = ("total_earned", "pending_earnings", "total_paid_out")
+_PERIOD_FIELDS = ("gross_amount", "net_amount", "earned_net", "earnings_count")
+
+# Columns whose changes move an earning's or payout's contribution
+_EARNING_COLUMNS = ("instructor_id", "course_id", "earning_type", "gross_amount", "net_amount", "status", "created_at")
+_PAYOUT_COLUMNS = ("instructor_id", "amount", "status")
+
+_CENT = Decimal("0.01")
+
+PeriodKey = Tuple[uuid.UUID, date, EarningType, Optional[uuid.UUID]]
+
+
+def _money(value: Any) -> Decimal:
+    return Decimal(str(value or 0)).quantize(_CENT, rounding=ROUND_HALF_UP)
+
+
+def _uuid(value: Any) -> Optional[uuid.UUID]:
+    if value is None or isinstance(value, uuid.UUID):
+        return value
+    return uuid.UUID(str(value))
+
+
+def _enum_value(value: Any) -> Any:
+    return getattr(value, "value", value)
+
+
+def period_start(moment: Optional[datetime]) -> date:
+    """First day of the month ``moment`` falls in (now if None)."""
+    moment = moment or datetime.utcnow()
+    return date(moment.year, moment.month, 1)
+
+
+def _zeros(fields) -> Dict[str, Decimal]:
+    return dict.fromkeys(fields, Decimal("0"))
+
+
+# Contributions of single rows
+
+def _reader(obj: Any, old: bool):
+    """Attribute getter for the row's flushed (new) or previous (old) values."""
+    if not old:
+        return lambda name: getattr(obj, name)
+    attrs = inspect(obj).attrs
+
+    def get(name: str) -> Any:
+        history = attrs[name].history
+        return history.deleted[0] if history.deleted else getattr(obj, name)
+    return get
+
+
+def _earning_contribution(get) -> Tuple[uuid.UUID, Dict[str, Decimal], PeriodKey, Dict[str, Decimal]]:
+    status = _enum_value(get("status"))
+    net = _money(get("net_amount"))
+    earned = net if status in COUNTED_EARNINGS else Decimal("0")
+
+    instructor_id = _uuid(get("instructor_id"))
+    balance = {
+        "total_earned": earned,
+        "pending_earnings": net if status == "pending" else Decimal("0"),
+    }
+    key = (
+        instructor_id,
+        period_start(get("created_at")),
+        EarningType(_enum_value(get("earning_type"))),
+        _uuid(get("course_id")),
+    )
+    bucket = {
+        "gross_amount": _money(get("gross_amount")),
+        "net_amount": net,
+        "earned_net": earned,
+        "earnings_count": Decimal("1"),
+    }
+    return instructor_id, balance, key, bucket
+
+
+def _payout_contribution(get) -> Tuple[uuid.UUID, Dict[str, Decimal]]:
+    held = _enum_value(get("status")) in HELD_PAYOUTS
+    return _uuid(get("instructor_id")), {"total_paid_out": _money(get("amount")) if held else Decimal("0")}
+
+
+def _changed(obj: Any, columns) -> bool:
+    attrs = inspect(obj).attrs
+    return any(attrs[name].history.has_changes() for name in columns)
+
+
+# Session hook: apply deltas in the flushing transaction
+
+@event.listens_for(Session, "after_flush")
+def _after_flush(session: Session, flush_context) -> None:
+    balances: Dict[uuid.UUID, Dict[str, Decimal]] = defaultdict(lambda: _zeros(_BALANCE_FIELDS))
+    periods: Dict[PeriodKey, Dict[str, Decimal]] = defaultdict(lambda: _zeros(_PERIOD_FIELDS))
+
+    def add(get, sign: int, is_earning: bool) -> None:
+        if is_earning:
+            instructor_id, balance, key, bucket = _earning_contribution(get)
+            for field, value in bucket.items():
+                periods[key][field] += sign * value
+        else:
+            instructor_id, balance = _payout_contribution(get)
+        for field, value in balance.items():
+            balances[instructor_id][field] += sign * value
+
+    for objects, state in ((session.new, "new"), (session.deleted, "deleted"), (session.dirty, "dirty")):
+        for obj in objects:
+            is_earning = isinstance(obj, InstructorEarning)
+            if not is_earning and not isinstance(obj, InstructorPayout):
+                continue
+            if state == "new":
+                add(_reader(obj, old=False), 1, is_earning)
+            elif state == "deleted":
+                add(_reader(obj, old=True), -1, is_earning)
+            elif _changed(obj, _EARNING_COLUMNS if is_earning else _PAYOUT_COLUMNS):
+                add(_reader(obj, old=True), -1, is_earning)
+                add(_reader(obj, old=False), 1, is_earning)
+
+    if not balances:
+        return
+    connection = session.connection()
+    for instructor_id, deltas in balances.items():
+        _apply_balance(connection, instructor_id, deltas)
+    for key, deltas in periods.items():
+        if any(deltas.values()):
+            _apply_period(connection, key, deltas)
+
+
+def _apply_balance(connection, instructor_id: uuid.UUID, deltas: Dict[str, Decimal]) -> None:
+    """Add ``deltas`` to the instructor's row, creating it if needed (always takes the row lock)."""
+    table = InstructorBalance.__table__
+    now = datetime.utcnow()
+    dialect = connection.dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        insert_ = pg_insert if dialect == "postgresql" else sqlite_insert
+        stmt = insert_(table).values(instructor_id=instructor_id, updated_at=now, **deltas)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.instructor_id],
+            set_={
+                **{field: table.c[field] + stmt.excluded[field] for field in deltas},
+                "updated_at": now,
+            },
+        )
+        connection.execute(stmt)
+        return
+
+    result = connection.execute(
+        update(table)
+        .where(table.c.instructor_id == instructor_id)
+        .values({**{field: table.c[field] + value for field, value in deltas.items()}, "updated_at": now})
+    )
+    if result.rowcount == 0:
+        connection.execute(insert(table).values(instructor_id=instructor_id, updated_at=now, **deltas))
+
+
+def _apply_period(connection, key: PeriodKey, deltas: Dict[str, Decimal]) -> None:
+    table = InstructorEarningPeriod.__table__
+    instructor_id, start, earning_type, course_id = key
+    values = {**deltas, "earnings_count": int(deltas["earnings_count"])}
+    result = connection.execute(
+        update(table)
+        .where(
+            table.c.instructor_id == instructor_id,
+            table.c.period_start == start,
+            table.c.earning_type == earning_type,
+            table.c.course_id.is_(None) if course_id is None else table.c.course_id == course_id,
+        )
+        .values({field: table.c[field] + value for field, value in values.items()})
+    )
+    # Two transactions may both create the key; readers sum, so that is harmless
+    if result.rowcount == 0:
+        connection.execute(insert(table).values(
+            id=uuid.uuid4(), instructor_id=instructor_id, period_start=start,
+            earning_type=earning_type, course_id=course_id, **values,
+        ))
+
+
+# Reads
+
+async def get_balance(db: AsyncSession, instructor_id: Any, for_update: bool = False) -> Dict[str, Decimal]:
+    """
+    The instructor's ledger totals plus ``available``.
+
+    With ``for_update`` the balance row stays locked until the
+    transaction ends, serialising payout checks for the instructor.
+    """
+    query = select(
+        InstructorBalance.total_earned,
+        InstructorBalance.pending_earnings,
+        InstructorBalance.total_paid_out,
+    ).where(InstructorBalance.instructor_id == _uuid(instructor_id))
+    if for_update:
+        query = query.with_for_update()
+    row = (await db.execute(query)).one_or_none()
+
+    totals = _zeros(_BALANCE_FIELDS)
+    if row is not None:
+        totals.update({field: _money(value) for field, value in row._mapping.items()})
+    totals["available"] = totals["total_earned"] - totals["total_paid_out"]
+    return totals
+
+
+async def get_period_totals(
+    db: AsyncSession,
+    instructor_id: Any,
+    since: Optional[date] = None,
+    until: Optional[date] = None,
+) -> Dict[str, Any]:
+    """
+    Bucket sums for months starting in [since, until]: overall totals,
+    net by earning type and the top 10 courses by net.
+    """
+    filters = [InstructorEarningPeriod.instructor_id == _uuid(instructor_id)]
+    if since is not None:
+        filters.append(InstructorEarningPeriod.period_start >= since)
+    if until is not None:
+        filters.append(InstructorEarningPeriod.period_start <= until)
+
+    totals = (await db.execute(
+        select(
+            func.coalesce(func.sum(InstructorEarningPeriod.gross_amount), 0).label("gross"),
+            func.coalesce(func.sum(InstructorEarningPeriod.net_amount), 0).label("net"),
+            func.coalesce(func.sum(InstructorEarningPeriod.earned_net), 0).label("earned"),
+        ).where(*filters)
+    )).one()
+
+    by_type_rows = (await db.execute(
+        select(InstructorEarningPeriod.earning_type, func.sum(InstructorEarningPeriod.net_amount))
+        .where(*filters)
+        .group_by(InstructorEarningPeriod.earning_type)
+    )).all()
+
+    by_course_rows = (await db.execute(
+        select(
+            InstructorEarningPeriod.course_id,
+            func.sum(InstructorEarningPeriod.net_amount).label("amount"),
+            func.sum(InstructorEarningPeriod.earnings_count).label("count"),
+        )
+        .where(*filters, InstructorEarningPeriod.course_id.isnot(None))
+        .group_by(InstructorEarningPeriod.course_id)
+        .order_by(func.sum(InstructorEarningPeriod.net_amount).desc())
+        .limit(10)
+    )).all()
+
+    return {
+        "gross": _money(totals.gross),
+        "net": _money(totals.net),
+        "earned": _money(totals.earned),
+        "by_type": {_enum_value(earning_type): _money(amount) for earning_type, amount in by_type_rows},
+        "by_course": [(row.course_id, _money(row.amount), int(row.count or 0)) for row in by_course_rows],
+    }
+
+
+# Reconciliation against the raw rows
+
+async def _raw_balances(db: AsyncSession, instructor_id: Optional[uuid.UUID] = None) -> Dict[uuid.UUID, Dict[str, Decimal]]:
+    earnings_q = select(
+        InstructorEarning.instructor_id,
+        func.sum(case((InstructorEarning.status.in_(COUNTED_EARNINGS), InstructorEarning.net_amount), else_=0)),
+        func.sum(case((InstructorEarning.status == "pending", InstructorEarning.net_amount), else_=0)),
+    ).group_by(InstructorEarning.instructor_id)
+    payouts_q = select(
+        InstructorPayout.instructor_id,
+        func.sum(case((InstructorPayout.status.in_(HELD_PAYOUTS), InstructorPayout.amount), else_=0)),
+    ).group_by(InstructorPayout.instructor_id)
+    if instructor_id is not None:
+        earnings_q = earnings_q.where(InstructorEarning.instructor_id == instructor_id)
+        payouts_q = payouts_q.where(InstructorPayout.instructor_id == instructor_id)
+
+    totals: Dict[uuid.UUID, Dict[str, Decimal]] = defaultdict(lambda: _zeros(_BALANCE_FIELDS))
+    for owner, earned, pending in (await db.execute(earnings_q)).all():
+        totals[owner]["total_earned"] = _money(earned)
+        totals[owner]["pending_earnings"] = _money(pending)
+    for owner, paid_out in (await db.execute(payouts_q)).all():
+        totals[owner]["total_paid_out"] = _money(paid_out)
+    return totals
+
+
+async def _ledger_balances(db: AsyncSession) -> Dict[uuid.UUID, Dict[str, Decimal]]:
+    rows = (await db.execute(select(
+        InstructorBalance.instructor_id,
+        InstructorBalance.total_earned,
+        InstructorBalance.pending_earnings,
+        InstructorBalance.total_paid_out,
+    ))).all()
+    return {row[0]: dict(zip(_BALANCE_FIELDS, map(_money, row[1:]))) for row in rows}
+
+
+async def _period_fingerprints(db: AsyncSession) -> Tuple[Dict[uuid.UUID, tuple], Dict[uuid.UUID, tuple]]:
+    """Per-instructor (gross, net, earned, count) from raw earnings and from the buckets."""
+    raw_rows = (await db.execute(
+        select(
+            InstructorEarning.instructor_id,
+            func.sum(InstructorEarning.gross_amount),
+            func.sum(InstructorEarning.net_amount),
+            func.sum(case((InstructorEarning.status.in_(COUNTED_EARNINGS), InstructorEarning.net_amount), else_=0)),
+            func.count(),
+        ).group_by(InstructorEarning.instructor_id)
+    )).all()
+    bucket_rows = (await db.execute(
+        select(
+            InstructorEarningPeriod.instructor_id,
+            func.sum(InstructorEarningPeriod.gross_amount),
+            func.sum(InstructorEarningPeriod.net_amount),
+            func.sum(InstructorEarningPeriod.earned_net),
+            func.sum(InstructorEarningPeriod.earnings_count),
+        ).group_by(InstructorEarningPeriod.instructor_id)
+    )).all()
+
+    def fingerprint(row) -> tuple:
+        return (_money(row[1]), _money(row[2]), _money(row[3]), int(row[4] or 0))
+    return (
+        {row[0]: fingerprint(row) for row in raw_rows},
+        {row[0]: fingerprint(row) for row in bucket_rows},
+    )
+
+
+async def rebuild_instructor(db: AsyncSession, instructor_id: Any) -> None:
+    """Recompute one instructor's balance row and buckets from the raw rows (caller commits)."""
+    instructor_id = _uuid(instructor_id)
+    balance_table = InstructorBalance.__table__
+    period_table = InstructorEarningPeriod.__table__
+
+    # Wait for in-flight earnings/payouts of this instructor before reading
+    await db.execute(
+        select(InstructorBalance.instructor_id)
+        .where(InstructorBalance.instructor_id == instructor_id)
+        .with_for_update()
+    )
+    totals = (await _raw_balances(db, instructor_id)).get(instructor_id, _zeros(_BALANCE_FIELDS))
+    await db.execute(delete(balance_table).where(balance_table.c.instructor_id == instructor_id))
+    await db.execute(insert(balance_table).values(instructor_id=instructor_id, updated_at=datetime.utcnow(), **totals))
+
+    earnings = (await db.execute(
+        select(
+            InstructorEarning.status,
+            InstructorEarning.net_amount,
+            InstructorEarning.gross_amount,
+            InstructorEarning.instructor_id,
+            InstructorEarning.created_at,
+            InstructorEarning.earning_type,
+            InstructorEarning.course_id,
+        ).where(InstructorEarning.instructor_id == instructor_id)
+    )).all()
+    periods: Dict[PeriodKey, Dict[str, Decimal]] = defaultdict(lambda: _zeros(_PERIOD_FIELDS))
+    for row in earnings:
+        _, _, key, bucket = _earning_contribution(row._mapping.get)
+        for field, value in bucket.items():
+            periods[key][field] += value
+
+    await db.execute(delete(period_table).where(period_table.c.instructor_id == instructor_id))
+    if periods:
+        await db.execute(insert(period_table), [
+            {
+                "id": uuid.uuid4(), "instructor_id": owner, "period_start": start,
+                "earning_type": earning_type, "course_id": course_id,
+                **values, "earnings_count": int(values["earnings_count"]),
+            }
+            for (owner, start, earning_type, course_id), values in periods.items()
+        ])
+
+
+async def reconcile_earnings_ledger(db: AsyncSession) -> int:
+    """
+    Compare the ledger with the raw earnings and payouts; rebuild each
+    instructor whose balance or bucket totals drifted. Returns the number
+    of instructors rebuilt.
+    """
+    raw, ledger = await _raw_balances(db), await _ledger_balances(db)
+    raw_periods, ledger_periods = await _period_fingerprints(db)
+
+    zeros = _zeros(_BALANCE_FIELDS)
+    drifted: Set[uuid.UUID] = {
+        owner for owner in raw.keys() | ledger.keys()
+        if raw.get(owner, zeros) != ledger.get(owner, zeros)
+    }
+    drifted |= {
+        owner for owner in raw_periods.keys() | ledger_periods.keys()
+        if raw_periods.get(owner) != ledger_periods.get(owner)
+    }
+    # Commit the detection snapshot's transaction before taking row locks
+    await db.commit()
+
+    for owner in drifted:
+        await rebuild_instructor(db, owner)
+        await db.commit()
+    if drifted:
+        logger.warning(f"Earnings ledger: rebuilt {len(drifted)} drifted instructors")
+    return len(drifted)
@@ -2,11 +2,13 @@
 Instructor Earnings Service
 
 Revenue split calculation, multi-gateway payouts, earnings aggregation.
+Balances and breakdowns are read from the materialised ledger in
+earnings_ledger.
 """
 
 import logging
 from typing import Dict, Any, List
-from datetime import datetime
+from datetime import datetime, time
 from decimal import Decimal
 
 from sqlalchemy import select, and_, func
@@ -17,6 +19,15 @@ from app.models.instructor.instructor_earnings import (
     InstructorPayout,
     InstructorRevenueSplit
 )
+from app.services.instructor import earnings_ledger
+
+# by_type keys of the breakdown response, per EarningType value
+_BREAKDOWN_TYPE_KEYS = {
+    "course_sale": "course_sales",
+    "session_fee": "session_fees",
+    "bonus": "bonuses",
+    "referral": "referrals",
+}
 
 logger = logging.getLogger(__name__)
 
@@ -94,8 +105,10 @@ async def request_payout(
     Validates balance and initiates gateway transfer.
     """
     try:
-        # Validate available balance
-        available = await get_available_balance(db, instructor_id)
+        # Validate available balance; the ledger row stays locked until the
+        # payout is committed, so concurrent requests cannot both spend it
+        balance = await earnings_ledger.get_balance(db, instructor_id, for_update=True)
+        available = balance["available"]
         if amount > available:
             raise ValueError(
                 f"Insufficient balance. Available: {available}, Requested: {amount}"
@@ -141,26 +154,22 @@ async def get_available_balance(
     db: AsyncSession,
     instructor_id: str,
 ) -> Decimal:
-    """Calculate available balance: confirmed earnings minus pending/processing payouts."""
-    # Total confirmed earnings
-    earnings_q = select(func.coalesce(func.sum(InstructorEarning.net_amount), 0)).where(
-        and_(
-            InstructorEarning.instructor_id == instructor_id,
-            InstructorEarning.status.in_(["confirmed", "paid"]),
-        )
-    )
-    total_earnings = Decimal(str((await db.execute(earnings_q)).scalar() or 0))
-
-    # Total paid/pending/processing payouts
-    payouts_q = select(func.coalesce(func.sum(InstructorPayout.amount), 0)).where(
-        and_(
-            InstructorPayout.instructor_id == instructor_id,
-            InstructorPayout.status.in_(["requested", "processing", "completed"]),
-        )
-    )
-    total_payouts = Decimal(str((await db.execute(payouts_q)).scalar() or 0))
+    """Available balance: confirmed/paid earnings minus requested/processing/completed payouts."""
+    balance = await earnings_ledger.get_balance(db, instructor_id)
+    return balance["available"]
+
 
-    return total_earnings - total_payouts
+def _is_month_start(moment: datetime) -> bool:
+    return moment.day == 1 and moment.time() == time.min
+
+
+def _breakdown_by_type(amounts: Dict[Any, Decimal]) -> Dict[str, float]:
+    by_type = {key: 0.0 for key in _BREAKDOWN_TYPE_KEYS.values()}
+    for earning_type, amount in amounts.items():
+        key = _BREAKDOWN_TYPE_KEYS.get(getattr(earning_type, "value", earning_type))
+        if key:
+            by_type[key] = float(amount or 0)
+    return by_type
 
 
 async def get_earnings_breakdown(
@@ -169,8 +178,28 @@ async def get_earnings_breakdown(
     start_date: datetime = None,
     end_date: datetime = None
 ) -> Dict[str, Any]:
-    """Get detailed earnings breakdown by type, course, and session."""
+    """
+    Get detailed earnings breakdown by type, course, and session.
+
+    Whole months (no end date, start on a month boundary) are read from the
+    ledger's monthly buckets; other ranges aggregate the earning rows.
+    """
     try:
+        if end_date is None and (start_date is None or _is_month_start(start_date)):
+            totals = await earnings_ledger.get_period_totals(
+                db, instructor_id, since=start_date.date() if start_date else None,
+            )
+            return {
+                "total_gross": float(totals["gross"]),
+                "total_net": float(totals["net"]),
+                "by_type": _breakdown_by_type(totals["by_type"]),
+                "by_course": [
+                    {"course_id": str(course_id), "amount": float(amount), "count": count}
+                    for course_id, amount, count in totals["by_course"]
+                ],
+                "by_session": [],
+            }
+
         filters = [InstructorEarning.instructor_id == instructor_id]
         if start_date:
             filters.append(InstructorEarning.created_at >= start_date)
@@ -190,15 +219,7 @@ async def get_earnings_breakdown(
             func.sum(InstructorEarning.net_amount).label("amount"),
         ).where(and_(*filters)).group_by(InstructorEarning.earning_type)
         by_type_result = await db.execute(by_type_q)
-        by_type = {
-            "course_sales": Decimal("0.00"),
-            "session_fees": Decimal("0.00"),
-            "bonuses": Decimal("0.00"),
-            "referrals": Decimal("0.00"),
-        }
-        for row in by_type_result.all():
-            if row.earning_type in by_type:
-                by_type[row.earning_type] = Decimal(str(row.amount or 0))
+        by_type = _breakdown_by_type({row.earning_type: row.amount for row in by_type_result.all()})
 
         # By course (top 10)
         by_course_q = select(
@@ -223,7 +244,7 @@ async def get_earnings_breakdown(
         return {
             "total_gross": float(totals.total_gross),
             "total_net": float(totals.total_net),
-            "by_type": {k: float(v) for k, v in by_type.items()},
+            "by_type": by_type,
             "by_course": by_course,
             "by_session": [],
         }
@@ -10,11 +10,10 @@ from datetime import datetime, timedelta
 from decimal import Decimal
 import math
 
-from sqlalchemy import select, and_, func, case
+from sqlalchemy import select, and_, func, case, desc
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.config import settings
-from app.redis import get_redis
 from app.models.user import User
 from app.models.instructor.instructor_gamification import (
     InstructorBadge,
@@ -23,40 +22,58 @@ from app.models.instructor.instructor_gamification import (
     InstructorPointsLog,
     PeerKudo
 )
+from app.services.leaderboard import ALL_TIME, WINDOWS, Leaderboard, window_bounds
 
 logger = logging.getLogger(__name__)
 
-# Redis key constants
-LEADERBOARD_KEY_ALL_TIME = "instructor:leaderboard:all_time"
-LEADERBOARD_KEY_WEEKLY = "instructor:leaderboard:weekly"
-LEADERBOARD_KEY_MONTHLY = "instructor:leaderboard:monthly"
+INSTRUCTOR_LEADERBOARD = Leaderboard("instructor")
+
+# Instructors are ranked platform-wide
+LEADERBOARD_SCOPE = "all"
 
 
 # ---------------------------------------------------------------------------
 # Redis helper
 # ---------------------------------------------------------------------------
 
-async def update_leaderboard(instructor_id: str, points: int) -> None:
+async def update_leaderboard(instructor_id: str, points_delta: int) -> None:
     """
-    Update the Redis sorted-set leaderboard with the instructor's current
-    total points.  Uses ZADD so the score is always the latest value.
+    Add a points change to the instructor's all-time, weekly and monthly
+    leaderboards.  Windowed boards only count points earned inside the
+    window; their keys expire on their own.
     """
-    try:
-        r = get_redis()
-        # All-time leaderboard -- always updated
-        await r.zadd(LEADERBOARD_KEY_ALL_TIME, {str(instructor_id): points})
+    # Leaderboard update is best-effort; failures are logged, not raised
+    await INSTRUCTOR_LEADERBOARD.increment(str(instructor_id), points_delta, [LEADERBOARD_SCOPE])
 
-        # Weekly and monthly leaderboards -- same score; the keys are
-        # rotated/expired externally or via a scheduled task.
-        await r.zadd(LEADERBOARD_KEY_WEEKLY, {str(instructor_id): points})
-        await r.zadd(LEADERBOARD_KEY_MONTHLY, {str(instructor_id): points})
 
-        logger.debug(
-            f"Leaderboard updated for instructor {instructor_id}: {points} pts"
+async def rebuild_instructor_leaderboards(db: AsyncSession) -> int:
+    """
+    Recompute the current instructor leaderboards from the database
+    (all-time from InstructorPoints, windows from InstructorPointsLog).
+    Returns the number of boards written.
+    """
+    now = datetime.utcnow()
+    for window in WINDOWS:
+        rows = (await db.execute(_points_query(window, now))).all()
+        await INSTRUCTOR_LEADERBOARD.replace(
+            LEADERBOARD_SCOPE, window, {str(instructor_id): score for instructor_id, score in rows}, when=now
         )
-    except Exception as e:
-        # Leaderboard update is best-effort; don't let it break the main flow
-        logger.warning(f"Failed to update Redis leaderboard: {str(e)}")
+    return len(WINDOWS)
+
+
+def _points_query(window: str, when: datetime):
+    """Select (instructor_id, points) for a leaderboard window."""
+    if window == ALL_TIME:
+        return select(InstructorPoints.instructor_id, InstructorPoints.points.label("score"))
+    start, _ = window_bounds(window, when)
+    return (
+        select(
+            InstructorPointsLog.instructor_id,
+            func.sum(InstructorPointsLog.points_delta).label("score"),
+        )
+        .where(InstructorPointsLog.created_at >= start)
+        .group_by(InstructorPointsLog.instructor_id)
+    )
 
 
 # ---------------------------------------------------------------------------
@@ -174,8 +191,8 @@ async def add_points(
         await db.commit()
         await db.refresh(points_record)
 
-        # Update Redis leaderboard
-        await update_leaderboard(instructor_id, points_record.points)
+        # Update Redis leaderboards with the change
+        await update_leaderboard(instructor_id, points_delta)
 
         logger.info(f"Added {points_delta} points to instructor {instructor_id}: {reason}")
         return points_record
@@ -354,85 +371,76 @@ async def get_leaderboard(
     current_instructor_id: Optional[str] = None
 ) -> Dict[str, Any]:
     """
-    Get leaderboard from Redis sorted set.
+    Get leaderboard from Redis sorted sets.
 
     Returns a dict with:
-        entries  -- list of {rank, instructor_id, name, points}
-        my_rank  -- rank of the current instructor (None if not provided)
+        entries     -- list of {rank, instructor_id, name, points}
+        my_rank     -- rank of the current instructor (None if not provided)
+        neighbours  -- entries around the current instructor
+        total       -- number of ranked instructors in the period
     """
-    key_map = {
-        "all_time": LEADERBOARD_KEY_ALL_TIME,
-        "weekly": LEADERBOARD_KEY_WEEKLY,
-        "monthly": LEADERBOARD_KEY_MONTHLY,
-    }
-    redis_key = key_map.get(period, LEADERBOARD_KEY_ALL_TIME)
+    if period not in WINDOWS:
+        period = ALL_TIME
 
     entries: List[Dict[str, Any]] = []
+    neighbours: List[Dict[str, Any]] = []
     my_rank: Optional[int] = None
-
-    try:
-        r = _get_redis()
-        async with r:
-            # ZREVRANGE returns highest-score first
-            raw = await r.zrevrange(redis_key, 0, limit - 1, withscores=True)
-
-            # Resolve instructor names in bulk
-            instructor_ids = [member for member, _ in raw]
-            names_map: Dict[str, str] = {}
-            if instructor_ids:
-                query = select(User.id, User.email, User.profile_data).where(
-                    User.id.in_(instructor_ids)
-                )
-                result = await db.execute(query)
-                for row in result.all():
-                    uid = str(row.id)
-                    profile = row.profile_data or {}
-                    names_map[uid] = profile.get("full_name", row.email)
-
-            for rank_idx, (member, score) in enumerate(raw, start=1):
-                entries.append({
-                    "rank": rank_idx,
-                    "instructor_id": member,
-                    "name": names_map.get(member, "Unknown Instructor"),
-                    "points": int(score),
-                })
-
-            # Current instructor's rank
-            if current_instructor_id:
-                rank_zero_based = await r.zrevrank(
-                    redis_key, str(current_instructor_id)
-                )
-                if rank_zero_based is not None:
-                    my_rank = rank_zero_based + 1  # 1-based
-
-    except Exception as e:
-        logger.warning(f"Error getting leaderboard from Redis: {str(e)}")
+    total = 0
+
+    standing = await INSTRUCTOR_LEADERBOARD.standing(
+        LEADERBOARD_SCOPE, period, member=current_instructor_id, limit=limit
+    )
+    if standing is not None:
+        rows = standing["entries"]
+        neighbour_rows = standing["neighbours"]
+        total = standing["total"]
+        if standing["me"]:
+            my_rank = standing["me"]["rank"]
+    else:
         # Fallback: query database directly
+        rows, neighbour_rows = [], []
         try:
-            query = (
-                select(InstructorPoints)
-                .order_by(InstructorPoints.points.desc())
-                .limit(limit)
+            result = await db.execute(
+                _points_query(period, datetime.utcnow()).order_by(desc("score")).limit(limit)
             )
-            result = await db.execute(query)
-            records = result.scalars().all()
-
-            for rank_idx, record in enumerate(records, start=1):
-                name = await _get_instructor_name(db, str(record.instructor_id))
-                entries.append({
-                    "rank": rank_idx,
-                    "instructor_id": str(record.instructor_id),
-                    "name": name,
-                    "points": record.points,
-                })
-                if current_instructor_id and str(record.instructor_id) == str(current_instructor_id):
+            for rank_idx, (instructor_id, score) in enumerate(result.all(), start=1):
+                rows.append({"rank": rank_idx, "member": str(instructor_id), "score": int(score or 0)})
+                if current_instructor_id and str(instructor_id) == str(current_instructor_id):
                     my_rank = rank_idx
+            total = len(rows)
         except Exception as db_err:
             logger.error(f"Fallback leaderboard query failed: {str(db_err)}")
 
+    # Resolve instructor names in bulk
+    names_map: Dict[str, str] = {}
+    instructor_ids = {row["member"] for row in rows + neighbour_rows}
+    if instructor_ids:
+        try:
+            result = await db.execute(
+                select(User.id, User.email, User.profile_data).where(User.id.in_(instructor_ids))
+            )
+            for row in result.all():
+                profile = row.profile_data or {}
+                names_map[str(row.id)] = profile.get("full_name", row.email)
+        except Exception as e:
+            logger.warning(f"Error resolving leaderboard names: {str(e)}")
+
+    def _entry(row: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "rank": row["rank"],
+            "instructor_id": row["member"],
+            "name": names_map.get(row["member"], "Unknown Instructor"),
+            "points": row["score"],
+        }
+
+    entries = [_entry(row) for row in rows]
+    neighbours = [_entry(row) for row in neighbour_rows]
+
     return {
         "entries": entries,
         "my_rank": my_rank,
+        "neighbours": neighbours,
+        "total": total,
     }
 
 
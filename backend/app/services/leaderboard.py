@@ -0,0 +1,227 @@
+"""
+Leaderboards
+
+Redis sorted-set leaderboards shared by the student and instructor
+gamification services:
+
+- Every board is kept per scope (e.g. ``school``, ``grade:grade_4``) and
+  per window (all-time, weekly, monthly). Windowed boards live in
+  time-bucketed keys (``lb:<name>:<scope>:weekly:2026-W42``) that expire
+  ``leaderboard_retention_days`` after their window closes, so nothing
+  has to rotate them.
+- Awards call increment() with the delta; ZINCRBY keeps each window's
+  score to what was earned inside it.
+- standing() returns the top N, the caller's rank and score and the
+  entries around them from one server-side script (one round trip).
+- replace() swaps in a board recomputed from the database, for the
+  rebuild jobs that recover from a Redis flush or drift.
+
+Leaderboards are best-effort: Redis errors are logged and reported to
+the caller as a False/None result so it can fall back to SQL.
+"""
+
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+ALL_TIME = "all_time"
+WEEKLY = "weekly"
+MONTHLY = "monthly"
+WINDOWS = (ALL_TIME, WEEKLY, MONTHLY)
+
+_REPLACE_CHUNK = 1000
+
+# Top N, board size, the member's rank and score, and the slice around them
+_STANDING = """
+local key = KEYS[1]
+local member = ARGV[1]
+local limit = tonumber(ARGV[2])
+local around = tonumber(ARGV[3])
+local top = {}
+if limit > 0 then
+    top = redis.call('ZREVRANGE', key, 0, limit - 1, 'WITHSCORES')
+end
+local total = redis.call('ZCARD', key)
+local rank = -1
+local score = ''
+local first = 0
+local near = {}
+if member ~= '' then
+    local found = redis.call('ZREVRANK', key, member)
+    if found then
+        rank = found
+        score = redis.call('ZSCORE', key, member)
+        first = math.max(found - around, 0)
+        near = redis.call('ZREVRANGE', key, first, found + around, 'WITHSCORES')
+    end
+end
+return {top, total, rank, score, first, near}
+"""
+
+
+def window_bounds(window: str, when: datetime) -> Tuple[Optional[datetime], Optional[datetime]]:
+    """Return the [start, end) of the window containing ``when``; all-time is unbounded."""
+    if window == WEEKLY:
+        start = datetime(when.year, when.month, when.day) - timedelta(days=when.weekday())
+        return start, start + timedelta(days=7)
+    if window == MONTHLY:
+        start = datetime(when.year, when.month, 1)
+        end = datetime(when.year + 1, 1, 1) if when.month == 12 else datetime(when.year, when.month + 1, 1)
+        return start, end
+    if window == ALL_TIME:
+        return None, None
+    raise ValueError(f"Unknown leaderboard window: {window}")
+
+
+def _bucket(window: str, when: datetime) -> str:
+    if window == WEEKLY:
+        year, week, _ = when.isocalendar()
+        return f"{year}-W{week:02d}"
+    if window == MONTHLY:
+        return when.strftime("%Y-%m")
+    return "all"
+
+
+def _pairs(flat: List[Any], first_rank: int) -> List[Dict[str, Any]]:
+    return [
+        {"rank": first_rank + i + 1, "member": flat[2 * i], "score": int(float(flat[2 * i + 1]))}
+        for i in range(len(flat) // 2)
+    ]
+
+
+class Leaderboard:
+    """A family of scoped, time-windowed sorted-set leaderboards."""
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def key(self, scope: str, window: str = ALL_TIME, when: Optional[datetime] = None) -> str:
+        if window not in WINDOWS:
+            raise ValueError(f"Unknown leaderboard window: {window}")
+        return f"lb:{self.name}:{scope}:{window}:{_bucket(window, when or datetime.utcnow())}"
+
+    def _expire_at(self, window: str, when: datetime) -> Optional[datetime]:
+        _, end = window_bounds(window, when)
+        if end is None:
+            return None
+        return end + timedelta(days=settings.leaderboard_retention_days)
+
+    async def increment(
+        self,
+        member: str,
+        delta: int,
+        scopes: Iterable[str],
+        when: Optional[datetime] = None,
+    ) -> bool:
+        """Add ``delta`` to ``member`` on every window of every scope."""
+        return await self.increment_many([(member, delta, scopes)], when)
+
+    async def increment_many(
+        self,
+        awards: Iterable[Tuple[str, int, Iterable[str]]],
+        when: Optional[datetime] = None,
+    ) -> bool:
+        """Apply several ``(member, delta, scopes)`` awards in one pipeline."""
+        when = when or datetime.utcnow()
+        try:
+            from app.redis import get_redis
+
+            pipe = None
+            for member, delta, scopes in awards:
+                if not delta:
+                    continue
+                if pipe is None:
+                    pipe = get_redis().pipeline(transaction=False)
+                for scope in scopes:
+                    for window in WINDOWS:
+                        key = self.key(scope, window, when)
+                        pipe.zincrby(key, delta, str(member))
+                        expire_at = self._expire_at(window, when)
+                        if expire_at is not None:
+                            pipe.expireat(key, expire_at)
+            if pipe is not None:
+                await pipe.execute()
+            return True
+        except Exception as e:
+            logger.warning(f"Leaderboard {self.name} update failed: {e}")
+            return False
+
+    async def standing(
+        self,
+        scope: str,
+        window: str = ALL_TIME,
+        member: Optional[str] = None,
+        limit: int = 10,
+        neighbours: Optional[int] = None,
+        when: Optional[datetime] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Return the board's top ``limit`` entries and the member's standing.
+
+        Result: ``{"entries", "total", "me", "neighbours"}`` where entries
+        and neighbours are ``{rank, member, score}`` dicts (1-based ranks)
+        and ``me`` is None when the member has no score in this window.
+        Returns None if Redis is unavailable.
+        """
+        key = self.key(scope, window, when)
+        if neighbours is None:
+            neighbours = settings.leaderboard_neighbours
+        try:
+            from app.redis import get_redis
+
+            top, total, rank, score, first, near = await get_redis().eval(
+                _STANDING, 1, key, str(member) if member else "", max(limit, 0), max(neighbours, 0),
+            )
+        except Exception as e:
+            logger.warning(f"Leaderboard {self.name} read failed for {key}: {e}")
+            return None
+
+        rank = int(rank)
+        return {
+            "entries": _pairs(top, 0),
+            "total": int(total),
+            "me": {"rank": rank + 1, "member": str(member), "score": int(float(score))} if rank >= 0 else None,
+            "neighbours": _pairs(near, int(first)),
+        }
+
+    async def replace(
+        self,
+        scope: str,
+        window: str,
+        scores: Dict[str, int],
+        when: Optional[datetime] = None,
+    ) -> None:
+        """Atomically replace one board with ``scores`` (used by rebuild jobs)."""
+        from app.redis import get_redis
+
+        when = when or datetime.utcnow()
+        redis = get_redis()
+        key = self.key(scope, window, when)
+        scores = {str(member): score for member, score in scores.items() if score}
+        if not scores:
+            await redis.delete(key)
+            return
+
+        # Fill a scratch key in chunks, then swap it in with RENAME
+        staging = f"{key}:rebuild"
+        await redis.delete(staging)
+        items = list(scores.items())
+        for i in range(0, len(items), _REPLACE_CHUNK):
+            await redis.zadd(staging, dict(items[i:i + _REPLACE_CHUNK]))
+
+        pipe = redis.pipeline(transaction=True)
+        pipe.rename(staging, key)
+        expire_at = self._expire_at(window, when)
+        if expire_at is not None:
+            pipe.expireat(key, expire_at)
+        await pipe.execute()
+
+    async def exists(self, scope: str, window: str = ALL_TIME) -> bool:
+        """Whether the current bucket of a board is present."""
+        from app.redis import get_redis
+
+        return bool(await get_redis().exists(self.key(scope, window)))
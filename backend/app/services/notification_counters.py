@@ -0,0 +1,225 @@
+"""
+Unread Notification Counters
+
+Unread counts live in Redis (``notif:unread:<user_id>``) so the inbox and
+the dashboard badge stop running COUNT(*) on every poll:
+
+- The first read of a user's counter counts in SQL (served by the
+  partial unread index) and stores the result with SET NX and a TTL.
+- Changes are collected on the session while the transaction runs:
+  ORM inserts/deletes/updates of Notification rows are picked up by a
+  flush hook, bulk statements call record_unread_change(). After commit
+  they are applied with an increment-if-present script, so a rolled back
+  transaction never moves a counter, and an absent counter is left for
+  the next read to compute.
+- reconcile_unread_counters() recounts every live counter; the scheduler
+  runs it every ``notification_unread_reconcile_seconds`` to repair
+  drift from a recount racing a concurrent commit.
+- New values are pushed to the user's WebSocket connections, so clients
+  can stop polling /notifications/unread-count.
+"""
+
+import logging
+import uuid
+from typing import Any, Dict, Set
+
+from sqlalchemy import event, func, inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import on_commit
+from app.models.notification import Notification
+
+logger = logging.getLogger(__name__)
+
+EVENT_UNREAD_COUNT = "unread_count"
+
+_KEY_PREFIX = "notif:unread:"
+_INFO_KEY = "notification_unread_deltas"
+
+# INCRBY each key that exists, clamping at zero; -1 for absent keys
+_APPLY_DELTAS = """
+local out = {}
+for i, key in ipairs(KEYS) do
+    if redis.call('EXISTS', key) == 1 then
+        local value = redis.call('INCRBY', key, ARGV[i])
+        if value < 0 then
+            redis.call('SET', key, 0, 'KEEPTTL')
+            value = 0
+        end
+        out[i] = value
+    else
+        out[i] = -1
+    end
+end
+return out
+"""
+
+
+def _key(user_id: Any) -> str:
+    return f"{_KEY_PREFIX}{user_id}"
+
+
+async def count_unread(db: AsyncSession, user_id: Any) -> int:
+    """Count a user's unread notifications in SQL."""
+    result = await db.execute(
+        select(func.count()).where(
+            Notification.user_id == user_id,
+            Notification.is_read == False,  # noqa: E712
+        )
+    )
+    return result.scalar() or 0
+
+
+async def get_unread_count(db: AsyncSession, user_id: Any) -> int:
+    """Return the cached unread count, counting in SQL on a miss."""
+    redis = None
+    try:
+        from app.redis import get_redis
+
+        redis = get_redis()
+        value = await redis.get(_key(user_id))
+        if value is not None:
+            return int(value)
+    except Exception as e:
+        if redis is not None:
+            logger.warning(f"Unread counter read failed for {user_id}: {e}")
+        redis = None
+
+    count = await count_unread(db, user_id)
+    if redis is not None:
+        try:
+            await redis.set(_key(user_id), count, ex=settings.notification_unread_ttl, nx=True)
+        except Exception as e:
+            logger.warning(f"Unread counter store failed for {user_id}: {e}")
+    return count
+
+
+def _record(session: Any, user_id: Any, delta: int) -> None:
+    if not delta or user_id is None:
+        return
+    pending: Dict[str, int] = session.info.setdefault(_INFO_KEY, {})
+    key = str(user_id)
+    pending[key] = pending.get(key, 0) + delta
+    on_commit(session, _INFO_KEY, apply_unread_changes)
+
+
+def record_unread_change(db: AsyncSession, user_id: Any, delta: int) -> None:
+    """Adjust a user's counter by ``delta`` once the transaction commits."""
+    _record(db, user_id, delta)
+
+
+async def apply_unread_changes(deltas: Dict[str, int]) -> None:
+    """Apply committed deltas to Redis and push the new counts."""
+    deltas = {user_id: delta for user_id, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    try:
+        from app.redis import get_redis
+
+        user_ids = list(deltas)
+        values = await get_redis().eval(
+            _APPLY_DELTAS,
+            len(user_ids),
+            *[_key(user_id) for user_id in user_ids],
+            *[deltas[user_id] for user_id in user_ids],
+        )
+    except Exception as e:
+        logger.warning(f"Unread counter update failed for {len(deltas)} users: {e}")
+        return
+
+    for user_id, value in zip(user_ids, values):
+        # Absent counter: nobody has looked recently, nothing to push
+        if value is not None and int(value) >= 0:
+            await publish_unread_count(user_id, int(value))
+
+
+async def publish_unread_count(user_id: str, count: int) -> None:
+    """Push an unread count to the user's WebSocket connections."""
+    from app.websocket.connection_manager import ws_manager
+    from app.websocket.instructor_connection_manager import instructor_ws_manager
+    from app.websocket.parent_connection_manager import parent_ws_manager
+
+    data = {"unread_count": count}
+    try:
+        await ws_manager.send_personal(user_id, EVENT_UNREAD_COUNT, data)
+        await parent_ws_manager.send_to_parent(user_id, EVENT_UNREAD_COUNT, data)
+        await instructor_ws_manager.send_counter_update(user_id, "unreadNotifications", count)
+    except Exception as e:
+        logger.warning(f"Unread count push failed for {user_id}: {e}")
+
+
+async def reconcile_unread_counters(db: AsyncSession, batch_size: int = 500) -> int:
+    """
+    Recount every cached counter from SQL; returns the number corrected.
+
+    Only users with a live key are touched, so the work is bounded by the
+    recently active users rather than the whole table.
+    """
+    from app.redis import get_redis
+
+    redis = get_redis()
+    corrected = 0
+    batch: Set[str] = set()
+
+    async def flush() -> int:
+        if not batch:
+            return 0
+        ids = list(batch)
+        batch.clear()
+        keys = [_key(user_id) for user_id in ids]
+        cached = await redis.mget(keys)
+        rows = (await db.execute(
+            select(Notification.user_id, func.count())
+            .where(
+                Notification.user_id.in_([uuid.UUID(user_id) for user_id in ids]),
+                Notification.is_read == False,  # noqa: E712
+            )
+            .group_by(Notification.user_id)
+        )).all()
+        actual = {str(user_id): count for user_id, count in rows}
+
+        fixed = 0
+        pipe = redis.pipeline(transaction=False)
+        for user_id, key, value in zip(ids, keys, cached):
+            count = actual.get(user_id, 0)
+            if value is not None and int(value) != count:
+                pipe.set(key, count, xx=True, keepttl=True)
+                fixed += 1
+        if fixed:
+            await pipe.execute()
+        return fixed
+
+    async for key in redis.scan_iter(match=f"{_KEY_PREFIX}*", count=batch_size):
+        user_id = key[len(_KEY_PREFIX):]
+        try:
+            uuid.UUID(user_id)
+        except ValueError:
+            continue
+        batch.add(user_id)
+        if len(batch) >= batch_size:
+            corrected += await flush()
+    corrected += await flush()
+    return corrected
+
+
+# Session hook: collect ORM-level changes, apply after commit
+
+
+@event.listens_for(Session, "after_flush")
+def _after_flush(session: Session, flush_context) -> None:
+    for obj in session.new:
+        if isinstance(obj, Notification) and not obj.is_read:
+            _record(session, obj.user_id, 1)
+    for obj in session.deleted:
+        if isinstance(obj, Notification):
+            # Only if loaded; an unknown state is left to reconciliation
+            if inspect(obj).dict.get("is_read") is False:
+                _record(session, obj.user_id, -1)
+    for obj in session.dirty:
+        if isinstance(obj, Notification):
+            history = inspect(obj).attrs.is_read.history
+            if history.deleted and history.added and history.deleted[0] != history.added[0]:
+                _record(session, obj.user_id, -1 if history.added[0] else 1)
+
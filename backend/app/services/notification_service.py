@@ -2,18 +2,22 @@
 Notification Service for Urban Home School
 
 Provides CRUD operations for notifications and a utility function
-for creating notifications from other services.
+for creating notifications from other services. Unread counts come
+from the Redis counters in notification_counters.
 """
 
+import base64
+import binascii
 import logging
 from datetime import datetime
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from uuid import UUID
 
-from sqlalchemy import select, func, desc, update
+from sqlalchemy import select, desc, tuple_, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.notification import Notification, NotificationType
+from app.services import notification_counters
 
 logger = logging.getLogger(__name__)
 
@@ -48,18 +52,38 @@ async def create_notification(
     return notification
 
 
+def encode_cursor(notification: Notification) -> str:
+    """Opaque keyset cursor pointing just after ``notification``."""
+    raw = f"{notification.created_at.isoformat()}|{notification.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, UUID]:
+    """Decode a cursor from encode_cursor(); raises ValueError if malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, notification_id = raw.split("|", 1)
+        return datetime.fromisoformat(created_at), UUID(notification_id)
+    except (binascii.Error, UnicodeDecodeError) as e:
+        raise ValueError("Invalid cursor") from e
+
+
 async def get_notifications(
     db: AsyncSession,
     user_id: UUID,
     is_read: Optional[bool] = None,
     notification_type: Optional[str] = None,
-    page: int = 1,
+    cursor: Optional[str] = None,
     limit: int = 20,
 ) -> dict:
     """
-    Get paginated notifications for a user with optional filters.
+    Get a page of notifications for a user with optional filters.
 
-    Returns dict with notifications list, total count, and unread count.
+    Pages are keyset-paginated on (created_at, id), newest first, so deep
+    pages cost the same as the first one. Pass the returned next_cursor
+    to fetch the following page; it is None on the last page.
+
+    Returns dict with notifications list, next cursor and unread count.
     """
     query = select(Notification).where(Notification.user_id == user_id)
 
@@ -67,44 +91,36 @@ async def get_notifications(
         query = query.where(Notification.is_read == is_read)
     if notification_type:
         query = query.where(Notification.type == notification_type)
+    if cursor:
+        created_at, notification_id = decode_cursor(cursor)
+        query = query.where(
+            tuple_(Notification.created_at, Notification.id) < tuple_(created_at, notification_id)
+        )
 
-    # Get total count
-    count_query = select(func.count()).select_from(query.subquery())
-    total_result = await db.execute(count_query)
-    total = total_result.scalar() or 0
+    # One extra row tells us whether another page exists
+    query = query.order_by(desc(Notification.created_at), desc(Notification.id)).limit(limit + 1)
+    result = await db.execute(query)
+    notifications = list(result.scalars().all())
 
-    # Get unread count (always for the user, unfiltered)
-    unread_query = select(func.count()).where(
-        Notification.user_id == user_id,
-        Notification.is_read == False,
-    )
-    unread_result = await db.execute(unread_query)
-    unread_count = unread_result.scalar() or 0
+    next_cursor = None
+    if len(notifications) > limit:
+        notifications = notifications[:limit]
+        next_cursor = encode_cursor(notifications[-1])
 
-    # Paginate
-    offset = (page - 1) * limit
-    query = query.order_by(desc(Notification.created_at)).offset(offset).limit(limit)
-    result = await db.execute(query)
-    notifications = result.scalars().all()
+    # Unread count (always for the user, unfiltered), served from Redis
+    unread_count = await get_unread_count(db, user_id)
 
     return {
         "notifications": notifications,
-        "total": total,
+        "next_cursor": next_cursor,
         "unread_count": unread_count,
-        "page": page,
         "limit": limit,
     }
 
 
 async def get_unread_count(db: AsyncSession, user_id: UUID) -> int:
     """Get the number of unread notifications for a user."""
-    result = await db.execute(
-        select(func.count()).where(
-            Notification.user_id == user_id,
-            Notification.is_read == False,
-        )
-    )
-    return result.scalar() or 0
+    return await notification_counters.get_unread_count(db, user_id)
 
 
 async def mark_as_read(
@@ -136,6 +152,7 @@ async def mark_all_as_read(db: AsyncSession, user_id: UUID) -> int:
         .values(is_read=True, read_at=now)
     )
     await db.flush()
+    notification_counters.record_unread_change(db, user_id, -result.rowcount)
     return result.rowcount
 
 
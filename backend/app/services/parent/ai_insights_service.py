@@ -12,6 +12,7 @@ from uuid import UUID
 from sqlalchemy import select, and_, desc
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.database import release_db
 from app.models import User, Student, AITutor, AIAlert
 from app.schemas.parent.ai_insights_schemas import (
     AITutorSummary, ConversationSample, LearningStyleAnalysis,
@@ -100,7 +101,9 @@ Strengths: {', '.join(strengths)}
 Progress rate: {progress_rate:.0%}
 Keep it encouraging and actionable for parents (2-3 sentences)."""
 
-            orchestrator = await get_orchestrator(db)
+            # Reads are done; don't hold the connection through the AI call
+            await release_db(db)
+            orchestrator = await get_orchestrator(None)
             ai_response = await orchestrator.chat(
                 task_type="general",
                 messages=[{"role": "user", "content": prompt}],
@@ -141,15 +141,6 @@ class MpesaService:
             amount=2500.0
         )
 
-    async def process_callback(self, callback_data: dict) -> dict:
-        """Process M-Pesa callback"""
-
-        # Extract callback data
-        # Update payment status in database
-        # Trigger subscription activation/renewal
-
-        return {"status": "processed"}
-
 
 # Singleton instance
 mpesa_service = MpesaService()
@@ -6,6 +6,7 @@ discussion starter cards and offline activity suggestions. Queries the
 child's mastery records, session logs, mood entries, and skill nodes
 to provide personalized, actionable content for parent-child engagement.
 """
+import logging
 from datetime import date, datetime, timedelta
 from typing import Dict, List, Optional
 from uuid import UUID
@@ -20,6 +21,8 @@ from app.models.student_dashboard import StudentMoodEntry
 from app.models.student_gamification import StudentSkillNode
 from app.services.ai_orchestrator import AIOrchestrator
 
+logger = logging.getLogger(__name__)
+
 
 class ParentWeeklySummaryService:
     """Service for generating and retrieving weekly parent summaries."""
@@ -236,3 +239,40 @@ class ParentWeeklySummaryService:
             }
             for c in cards
         ]
+
+
+async def generate_weekly_summaries(db: AsyncSession, shard: int = 0, shards: int = 1) -> int:
+    """
+    Generate this week's summary for every linked child in partition
+    ``shard`` of ``shards`` (children are partitioned by id). Children with
+    a card from the last six days are skipped, so a re-run only fills gaps.
+    """
+    recent = date.today() - timedelta(days=6)
+    has_card = (
+        select(ParentDiscussionCard.id)
+        .where(
+            and_(
+                ParentDiscussionCard.child_id == Student.id,
+                ParentDiscussionCard.week_end >= recent,
+            )
+        )
+        .exists()
+    )
+    rows = (await db.execute(
+        select(Student.id, Student.parent_id).where(
+            and_(Student.parent_id.isnot(None), ~has_card)
+        )
+    )).all()
+
+    service = ParentWeeklySummaryService(db)
+    generated = 0
+    for child_id, parent_id in rows:
+        if child_id.int % shards != shard:
+            continue
+        try:
+            await service.generate_weekly_summary(parent_id, child_id)
+            generated += 1
+        except Exception as e:
+            await db.rollback()
+            logger.error(f"Weekly summary for child {child_id} failed: {e}")
+    return generated
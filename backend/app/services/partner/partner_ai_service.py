@@ -19,6 +19,7 @@ from typing import Any, Dict, List, Optional
 from sqlalchemy import select, func, and_
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.database import release_db
 from app.models.partner.sponsorship import (
     SponsorshipProgram,
     SponsoredChild,
@@ -43,11 +44,16 @@ logger = logging.getLogger(__name__)
 # ---------------------------------------------------------------------------
 
 async def _try_ai_enhance(db: AsyncSession, prompt: str, fallback: Any) -> Any:
-    """Try to enhance data with AI, gracefully fallback if unavailable."""
+    """
+    Try to enhance data with AI, gracefully fallback if unavailable.
+
+    Callers gather their data first and write after, so the session's
+    connection is returned to the pool for the duration of the AI call.
+    """
     try:
-        from app.services.ai_orchestrator import AIOrchestrator
-        orchestrator = AIOrchestrator(db)
-        await orchestrator.load_providers()
+        from app.services.ai_orchestrator import get_orchestrator
+        await release_db(db)
+        orchestrator = await get_orchestrator(None)
         response = await orchestrator.route_query(prompt)
         return response.get("message", fallback)
     except Exception as e:
@@ -28,9 +28,16 @@ from app.models.partner.partner_impact import (
     PartnerImpactReport,
     ExportFormat,
 )
+from app.utils.export import ExportColumn, format_value, store_export
 
 logger = logging.getLogger(__name__)
 
+REPORT_EXPORT_COLUMNS = [
+    ExportColumn("Section", "section"),
+    ExportColumn("Metric", "metric"),
+    ExportColumn("Value", "value"),
+]
+
 
 # ------------------------------------------------------------------
 # 1. ROI Metrics
@@ -271,9 +278,11 @@ async def export_report(
     """
     Initiate an export of an impact report in the requested format.
 
-    Validates partner ownership, updates the export_format field on the
-    report record, and returns a pending response. Actual file generation
-    is deferred to a background task / worker.
+    Validates partner ownership and updates the export fields on the report
+    record. CSV/XLSX files are flattened (section, metric, value) from the
+    report's structured data and written to the export file store via the
+    shared streaming export engine; PDF generation is deferred to a
+    background task / worker and returns a pending response.
 
     Args:
         db: Async database session.
@@ -324,18 +333,34 @@ async def export_report(
         # ----------------------------------------------------------
         report.export_format = export_fmt
         report.exported_at = datetime.utcnow()
-        await db.flush()
-
-        filename = f"report_{report_id}.{format_lower}"
 
         logger.info(
             f"Export requested for report {report_id} "
             f"(partner {partner_id}, format={format_lower})"
         )
 
+        if export_fmt in (ExportFormat.CSV, ExportFormat.XLSX):
+            handle = await store_export(
+                _iter_report_rows(report),
+                REPORT_EXPORT_COLUMNS,
+                filename=f"report_{report_id}",
+                export_format=export_fmt.value,
+                owner_id=partner_id,
+                sheet_title="Impact Report",
+            )
+            report.export_url = handle["download_url"]
+            await db.flush()
+            return {
+                "url": handle["download_url"],
+                "filename": handle["filename"],
+                "status": handle["status"],
+            }
+
+        await db.flush()
+
         return {
             "url": None,
-            "filename": filename,
+            "filename": f"report_{report_id}.{format_lower}",
             "status": "pending",
         }
 
@@ -349,6 +374,29 @@ async def export_report(
         raise
 
 
+def _iter_report_rows(report: PartnerImpactReport):
+    """Flatten an impact report's JSON sections into (section, metric, value) rows."""
+    yield {"section": "report", "metric": "title", "value": report.title}
+    yield {"section": "report", "metric": "report_type", "value": format_value(report.report_type)}
+    yield {"section": "report", "metric": "period_start", "value": format_value(report.period_start)}
+    yield {"section": "report", "metric": "period_end", "value": format_value(report.period_end)}
+    if report.summary:
+        yield {"section": "report", "metric": "summary", "value": report.summary}
+
+    def walk(section: str, prefix: str, data: Any):
+        if isinstance(data, dict):
+            for key, value in data.items():
+                yield from walk(section, f"{prefix}.{key}" if prefix else str(key), value)
+        elif isinstance(data, list):
+            for idx, value in enumerate(data):
+                yield from walk(section, f"{prefix}[{idx}]", value)
+        else:
+            yield {"section": section, "metric": prefix, "value": format_value(data)}
+
+    for section in ("metrics", "ai_insights", "cbc_progress"):
+        yield from walk(section, "", getattr(report, section) or {})
+
+
 # ------------------------------------------------------------------
 # 4. Student AI Insights
 # ------------------------------------------------------------------
@@ -9,10 +9,11 @@ import uuid
 from decimal import Decimal
 from typing import Any, Dict, List, Optional
 
-from sqlalchemy import select, desc
+from sqlalchemy import func, select, desc
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.payment import Wallet, Transaction
+from app.models.user import User
 
 
 class PartnerWalletService:
@@ -94,8 +95,12 @@ class PartnerWalletService:
         uid = uuid.UUID(user_id) if isinstance(user_id, str) else user_id
         decimal_amount = Decimal(str(amount))
 
+        # Lock the wallet row so concurrent credits and debits apply in turn
         result = await db.execute(
-            select(Wallet).where(Wallet.user_id == uid)
+            select(Wallet)
+            .where(Wallet.user_id == uid)
+            .with_for_update()
+            .execution_options(populate_existing=True)
         )
         wallet = result.scalar_one_or_none()
 
@@ -122,5 +127,22 @@ class PartnerWalletService:
             "transaction_reference": tx.reference,
         }
 
+    async def count_drifted_wallets(self, db: AsyncSession) -> int:
+        """
+        Count partner wallets whose balance no longer equals credits minus
+        debits. The balance is the materialised running total; a mismatch
+        means something moved it without credit()/debit().
+        """
+        result = await db.execute(
+            select(func.count())
+            .select_from(Wallet)
+            .join(User, User.id == Wallet.user_id)
+            .where(
+                User.role == "partner",
+                Wallet.balance != Wallet.total_credited - Wallet.total_debited,
+            )
+        )
+        return result.scalar() or 0
+
 
 partner_wallet_service = PartnerWalletService()
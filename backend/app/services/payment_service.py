@@ -32,6 +32,7 @@ from sqlalchemy.orm import joinedload
 from app.config import settings
 from app.models.payment import Transaction, Wallet, PaymentMethod
 from app.models.user import User
+from app.services.store_service import StoreService
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -371,12 +372,7 @@ class PaymentService:
             result_desc = stk_callback.get('ResultDesc')
 
             # Find payment by CheckoutRequestID
-            stmt = select(Transaction).where(
-                Transaction.transaction_id == checkout_request_id,
-                Transaction.gateway == "mpesa"
-            )
-            result = await self.db.execute(stmt)
-            payment = result.scalar_one_or_none()
+            payment = await self._find_gateway_payment("mpesa", checkout_request_id)
 
             if not payment:
                 logger.warning(f"Payment not found for CheckoutRequestID: {checkout_request_id}")
@@ -386,12 +382,19 @@ class PaymentService:
                     "error": "Payment not found"
                 }
 
+            # Already settled by an earlier delivery of this callback
+            if payment.status in ("completed", "failed"):
+                return {
+                    "success": True,
+                    "data": {
+                        "payment_id": str(payment.id),
+                        "status": payment.status
+                    },
+                    "error": ""
+                }
+
             # Update payment based on result code
             if result_code == 0:
-                # Payment successful
-                payment.status = "completed"
-                payment.completed_at = datetime.utcnow()
-
                 # Extract metadata from callback
                 callback_metadata = stk_callback.get('CallbackMetadata', {}).get('Item', [])
                 metadata = {}
@@ -401,26 +404,15 @@ class PaymentService:
                     if name:
                         metadata[name] = value
 
-                payment.payment_metadata.update(metadata)
-
-                # Credit user wallet if payment successful
-                if payment.user_id:
-                    credit_result = await self.add_funds(
-                        user_id=payment.user_id,
-                        amount=float(payment.amount),
-                        transaction_id=str(payment.id)
-                    )
-                    if not credit_result["success"]:
-                        logger.error(f"Failed to credit wallet for payment {payment.id}")
-
-                logger.info(f"M-Pesa payment completed: {payment.reference_number}")
+                # Payment successful: complete it and credit the user's wallet
+                await self._complete_payment(payment, **metadata)
+                logger.info(f"M-Pesa payment completed: {payment.transaction_reference}")
             else:
                 # Payment failed
                 payment.status = "failed"
-                payment.payment_metadata['failure_reason'] = result_desc
-                logger.warning(f"M-Pesa payment failed: {payment.reference_number} - {result_desc}")
+                self._update_metadata(payment, failure_reason=result_desc)
+                logger.warning(f"M-Pesa payment failed: {payment.transaction_reference} - {result_desc}")
 
-            payment.gateway_response.update(callback_data)
             await self.db.commit()
 
             return {
@@ -441,6 +433,73 @@ class PaymentService:
                 "error": f"Callback processing failed: {str(e)}"
             }
 
+    # ==================== GATEWAY SETTLEMENT ====================
+
+    async def _find_gateway_payment(self, gateway: str, reference: Optional[str]) -> Optional[Transaction]:
+        """Payment of ``gateway`` whose gateway reference is ``reference``."""
+        if not reference:
+            return None
+        result = await self.db.execute(
+            select(Transaction).where(
+                Transaction.transaction_reference == reference,
+                Transaction.gateway == gateway
+            )
+        )
+        return result.scalar_one_or_none()
+
+    @staticmethod
+    def _update_metadata(payment: Transaction, **values: Any) -> None:
+        """Merge ``values`` into the payment's metadata (reassigned so the JSONB change is saved)."""
+        payment.transaction_metadata = {**(payment.transaction_metadata or {}), **values}
+
+    async def _credit_wallet(self, user_id: uuid.UUID, amount: Decimal, currency: str = "KES") -> Wallet:
+        """Credit the user's wallet, creating it if needed, in the current transaction."""
+        result = await self.db.execute(
+            select(Wallet).where(Wallet.user_id == user_id).with_for_update()
+        )
+        wallet = result.scalar_one_or_none()
+        if wallet is None:
+            wallet = Wallet(
+                user_id=user_id,
+                balance=Decimal("0.00"),
+                currency=currency,
+                total_credited=Decimal("0.00"),
+                total_debited=Decimal("0.00"),
+                total_withdrawn=Decimal("0.00"),
+            )
+            self.db.add(wallet)
+        wallet.credit(Decimal(str(amount)))
+        return wallet
+
+    async def _complete_payment(self, payment: Transaction, **details: Any) -> None:
+        """
+        Mark a gateway payment completed and apply it.
+
+        A payment for a store order (``order_id`` in its metadata) confirms
+        the order, making its stock reservation permanent; any other payment,
+        or one whose order reservation already expired, is credited to the
+        payer's wallet. Runs in the caller's transaction, so the status
+        change and its effect are committed (or rolled back) together.
+        """
+        payment.status = "completed"
+        self._update_metadata(payment, completed_at=datetime.utcnow().isoformat(), **details)
+
+        order_id = (payment.transaction_metadata or {}).get("order_id")
+        if order_id:
+            order = await StoreService.confirm_order_payment(
+                self.db, uuid.UUID(str(order_id)), payment.transaction_reference
+            )
+            if order is not None:
+                logger.info(f"Store order {order_id} paid by {payment.transaction_reference}")
+                return
+            logger.warning(
+                f"Store order {order_id} is no longer pending; crediting payment "
+                f"{payment.transaction_reference} to the wallet"
+            )
+
+        if payment.user_id:
+            await self._credit_wallet(payment.user_id, payment.amount, payment.currency)
+
     # ==================== PAYPAL METHODS ====================
 
     async def initiate_paypal_payment(
@@ -657,44 +716,21 @@ class PaymentService:
             if event_type == 'PAYMENT.SALE.COMPLETED':
                 # Payment completed
                 payment_id = resource.get('parent_payment')
-
-                stmt = select(Transaction).where(
-                    Transaction.transaction_id == payment_id,
-                    Transaction.gateway == "paypal"
-                )
-                result = await self.db.execute(stmt)
-                payment = result.scalar_one_or_none()
+                payment = await self._find_gateway_payment("paypal", payment_id)
 
                 if payment and payment.status != "completed":
-                    payment.status = "completed"
-                    payment.completed_at = datetime.utcnow()
-                    payment.gateway_response.update(webhook_data)
-
-                    # Credit user wallet
-                    if payment.user_id:
-                        await self.add_funds(
-                            user_id=payment.user_id,
-                            amount=float(payment.amount),
-                            transaction_id=str(payment.id)
-                        )
-
+                    await self._complete_payment(payment, sale_id=resource.get('id'))
                     await self.db.commit()
                     logger.info(f"PayPal webhook: Payment completed {payment_id}")
 
             elif event_type == 'PAYMENT.SALE.REFUNDED':
                 # Payment refunded
                 payment_id = resource.get('parent_payment')
-
-                stmt = select(Transaction).where(
-                    Transaction.transaction_id == payment_id,
-                    Transaction.gateway == "paypal"
-                )
-                result = await self.db.execute(stmt)
-                payment = result.scalar_one_or_none()
+                payment = await self._find_gateway_payment("paypal", payment_id)
 
                 if payment:
                     payment.status = "refunded"
-                    payment.gateway_response.update(webhook_data)
+                    self._update_metadata(payment, refunded_at=datetime.utcnow().isoformat())
                     await self.db.commit()
                     logger.info(f"PayPal webhook: Payment refunded {payment_id}")
 
@@ -959,6 +995,28 @@ class PaymentService:
                     "error": "Invalid signature"
                 }
 
+            return await self.process_stripe_event(event)
+
+        except Exception as e:
+            logger.error(f"Stripe webhook processing failed: {str(e)}")
+            await self.db.rollback()
+            return {
+                "success": False,
+                "data": {},
+                "error": f"Webhook processing failed: {str(e)}"
+            }
+
+    async def process_stripe_event(self, event: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Apply a Stripe event whose signature was already verified.
+
+        Args:
+            event: Stripe event (as sent in the webhook body)
+
+        Returns:
+            Response dict with processing status
+        """
+        try:
             # Handle different event types
             event_type = event['type']
             event_object = event['data']['object']
@@ -966,66 +1024,37 @@ class PaymentService:
             if event_type == 'payment_intent.succeeded':
                 # Payment succeeded
                 payment_intent_id = event_object['id']
-
-                stmt = select(Transaction).where(
-                    Transaction.transaction_id == payment_intent_id,
-                    Transaction.gateway == "stripe"
-                )
-                result = await self.db.execute(stmt)
-                payment = result.scalar_one_or_none()
+                payment = await self._find_gateway_payment("stripe", payment_intent_id)
 
                 if payment and payment.status != "completed":
-                    payment.status = "completed"
-                    payment.completed_at = datetime.utcnow()
-                    payment.gateway_response.update(event_object)
-
-                    # Credit user wallet
-                    if payment.user_id:
-                        await self.add_funds(
-                            user_id=payment.user_id,
-                            amount=float(payment.amount),
-                            transaction_id=str(payment.id)
-                        )
-
+                    await self._complete_payment(payment)
                     await self.db.commit()
                     logger.info(f"Stripe webhook: Payment succeeded {payment_intent_id}")
 
             elif event_type == 'payment_intent.payment_failed':
                 # Payment failed
                 payment_intent_id = event_object['id']
+                payment = await self._find_gateway_payment("stripe", payment_intent_id)
 
-                stmt = select(Transaction).where(
-                    Transaction.transaction_id == payment_intent_id,
-                    Transaction.gateway == "stripe"
-                )
-                result = await self.db.execute(stmt)
-                payment = result.scalar_one_or_none()
-
-                if payment:
+                if payment and payment.status != "completed":
                     payment.status = "failed"
-                    payment.payment_metadata['failure_reason'] = event_object.get('last_payment_error', {}).get('message', 'Unknown error')
-                    payment.gateway_response.update(event_object)
+                    self._update_metadata(
+                        payment,
+                        failure_reason=(event_object.get('last_payment_error') or {}).get('message', 'Unknown error')
+                    )
                     await self.db.commit()
                     logger.info(f"Stripe webhook: Payment failed {payment_intent_id}")
 
             elif event_type == 'charge.refunded':
                 # Charge refunded
                 charge_id = event_object['id']
-                payment_intent_id = event_object.get('payment_intent')
+                payment = await self._find_gateway_payment("stripe", event_object.get('payment_intent'))
 
-                if payment_intent_id:
-                    stmt = select(Transaction).where(
-                        Transaction.transaction_id == payment_intent_id,
-                        Transaction.gateway == "stripe"
-                    )
-                    result = await self.db.execute(stmt)
-                    payment = result.scalar_one_or_none()
-
-                    if payment:
-                        payment.status = "refunded"
-                        payment.gateway_response.update(event_object)
-                        await self.db.commit()
-                        logger.info(f"Stripe webhook: Charge refunded {charge_id}")
+                if payment:
+                    payment.status = "refunded"
+                    self._update_metadata(payment, refunded_charge_id=charge_id)
+                    await self.db.commit()
+                    logger.info(f"Stripe webhook: Charge refunded {charge_id}")
 
             return {
                 "success": True,
@@ -1125,40 +1154,14 @@ class PaymentService:
                     "error": "Amount must be positive"
                 }
 
-            # Get or create wallet
-            wallet_result = await self.get_wallet(user_id)
-            if not wallet_result["success"]:
-                return wallet_result
-
-            wallet_id = uuid.UUID(wallet_result["data"]["wallet_id"])
-
-            # Reload wallet from database
-            stmt = select(Wallet).where(Wallet.id == wallet_id)
-            result = await self.db.execute(stmt)
-            wallet = result.scalar_one()
-
-            # Record balance before transaction
-            balance_before = wallet.balance
-
-            # Credit wallet
-            wallet.credit(Decimal(str(amount)), description)
-
-            # Create wallet transaction record
-            wallet_transaction = Transaction(
-                wallet_id=wallet.id,
-                payment_id=uuid.UUID(transaction_id) if transaction_id else None,
-                transaction_type="credit",
-                amount=Decimal(str(amount)),
-                balance_before=balance_before,
-                balance_after=wallet.balance,
-                description=description
-            )
-            self.db.add(wallet_transaction)
+            # Get or create wallet and credit it
+            wallet = await self._credit_wallet(user_id, Decimal(str(amount)))
+            balance_before = wallet.balance - Decimal(str(amount))
 
             await self.db.commit()
             await self.db.refresh(wallet)
 
-            logger.info(f"Added {amount} to wallet for user {user_id}")
+            logger.info(f"Added {amount} to wallet for user {user_id} ({description})")
             return {
                 "success": True,
                 "data": {
@@ -1166,7 +1169,7 @@ class PaymentService:
                     "previous_balance": float(balance_before),
                     "amount_added": float(amount),
                     "new_balance": float(wallet.balance),
-                    "transaction_id": str(wallet_transaction.id)
+                    "transaction_id": transaction_id
                 },
                 "error": ""
             }
@@ -0,0 +1,181 @@
+"""
+Scheduled Jobs
+
+The platform's periodic background work, registered on the cluster-wide
+scheduler (app/utils/scheduler.py). Importing this module registers the
+jobs; the lifespan imports it and starts the scheduler.
+
+Cluster jobs run once per period across all workers; ``per_worker`` jobs
+act on state held in each process.
+"""
+
+import logging
+
+from app import database
+from app.config import settings
+from app.utils.scheduler import scheduler
+from app.websocket.yjs_handler import SAVE_INTERVAL_SECONDS
+
+logger = logging.getLogger(__name__)
+
+
+@scheduler.job("sla_monitor", every=60, jitter=5)
+async def sla_monitor() -> None:
+    """Mark overdue tickets as breached and escalate them."""
+    from app.services.staff.sla_engine import check_sla_breaches
+
+    async with database.AsyncSessionLocal() as db:
+        result = await check_sla_breaches(db)
+    if result.get("breaches_detected", 0) > 0:
+        logger.info(
+            f"SLA monitor: {result['breaches_detected']} breaches detected, "
+            f"{result.get('escalations_triggered', 0)} escalations triggered"
+        )
+
+
+async def store_reservation_sweep() -> None:
+    """Cancel unpaid orders whose stock reservation expired and restock."""
+    from app.services.store_service import StoreService
+
+    async with database.AsyncSessionLocal() as db:
+        released = await StoreService.release_expired_reservations(db)
+        await db.commit()
+    if released:
+        logger.info(f"Reservation sweep: released {released} unpaid orders")
+
+
+# Completed payments confirm their order (PaymentService._complete_payment),
+# so only orders nobody paid for are still pending when the sweep reaches them
+if settings.store_reservation_sweep_enabled:
+    scheduler.register("store_reservation_sweep", store_reservation_sweep,
+                       every=settings.store_reservation_sweep_seconds, jitter=5)
+
+
+@scheduler.job(
+    "unread_reconcile",
+    every=settings.notification_unread_reconcile_seconds,
+    jitter=30,
+    misfire_grace=settings.notification_unread_reconcile_seconds,
+)
+async def unread_reconcile() -> None:
+    """Recount cached unread notification counters from the database."""
+    from app.services.notification_counters import reconcile_unread_counters
+
+    async with database.AsyncSessionLocal() as db:
+        corrected = await reconcile_unread_counters(db)
+    if corrected:
+        logger.info(f"Unread reconcile: corrected {corrected} counters")
+
+
+@scheduler.job("session_counter_flush", every=settings.session_counter_flush_seconds, jitter=5)
+async def session_counter_flush() -> None:
+    """Write today's Redis AI session counters to student_session_logs."""
+    from app.services.student.session_limit_service import flush_session_counters
+
+    async with database.AsyncSessionLocal() as db:
+        written = await flush_session_counters(db)
+    if written:
+        logger.debug(f"Session counter flush: wrote {written} logs")
+
+
+@scheduler.job(
+    "earnings_ledger_reconcile",
+    every=settings.earnings_ledger_reconcile_seconds,
+    jitter=60,
+    misfire_grace=settings.earnings_ledger_reconcile_seconds,
+)
+async def earnings_ledger_reconcile() -> None:
+    """Check materialised instructor balances and partner wallets against their rows."""
+    from app.services.instructor.earnings_ledger import reconcile_earnings_ledger
+    from app.services.partner.wallet_service import partner_wallet_service
+
+    async with database.AsyncSessionLocal() as db:
+        rebuilt = await reconcile_earnings_ledger(db)
+        drifted_wallets = await partner_wallet_service.count_drifted_wallets(db)
+    if rebuilt:
+        logger.info(f"Earnings ledger reconcile: rebuilt {rebuilt} instructor balances")
+    if drifted_wallets:
+        logger.warning(f"Earnings ledger reconcile: {drifted_wallets} partner wallets do not match their totals")
+
+
+@scheduler.job("webhook_inbox_sweep", every=settings.webhook_sweep_seconds, jitter=5)
+async def webhook_inbox_sweep() -> None:
+    """Re-queue stalled payment webhooks and refresh inbox backlog gauges."""
+    from app.services.webhook_inbox import sweep_inbox
+
+    async with database.AsyncSessionLocal() as db:
+        requeued = await sweep_inbox(db)
+    if requeued:
+        logger.info(f"Webhook sweep: re-queued events of {requeued} payments")
+
+
+@scheduler.job("scheduled_reports", cron="*/15 * * * *", jitter=30, misfire_grace=600, timeout=900)
+async def scheduled_reports() -> None:
+    """Generate and send report schedules that have come due."""
+    from app.services.staff.report_builder_service import run_scheduled_reports
+
+    async with database.AsyncSessionLocal() as db:
+        await run_scheduled_reports(db)
+        await db.commit()
+
+
+@scheduler.job("age_transitions", cron="0 5 * * *", jitter=60, misfire_grace=6 * 3600)
+async def age_transitions() -> None:
+    """Notify students turning 19 today, and their parents."""
+    from app.services.age_transition_service import notify_students_turning_19
+
+    async with database.AsyncSessionLocal() as db:
+        notified = await notify_students_turning_19(db)
+    if notified:
+        logger.info(f"Age transitions: notified {notified} students")
+
+
+@scheduler.job(
+    "weekly_summaries",
+    cron="0 15 * * 0",
+    jitter=300,
+    misfire_grace=12 * 3600,
+    shards=settings.weekly_summary_shards,
+    timeout=3600,
+)
+async def weekly_summaries(shard: int, shards: int) -> None:
+    """Generate the weekly parent summaries for one partition of children."""
+    from app.services.parent.weekly_summary_service import generate_weekly_summaries
+
+    async with database.AsyncSessionLocal() as db:
+        generated = await generate_weekly_summaries(db, shard, shards)
+    logger.info(f"Weekly summaries: generated {generated} for partition {shard}/{shards}")
+
+
+@scheduler.job("leaderboard_recovery", every=3600, jitter=60, misfire_grace=3600, run_on_start=True)
+async def leaderboard_recovery() -> None:
+    """Recompute student/instructor leaderboards missing from Redis."""
+    from app.services.instructor.gamification_service import (
+        INSTRUCTOR_LEADERBOARD, LEADERBOARD_SCOPE, rebuild_instructor_leaderboards,
+    )
+    from app.services.student.gamification_service import (
+        SCHOOL_SCOPE, STUDENT_LEADERBOARD, rebuild_student_leaderboards,
+    )
+
+    async with database.AsyncSessionLocal() as db:
+        if not await STUDENT_LEADERBOARD.exists(SCHOOL_SCOPE):
+            boards = await rebuild_student_leaderboards(db)
+            logger.info(f"Leaderboard recovery: rebuilt {boards} student boards")
+        if not await INSTRUCTOR_LEADERBOARD.exists(LEADERBOARD_SCOPE):
+            boards = await rebuild_instructor_leaderboards(db)
+            logger.info(f"Leaderboard recovery: rebuilt {boards} instructor boards")
+
+
+@scheduler.job("replica_lag_monitor", every=settings.database_replica_lag_check_seconds, per_worker=True)
+async def replica_lag_monitor() -> None:
+    """Measure read replica lag; reads fall back to the primary while it is high."""
+    if settings.database_read_url:
+        await database.check_replica_lag()
+
+
+@scheduler.job("yjs_autosave", every=SAVE_INTERVAL_SECONDS, per_worker=True, misfire_grace=30)
+async def yjs_autosave() -> None:
+    """Persist collaborative documents edited in this worker."""
+    from app.websocket.yjs_handler import yjs_manager
+
+    await yjs_manager.save_dirty_rooms()
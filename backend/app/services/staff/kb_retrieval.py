@@ -0,0 +1,241 @@
+"""
+Knowledge Base Retrieval
+
+Hybrid article search behind support agent suggestions. Two rankers run
+concurrently, each on its own read session:
+
+- lexical: PostgreSQL full-text search over kb_articles.search_vector
+  (title weighted above body) ranked with ts_rank_cd. The query's terms
+  are OR-ed together, since ticket text rarely contains every word of
+  the article that answers it.
+- vector: cosine distance between the query embedding and article chunk
+  embeddings (HNSW index), best chunk per article.
+
+Rankings are merged with reciprocal rank fusion: an article scores
+sum(1 / (RRF_K + rank)) over the rankers that returned it, so articles
+both rankers agree on come first without calibrating one ranker's
+scores against the other's. Rankers that have not answered within
+``kb_suggestion_budget_ms`` are left out of that response (the first
+to answer is always waited for).
+"""
+
+import asyncio
+import contextlib
+import logging
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.services.embeddings import embed_query, get_embedding_backend
+
+logger = logging.getLogger(__name__)
+
+RRF_K = 60
+
+# Tag for cached suggestions; invalidated when articles change
+KB_CACHE_TAG = "kb:articles"
+
+# Ticket text past this adds little to the ranking
+_MAX_QUERY_CHARS = 2000
+
+
+@dataclass
+class Candidate:
+    """One ranked article (or article chunk) from a ranker."""
+
+    article_id: str
+    title: str
+    slug: str
+    snippet: str
+
+
+Ranker = Callable[[str, int], Awaitable[List[Candidate]]]
+
+
+def fuse(rankings: Dict[str, Sequence[Candidate]], limit: int) -> List[Dict[str, Any]]:
+    """
+    Reciprocal rank fusion of ``rankings`` (ranker name -> best first).
+
+    Only an article's first candidate in each ranking counts, so several
+    matching chunks of one article do not crowd out other articles. The
+    snippet comes from the first ranking that returned the article.
+    ``similarity_score`` is the fused score relative to the best possible
+    (first in every ranking).
+    """
+    scores: Dict[str, float] = defaultdict(float)
+    best: Dict[str, Candidate] = {}
+    matched_by: Dict[str, List[str]] = defaultdict(list)
+
+    for name, ranking in rankings.items():
+        rank = 0
+        for candidate in ranking:
+            if name in matched_by[candidate.article_id]:
+                continue
+            rank += 1
+            scores[candidate.article_id] += 1.0 / (RRF_K + rank)
+            best.setdefault(candidate.article_id, candidate)
+            matched_by[candidate.article_id].append(name)
+
+    ceiling = max(len(rankings), 1) / (RRF_K + 1)
+    top = sorted(scores, key=lambda article_id: scores[article_id], reverse=True)[:limit]
+    return [
+        {
+            "article_id": article_id,
+            "title": best[article_id].title,
+            "slug": best[article_id].slug,
+            "snippet": best[article_id].snippet,
+            "similarity_score": round(scores[article_id] / ceiling, 4),
+            "matched_by": matched_by[article_id],
+        }
+        for article_id in top
+    ]
+
+
+def _record(ranker: str, seconds: float) -> None:
+    try:
+        from app.metrics import kb_retrieval_duration
+
+        kb_retrieval_duration.labels(ranker=ranker).observe(seconds)
+    except Exception:
+        pass
+
+
+class HybridRetriever:
+    """Runs its rankers concurrently and fuses their rankings."""
+
+    def __init__(self, rankers: Dict[str, Ranker], candidates: int = 20):
+        self.rankers = rankers
+        self.candidates = candidates
+
+    async def search(
+        self,
+        query: str,
+        limit: int = 5,
+        budget: Optional[float] = None,
+    ) -> Tuple[List[Dict[str, Any]], bool]:
+        """
+        Return (results, complete).
+
+        ``complete`` is False when a ranker failed or missed the
+        ``budget`` (seconds); such results should not be cached. Raises
+        RuntimeError when no ranker produced a ranking.
+        """
+        query = query[:_MAX_QUERY_CHARS]
+        start = time.perf_counter()
+        tasks = {
+            asyncio.create_task(self._timed(name, ranker, query)): name
+            for name, ranker in self.rankers.items()
+        }
+        done, pending = await asyncio.wait(tasks, timeout=budget)
+        if not done:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        for task in pending:
+            # Let it finish in the background (a query embedding computed
+            # there is cached for the next request), but don't wait for it
+            logger.info(f"KB ranker {tasks[task]} missed the {budget}s budget")
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+
+        rankings = {}
+        for task, name in tasks.items():
+            if task not in done:
+                continue
+            if task.exception() is not None:
+                logger.warning(f"KB ranker {name} failed: {task.exception()}")
+                continue
+            rankings[name] = task.result()
+        if not rankings:
+            raise RuntimeError("No knowledge base ranker answered")
+
+        results = fuse(rankings, limit)
+        _record("fused", time.perf_counter() - start)
+        return results, len(rankings) == len(self.rankers)
+
+    async def _timed(self, name: str, ranker: Ranker, query: str) -> List[Candidate]:
+        start = time.perf_counter()
+        try:
+            return await ranker(query, self.candidates)
+        finally:
+            _record(name, time.perf_counter() - start)
+
+
+# ── PostgreSQL rankers ───────────────────────────────────────────────
+
+@contextlib.asynccontextmanager
+async def _read_session():
+    from app import database
+
+    session_factory = database.AsyncReadSessionLocal or database.AsyncSessionLocal
+    if session_factory is None:
+        raise RuntimeError("Database not initialized")
+    async with session_factory() as session:
+        yield session
+
+
+_LEXICAL_SQL = text("""
+    SELECT a.id, a.title, a.slug, left(a.body, 200) AS snippet
+    FROM kb_articles a,
+         (SELECT replace(plainto_tsquery('english', :query)::text, ' & ', ' | ')::tsquery AS q) query
+    WHERE a.status = 'published'
+      AND a.search_vector @@ query.q
+    ORDER BY ts_rank_cd(a.search_vector, query.q, 32) DESC
+    LIMIT :limit
+""")
+
+_VECTOR_SQL = text("""
+    SELECT
+        e.article_id,
+        a.title,
+        a.slug,
+        e.chunk_text,
+        1 - (e.embedding <=> :query_vec) AS similarity
+    FROM kb_embeddings e
+    JOIN kb_articles a ON a.id = e.article_id
+    WHERE a.status = 'published'
+      AND e.embedding_model = :model
+    ORDER BY e.embedding <=> :query_vec
+    LIMIT :limit
+""")
+
+
+async def vector_rows(db: AsyncSession, query_embedding: List[float], limit: int) -> list:
+    """
+    Nearest published chunks to ``query_embedding`` (article_id, title,
+    slug, chunk_text, similarity).
+
+    Runs in a savepoint so a failure leaves ``db`` usable.
+    """
+    async with db.begin_nested():
+        await db.execute(text(f"SET LOCAL hnsw.ef_search = {int(settings.kb_hnsw_ef_search)}"))
+        result = await db.execute(
+            _VECTOR_SQL,
+            {
+                "query_vec": query_embedding,
+                "model": get_embedding_backend().model,
+                "limit": limit,
+            },
+        )
+        return result.fetchall()
+
+
+async def lexical_ranker(query: str, limit: int) -> List[Candidate]:
+    async with _read_session() as db:
+        rows = (await db.execute(_LEXICAL_SQL, {"query": query, "limit": limit})).all()
+    return [Candidate(str(row.id), row.title, row.slug, row.snippet or "") for row in rows]
+
+
+async def vector_ranker(query: str, limit: int) -> List[Candidate]:
+    query_embedding = await embed_query(query)
+    if query_embedding is None:
+        return []
+    async with _read_session() as db:
+        # Several chunks per article; fuse() keeps each article's best
+        rows = await vector_rows(db, query_embedding, limit * 3)
+    return [Candidate(str(row[0]), row[1], row[2], row[3][:200]) for row in rows]
+
+
+retriever = HybridRetriever({"vector": vector_ranker, "lexical": lexical_ranker})
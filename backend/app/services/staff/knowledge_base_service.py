@@ -5,24 +5,35 @@ Article CRUD, vector-search via pgvector embeddings, and AI-powered
 KB article suggestions for support tickets.
 """
 
+import hashlib
 import logging
 import math
 import uuid
 from datetime import datetime
 from typing import Any, Dict, List, Optional
 
-from sqlalchemy import select, func, and_, text, delete
+from sqlalchemy import select, func, and_, text, delete, literal_column, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.config import settings
 from app.models.staff.knowledge_article import KBArticle, KBEmbedding, KBCategory
 from app.services.ai_orchestrator import AIOrchestrator
+from app.models.staff.ticket import StaffTicket
+from app.services.embeddings import (
+    EmbeddingBackend,
+    content_hash,
+    embed_query,
+    get_embedding_backend,
+)
+from app.services.staff.kb_retrieval import KB_CACHE_TAG, retriever as kb_retriever, vector_rows
+from app.utils.cache import cache_get, cache_set
 
 logger = logging.getLogger(__name__)
 
-# Embedding dimension (OpenAI text-embedding-ada-002 compatible)
-EMBEDDING_DIMENSION = 1536
 # Maximum chunk size for embedding generation
 CHUNK_SIZE = 500
+# Seconds suggestions for a ticket are cached (dropped sooner when articles change)
+SUGGESTION_CACHE_TTL = 600
 
 
 class KnowledgeBaseService:
@@ -66,8 +77,15 @@ class KnowledgeBaseService:
         return await vector_search(db, query_text=query, limit=top_k)
 
     @staticmethod
-    async def get_suggestions(db, *, ticket_id, additional_context=None):
-        return await get_ai_suggestions(db, ticket_text=additional_context or ticket_id, limit=5)
+    async def get_suggestions(db, *, ticket_id, additional_context=None, ticket_text=None, include_summary=False):
+        query = ticket_text or await _ticket_text(db, ticket_id)
+        if additional_context:
+            query = f"{query}\n{additional_context}" if query else additional_context
+        if not query.strip():
+            return {"suggestions": [], "ai_summary": None}
+        return await get_ai_suggestions(
+            db, ticket_text=query, limit=5, ticket_id=ticket_id, include_summary=include_summary,
+        )
 
 
 async def list_articles(
@@ -205,13 +223,8 @@ async def create_article(
         db.add(article)
         await db.flush()
 
-        # Generate embeddings asynchronously
-        try:
-            await _generate_embeddings(db, str(article.id), article.body)
-        except Exception as emb_error:
-            logger.warning(
-                f"Embedding generation failed for article {article.id}: {emb_error}"
-            )
+        # Embed the article on the job queue once it is committed
+        _queue_embeddings(db, article)
 
         logger.info(f"KB article created: {article.title} by {author_id}")
 
@@ -258,10 +271,7 @@ async def update_article(
 
         # Regenerate embeddings if body changed
         if body_changed and article.body:
-            try:
-                await _generate_embeddings(db, str(article.id), article.body)
-            except Exception as emb_error:
-                logger.warning(f"Embedding regeneration failed: {emb_error}")
+            _queue_embeddings(db, article)
 
         logger.info(f"KB article {article_id} updated")
 
@@ -310,37 +320,18 @@ async def vector_search(
     limit: int = 5,
 ) -> List[Dict[str, Any]]:
     """
-    Embed the query text and perform cosine similarity search against
-    KB article embeddings using pgvector.
+    Embed the query text (cached per worker) and perform cosine
+    similarity search against KB article embeddings using pgvector.
 
     Falls back to basic keyword search if pgvector is not available.
     """
     try:
-        # Generate query embedding
-        query_embedding = await _get_embedding_vector(query_text)
+        query_embedding = await embed_query(query_text)
 
         if query_embedding:
-            # pgvector cosine similarity search
-            # Uses raw SQL because SQLAlchemy does not natively support vector ops
-            embedding_str = "[" + ",".join(str(v) for v in query_embedding) + "]"
-            sql = text("""
-                SELECT
-                    e.article_id,
-                    a.title,
-                    a.slug,
-                    e.chunk_text,
-                    1 - (e.embedding <=> :query_vec::vector) AS similarity
-                FROM kb_embeddings e
-                JOIN kb_articles a ON a.id = e.article_id
-                WHERE a.status = 'published'
-                ORDER BY e.embedding <=> :query_vec::vector
-                LIMIT :limit
-            """)
-            result = await db.execute(
-                sql,
-                {"query_vec": embedding_str, "limit": limit},
-            )
-            rows = result.fetchall()
+            # pgvector cosine distance over the HNSW index; the query vector
+            # is bound in binary form
+            rows = await vector_rows(db, query_embedding, limit)
 
             return [
                 {
@@ -366,17 +357,23 @@ async def get_ai_suggestions(
     db: AsyncSession,
     ticket_text: str,
     limit: int = 5,
+    ticket_id: Optional[str] = None,
+    include_summary: bool = True,
 ) -> Dict[str, Any]:
     """
     Given ticket text, find similar KB articles and optionally generate
     an AI summary of the best matches.
+
+    Articles come from hybrid lexical + vector retrieval (kb_retrieval)
+    and are cached per ticket and text until articles change; the LLM
+    summary is only generated when ``include_summary`` is set.
     """
     try:
-        results = await vector_search(db, ticket_text, limit)
+        results = await suggest_articles(db, ticket_text, limit, ticket_id=ticket_id)
 
         # Generate AI summary if results found
         ai_summary = None
-        if results:
+        if results and include_summary:
             try:
                 orchestrator = AIOrchestrator(db)
                 await orchestrator.load_providers()
@@ -405,77 +402,194 @@ async def get_ai_suggestions(
         return {"suggestions": [], "ai_summary": None}
 
 
+async def suggest_articles(
+    db: AsyncSession,
+    ticket_text: str,
+    limit: int = 5,
+    ticket_id: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    """Hybrid-ranked articles for ticket text, cached per ticket."""
+    digest = hashlib.sha1(" ".join(ticket_text.split()).encode()).hexdigest()[:16]
+    key = f"kb:suggestions:{ticket_id or '-'}:{digest}:{limit}"
+    cached = await cache_get(key)
+    if cached is not None:
+        return cached
+
+    try:
+        results, complete = await kb_retriever.search(
+            ticket_text, limit, budget=settings.kb_suggestion_budget_ms / 1000,
+        )
+    except RuntimeError as e:
+        logger.warning(f"Hybrid KB search unavailable, using keyword fallback: {e}")
+        return await _keyword_search(db, ticket_text, limit)
+
+    # A ranking missing a ranker is served once but not cached
+    if complete:
+        await cache_set(key, results, ttl=SUGGESTION_CACHE_TTL, tags=[KB_CACHE_TAG])
+    return results
+
+
+async def _ticket_text(db: AsyncSession, ticket_id: str) -> str:
+    try:
+        row = (await db.execute(
+            select(StaffTicket.subject, StaffTicket.description)
+            .where(StaffTicket.id == uuid.UUID(str(ticket_id)))
+        )).first()
+    except ValueError:
+        return ""
+    return f"{row.subject}\n{row.description}" if row else ""
+
+
+def _queue_embeddings(db: AsyncSession, article: KBArticle) -> None:
+    """Embed ``article`` in a background job after ``db`` commits."""
+    from app.services.background_jobs import kb_embeddings
+
+    digest = hashlib.sha1((article.body or "").encode()).hexdigest()[:16]
+    kb_embeddings.defer(db, {"article_id": article.id}, idempotency_key=f"{article.id}:{digest}")
+
+
 async def _generate_embeddings(
     db: AsyncSession,
     article_id: str,
     body_text: str,
 ) -> None:
     """
-    Split article body into chunks, generate embeddings via AI, and
-    store them in the kb_embeddings table.
+    Split article body into chunks and store their embeddings in the
+    kb_embeddings table.
+
+    Chunks are identified by a hash of their text and the embedding
+    model. Unchanged chunks keep their rows, chunks already embedded for
+    another article copy that vector, and only the rest are sent to the
+    embedding backend, in batches.
+
+    Every chunk written has a vector: without a backend the article's
+    chunks are only removed. On failure ``db`` is rolled back and the
+    error re-raised, so the kb_embeddings job retries it.
     """
     try:
-        # Remove existing embeddings for this article
-        await db.execute(
-            delete(KBEmbedding).where(KBEmbedding.article_id == article_id)
-        )
+        backend = get_embedding_backend()
+        if backend is None:
+            await db.execute(delete(KBEmbedding).where(KBEmbedding.article_id == article_id))
+            logger.info(f"No embedding backend; cleared chunks of article {article_id}")
+            return
 
-        # Split text into chunks
         chunks = _split_into_chunks(body_text, CHUNK_SIZE)
-
-        for idx, chunk in enumerate(chunks):
+        hashes = [content_hash(chunk, backend.model) for chunk in chunks]
+
+        existing = (await db.execute(
+            select(
+                KBEmbedding.id,
+                KBEmbedding.content_hash,
+                KBEmbedding.chunk_index,
+                literal_column("embedding IS NOT NULL").label("has_vector"),
+            ).where(KBEmbedding.article_id == article_id)
+        )).all()
+
+        # Keep one embedded row per unchanged chunk; drop the rest
+        kept = {}
+        stale = []
+        for row in existing:
+            if row.has_vector and row.content_hash in hashes and row.content_hash not in kept:
+                kept[row.content_hash] = row
+            else:
+                stale.append(row.id)
+        if stale:
+            await db.execute(delete(KBEmbedding).where(KBEmbedding.id.in_(stale)))
+
+        new_rows = []
+        for idx, (chunk, digest) in enumerate(zip(chunks, hashes)):
+            row = kept.pop(digest, None)
+            if row is not None:
+                if row.chunk_index != idx:
+                    await db.execute(
+                        update(KBEmbedding).where(KBEmbedding.id == row.id).values(chunk_index=idx)
+                    )
+                continue
             embedding = KBEmbedding(
                 id=uuid.uuid4(),
                 article_id=article_id,
                 chunk_text=chunk,
                 chunk_index=idx,
+                content_hash=digest,
+                embedding_model=backend.model,
             )
             db.add(embedding)
+            new_rows.append(embedding)
+        await db.flush()
 
-            # Generate the actual vector embedding
-            # The vector column is populated via raw SQL after the row is created
-            vector = await _get_embedding_vector(chunk)
-            if vector:
-                await db.execute(
-                    text(
-                        "UPDATE kb_embeddings SET embedding = :vec::vector "
-                        "WHERE id = :emb_id"
-                    ),
-                    {"vec": "[" + ",".join(str(v) for v in vector) + "]", "emb_id": embedding.id},
-                )
+        if new_rows:
+            await _store_vectors(db, backend, new_rows)
 
-        await db.flush()
-        logger.info(f"Generated {len(chunks)} embeddings for article {article_id}")
+        logger.info(
+            f"Embeddings for article {article_id}: {len(chunks)} chunks, "
+            f"{len(chunks) - len(new_rows)} unchanged"
+        )
 
     except Exception as e:
         logger.warning(f"Embedding generation error for article {article_id}: {e}")
+        await db.rollback()
+        raise
 
 
-async def _get_embedding_vector(text_input: str) -> Optional[List[float]]:
-    """
-    Generate an embedding vector for the given text using the AI orchestrator.
-
-    Returns None if embedding generation is unavailable.
-    """
-    try:
-        from app.config import settings
+async def _store_vectors(
+    db: AsyncSession,
+    backend: EmbeddingBackend,
+    rows: List[KBEmbedding],
+) -> None:
+    """Fill the vector column of new chunk rows, embedding each distinct chunk once."""
+    # The vector column is not mapped; it is written with raw SQL and the
+    # vectors are bound as pgvector binary values (see database.py)
+    shared = set((await db.execute(
+        select(KBEmbedding.content_hash)
+        .where(
+            KBEmbedding.content_hash.in_({row.content_hash for row in rows}),
+            literal_column("embedding IS NOT NULL"),
+        )
+        .distinct()
+    )).scalars())
+
+    to_embed: Dict[str, str] = {}
+    for row in rows:
+        if row.content_hash not in shared:
+            to_embed.setdefault(row.content_hash, row.chunk_text)
+
+    vectors = {}
+    if to_embed:
+        embedded = await backend.embed(list(to_embed.values()))
+        if len(embedded) != len(to_embed):
+            raise RuntimeError(f"Embedding backend returned {len(embedded)} vectors for {len(to_embed)} chunks")
+        vectors = dict(zip(to_embed, embedded))
+
+    if vectors:
+        await db.execute(
+            text("UPDATE kb_embeddings SET embedding = :embedding WHERE id = :id"),
+            [{"embedding": vectors[row.content_hash], "id": row.id}
+             for row in rows if row.content_hash in vectors],
+        )
+    copied = [row for row in rows if row.content_hash in shared]
+    if copied:
+        await db.execute(
+            text(
+                "UPDATE kb_embeddings SET embedding = ("
+                "  SELECT s.embedding FROM kb_embeddings s"
+                "  WHERE s.content_hash = :content_hash AND s.embedding IS NOT NULL"
+                "  LIMIT 1"
+                ") WHERE id = :id"
+            ),
+            [{"content_hash": row.content_hash, "id": row.id} for row in copied],
+        )
 
-        if settings.openai_api_key:
-            from openai import OpenAI
+    _record_chunks(backend.model, embedded=len(vectors), reused=len(rows) - len(vectors))
 
-            client = OpenAI(api_key=settings.openai_api_key)
-            response = client.embeddings.create(
-                model="text-embedding-ada-002",
-                input=text_input[:8000],
-            )
-            return response.data[0].embedding
 
-        logger.debug("No embedding provider configured")
-        return None
+def _record_chunks(backend: str, embedded: int, reused: int) -> None:
+    try:
+        from app.metrics import embedding_chunks_total
 
-    except Exception as e:
-        logger.warning(f"Embedding generation failed: {e}")
-        return None
+        embedding_chunks_total.labels(backend=backend, result="embedded").inc(embedded)
+        embedding_chunks_total.labels(backend=backend, result="reused").inc(reused)
+    except Exception:
+        pass
 
 
 def _split_into_chunks(text_body: str, chunk_size: int) -> List[str]:
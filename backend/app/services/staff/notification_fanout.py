@@ -0,0 +1,407 @@
+"""
+Bulk Notification Fan-out
+
+Sends one notification to a large audience without a request waiting on
+the delivery:
+
+1. The audience is resolved in SQL and walked in batches of
+   ``notification_fanout_batch_size`` user ids (keyset pagination for
+   role audiences, chunked lookups for explicit id lists).
+2. Each batch is written with one multi-row INSERT and committed, so
+   recipients see the in-app notification while the send is running.
+3. The batch's push subscriptions are loaded with one query and handed to
+   PushDispatcher. It keeps up to ``push_concurrency`` requests in flight
+   over one pooled aiohttp session and signs VAPID headers once per push
+   service instead of once per device.
+4. Subscriptions the push service reports as gone (404/410) are
+   deactivated in batches.
+5. After every batch, progress is sent to the initiating staff member over
+   the staff WebSocket.
+"""
+
+import asyncio
+import json
+import logging
+import time
+import uuid
+from datetime import datetime
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+from urllib.parse import urlparse
+
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.metrics import push_deliveries_total
+from app.models.notification import Notification, NotificationType
+from app.models.staff.notification_preference import PushSubscription
+from app.models.user import User
+from app.services.notification_counters import record_unread_change
+from app.websocket.connection_manager import ws_manager
+
+try:
+    import aiohttp
+    from py_vapid import Vapid
+    from pywebpush import WebPusher
+except ImportError:
+    aiohttp = None
+    Vapid = None
+    WebPusher = None
+
+logger = logging.getLogger(__name__)
+
+# Push service responses meaning the subscription no longer exists
+_EXPIRED_STATUSES = frozenset({404, 410})
+
+# VAPID JWTs may live up to 24h; re-sign well before that
+_VAPID_LIFETIME = 12 * 60 * 60
+
+EVENT_BULK_PROGRESS = "bulk_notification_progress"
+
+ProgressCallback = Callable[[Dict[str, Any]], Awaitable[None]]
+
+
+class PushDispatcher:
+    """
+    Bounded-concurrency Web Push sender.
+
+    Use as an async context manager; leaving the block waits for every
+    queued delivery. Expired subscription ids accumulate in ``expired``
+    for the caller to deactivate.
+    """
+
+    def __init__(self, concurrency: Optional[int] = None) -> None:
+        self._limit = concurrency or settings.push_concurrency
+        self._semaphore = asyncio.Semaphore(self._limit)
+        self._tasks: Set[asyncio.Task] = set()
+        self._session = None
+        self._vapid = None
+        # Push service origin -> (expiry, signed headers)
+        self._vapid_headers: Dict[str, Tuple[int, Dict[str, str]]] = {}
+        self.sent = 0
+        self.failed = 0
+        self.expired: List[Any] = []
+
+    @property
+    def enabled(self) -> bool:
+        return WebPusher is not None and bool(settings.vapid_private_key)
+
+    async def __aenter__(self) -> "PushDispatcher":
+        if self.enabled:
+            self._vapid = Vapid.from_string(private_key=settings.vapid_private_key)
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self._limit),
+            )
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        try:
+            await self.drain()
+        finally:
+            if self._session is not None:
+                await self._session.close()
+                self._session = None
+
+    def _headers_for(self, endpoint: str) -> Dict[str, str]:
+        url = urlparse(endpoint)
+        audience = f"{url.scheme}://{url.netloc}"
+        now = int(time.time())
+        cached = self._vapid_headers.get(audience)
+        if cached is None or cached[0] - 60 < now:
+            expires = now + _VAPID_LIFETIME
+            headers = self._vapid.sign({
+                "sub": f"mailto:{settings.vapid_claims_email}",
+                "aud": audience,
+                "exp": expires,
+            })
+            cached = (expires, headers)
+            self._vapid_headers[audience] = cached
+        return dict(cached[1])
+
+    async def submit(self, subscription: Any, payload: str) -> None:
+        """Queue one delivery, waiting while ``push_concurrency`` are in flight."""
+        if not self.enabled:
+            return
+        await self._semaphore.acquire()
+        task = asyncio.create_task(self._deliver(subscription, payload))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def drain(self) -> None:
+        while self._tasks:
+            await asyncio.gather(*list(self._tasks), return_exceptions=True)
+
+    def take_expired(self) -> List[Any]:
+        expired, self.expired = self.expired, []
+        return expired
+
+    async def _deliver(self, subscription: Any, payload: str) -> None:
+        status = None
+        try:
+            pusher = WebPusher(
+                {
+                    "endpoint": subscription.endpoint,
+                    "keys": {"p256dh": subscription.p256dh_key, "auth": subscription.auth_key},
+                },
+                aiohttp_session=self._session,
+            )
+            response = await pusher.send_async(
+                data=payload,
+                headers=self._headers_for(subscription.endpoint),
+                ttl=settings.push_ttl_seconds,
+                timeout=aiohttp.ClientTimeout(total=settings.push_timeout_seconds),
+            )
+            status = response.status
+        except Exception as e:
+            logger.warning(f"Push delivery failed for subscription {subscription.id}: {e}")
+        finally:
+            self._semaphore.release()
+
+        if status is not None and status < 300:
+            self.sent += 1
+            push_deliveries_total.labels(result="sent").inc()
+        elif status in _EXPIRED_STATUSES:
+            self.expired.append(subscription.id)
+            push_deliveries_total.labels(result="expired").inc()
+        else:
+            if status is not None:
+                logger.warning(f"Push service returned {status} for subscription {subscription.id}")
+            self.failed += 1
+            push_deliveries_total.labels(result="failed").inc()
+
+
+async def deactivate_subscriptions(db: AsyncSession, subscription_ids: List[Any]) -> int:
+    """Deactivate expired push subscriptions with one UPDATE."""
+    if not subscription_ids:
+        return 0
+    await db.execute(
+        update(PushSubscription)
+        .where(PushSubscription.id.in_(subscription_ids))
+        .values(is_active=False)
+    )
+    return len(subscription_ids)
+
+
+def _recipients() -> Any:
+    return select(User.id).where(
+        User.is_active == True,  # noqa: E712
+        User.is_deleted == False,  # noqa: E712
+    )
+
+
+async def count_audience(
+    db: AsyncSession,
+    user_ids: Optional[List[str]] = None,
+    roles: Optional[List[str]] = None,
+) -> int:
+    """Upper bound of recipients, for progress reporting."""
+    if user_ids is not None:
+        return len(set(str(uid) for uid in user_ids))
+    query = _recipients()
+    if roles:
+        query = query.where(User.role.in_(roles))
+    return (await db.execute(select(func.count()).select_from(query.subquery()))).scalar() or 0
+
+
+async def iter_audience(
+    db: AsyncSession,
+    user_ids: Optional[List[str]] = None,
+    roles: Optional[List[str]] = None,
+    batch_size: Optional[int] = None,
+) -> AsyncIterator[List[uuid.UUID]]:
+    """
+    Yield batches of active recipient ids.
+
+    Explicit ids are filtered against the users table chunk by chunk (large
+    IN lists would exceed the driver's parameter limit); role audiences are
+    walked with keyset pagination on ``users.id``.
+    """
+    batch_size = batch_size or settings.notification_fanout_batch_size
+    query = _recipients()
+    if roles:
+        query = query.where(User.role.in_(roles))
+
+    if user_ids is not None:
+        ids = sorted({uuid.UUID(str(uid)) for uid in user_ids})
+        for start in range(0, len(ids), batch_size):
+            chunk = ids[start:start + batch_size]
+            batch = (await db.execute(query.where(User.id.in_(chunk)))).scalars().all()
+            if batch:
+                yield list(batch)
+        return
+
+    last_id = None
+    while True:
+        page = query.order_by(User.id).limit(batch_size)
+        if last_id is not None:
+            page = page.where(User.id > last_id)
+        batch = (await db.execute(page)).scalars().all()
+        if not batch:
+            return
+        yield list(batch)
+        if len(batch) < batch_size:
+            return
+        last_id = batch[-1]
+
+
+async def insert_notifications(
+    db: AsyncSession,
+    user_ids: List[uuid.UUID],
+    notification: Dict[str, Any],
+) -> int:
+    """Insert one notification per user with a single multi-row INSERT."""
+    if not user_ids:
+        return 0
+    now = datetime.utcnow()
+    notification_type = NotificationType(notification.get("notification_type", "system"))
+    await db.execute(
+        insert(Notification),
+        [
+            {
+                "id": uuid.uuid4(),
+                "user_id": uid,
+                "type": notification_type,
+                "title": notification["title"],
+                "message": notification["message"],
+                "action_url": notification.get("action_url"),
+                "action_label": notification.get("action_label"),
+                "metadata_": notification.get("data") or {},
+                "is_read": False,
+                "created_at": now,
+            }
+            for uid in user_ids
+        ],
+    )
+    for uid in user_ids:
+        record_unread_change(db, uid, 1)
+    return len(user_ids)
+
+
+async def fan_out_notification(
+    db: AsyncSession,
+    notification: Dict[str, Any],
+    *,
+    user_ids: Optional[List[str]] = None,
+    roles: Optional[List[str]] = None,
+    job_id: Optional[str] = None,
+    on_progress: Optional[ProgressCallback] = None,
+) -> Dict[str, Any]:
+    """
+    Create in-app notifications for an audience and push them to devices.
+
+    The audience is ``user_ids``, ``roles`` or both (intersection); only
+    active, non-deleted users receive it. Commits after every batch.
+    """
+    progress: Dict[str, Any] = {
+        "job_id": job_id,
+        "status": "running",
+        "total_users": await count_audience(db, user_ids, roles),
+        "notifications_created": 0,
+        "push_sent": 0,
+        "push_failed": 0,
+        "subscriptions_pruned": 0,
+    }
+    payload = json.dumps({
+        "title": notification["title"],
+        "body": notification["message"],
+        "data": notification.get("data") or {},
+    })
+    prune_threshold = settings.notification_fanout_batch_size
+
+    async def report() -> None:
+        progress["push_sent"] = dispatcher.sent
+        progress["push_failed"] = dispatcher.failed
+        if on_progress is not None:
+            try:
+                await on_progress(dict(progress))
+            except Exception as e:
+                logger.warning(f"Bulk notification progress report failed: {e}")
+
+    async with PushDispatcher() as dispatcher:
+        async for batch in iter_audience(db, user_ids, roles):
+            progress["notifications_created"] += await insert_notifications(db, batch, notification)
+            await db.commit()
+
+            if dispatcher.enabled:
+                subscriptions = (await db.execute(
+                    select(
+                        PushSubscription.id,
+                        PushSubscription.endpoint,
+                        PushSubscription.p256dh_key,
+                        PushSubscription.auth_key,
+                    ).where(
+                        PushSubscription.user_id.in_(batch),
+                        PushSubscription.is_active == True,  # noqa: E712
+                    )
+                )).all()
+                for subscription in subscriptions:
+                    await dispatcher.submit(subscription, payload)
+
+            if len(dispatcher.expired) >= prune_threshold:
+                progress["subscriptions_pruned"] += await deactivate_subscriptions(
+                    db, dispatcher.take_expired()
+                )
+                await db.commit()
+            await report()
+
+    progress["subscriptions_pruned"] += await deactivate_subscriptions(db, dispatcher.take_expired())
+    await db.commit()
+    progress["status"] = "completed"
+    await report()
+
+    logger.info(
+        f"Bulk notification {job_id or ''}: {progress['notifications_created']} created, "
+        f"{dispatcher.sent} push sent, {dispatcher.failed} push failed, "
+        f"{progress['subscriptions_pruned']} subscriptions pruned"
+    )
+    return progress
+
+
+# Background jobs ────────────────────────────────────────────────────
+
+_jobs: Set[asyncio.Task] = set()
+
+
+def start_bulk_notification(
+    notification: Dict[str, Any],
+    *,
+    user_ids: Optional[List[str]] = None,
+    roles: Optional[List[str]] = None,
+    initiated_by: Optional[str] = None,
+) -> str:
+    """Run a fan-out in the background and return its job id."""
+    job_id = uuid.uuid4().hex
+    task = asyncio.create_task(
+        _run_job(job_id, notification, user_ids, roles, initiated_by),
+        name=f"bulk-notification-{job_id}",
+    )
+    _jobs.add(task)
+    task.add_done_callback(_jobs.discard)
+    return job_id
+
+
+async def _run_job(
+    job_id: str,
+    notification: Dict[str, Any],
+    user_ids: Optional[List[str]],
+    roles: Optional[List[str]],
+    initiated_by: Optional[str],
+) -> None:
+    from app import database
+
+    async def report(progress: Dict[str, Any]) -> None:
+        if initiated_by:
+            await ws_manager.send_personal(str(initiated_by), EVENT_BULK_PROGRESS, progress)
+
+    try:
+        async with database.AsyncSessionLocal() as db:
+            await fan_out_notification(
+                db, notification,
+                user_ids=user_ids, roles=roles, job_id=job_id, on_progress=report,
+            )
+    except Exception as e:
+        logger.error(f"Bulk notification {job_id} failed: {e}")
+        try:
+            await report({"job_id": job_id, "status": "failed", "error": str(e)})
+        except Exception:
+            pass
@@ -2,7 +2,8 @@
 Notification Service
 
 In-app notifications, Web Push delivery, bulk notification creation,
-and push subscription management for staff members.
+and push subscription management for staff members. Bulk sends are
+delegated to notification_fanout.
 """
 
 import json
@@ -16,20 +17,16 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.notification import Notification
 from app.models.staff.notification_preference import PushSubscription
-from app.config import settings
-
-# Web Push placeholder
-try:
-    from pywebpush import webpush
-except ImportError:
-    webpush = None
+from app.services.notification_counters import get_unread_count, record_unread_change
+from app.services.staff.notification_fanout import (
+    PushDispatcher,
+    deactivate_subscriptions,
+    fan_out_notification,
+    start_bulk_notification,
+)
 
 logger = logging.getLogger(__name__)
 
-# VAPID keys for Web Push (loaded from settings in production)
-VAPID_PRIVATE_KEY = getattr(settings, "vapid_private_key", "")
-VAPID_CLAIMS = {"sub": f"mailto:{getattr(settings, 'from_email', 'admin@urbanhomeschool.co.ke')}"}
-
 
 class NotificationService:
     """Facade used by route handlers to access notification service functions."""
@@ -85,6 +82,19 @@ class NotificationService:
     ) -> Dict[str, Any]:
         return await unsubscribe_push(db, user_id, endpoint)
 
+    @staticmethod
+    def start_bulk_notification(
+        *,
+        notification: Dict[str, Any],
+        user_ids: Optional[List[str]] = None,
+        roles: Optional[List[str]] = None,
+        initiated_by: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        job_id = start_bulk_notification(
+            notification, user_ids=user_ids, roles=roles, initiated_by=initiated_by
+        )
+        return {"job_id": job_id, "status": "queued"}
+
     @staticmethod
     async def delete_notification(
         db: AsyncSession,
@@ -111,15 +121,8 @@ async def list_notifications(
         total_result = await db.execute(total_q)
         total: int = total_result.scalar() or 0
 
-        # Unread count
-        unread_q = select(func.count(Notification.id)).where(
-            and_(
-                Notification.user_id == user_id,
-                Notification.is_read == False,  # noqa: E712
-            )
-        )
-        unread_result = await db.execute(unread_q)
-        unread_count: int = unread_result.scalar() or 0
+        # Unread count (cached in Redis)
+        unread_count: int = await get_unread_count(db, user_id)
 
         # Paginated items
         offset = (page - 1) * page_size
@@ -206,7 +209,7 @@ async def mark_read(
     """Mark specific notifications as read."""
     try:
         now = datetime.utcnow()
-        await db.execute(
+        result = await db.execute(
             update(Notification)
             .where(
                 and_(
@@ -218,6 +221,7 @@ async def mark_read(
             .values(is_read=True, read_at=now)
         )
         await db.flush()
+        record_unread_change(db, user_id, -result.rowcount)
 
         logger.info(f"Marked {len(notification_ids)} notifications as read for user {user_id}")
 
@@ -251,6 +255,7 @@ async def mark_all_read(
         await db.flush()
 
         marked_count = result.rowcount
+        record_unread_change(db, user_id, -marked_count)
 
         logger.info(f"Marked all ({marked_count}) notifications as read for user {user_id}")
 
@@ -339,65 +344,45 @@ async def send_push(
     Send a Web Push notification to all active subscriptions for a user.
 
     Requires a database session to look up subscriptions. Falls back
-    gracefully if pywebpush is not installed.
+    gracefully if pywebpush is not installed or VAPID is not configured.
     """
     try:
         if not db:
             logger.warning("No database session provided for push notification")
             return {"sent": 0, "failed": 0, "reason": "No database session"}
 
-        if not webpush:
-            logger.warning("pywebpush not installed, skipping push delivery")
-            return {"sent": 0, "failed": 0, "reason": "pywebpush not installed"}
+        async with PushDispatcher() as dispatcher:
+            if not dispatcher.enabled:
+                logger.warning("Web Push not configured, skipping push delivery")
+                return {"sent": 0, "failed": 0, "reason": "Web Push not configured"}
 
-        # Fetch active subscriptions
-        subs_q = select(PushSubscription).where(
-            and_(
-                PushSubscription.user_id == user_id,
-                PushSubscription.is_active == True,  # noqa: E712
-            )
-        )
-        result = await db.execute(subs_q)
-        subscriptions = result.scalars().all()
-
-        sent = 0
-        failed = 0
-        payload = json.dumps({
-            "title": title,
-            "body": message,
-            "data": data or {},
-        })
-
-        for sub in subscriptions:
-            try:
-                webpush(
-                    subscription_info={
-                        "endpoint": sub.endpoint,
-                        "keys": {
-                            "p256dh": sub.p256dh_key,
-                            "auth": sub.auth_key,
-                        },
-                    },
-                    data=payload,
-                    vapid_private_key=VAPID_PRIVATE_KEY,
-                    vapid_claims=VAPID_CLAIMS,
-                )
-                sent += 1
-            except Exception as push_error:
-                failed += 1
-                logger.warning(
-                    f"Push delivery failed for subscription {sub.id}: {push_error}"
+            # Fetch active subscriptions
+            subs_q = select(PushSubscription).where(
+                and_(
+                    PushSubscription.user_id == user_id,
+                    PushSubscription.is_active == True,  # noqa: E712
                 )
-                # Deactivate subscription on 410 Gone or similar
-                if "410" in str(push_error) or "expired" in str(push_error).lower():
-                    sub.is_active = False
-
-        if failed > 0:
+            )
+            result = await db.execute(subs_q)
+            payload = json.dumps({
+                "title": title,
+                "body": message,
+                "data": data or {},
+            })
+            for sub in result.scalars().all():
+                await dispatcher.submit(sub, payload)
+
+        # Deactivate subscriptions the push service reported as gone
+        expired = await deactivate_subscriptions(db, dispatcher.take_expired())
+        if expired:
             await db.flush()
 
-        logger.info(f"Push notifications for user {user_id}: {sent} sent, {failed} failed")
+        logger.info(
+            f"Push notifications for user {user_id}: "
+            f"{dispatcher.sent} sent, {dispatcher.failed + expired} failed"
+        )
 
-        return {"sent": sent, "failed": failed}
+        return {"sent": dispatcher.sent, "failed": dispatcher.failed + expired}
 
     except Exception as e:
         logger.error(f"Error sending push notification to user {user_id}: {e}")
@@ -410,56 +395,20 @@ async def send_bulk_notifications(
     notification: Dict[str, Any],
 ) -> Dict[str, Any]:
     """
-    Create in-app notifications for multiple users and optionally
-    send push notifications.
+    Create in-app notifications for multiple users and send push
+    notifications, waiting for the whole fan-out to finish.
+
+    Commits after every batch. Request handlers should use
+    start_bulk_notification() instead, which runs in the background.
     """
     try:
-        created_count = 0
-        push_sent = 0
-        push_failed = 0
-
-        for uid in user_ids:
-            try:
-                # Create in-app notification
-                notif = Notification(
-                    id=uuid.uuid4(),
-                    user_id=uid,
-                    type=notification.get("notification_type", "system"),
-                    title=notification["title"],
-                    message=notification["message"],
-                    action_url=notification.get("action_url"),
-                    metadata_=notification.get("data", {}),
-                    is_read=False,
-                )
-                db.add(notif)
-                created_count += 1
-
-                # Send push notification
-                push_result = await send_push(
-                    user_id=uid,
-                    title=notification["title"],
-                    message=notification["message"],
-                    data=notification.get("data"),
-                    db=db,
-                )
-                push_sent += push_result.get("sent", 0)
-                push_failed += push_result.get("failed", 0)
-
-            except Exception as user_error:
-                logger.warning(f"Bulk notification failed for user {uid}: {user_error}")
-
-        await db.flush()
-
-        logger.info(
-            f"Bulk notifications: {created_count} created, "
-            f"{push_sent} push sent, {push_failed} push failed"
-        )
+        result = await fan_out_notification(db, notification, user_ids=user_ids)
 
         return {
             "total_users": len(user_ids),
-            "notifications_created": created_count,
-            "push_sent": push_sent,
-            "push_failed": push_failed,
+            "notifications_created": result["notifications_created"],
+            "push_sent": result["push_sent"],
+            "push_failed": result["push_failed"],
         }
 
     except Exception as e:
@@ -2,27 +2,27 @@
 Report Builder Service
 
 Custom report definitions, scheduling, and export (PDF/CSV/Excel).
+Widget data is produced by the report query engine (report_query_engine).
 Supports background execution of scheduled reports.
 """
 
-import io
-import csv
+import asyncio
 import logging
 import uuid
 from datetime import datetime
+from html import escape
 from typing import Any, Dict, List, Optional
 
 from sqlalchemy import select, func, and_, delete
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.staff.custom_report import ReportDefinition, ReportSchedule
+from app.config import settings
 from app.models.user import User
-
-# Optional Excel export dependency
-try:
-    import openpyxl
-except ImportError:
-    openpyxl = None
+from app.services.email_service import send_scheduled_report_email
+from app.services.staff import report_query_engine as query_engine
+from app.utils.export import ExportColumn, store_export, store_export_bytes
+from app.utils.scheduler import CronSchedule
 
 logger = logging.getLogger(__name__)
 
@@ -246,17 +246,16 @@ async def delete_report(db: AsyncSession, report_id: str) -> bool:
         raise
 
 
-async def export_report(
+async def get_report_data(
     db: AsyncSession,
     report_id: str,
-    format: str = "csv",
     filters: Optional[Dict[str, Any]] = None,
-) -> Dict[str, Any]:
+) -> Optional[Dict[str, Any]]:
     """
-    Generate a report export in the requested format (PDF, CSV, Excel).
+    Run every data-bound widget of a report and return its aggregate rows.
 
-    Returns an export_id and, for CSV/Excel, the file content as bytes.
-    PDF generation is a placeholder for future implementation.
+    Widget queries are compiled by the report query engine, executed on
+    the read replica and cached per definition hash and time bucket.
     """
     try:
         q = select(ReportDefinition).where(ReportDefinition.id == report_id)
@@ -264,81 +263,128 @@ async def export_report(
         report = result.scalar_one_or_none()
 
         if not report:
-            return {"error": "Report not found"}
+            return None
 
-        export_id = str(uuid.uuid4())
-        now = datetime.utcnow()
+        merged: Dict[str, Any] = dict(report.filters or {})
+        merged.update(filters or {})
+        widgets = await query_engine.run_report(report.config or {}, merged, fallback_db=db)
 
-        # Generate report data (simplified: return config-based placeholder data)
-        report_config = report.config or {}
-        widgets = report_config.get("widgets", [])
-
-        # Build tabular data from widget definitions
-        rows = []
-        headers = ["Widget", "Type", "Data Source"]
-        for widget in widgets:
-            if isinstance(widget, dict):
-                rows.append([
-                    widget.get("title", "Untitled"),
-                    widget.get("widget_type", "unknown"),
-                    widget.get("data_source", ""),
-                ])
-
-        if format == "csv":
-            output = io.StringIO()
-            writer = csv.writer(output)
-            writer.writerow(headers)
-            writer.writerows(rows)
-            content = output.getvalue()
+        return {
+            "report_id": str(report.id),
+            "name": report.name,
+            "widgets": widgets,
+            "generated_at": datetime.utcnow().isoformat(),
+        }
 
-            return {
-                "export_id": export_id,
-                "status": "completed",
-                "format": "csv",
-                "content": content,
-                "filename": f"report_{report.name}_{now.strftime('%Y%m%d')}.csv",
-                "created_at": now.isoformat(),
-            }
+    except Exception as e:
+        logger.error(f"Error running report {report_id}: {e}")
+        raise
 
-        elif format == "excel" and openpyxl:
-            wb = openpyxl.Workbook()
-            ws = wb.active
-            ws.title = report.name[:30]
-            ws.append(headers)
-            for row in rows:
-                ws.append(row)
 
-            buffer = io.BytesIO()
-            wb.save(buffer)
-            buffer.seek(0)
+def _render_report_pdf(name: str, widgets: List[Dict[str, Any]]) -> bytes:
+    """Render widget results as an HTML document and convert it with WeasyPrint."""
+    from weasyprint import HTML
 
-            return {
-                "export_id": export_id,
-                "status": "completed",
-                "format": "excel",
-                "content_bytes": buffer.getvalue(),
-                "filename": f"report_{report.name}_{now.strftime('%Y%m%d')}.xlsx",
-                "created_at": now.isoformat(),
-            }
+    sections = []
+    for res in widgets:
+        columns = res["dimensions"] + res["measures"]
+        head = "".join(f"<th>{escape(c)}</th>" for c in columns)
+        body = "".join(
+            "<tr>" + "".join(f"<td>{escape(str(row.get(c, '')))}</td>" for c in columns) + "</tr>"
+            for row in res["rows"]
+        )
+        error = f"<p class='error'>{escape(res['error'])}</p>" if res.get("error") else ""
+        sections.append(
+            f"<h2>{escape(res['title'])}</h2>{error}"
+            f"<table><thead><tr>{head}</tr></thead><tbody>{body}</tbody></table>"
+        )
 
-        elif format == "pdf":
-            # PDF generation placeholder
-            return {
-                "export_id": export_id,
-                "status": "processing",
-                "format": "pdf",
-                "download_url": None,
-                "message": "PDF generation queued. URL will be available shortly.",
-                "created_at": now.isoformat(),
-            }
+    html = f"""<!DOCTYPE html>
+<html><head><meta charset="utf-8"><style>
+body {{ font-family: sans-serif; font-size: 10pt; }}
+table {{ border-collapse: collapse; width: 100%; margin-bottom: 16pt; }}
+th, td {{ border: 1px solid #ccc; padding: 3pt 6pt; text-align: left; }}
+th {{ background: #f2f2f2; }}
+.error {{ color: #b00020; }}
+</style></head><body>
+<h1>{escape(name)}</h1>
+<p>Generated {datetime.utcnow().strftime('%Y-%m-%d %H:%M')} UTC</p>
+{''.join(sections)}
+</body></html>"""
+    return HTML(string=html).write_pdf()
 
-        else:
+
+async def export_report(
+    db: AsyncSession,
+    report_id: str,
+    format: str = "csv",
+    filters: Optional[Dict[str, Any]] = None,
+    requester_id: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Generate a report export in the requested format (PDF, CSV, Excel).
+
+    Widget data comes from the report query engine. CSV/Excel are written in
+    long format (one row per widget, dimension values and measure) through
+    the shared export engine; PDF is rendered by WeasyPrint in a worker
+    thread. Every format lands in the export file store and the result
+    carries an export_id and download_url.
+    """
+    try:
+        q = select(ReportDefinition).where(ReportDefinition.id == report_id)
+        result = await db.execute(q)
+        report = result.scalar_one_or_none()
+
+        if not report:
+            return {"error": "Report not found"}
+
+        if format not in ("csv", "excel", "xlsx", "pdf"):
             return {
-                "export_id": export_id,
+                "export_id": str(uuid.uuid4()),
                 "status": "error",
                 "message": f"Unsupported format: {format}",
             }
 
+        now = datetime.utcnow()
+        merged: Dict[str, Any] = dict(report.filters or {})
+        merged.update(filters or {})
+        widgets = await query_engine.run_report(report.config or {}, merged, fallback_db=db)
+        filename = f"report_{report.name}_{now.strftime('%Y%m%d')}"
+
+        if format == "pdf":
+            # WeasyPrint layout is CPU-bound; keep it off the event loop
+            content = await asyncio.to_thread(_render_report_pdf, report.name, widgets)
+            handle = await store_export_bytes(
+                content,
+                filename=filename,
+                export_format="pdf",
+                owner_id=requester_id,
+            )
+        else:
+            columns = (
+                [ExportColumn("Widget", "widget")]
+                + [ExportColumn(d.replace("_", " ").title(), d) for d in query_engine.result_dimensions(widgets)]
+                + [ExportColumn("Measure", "measure"), ExportColumn("Value", "value")]
+            )
+            handle = await store_export(
+                query_engine.iter_result_rows(widgets),
+                columns,
+                filename=filename,
+                export_format=format,
+                owner_id=requester_id,
+                sheet_title=report.name,
+            )
+
+        return {
+            "export_id": handle["id"],
+            "status": handle["status"],
+            "format": "excel" if format == "xlsx" else format,
+            "filename": handle["filename"],
+            "rows": handle["rows"],
+            "download_url": handle["download_url"],
+            "created_at": now.isoformat(),
+        }
+
     except Exception as e:
         logger.error(f"Error exporting report {report_id}: {e}")
         raise
@@ -360,8 +406,8 @@ async def create_schedule(
             created_by=schedule_data.get("created_by"),
         )
 
-        # Compute next run time (simplified: use current time + 1 day as placeholder)
-        schedule.next_run_at = datetime.utcnow()
+        # Raises ValueError for an invalid cron expression
+        schedule.next_run_at = CronSchedule(schedule.schedule_cron).next_after(datetime.utcnow())
 
         db.add(schedule)
         await db.flush()
@@ -398,6 +444,7 @@ async def update_schedule(
             return None
 
         if "schedule_cron" in data and data["schedule_cron"]:
+            schedule.next_run_at = CronSchedule(data["schedule_cron"]).next_after(datetime.utcnow())
             schedule.schedule_cron = data["schedule_cron"]
         if "format" in data and data["format"]:
             schedule.format = data["format"]
@@ -415,6 +462,7 @@ async def update_schedule(
             "schedule_cron": schedule.schedule_cron,
             "format": schedule.format,
             "is_active": schedule.is_active,
+            "next_run_at": schedule.next_run_at.isoformat() if schedule.next_run_at else None,
         }
 
     except Exception as e:
@@ -422,11 +470,49 @@ async def update_schedule(
         raise
 
 
+async def _run_schedule(
+    report_id: str,
+    format: str,
+    created_by: Optional[str],
+    semaphore: asyncio.Semaphore,
+    fallback_db: AsyncSession,
+) -> Dict[str, Any]:
+    """Generate one scheduled report on its own session, bounded by the pool semaphore."""
+    from app import database
+
+    async with semaphore:
+        if database.AsyncSessionLocal is None:
+            return await export_report(fallback_db, report_id, format, requester_id=created_by)
+        async with database.AsyncSessionLocal() as session:
+            return await export_report(session, report_id, format, requester_id=created_by)
+
+
+async def _email_recipients(schedule: ReportSchedule, export_result: Dict[str, Any]) -> None:
+    """Send the export's download link to each of the schedule's recipients."""
+    for recipient in schedule.recipients or []:
+        email = recipient.get("email") if isinstance(recipient, dict) else recipient
+        if not email:
+            continue
+        # SMTP is blocking; keep it off the event loop
+        sent = await asyncio.to_thread(
+            send_scheduled_report_email,
+            email,
+            export_result["filename"],
+            export_result["download_url"],
+        )
+        if not sent:
+            logger.warning(f"Scheduled report {schedule.report_id} not delivered to {email}")
+
+
 async def run_scheduled_reports(db: AsyncSession) -> Dict[str, Any]:
     """
     Background task: check for schedules whose next_run_at has passed,
     generate the report, email to recipients, and update next_run_at.
 
+    Due schedules are generated concurrently through a bounded worker pool
+    (settings.report_schedule_concurrency), each on its own session so a
+    slow report does not hold up the rest of the batch.
+
     Should be called periodically by a scheduler (e.g., every 15 minutes).
     """
     try:
@@ -448,35 +534,46 @@ async def run_scheduled_reports(db: AsyncSession) -> Dict[str, Any]:
         result = await db.execute(due_q)
         due_schedules = result.scalars().all()
 
-        for schedule in due_schedules:
-            try:
-                # Generate the report
-                export_result = await export_report(
-                    db,
+        # Without a session factory every run shares ``db``, which cannot
+        # serve concurrent queries; fall back to one-at-a-time.
+        from app import database
+        concurrency = settings.report_schedule_concurrency if database.AsyncSessionLocal else 1
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+
+        outcomes = await asyncio.gather(
+            *(
+                _run_schedule(
                     str(schedule.report_id),
                     schedule.format,
+                    str(schedule.created_by) if schedule.created_by else None,
+                    semaphore,
+                    db,
                 )
+                for schedule in due_schedules
+            ),
+            return_exceptions=True,
+        )
 
-                if export_result.get("status") != "error":
-                    # TODO: Email the export to recipients
-                    # from app.services.email_service import send_email
-                    # for recipient in schedule.recipients:
-                    #     await send_email(recipient["email"], ...)
-
-                    reports_run += 1
-
-                # Update schedule timestamps
-                schedule.last_run_at = now
-                # Simple next_run calculation: add 24h (proper cron parsing
-                # would be implemented with a library like croniter)
-                from datetime import timedelta
-                schedule.next_run_at = now + timedelta(hours=24)
-
-            except Exception as sched_error:
+        for schedule, export_result in zip(due_schedules, outcomes):
+            if isinstance(export_result, BaseException):
                 errors_count += 1
                 logger.error(
-                    f"Error running scheduled report {schedule.report_id}: {sched_error}"
+                    f"Error running scheduled report {schedule.report_id}: {export_result}"
                 )
+                continue
+
+            if export_result.get("status") != "error" and not export_result.get("error"):
+                await _email_recipients(schedule, export_result)
+                reports_run += 1
+
+            # Update schedule timestamps
+            schedule.last_run_at = now
+            try:
+                schedule.next_run_at = CronSchedule(schedule.schedule_cron).next_after(now)
+            except ValueError as e:
+                # Stored before cron validation; stop retrying it every check
+                logger.error(f"Deactivating report schedule {schedule.id}: {e}")
+                schedule.is_active = False
 
         if due_schedules:
             await db.flush()
@@ -0,0 +1,529 @@
+"""
+Report Query Engine
+
+Compiles report builder widget definitions (data source, dimensions,
+measures, filters) into parameterised aggregate SQL and runs them against
+the read replica.
+
+Only whitelisted data sources, columns and aggregates can be referenced,
+so a saved ReportDefinition can never inject arbitrary SQL: every name in
+a widget is looked up in DATA_SOURCES and every value is a bound parameter.
+
+Widget shape (stored in ReportDefinition.config["widgets"]):
+
+    {
+        "id": "w1",
+        "title": "Revenue by gateway",
+        "widget_type": "bar_chart",
+        "data_source": "transactions",
+        "filters": {"status": "completed"},
+        "config": {
+            "dimensions": ["gateway", "month"],
+            "measures": [{"agg": "sum", "field": "amount"}, "count"],
+            "limit": 100
+        }
+    }
+
+Filter values, dates and limits are checked against the column types at
+compile time, so a bad definition is a ReportQueryError (HTTP 400) rather
+than a database error.
+
+Result rows are cached per (definition hash, time bucket) so dashboards and
+repeated exports of the same report inside a bucket hit Redis, not Postgres.
+"""
+
+import hashlib
+import json
+import logging
+import uuid
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from sqlalchemy import func, select, literal_column
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models.admin.audit_log import AuditLog
+from app.models.course import Course
+from app.models.enrollment import Enrollment
+from app.models.payment import Transaction
+from app.models.staff.ticket import StaffTicket
+from app.models.user import User
+from app.utils.cache import cache_get, cache_set
+
+logger = logging.getLogger(__name__)
+
+# Time grains usable as a dimension on any data source's date column
+TIME_GRAINS = ("day", "week", "month", "quarter", "year")
+
+AGGREGATES = {
+    "count": func.count,
+    "count_distinct": lambda col: func.count(col.distinct()),
+    "sum": func.sum,
+    "avg": func.avg,
+    "min": func.min,
+    "max": func.max,
+}
+
+FILTER_OPS = ("eq", "ne", "gt", "gte", "lt", "lte", "in", "not_in")
+
+
+class ReportQueryError(ValueError):
+    """Raised when a widget references an unknown source, field or operator."""
+
+
+@dataclass(frozen=True)
+class DataSource:
+    """A reportable table: its groupable dimensions and aggregatable fields."""
+
+    model: Any
+    date_column: str
+    dimensions: Tuple[str, ...]
+    measure_fields: Tuple[str, ...]
+    base_conditions: Tuple[Tuple[str, Any], ...] = field(default_factory=tuple)
+
+    def column(self, name: str):
+        return getattr(self.model, name)
+
+
+DATA_SOURCES: Dict[str, DataSource] = {
+    "users": DataSource(
+        model=User,
+        date_column="created_at",
+        dimensions=("role", "is_active", "is_verified"),
+        measure_fields=("id",),
+        base_conditions=(("is_deleted", False),),
+    ),
+    "enrollments": DataSource(
+        model=Enrollment,
+        date_column="enrolled_at",
+        dimensions=("status", "course_id", "is_completed"),
+        measure_fields=(
+            "id", "student_id", "progress_percentage", "current_grade",
+            "total_time_spent_minutes", "payment_amount", "rating",
+        ),
+        base_conditions=(("is_deleted", False),),
+    ),
+    "courses": DataSource(
+        model=Course,
+        date_column="created_at",
+        dimensions=("learning_area", "is_published", "is_featured", "currency"),
+        measure_fields=("id", "price", "enrollment_count", "average_rating", "total_reviews"),
+    ),
+    "transactions": DataSource(
+        model=Transaction,
+        date_column="created_at",
+        dimensions=("gateway", "status", "currency"),
+        measure_fields=("id", "user_id", "amount"),
+    ),
+    "tickets": DataSource(
+        model=StaffTicket,
+        date_column="created_at",
+        dimensions=("category", "priority", "status", "sla_breached", "assigned_to"),
+        measure_fields=("id", "csat_score"),
+    ),
+    "audit_logs": DataSource(
+        model=AuditLog,
+        date_column="created_at",
+        dimensions=("action", "resource_type", "actor_role", "status"),
+        measure_fields=("id", "actor_id"),
+    ),
+}
+
+
+@dataclass
+class CompiledWidget:
+    """A widget compiled to SQL plus the metadata needed to label its result."""
+
+    widget_id: str
+    title: str
+    data_source: str
+    dimensions: List[str]
+    measures: List[str]
+    statement: Any
+    cache_key: str
+
+
+# ------------------------------------------------------------------
+# Compilation
+# ------------------------------------------------------------------
+
+def _normalise_measures(raw: Any) -> List[Tuple[str, Optional[str]]]:
+    """Accept "count", "sum:amount" or {"agg": "sum", "field": "amount"}."""
+    measures: List[Tuple[str, Optional[str]]] = []
+    for item in raw or ["count"]:
+        if isinstance(item, dict):
+            agg, fld = item.get("agg", "count"), item.get("field")
+        elif isinstance(item, str) and ":" in item:
+            agg, fld = item.split(":", 1)
+        else:
+            agg, fld = str(item), None
+        if agg not in AGGREGATES:
+            raise ReportQueryError(f"Unsupported aggregate '{agg}'")
+        measures.append((agg, fld))
+    return measures
+
+
+def _check_value(source: DataSource, name: str, value: Any) -> Any:
+    """Coerce a filter value to its column's type, or raise ReportQueryError."""
+    if value is None:
+        return None
+    col_type = source.column(name).type
+    enum_class = getattr(col_type, "enum_class", None)
+    if enum_class is not None:
+        # By value ("active") or by member name ("ACTIVE")
+        try:
+            return enum_class(value)
+        except (TypeError, ValueError):
+            pass
+        try:
+            return enum_class[value]
+        except (KeyError, TypeError):
+            raise ReportQueryError(f"Invalid value {value!r} for '{name}'")
+    if getattr(col_type, "enums", None):
+        if value not in col_type.enums:
+            raise ReportQueryError(f"Invalid value {value!r} for '{name}'")
+        return value
+
+    try:
+        python_type = col_type.python_type
+    except NotImplementedError:
+        return value
+    try:
+        if python_type is bool:
+            if not isinstance(value, bool):
+                raise ValueError(value)
+            return value
+        if python_type is uuid.UUID:
+            return value if isinstance(value, uuid.UUID) else uuid.UUID(str(value))
+        if python_type in (int, Decimal):
+            if isinstance(value, bool):
+                raise ValueError(value)
+            return python_type(str(value))
+        if python_type is str:
+            if not isinstance(value, (str, int, float)):
+                raise ValueError(value)
+            return str(value)
+    except (TypeError, ValueError, InvalidOperation):
+        raise ReportQueryError(f"Invalid value {value!r} for '{name}'")
+    return value
+
+
+def _filter_condition(source: DataSource, name: str, spec: Any):
+    if name not in source.dimensions and name not in source.measure_fields:
+        raise ReportQueryError(f"Cannot filter on '{name}'")
+    col = source.column(name)
+
+    if isinstance(spec, dict):
+        op, value = spec.get("op", "eq"), spec.get("value")
+    elif isinstance(spec, list):
+        op, value = "in", spec
+    else:
+        op, value = "eq", spec
+
+    if op not in FILTER_OPS:
+        raise ReportQueryError(f"Unsupported filter operator '{op}'")
+    if op in ("in", "not_in"):
+        values = value if isinstance(value, list) else [value]
+        values = [_check_value(source, name, v) for v in values]
+        return col.in_(values) if op == "in" else col.notin_(values)
+    value = _check_value(source, name, value)
+    if op in ("gt", "gte", "lt", "lte") and value is None:
+        raise ReportQueryError(f"Filter '{op}' on '{name}' needs a value")
+    if op == "eq":
+        return col.is_(None) if value is None else col == value
+    if op == "ne":
+        return col.isnot(None) if value is None else col != value
+    if op == "gt":
+        return col > value
+    if op == "gte":
+        return col >= value
+    if op == "lt":
+        return col < value
+    return col <= value
+
+
+def _parse_date(value: Any) -> Optional[datetime]:
+    if not value:
+        return None
+    if isinstance(value, datetime):
+        return value
+    try:
+        return datetime.fromisoformat(str(value))
+    except ValueError:
+        raise ReportQueryError(f"Invalid date {value!r}")
+
+
+def _row_limit(value: Any) -> int:
+    """The widget's row limit, capped at report_widget_row_limit."""
+    cap = settings.report_widget_row_limit
+    if value is None or value == "":
+        return cap
+    try:
+        if isinstance(value, bool):
+            raise ValueError(value)
+        limit = int(value)
+    except (TypeError, ValueError):
+        raise ReportQueryError(f"Invalid limit {value!r}")
+    if limit < 1:
+        raise ReportQueryError("Limit must be positive")
+    return min(limit, cap)
+
+
+def definition_hash(payload: Dict[str, Any]) -> str:
+    """Stable hash of a widget definition plus its effective filters."""
+    encoded = json.dumps(payload, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()[:32]
+
+
+def compile_widget(
+    widget: Dict[str, Any],
+    filters: Optional[Dict[str, Any]] = None,
+) -> CompiledWidget:
+    """
+    Compile one widget into an aggregate select().
+
+    ``filters`` are report-level filters (global filters, report filters and
+    request filters already merged); ``date_from``/``date_to`` in either
+    filter set restrict the source's date column. Widget filters win.
+
+    Raises:
+        ReportQueryError: If the widget references an unknown source,
+            dimension, measure, filter field or operator, or has an
+            invalid filter value, date or limit.
+    """
+    source_name = widget.get("data_source")
+    source = DATA_SOURCES.get(source_name or "")
+    if source is None:
+        raise ReportQueryError(f"Unknown data source '{source_name}'")
+
+    config = widget.get("config") or {}
+    # Report-level filters only apply to sources that have the field;
+    # widget filters are explicit and must be valid for the source.
+    filterable = set(source.dimensions) | set(source.measure_fields)
+    merged: Dict[str, Any] = {
+        k: v for k, v in (filters or {}).items()
+        if k in filterable or k in ("date_from", "date_to")
+    }
+    merged.update(widget.get("filters") or {})
+    date_from = _parse_date(merged.pop("date_from", None))
+    date_to = _parse_date(merged.pop("date_to", None))
+
+    date_col = source.column(source.date_column)
+    select_cols = []
+    group_cols = []
+    dimensions: List[str] = []
+    for dim in config.get("dimensions") or []:
+        if dim in TIME_GRAINS:
+            expr = func.date_trunc(dim, date_col)
+        elif dim in source.dimensions:
+            expr = source.column(dim)
+        else:
+            raise ReportQueryError(f"Unknown dimension '{dim}' for '{source_name}'")
+        select_cols.append(expr.label(dim))
+        group_cols.append(expr)
+        dimensions.append(dim)
+
+    measures: List[str] = []
+    for agg, fld in _normalise_measures(config.get("measures")):
+        if fld is None:
+            if agg != "count":
+                raise ReportQueryError(f"Aggregate '{agg}' needs a field")
+            expr = func.count()
+            label = "count"
+        elif fld in source.measure_fields:
+            expr = AGGREGATES[agg](source.column(fld))
+            label = f"{agg}_{fld}"
+        else:
+            raise ReportQueryError(f"Unknown measure field '{fld}' for '{source_name}'")
+        select_cols.append(expr.label(label))
+        measures.append(label)
+
+    conditions = [source.column(name) == value for name, value in source.base_conditions]
+    for name, spec in merged.items():
+        conditions.append(_filter_condition(source, name, spec))
+    if date_from:
+        conditions.append(date_col >= date_from)
+    if date_to:
+        conditions.append(date_col <= date_to)
+
+    stmt = select(*select_cols).select_from(source.model)
+    if conditions:
+        stmt = stmt.where(*conditions)
+    if group_cols:
+        stmt = stmt.group_by(*group_cols)
+        order_by = config.get("order_by")
+        if order_by in measures:
+            stmt = stmt.order_by(literal_column(order_by).desc())
+        else:
+            stmt = stmt.order_by(*group_cols)
+
+    limit = _row_limit(config.get("limit"))
+    stmt = stmt.limit(limit)
+
+    key = definition_hash({
+        "source": source_name,
+        "dimensions": dimensions,
+        "measures": measures,
+        "filters": merged,
+        "date_from": date_from,
+        "date_to": date_to,
+        "order_by": config.get("order_by"),
+        "limit": limit,
+    })
+
+    return CompiledWidget(
+        widget_id=str(widget.get("id") or ""),
+        title=widget.get("title") or "Untitled",
+        data_source=source_name,
+        dimensions=dimensions,
+        measures=measures,
+        statement=stmt,
+        cache_key=key,
+    )
+
+
+# ------------------------------------------------------------------
+# Execution
+# ------------------------------------------------------------------
+
+@asynccontextmanager
+async def read_session(fallback: Optional[AsyncSession] = None) -> AsyncIterator[AsyncSession]:
+    """
+    Open a read-replica session, or reuse ``fallback`` when the database
+    layer has not been initialised (tests, scripts).
+    """
+    from app import database
+
+    if database.AsyncReadSessionLocal is None:
+        if fallback is None:
+            raise RuntimeError("Database not initialized. Call init_db() during startup.")
+        yield fallback
+        return
+
+    async with database.AsyncReadSessionLocal() as session:
+        yield session
+
+
+def _time_bucket() -> int:
+    return int(datetime.utcnow().timestamp()) // settings.report_cache_bucket_seconds
+
+
+def _jsonable(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    # Decimal, UUID, enums
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return str(value)
+
+
+async def run_widget(db: AsyncSession, compiled: CompiledWidget) -> Dict[str, Any]:
+    """Execute a compiled widget, serving its rows from the bucketed cache if warm."""
+    # The key covers the query only, so widgets with the same query share
+    # rows; the widget's own metadata is added after the cache
+    cache_key = f"report:widget:{compiled.cache_key}:{_time_bucket()}"
+    cached = await cache_get(cache_key)
+    if cached is None:
+        result = await db.execute(compiled.statement)
+        columns = compiled.dimensions + compiled.measures
+        cached = {
+            "rows": [
+                {name: _jsonable(value) for name, value in zip(columns, row)}
+                for row in result.all()
+            ],
+            "generated_at": datetime.utcnow().isoformat(),
+        }
+        await cache_set(cache_key, cached, ttl=settings.report_cache_bucket_seconds)
+
+    return {
+        "widget_id": compiled.widget_id,
+        "title": compiled.title,
+        "data_source": compiled.data_source,
+        "dimensions": compiled.dimensions,
+        "measures": compiled.measures,
+        "rows": cached["rows"],
+        "generated_at": cached["generated_at"],
+    }
+
+
+async def run_report(
+    config: Dict[str, Any],
+    filters: Optional[Dict[str, Any]] = None,
+    *,
+    fallback_db: Optional[AsyncSession] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Compile and run every data-bound widget of a report configuration.
+
+    Widgets without a data source (text blocks) are skipped; invalid
+    widgets are reported inline with an ``error`` instead of failing the
+    whole report.
+
+    Raises:
+        ReportQueryError: If the report's date range is invalid.
+    """
+    merged: Dict[str, Any] = dict(config.get("global_filters") or {})
+    date_range = config.get("date_range") or {}
+    if date_range.get("from"):
+        merged["date_from"] = date_range["from"]
+    if date_range.get("to"):
+        merged["date_to"] = date_range["to"]
+    merged.update(filters or {})
+    # A bad date range fails every widget, so it fails the report
+    for key in ("date_from", "date_to"):
+        _parse_date(merged.get(key))
+
+    results: List[Dict[str, Any]] = []
+    async with read_session(fallback_db) as db:
+        for widget in config.get("widgets") or []:
+            if not isinstance(widget, dict) or not widget.get("data_source"):
+                continue
+            try:
+                compiled = compile_widget(widget, merged)
+            except ReportQueryError as e:
+                results.append({
+                    "widget_id": str(widget.get("id") or ""),
+                    "title": widget.get("title") or "Untitled",
+                    "data_source": widget.get("data_source"),
+                    "dimensions": [],
+                    "measures": [],
+                    "rows": [],
+                    "error": str(e),
+                })
+                continue
+            results.append(await run_widget(db, compiled))
+    return results
+
+
+def iter_result_rows(results: List[Dict[str, Any]]):
+    """
+    Flatten widget results into long-format rows for tabular export:
+    one row per (widget, dimension values, measure).
+    """
+    for res in results:
+        for row in res["rows"]:
+            dims = {d: row.get(d) for d in res["dimensions"]}
+            for measure in res["measures"]:
+                yield {
+                    "widget": res["title"],
+                    **dims,
+                    "measure": measure,
+                    "value": row.get(measure),
+                }
+
+
+def result_dimensions(results: List[Dict[str, Any]]) -> List[str]:
+    """Union of dimension names across widget results, in first-seen order."""
+    seen: List[str] = []
+    for res in results:
+        for dim in res["dimensions"]:
+            if dim not in seen:
+                seen.append(dim)
+    return seen
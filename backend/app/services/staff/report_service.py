@@ -170,6 +170,26 @@ class ReportService:
         """Delete a report definition and its schedules."""
         return await builder.delete_report(db, report_id=report_id)
 
+    # ------------------------------------------------------------------
+    # Data
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    async def get_report_data(
+        db: AsyncSession,
+        *,
+        report_id: str,
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """Run a report's widget queries and return their aggregate rows."""
+        filters: Dict[str, Any] = {}
+        if date_from:
+            filters["date_from"] = date_from
+        if date_to:
+            filters["date_to"] = date_to
+        return await builder.get_report_data(db, report_id=report_id, filters=filters)
+
     # ------------------------------------------------------------------
     # Export
     # ------------------------------------------------------------------
@@ -202,6 +222,7 @@ class ReportService:
             report_id=report_id,
             format=export_format,
             filters=merged_filters if merged_filters else None,
+            requester_id=requester_id,
         )
 
         if result and result.get("error"):
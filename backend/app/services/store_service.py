@@ -4,7 +4,7 @@ Store Service Layer for Urban Home School E-Commerce
 This module contains business logic for the merchandise store including:
 - Product CRUD (create, read, update, delete with pagination/filtering)
 - Cart management (get/create, add items, update quantities, remove, clear)
-- Checkout workflow (create order from cart, generate order numbers)
+- Checkout workflow (atomic stock reservation, order creation, reservation expiry)
 - Order management (list user orders, retrieve by order number)
 - Shipping address CRUD
 
@@ -13,13 +13,16 @@ All functions are async and accept an AsyncSession for database operations.
 
 import random
 import string
-from datetime import datetime
+from datetime import datetime, timedelta
 from decimal import Decimal
-from typing import List, Optional, Tuple
+from typing import Dict, List, Optional, Tuple
 from uuid import UUID
 
-from sqlalchemy import select, func, and_, or_, delete
+from sqlalchemy import select, func, and_, or_, delete, update, case
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.attributes import set_committed_value
+
+from app.config import settings
 
 from app.models.store import (
     Product,
@@ -534,15 +537,22 @@ class StoreService:
         """
         Generate a unique human-readable order number.
 
-        Format: UHS-YYYYMMDD-XXXXX where X is a random alphanumeric character.
+        Format: UHS-YYYYMMDD-XXXXXXX where X is a random alphanumeric character.
+        Seven random characters give ~78 billion numbers per day, so no
+        collision lookup is done; the unique constraint is the backstop.
 
         Returns:
             Order number string (max 20 chars)
         """
         date_part = datetime.utcnow().strftime("%Y%m%d")
-        random_part = "".join(random.choices(string.ascii_uppercase + string.digits, k=5))
+        random_part = "".join(random.choices(string.ascii_uppercase + string.digits, k=7))
         return f"UHS-{date_part}-{random_part}"
 
+    @staticmethod
+    def _per_product(quantities: Dict[UUID, int]):
+        """CASE expression mapping each product id to its quantity."""
+        return case(quantities, value=Product.id)
+
     @staticmethod
     async def create_order_from_cart(
         db: AsyncSession,
@@ -554,8 +564,17 @@ class StoreService:
         """
         Create an order from the user's current cart.
 
-        Validates cart contents, calculates totals, creates order and order items,
-        decrements inventory, and clears the cart.
+        Checkout is set-based: all cart products are loaded (and row-locked
+        in id order) with one query, then stock for every line is reserved
+        with a single conditional UPDATE that only decrements rows that
+        still have enough inventory. If any line loses the race for the
+        last units, the lines already reserved are put back and checkout
+        fails, so concurrent checkouts can never oversell.
+
+        The order is created pending with ``reserved_until`` set; payment
+        confirms it through confirm_order_payment(), and unpaid orders are
+        cancelled and restocked by release_expired_reservations() (the
+        ``store_reservation_sweep`` job).
 
         Args:
             db: Database session
@@ -589,41 +608,74 @@ class StoreService:
         if not cart.items or len(cart.items) == 0:
             raise ValueError("Cart is empty")
 
-        # Calculate totals and validate stock
-        subtotal = Decimal("0.00")
-        order_items_data = []
-
+        quantities: Dict[UUID, int] = {}
         for cart_item in cart.items:
-            product = await StoreService.get_product_by_id(db, cart_item.product_id)
+            quantities[cart_item.product_id] = quantities.get(cart_item.product_id, 0) + cart_item.quantity
+
+        # Load every cart product in one query; locking in id order keeps
+        # checkouts with overlapping carts from deadlocking each other
+        product_result = await db.execute(
+            select(Product)
+            .where(Product.id.in_(quantities))
+            .order_by(Product.id)
+            .with_for_update()
+            .execution_options(populate_existing=True)
+        )
+        products = {p.id: p for p in product_result.scalars().all()}
+
+        for product_id, quantity in quantities.items():
+            product = products.get(product_id)
             if not product or not product.is_active:
-                raise ValueError(f"Product '{cart_item.product_id}' is no longer available")
-            if product.inventory_count < cart_item.quantity:
+                raise ValueError(f"Product '{product_id}' is no longer available")
+            if product.inventory_count < quantity:
                 raise ValueError(
                     f"Insufficient stock for '{product.name}'. "
-                    f"Available: {product.inventory_count}, requested: {cart_item.quantity}"
+                    f"Available: {product.inventory_count}, requested: {quantity}"
                 )
 
-            item_total = product.price * cart_item.quantity
-            subtotal += item_total
+        # Reserve stock for every line in one statement
+        per_product = StoreService._per_product(quantities)
+        reserve_result = await db.execute(
+            update(Product)
+            .where(
+                Product.id.in_(quantities),
+                Product.is_active.is_(True),
+                Product.inventory_count >= per_product,
+            )
+            .values(inventory_count=Product.inventory_count - per_product)
+            .returning(Product.id, Product.inventory_count)
+            .execution_options(synchronize_session=False)
+        )
+        reserved = dict(reserve_result.all())
+
+        if len(reserved) != len(quantities):
+            if reserved:
+                await db.execute(
+                    update(Product)
+                    .where(Product.id.in_(reserved))
+                    .values(inventory_count=Product.inventory_count + per_product)
+                    .execution_options(synchronize_session=False)
+                )
+            sold_out = [products[pid].name for pid in quantities if pid not in reserved]
+            raise ValueError(f"Insufficient stock for {', '.join(sold_out)}")
+
+        for product_id, inventory_count in reserved.items():
+            set_committed_value(products[product_id], "inventory_count", inventory_count)
 
+        subtotal = Decimal("0.00")
+        order_items_data = []
+        for product_id, quantity in quantities.items():
+            product = products[product_id]
+            item_total = product.price * quantity
+            subtotal += item_total
             order_items_data.append({
                 "product_id": product.id,
                 "product_name": product.name,
-                "quantity": cart_item.quantity,
+                "quantity": quantity,
                 "unit_price": product.price,
                 "total_price": item_total,
             })
 
-        # Generate unique order number (retry on collision)
-        order_number = StoreService.generate_order_number()
-        for _ in range(5):
-            existing = await db.execute(
-                select(Order).where(Order.order_number == order_number)
-            )
-            if not existing.scalar_one_or_none():
-                break
-            order_number = StoreService.generate_order_number()
-
         # Calculate shipping and tax (can be expanded later)
         shipping_cost = Decimal("0.00")
         tax = Decimal("0.00")
@@ -632,7 +684,7 @@ class StoreService:
         # Create order
         order = Order(
             user_id=user_id,
-            order_number=order_number,
+            order_number=StoreService.generate_order_number(),
             status="pending",
             subtotal=subtotal,
             shipping_cost=shipping_cost,
@@ -641,26 +693,12 @@ class StoreService:
             shipping_address_id=shipping_address_id,
             payment_method=payment_method,
             notes=notes,
+            reserved_until=datetime.utcnow() + timedelta(minutes=settings.store_reservation_minutes),
         )
         db.add(order)
         await db.flush()
 
-        # Create order items and decrement inventory
-        for item_data in order_items_data:
-            order_item = OrderItem(
-                order_id=order.id,
-                product_id=item_data["product_id"],
-                product_name=item_data["product_name"],
-                quantity=item_data["quantity"],
-                unit_price=item_data["unit_price"],
-                total_price=item_data["total_price"],
-            )
-            db.add(order_item)
-
-            # Decrement inventory
-            product = await StoreService.get_product_by_id(db, item_data["product_id"])
-            if product:
-                product.inventory_count -= item_data["quantity"]
+        db.add_all([OrderItem(order_id=order.id, **item_data) for item_data in order_items_data])
 
         # Clear cart
         await StoreService.clear_cart(db, cart.id)
@@ -670,6 +708,98 @@ class StoreService:
 
         return order
 
+    @staticmethod
+    async def confirm_order_payment(
+        db: AsyncSession,
+        order_id: UUID,
+        payment_reference: Optional[str] = None,
+    ) -> Optional[Order]:
+        """
+        Mark a pending order as paid, making its stock reservation permanent.
+
+        The status check is part of the UPDATE, so a payment racing the
+        reservation sweep either confirms the order or finds it cancelled.
+
+        Args:
+            db: Database session
+            order_id: Order UUID
+            payment_reference: External payment reference/transaction ID
+
+        Returns:
+            Confirmed Order, or None if the order is not pending (e.g. expired)
+        """
+        result = await db.execute(
+            update(Order)
+            .where(Order.id == order_id, Order.status == "pending")
+            .values(
+                status="confirmed",
+                payment_reference=payment_reference,
+                reserved_until=None,
+                updated_at=datetime.utcnow(),
+            )
+            .returning(Order.id)
+            .execution_options(synchronize_session=False)
+        )
+        if result.scalar_one_or_none() is None:
+            return None
+
+        order_result = await db.execute(
+            select(Order).where(Order.id == order_id).execution_options(populate_existing=True)
+        )
+        return order_result.scalar_one()
+
+    @staticmethod
+    async def release_expired_reservations(db: AsyncSession) -> int:
+        """
+        Cancel pending orders whose reservation has expired and restock them.
+
+        Runs as set-based statements: one UPDATE cancels every expired
+        order, one aggregate reads their quantities per product and one
+        UPDATE puts the stock back.
+
+        Args:
+            db: Database session
+
+        Returns:
+            Number of orders released
+        """
+        now = datetime.utcnow()
+        expired_result = await db.execute(
+            update(Order)
+            .where(
+                Order.status == "pending",
+                Order.reserved_until.is_not(None),
+                Order.reserved_until < now,
+            )
+            .values(status="cancelled", reserved_until=None, updated_at=now)
+            .returning(Order.id)
+            .execution_options(synchronize_session=False)
+        )
+        order_ids = list(expired_result.scalars().all())
+        if not order_ids:
+            return 0
+
+        quantity_result = await db.execute(
+            select(OrderItem.product_id, func.sum(OrderItem.quantity))
+            .where(
+                OrderItem.order_id.in_(order_ids),
+                OrderItem.product_id.is_not(None),
+            )
+            .group_by(OrderItem.product_id)
+        )
+        quantities = {product_id: int(quantity) for product_id, quantity in quantity_result.all()}
+
+        if quantities:
+            await db.execute(
+                update(Product)
+                .where(Product.id.in_(quantities))
+                .values(inventory_count=Product.inventory_count + StoreService._per_product(quantities))
+                .execution_options(synchronize_session=False)
+            )
+        await db.flush()
+
+        return len(order_ids)
+
     @staticmethod
     async def get_user_orders(
         db: AsyncSession,
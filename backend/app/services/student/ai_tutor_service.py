@@ -8,7 +8,8 @@ AI-analyzed journal entries, explains concepts at grade-appropriate levels,
 facilitates teacher Q&A with AI summaries, and handles voice response
 generation via ElevenLabs TTS.
 
-All methods require a student UUID and use the AIOrchestrator for AI calls.
+All methods require a student UUID and use the AIOrchestrator for AI calls,
+releasing the session's DB connection for the duration of each call.
 """
 from datetime import datetime
 from typing import Dict, List, Optional
@@ -16,12 +17,14 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, and_, func
 from uuid import UUID
 
+from app.database import release_db
 from app.models.user import User
 from app.models.student import Student
 from app.models.ai_tutor import AITutor
 from app.models.student_dashboard import StudentJournalEntry, StudentMoodEntry, MoodType
 from app.models.student_community import StudentTeacherQA
 from app.services.ai_orchestrator import AIOrchestrator
+from app.services.content_safety import screen_content
 from app.utils.student_codes import generate_ait_code
 
 
@@ -396,7 +399,8 @@ class AITutorService:
         # Effective message for the AI
         effective_message = message
 
-        # Call AI orchestrator
+        # Call AI orchestrator (without holding a DB connection)
+        await release_db(self.db)
         response = await self.ai_orchestrator.chat(
             message=effective_message,
             conversation_history=conversation_history,
@@ -414,6 +418,8 @@ class AITutorService:
         ai_tutor.total_interactions += 1
         await self.db.commit()
 
+        await screen_content("ai_tutor_response", ai_tutor.id, student.user_id, response["message"])
+
         return {
             "message": response["message"],
             "ait_code": ai_tutor.ait_code,
@@ -448,6 +454,7 @@ Include 3-5 learning activities, each with:
 - Difficulty level
 - Learning objective"""
 
+        await release_db(self.db)
         response = await self.ai_orchestrator.chat(
             message=prompt,
             system_message="You are an educational planner. Respond in JSON format.",
@@ -481,6 +488,7 @@ Include 3-5 learning activities, each with:
 
 Journal entry: {content}"""
 
+        await release_db(self.db)
         ai_response = await self.ai_orchestrator.chat(
             message=insight_prompt,
             system_message="You are an educational mentor analyzing student reflections.",
@@ -573,6 +581,7 @@ Journal entry: {content}"""
         if context:
             prompt += f"\n\nContext: {context}"
 
+        await release_db(self.db)
         response = await self.ai_orchestrator.chat(
             message=prompt,
             system_message=f"You are a patient tutor explaining concepts to grade {student.grade_level} students. Use simple language and examples.",
@@ -602,6 +611,7 @@ Journal entry: {content}"""
         # Generate AI summary of the question
         summary_prompt = f"Summarize this student question in one sentence: {question}"
 
+        await release_db(self.db)
         ai_response = await self.ai_orchestrator.chat(
             message=summary_prompt,
             system_message="You are an assistant summarizing student questions.",
@@ -10,6 +10,7 @@ from uuid import UUID
 
 from app.models.student import Student
 from app.models.user import User
+from app.services.content_safety import flag_content, scan_content
 from app.models.student_community import (
     StudentFriendship,
     FriendshipStatus,
@@ -257,6 +258,15 @@ class CommunityService:
         await self.db.commit()
         await self.db.refresh(shoutout)
 
+        # Public shoutouts make up the class wall
+        scan = await scan_content(message)
+        if scan is not None:
+            author_id = (await self.db.execute(
+                select(Student.user_id).where(Student.id == from_student_id)
+            )).scalar_one_or_none()
+            if author_id is not None:
+                await flag_content("shoutout", shoutout.id, author_id, message, scan)
+
         return shoutout
 
     async def get_shoutouts_received(self, student_id: UUID, limit: int = 20) -> List[Dict]:
@@ -5,7 +5,8 @@ Manages the student gamification system including:
 - XP awarding with configurable sources and multipliers
 - Level progression using an exponential XP curve
 - Badge awarding based on achievement milestones
-- Leaderboard generation (class, grade, or school scope)
+- Leaderboards (class, grade, or school scope; all-time, weekly, monthly)
+  kept in Redis sorted sets, with a rebuild job to recover them from the DB
 - AI-powered weekly learning reports with narrative summaries
 - Learning goal creation and tracking
 - Skill node progression (skill tree)
@@ -29,7 +30,61 @@ from app.models.student_gamification import (
     StudentSkillNode,
     StudentWeeklyReport
 )
+from app.models.user import User
 from app.services.ai_orchestrator import AIOrchestrator
+from app.services.leaderboard import ALL_TIME, WINDOWS, Leaderboard, window_bounds
+
+STUDENT_LEADERBOARD = Leaderboard("student")
+
+# Leaderboard scopes. There is no class grouping yet, so "class" requests
+# are served from the school board.
+SCHOOL_SCOPE = "school"
+
+
+def grade_scope(grade_level: str) -> str:
+    """Leaderboard scope for one grade, e.g. 'Grade 4' -> 'grade:grade_4'."""
+    return "grade:" + "_".join(grade_level.lower().split())
+
+
+def leaderboard_scopes(grade_level: Optional[str]) -> List[str]:
+    """Every board a student with this grade level is ranked on."""
+    return [SCHOOL_SCOPE, grade_scope(grade_level)] if grade_level else [SCHOOL_SCOPE]
+
+
+def _xp_query(window: str, when: datetime):
+    """Select (student_id, grade_level, xp) for a leaderboard window."""
+    if window == ALL_TIME:
+        return (
+            select(StudentLevel.student_id, Student.grade_level, StudentLevel.total_xp.label("score"))
+            .join(Student, StudentLevel.student_id == Student.id)
+        )
+    start, _ = window_bounds(window, when)
+    return (
+        select(StudentXPEvent.student_id, Student.grade_level, func.sum(StudentXPEvent.xp_amount).label("score"))
+        .join(Student, StudentXPEvent.student_id == Student.id)
+        .where(StudentXPEvent.timestamp >= start)
+        .group_by(StudentXPEvent.student_id, Student.grade_level)
+    )
+
+
+async def rebuild_student_leaderboards(db: AsyncSession) -> int:
+    """
+    Recompute the current student leaderboards from the database: all-time
+    boards from StudentLevel totals, weekly/monthly boards from XP events.
+    Returns the number of boards written.
+    """
+    now = datetime.utcnow()
+    written = 0
+    for window in WINDOWS:
+        boards: Dict[str, Dict[str, int]] = {}
+        for student_id, grade_level, score in (await db.execute(_xp_query(window, now))).all():
+            for scope in leaderboard_scopes(grade_level):
+                boards.setdefault(scope, {})[str(student_id)] = score or 0
+        boards.setdefault(SCHOOL_SCOPE, {})
+        for scope, scores in boards.items():
+            await STUDENT_LEADERBOARD.replace(scope, window, scores, when=now)
+            written += 1
+    return written
 
 
 class GamificationService:
@@ -104,7 +159,10 @@ class GamificationService:
         custom_amount: Optional[int] = None
     ) -> Dict:
         """
-        Award XP to a student and check for level ups
+        Award XP to a student now and check for level ups
+
+        Use record_xp() for high-frequency events whose result the caller
+        does not need; this method applies the event in the caller's request.
 
         Args:
             student_id: Student UUID
@@ -116,67 +174,54 @@ class GamificationService:
         Returns:
             Dict with XP awarded, new total XP, level, and any level ups
         """
-        # Calculate XP amount
-        base_xp = custom_amount or self.XP_REWARDS.get(source, 10)
-        xp_amount = int(base_xp * multiplier)
+        from app.services.student.xp_ledger import apply_xp_events, publish_xp_results, xp_ledger
 
-        # Create XP event
-        xp_event = StudentXPEvent(
+        event = xp_ledger.typed_event(
             student_id=student_id,
-            xp_amount=xp_amount,
             source=source,
             description=description,
-            multiplier=multiplier
-        )
-        self.db.add(xp_event)
-
-        # Get or create student level record
-        level_result = await self.db.execute(
-            select(StudentLevel).where(StudentLevel.student_id == student_id)
+            multiplier=multiplier,
+            custom_amount=custom_amount
         )
-        student_level = level_result.scalar_one_or_none()
-
-        if not student_level:
-            student_level = StudentLevel(
-                student_id=student_id,
-                current_level=1,
-                total_xp=0,
-                next_level_xp=self._calculate_xp_for_level(2)
-            )
-            self.db.add(student_level)
-            await self.db.flush()
-
-        # Update total XP
-        old_level = student_level.current_level
-        student_level.total_xp += xp_amount
-
-        # Check for level ups
-        leveled_up = False
-        levels_gained = 0
+        progress = await apply_xp_events(self.db, [event])
+        await self.db.commit()
 
-        while student_level.total_xp >= student_level.next_level_xp:
-            student_level.current_level += 1
-            levels_gained += 1
-            leveled_up = True
-            student_level.next_level_xp = self._calculate_xp_for_level(student_level.current_level + 1)
+        entry = progress.get(event["student_id"])
+        if entry is None:
+            raise ValueError("Student not found")
+        await publish_xp_results([entry])
+        return entry.as_dict()
 
-        await self.db.commit()
+    async def record_xp(
+        self,
+        student_id: UUID,
+        source: str,
+        description: str,
+        multiplier: float = 1.0,
+        custom_amount: Optional[int] = None
+    ) -> Dict:
+        """
+        Queue an XP event on the write-behind ledger
 
-        # Award badges for level milestones
-        if leveled_up and student_level.current_level == 10:
-            await self.award_badge(student_id, "level_10")
+        The event is queued when this service's session commits, so XP
+        earned by a rolled-back action is never awarded. Levels, badges and
+        leaderboards are updated when the ledger flushes its next batch; the
+        student is notified over WebSocket.
 
-        result = {
-            "xp_awarded": xp_amount,
-            "total_xp": student_level.total_xp,
-            "current_level": student_level.current_level,
-            "next_level_xp": student_level.next_level_xp,
-            "progress_to_next_level": (student_level.total_xp / student_level.next_level_xp) * 100,
-            "leveled_up": leveled_up,
-            "levels_gained": levels_gained
-        }
+        Returns:
+            Dict with the XP amount queued
+        """
+        from app.services.student.xp_ledger import xp_ledger
 
-        return result
+        event = xp_ledger.new_row(
+            student_id=student_id,
+            source=source,
+            description=description,
+            multiplier=multiplier,
+            custom_amount=custom_amount
+        )
+        xp_ledger.submit_after_commit(self.db, event)
+        return {"xp_awarded": event["xp_amount"], "queued": True}
 
     async def get_student_level_data(self, student_id: UUID) -> Dict:
         """Get student's current level and XP data"""
@@ -261,7 +306,8 @@ class GamificationService:
         self,
         student_id: UUID,
         scope: str = "class",
-        limit: int = 10
+        limit: int = 10,
+        period: str = ALL_TIME
     ) -> List[Dict]:
         """
         Get leaderboard data
@@ -270,47 +316,113 @@ class GamificationService:
             student_id: Current student ID
             scope: "class" | "grade" | "school"
             limit: Number of entries to return
+            period: "all_time" | "weekly" | "monthly"
+        """
+        standing = await self.get_leaderboard_standing(student_id, scope, limit, period)
+        return standing["entries"]
+
+    async def get_leaderboard_standing(
+        self,
+        student_id: UUID,
+        scope: str = "class",
+        limit: int = 10,
+        period: str = ALL_TIME
+    ) -> Dict:
         """
-        # Get student's grade to filter by class/grade
+        Get the top of a leaderboard together with the student's own rank
+        and the students ranked just above and below them.
+
+        Returns:
+            Dict with entries, my_rank, my_xp, neighbours and total
+        """
+        empty = {"entries": [], "my_rank": None, "my_xp": 0, "neighbours": [], "total": 0}
+        if period not in WINDOWS:
+            period = ALL_TIME
+
+        # Get student's grade to pick the board
         student_result = await self.db.execute(
             select(Student).where(Student.id == student_id)
         )
         student = student_result.scalar_one_or_none()
 
         if not student:
-            return []
+            return empty
 
-        # Build query based on scope
         if scope == "grade":
-            # Get top students from same grade
-            result = await self.db.execute(
-                select(StudentLevel, Student)
-                .join(Student, StudentLevel.student_id == Student.id)
-                .where(Student.grade_level == student.grade_level)
-                .order_by(desc(StudentLevel.total_xp))
-                .limit(limit)
-            )
+            # A student without a grade is on no grade board
+            if not student.grade_level:
+                return empty
+            board = grade_scope(student.grade_level)
         else:
-            # Default: all students (can be refined to actual class)
-            result = await self.db.execute(
-                select(StudentLevel, Student)
-                .join(Student, StudentLevel.student_id == Student.id)
-                .order_by(desc(StudentLevel.total_xp))
-                .limit(limit)
+            board = SCHOOL_SCOPE
+        standing = await STUDENT_LEADERBOARD.standing(board, period, member=str(student_id), limit=limit)
+        if standing is None:
+            standing = await self._leaderboard_from_db(
+                student, scope, limit, period
             )
 
-        leaderboard = []
-        for level, stud in result:
-            leaderboard.append({
-                "rank": len(leaderboard) + 1,
-                "student_id": str(stud.id),
-                "student_name": f"{stud.first_name} {stud.last_name}",
-                "level": level.current_level,
-                "total_xp": level.total_xp,
-                "is_current_student": str(stud.id) == str(student_id)
-            })
-
-        return leaderboard
+        rows = standing["entries"] + standing["neighbours"]
+        details = await self._describe_students([row["member"] for row in rows])
+
+        def entry(row: Dict) -> Dict:
+            name, level, total_xp = details.get(row["member"], ("Student", 1, 0))
+            return {
+                "rank": row["rank"],
+                "student_id": row["member"],
+                "student_name": name,
+                "level": level,
+                "xp": row["score"],
+                "total_xp": total_xp,
+                "is_current_student": row["member"] == str(student_id)
+            }
+
+        me = standing["me"]
+        return {
+            "entries": [entry(row) for row in standing["entries"]],
+            "my_rank": me["rank"] if me else None,
+            "my_xp": me["score"] if me else 0,
+            "neighbours": [entry(row) for row in standing["neighbours"]],
+            "total": standing["total"],
+        }
+
+    async def _leaderboard_from_db(
+        self,
+        student: Student,
+        scope: str,
+        limit: int,
+        period: str
+    ) -> Dict:
+        """SQL leaderboard used while Redis is unavailable (no neighbours)."""
+        query = _xp_query(period, datetime.utcnow())
+        if scope == "grade":
+            query = query.where(Student.grade_level == student.grade_level)
+        result = await self.db.execute(query.order_by(desc("score")).limit(limit))
+
+        entries = [
+            {"rank": rank, "member": str(student_id), "score": score or 0}
+            for rank, (student_id, _, score) in enumerate(result.all(), start=1)
+        ]
+        me = next((row for row in entries if row["member"] == str(student.id)), None)
+        return {"entries": entries, "me": me, "neighbours": [], "total": len(entries)}
+
+    async def _describe_students(self, student_ids: List[str]) -> Dict[str, tuple]:
+        """Map student id -> (display name, level, lifetime XP)."""
+        if not student_ids:
+            return {}
+        result = await self.db.execute(
+            select(Student.id, User.email, User.profile_data, StudentLevel.current_level, StudentLevel.total_xp)
+            .join(User, Student.user_id == User.id)
+            .outerjoin(StudentLevel, StudentLevel.student_id == Student.id)
+            .where(Student.id.in_([UUID(student_id) for student_id in set(student_ids)]))
+        )
+        return {
+            str(row.id): (
+                (row.profile_data or {}).get("full_name", row.email),
+                row.current_level or 1,
+                row.total_xp or 0,
+            )
+            for row in result.all()
+        }
 
     async def generate_weekly_report(self, student_id: UUID) -> StudentWeeklyReport:
         """Generate AI-powered weekly learning report"""
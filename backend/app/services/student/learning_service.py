@@ -15,7 +15,7 @@ All methods are async and use the student UUID for personalization.
 from datetime import datetime
 from typing import Dict, List, Optional
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_, or_, func, desc
+from sqlalchemy import select, and_, desc
 from uuid import UUID
 
 from app.models.user import User
@@ -24,6 +24,11 @@ from app.models.course import Course
 from app.models.enrollment import Enrollment, EnrollmentStatus
 from app.models.student_dashboard import StudentWishlist, StudentSessionPrep
 from app.services.ai_orchestrator import AIOrchestrator
+from app.services.course_catalog import SORTS, card_query, catalog_filters, catalog_page, make_etag, to_card
+
+
+class StudentNotFoundError(ValueError):
+    """Raised when the requesting user has no student profile."""
 
 
 class LearningService:
@@ -104,42 +109,37 @@ class LearningService:
         )
         enrolled_course_ids = [row[0] for row in enrolled_result.all()]
 
-        # Get courses matching student's grade level (not enrolled)
-        query = select(Course).where(
-            and_(
-                Course.is_deleted == False,
-                Course.is_published == True,
-                Course.grade_levels.contains([student.grade_level])
-            )
-        )
-
-        # Exclude already enrolled courses
+        # Card projection of the courses matching the student's grade (not enrolled)
+        query = card_query().where(*catalog_filters(grade_level=student.grade_level))
         if enrolled_course_ids:
             query = query.where(Course.id.notin_(enrolled_course_ids))
 
         result = await self.db.execute(query.limit(limit))
-        courses = result.scalars().all()
 
-        # Format courses
         recommended = []
-        for course in courses:
-            instructor_name = await self._get_instructor_name(course.instructor_id)
-            recommended.append({
-                "course_id": str(course.id),
-                "title": course.title,
-                "description": course.description,
-                "instructor_name": instructor_name,
-                "grade_levels": course.grade_levels,
-                "learning_area": course.learning_area,
-                "average_rating": float(course.average_rating),
-                "enrollment_count": course.enrollment_count,
-                "thumbnail_url": course.thumbnail_url,
-                "price": float(course.price) if course.price else 0.0,
-                "ai_match_score": 85  # Placeholder - would use ML model
-            })
+        for row in result.all():
+            card = self._marketplace_card(to_card(row))
+            card["ai_match_score"] = 85  # Placeholder - would use ML model
+            recommended.append(card)
 
         return recommended
 
+    @staticmethod
+    def _marketplace_card(card: Dict) -> Dict:
+        """Reshape a catalog card into the student marketplace format"""
+        return {
+            "course_id": card["id"],
+            "title": card["title"],
+            "description": card["description"],
+            "instructor_name": card["instructor_name"],
+            "grade_levels": card["grade_levels"],
+            "learning_area": card["learning_area"],
+            "average_rating": float(card["average_rating"]),
+            "enrollment_count": card["enrollment_count"],
+            "thumbnail_url": card["thumbnail_url"],
+            "price": float(card["price"]) if card["price"] else 0.0
+        }
+
     async def browse_courses(
         self,
         student_id: UUID,
@@ -147,88 +147,45 @@ class LearningService:
         subject: Optional[str] = None,
         sort_by: str = "popular",
         limit: int = 20,
-        offset: int = 0
+        offset: int = 0,
+        cursor: Optional[str] = None
     ) -> Dict:
-        """Browse course marketplace filtered to student's grade level"""
+        """
+        Browse course marketplace filtered to student's grade level.
+
+        Pages come from the shared catalog cache (one per grade, filter
+        set and cursor); ``etag`` identifies the response for 304s.
+        """
         # Fetch student to get their grade level
         student_result = await self.db.execute(
-            select(Student).where(Student.id == student_id)
+            select(Student.grade_level).where(Student.id == student_id)
         )
-        student = student_result.scalar_one_or_none()
-        if not student:
-            raise ValueError("Student not found")
-
-        # Base query: published, not deleted, matches student's grade
-        query = select(Course).where(
-            and_(
-                Course.is_deleted == False,
-                Course.is_published == True,
-                Course.grade_levels.contains([student.grade_level])
-            )
+        grade_level = student_result.scalar_one_or_none()
+        if grade_level is None:
+            raise StudentNotFoundError("Student not found")
+
+        # Published courses for the student's grade, excluding teacher-only
+        # courses (Teacher's Guide, Diploma)
+        page = await catalog_page(
+            self.db,
+            sort=sort_by if sort_by in SORTS else "popular",
+            cursor=cursor,
+            skip=offset,
+            limit=limit,
+            grade_level=grade_level,
+            audience="students",
+            search=search,
+            learning_area=subject,
         )
 
-        # Exclude teacher/instructor-only courses (Teacher's Guide, Diploma)
-        teacher_labels = ["Teacher's Guide", "Diploma"]
-        for label in teacher_labels:
-            query = query.where(~Course.grade_levels.any(label))
-
-        # Search filter
-        if search:
-            query = query.where(
-                or_(
-                    Course.title.ilike(f"%{search}%"),
-                    Course.description.ilike(f"%{search}%")
-                )
-            )
-
-        # Subject filter
-        if subject:
-            query = query.where(Course.learning_area == subject)
-
-        # Sorting
-        if sort_by == "popular":
-            query = query.order_by(desc(Course.enrollment_count))
-        elif sort_by == "rating":
-            query = query.order_by(desc(Course.average_rating))
-        elif sort_by == "newest":
-            query = query.order_by(desc(Course.created_at))
-        elif sort_by == "price_low":
-            query = query.order_by(Course.price.asc())
-        elif sort_by == "price_high":
-            query = query.order_by(Course.price.desc())
-
-        # Total count before pagination
-        count_query = select(func.count()).select_from(query.subquery())
-        total_result = await self.db.execute(count_query)
-        total_courses = total_result.scalar()
-
-        # Paginate
-        query = query.limit(limit).offset(offset)
-        result = await self.db.execute(query)
-        courses = result.scalars().all()
-
-        courses_list = []
-        for course in courses:
-            instructor_name = await self._get_instructor_name(course.instructor_id)
-            courses_list.append({
-                "course_id": str(course.id),
-                "title": course.title,
-                "description": course.description,
-                "instructor_name": instructor_name,
-                "grade_levels": course.grade_levels,
-                "learning_area": course.learning_area,
-                "average_rating": float(course.average_rating),
-                "enrollment_count": course.enrollment_count,
-                "thumbnail_url": course.thumbnail_url,
-                "price": float(course.price) if course.price else 0.0
-            })
-
         return {
-            "courses": courses_list,
-            "total": total_courses,
+            "courses": [self._marketplace_card(card) for card in page["courses"]],
+            "total": page["total"],
             "limit": limit,
-            "offset": offset,
-            "student_grade": student.grade_level
+            "offset": page["skip"],
+            "next_cursor": page["next_cursor"],
+            "student_grade": grade_level,
+            "etag": make_etag(page["etag"], grade_level)
         }
 
     async def get_wishlist_ids(self, student_id: UUID) -> list:
@@ -4,9 +4,25 @@ Student Session Limit Service
 Enforces a 2-hour daily AI tutoring cap and encourages Pomodoro-style
 breaks (25 minutes focus, 5 minutes break). Tracks daily interaction
 counts and provides session status for the frontend timer.
+
+Today's counters live in a Redis hash per student
+(``session:usage:<student_id>:<date>``) so a CoPilot message costs one
+HGETALL to check the limit and one atomic increment to log it, instead
+of reading (and creating) the StudentSessionLog row twice:
+
+- The first access of the day seeds the hash from the student's
+  StudentSessionLog row (if any) with HSETNX, so concurrent seeders
+  agree and increments never start from zero on top of stored usage.
+- Increments run in a script that only touches a seeded hash and marks
+  it dirty; flush_session_counters() writes dirty hashes back to
+  StudentSessionLog, every ``session_counter_flush_seconds`` from the
+  scheduler.
+- Without Redis every call falls back to the StudentSessionLog row.
 """
+import logging
+import uuid
 from datetime import date, datetime
-from typing import Dict
+from typing import Any, Dict, List, Mapping, Optional
 from uuid import UUID
 
 from sqlalchemy import select, and_
@@ -14,6 +30,52 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.student_mastery import StudentSessionLog
 
+logger = logging.getLogger(__name__)
+
+_KEY_PREFIX = "session:usage:"
+_DIRTY_KEY = "session:usage:dirty"
+
+# Outlives the day so the last increments are flushed after midnight
+_COUNTER_TTL = 2 * 24 * 3600
+
+_FIELDS = ("total_minutes", "core_tutoring_minutes", "message_count", "pomodoro_completed", "break_count")
+
+# KEYS: counters hash, dirty set
+# ARGV: minutes, messages, breaks, Pomodoro block minutes, TTL
+# Returns nil when the hash has not been seeded, else HGETALL
+_INCREMENT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return nil
+end
+local minutes = tonumber(ARGV[1])
+if minutes > 0 then
+    local total = redis.call('HINCRBY', KEYS[1], 'total_minutes', minutes)
+    redis.call('HINCRBY', KEYS[1], 'core_tutoring_minutes', minutes)
+    local block = tonumber(ARGV[4])
+    if math.floor(total / block) > math.floor((total - minutes) / block) then
+        redis.call('HINCRBY', KEYS[1], 'pomodoro_completed', 1)
+    end
+end
+redis.call('HINCRBY', KEYS[1], 'message_count', ARGV[2])
+redis.call('HINCRBY', KEYS[1], 'break_count', ARGV[3])
+redis.call('EXPIRE', KEYS[1], ARGV[5])
+redis.call('SADD', KEYS[2], KEYS[1])
+return redis.call('HGETALL', KEYS[1])
+"""
+
+
+def _key(student_id: Any, day: date) -> str:
+    return f"{_KEY_PREFIX}{student_id}:{day.isoformat()}"
+
+
+def _counts(values: Any) -> Dict[str, int]:
+    """Counters from a hash (dict or flat HGETALL list) or a log row."""
+    if isinstance(values, list):
+        values = dict(zip(values[::2], values[1::2]))
+    if isinstance(values, Mapping):
+        return {field: int(values.get(field) or 0) for field in _FIELDS}
+    return {field: getattr(values, field) or 0 for field in _FIELDS}
+
 
 class StudentSessionLimitService:
     """Service for enforcing daily AI session limits and break schedules."""
@@ -26,28 +88,85 @@ class StudentSessionLimitService:
     def __init__(self, db: AsyncSession):
         self.db = db
 
-    async def _get_or_create_today_log(self, student_id: UUID) -> StudentSessionLog:
-        """Get or create today's session log for a student."""
-        today = date.today()
+    async def _get_today_log(self, student_id: UUID) -> Optional[StudentSessionLog]:
         stmt = select(StudentSessionLog).where(
             and_(
                 StudentSessionLog.student_id == student_id,
-                StudentSessionLog.date == today,
+                StudentSessionLog.date == date.today(),
             )
         )
         result = await self.db.execute(stmt)
-        log = result.scalar_one_or_none()
+        return result.scalar_one_or_none()
+
+    async def _get_or_create_today_log(self, student_id: UUID) -> StudentSessionLog:
+        """Get or create today's session log for a student."""
+        log = await self._get_today_log(student_id)
 
         if not log:
             log = StudentSessionLog(
                 student_id=student_id,
-                date=today,
+                date=date.today(),
             )
             self.db.add(log)
             await self.db.flush()
 
         return log
 
+    # ── Redis counters ───────────────────────────────────────────────
+
+    def _redis(self):
+        """The Redis client, or None to use StudentSessionLog directly."""
+        try:
+            from app.redis import get_redis
+
+            return get_redis()
+        except RuntimeError:
+            return None
+
+    async def _seed(self, redis, key: str, student_id: UUID) -> None:
+        log = await self._get_today_log(student_id)
+        counts = _counts(log) if log else dict.fromkeys(_FIELDS, 0)
+        pipe = redis.pipeline(transaction=True)
+        for field, value in counts.items():
+            pipe.hsetnx(key, field, value)
+        pipe.expire(key, _COUNTER_TTL)
+        await pipe.execute()
+
+    async def _read_counters(self, student_id: UUID) -> Optional[Dict[str, int]]:
+        redis = self._redis()
+        if redis is None:
+            return None
+        key = _key(student_id, date.today())
+        try:
+            values = await redis.hgetall(key)
+            if not values:
+                await self._seed(redis, key, student_id)
+                values = await redis.hgetall(key)
+        except Exception as e:
+            logger.warning(f"Session counter read failed for {student_id}: {e}")
+            return None
+        return _counts(values)
+
+    async def _increment(
+        self, student_id: UUID, minutes: int = 0, messages: int = 0, breaks: int = 0
+    ) -> Optional[Dict[str, int]]:
+        redis = self._redis()
+        if redis is None:
+            return None
+        key = _key(student_id, date.today())
+        args = (minutes, messages, breaks, self.POMODORO_MINUTES, _COUNTER_TTL)
+        try:
+            values = await redis.eval(_INCREMENT, 2, key, _DIRTY_KEY, *args)
+            if values is None:
+                await self._seed(redis, key, student_id)
+                values = await redis.eval(_INCREMENT, 2, key, _DIRTY_KEY, *args)
+        except Exception as e:
+            logger.warning(f"Session counter update failed for {student_id}: {e}")
+            return None
+        return _counts(values)
+
+    # ── Public API ───────────────────────────────────────────────────
+
     async def log_interaction(self, student_id: UUID, minutes_elapsed: int = 1) -> Dict:
         """
         Log an AI interaction and increment counters.
@@ -59,27 +178,44 @@ class StudentSessionLimitService:
         Returns:
             Updated session status dict
         """
+        counts = await self._increment(student_id, minutes=minutes_elapsed, messages=1)
+        if counts is not None:
+            return self._status(counts)
+
         log = await self._get_or_create_today_log(student_id)
 
+        previous_total = log.total_minutes
         log.message_count += 1
         log.total_minutes += minutes_elapsed
         log.core_tutoring_minutes += minutes_elapsed
         log.updated_at = datetime.utcnow()
 
         # Check if a Pomodoro block was completed
-        if log.total_minutes > 0 and log.total_minutes % self.POMODORO_MINUTES == 0:
+        if log.total_minutes // self.POMODORO_MINUTES > previous_total // self.POMODORO_MINUTES:
             log.pomodoro_completed += 1
 
+        counts = _counts(log)
         await self.db.commit()
-        return await self.check_session_limits(student_id)
+        return self._status(counts)
 
     async def log_break(self, student_id: UUID) -> Dict:
         """Record that the student took a break."""
+        counts = await self._increment(student_id, breaks=1)
+        if counts is not None:
+            return self._status(counts)
+
         log = await self._get_or_create_today_log(student_id)
         log.break_count += 1
         log.updated_at = datetime.utcnow()
+        counts = _counts(log)
         await self.db.commit()
-        return await self.check_session_limits(student_id)
+        return self._status(counts)
+
+    async def _today_counts(self, student_id: UUID) -> Dict[str, int]:
+        counts = await self._read_counters(student_id)
+        if counts is None:
+            counts = _counts(await self._get_or_create_today_log(student_id))
+        return counts
 
     async def check_session_limits(self, student_id: UUID) -> Dict:
         """
@@ -95,16 +231,18 @@ class StudentSessionLimitService:
                 pomodoro_completed: int - focus blocks completed
                 suggestion: str - human-friendly suggestion text
         """
-        log = await self._get_or_create_today_log(student_id)
+        return self._status(await self._today_counts(student_id))
 
-        minutes_remaining = max(0, self.MAX_DAILY_MINUTES - log.total_minutes)
-        can_continue = log.total_minutes < self.MAX_DAILY_MINUTES
+    def _status(self, counts: Mapping[str, int]) -> Dict:
+        total_minutes = counts["total_minutes"]
+        minutes_remaining = max(0, self.MAX_DAILY_MINUTES - total_minutes)
+        can_continue = total_minutes < self.MAX_DAILY_MINUTES
 
         # Suggest break at Pomodoro intervals
-        minutes_since_break = log.total_minutes % self.POMODORO_MINUTES
+        minutes_since_break = total_minutes % self.POMODORO_MINUTES
         suggest_break = (
             minutes_since_break >= self.POMODORO_MINUTES - 2  # Within 2 min of break time
-            and log.total_minutes > 0
+            and total_minutes > 0
         )
 
         # Build suggestion text
@@ -131,25 +269,91 @@ class StudentSessionLimitService:
 
         return {
             "can_continue": can_continue,
-            "minutes_used": log.total_minutes,
+            "minutes_used": total_minutes,
             "minutes_remaining": minutes_remaining,
             "suggest_break": suggest_break,
-            "message_count": log.message_count,
-            "pomodoro_completed": log.pomodoro_completed,
-            "break_count": log.break_count,
+            "message_count": counts["message_count"],
+            "pomodoro_completed": counts["pomodoro_completed"],
+            "break_count": counts["break_count"],
             "suggestion": suggestion,
         }
 
     async def get_daily_stats(self, student_id: UUID) -> Dict:
         """Get today's session stats for the frontend dashboard."""
-        log = await self._get_or_create_today_log(student_id)
+        counts = await self._today_counts(student_id)
         return {
-            "date": log.date.isoformat(),
-            "total_minutes": log.total_minutes,
-            "core_tutoring_minutes": log.core_tutoring_minutes,
-            "message_count": log.message_count,
-            "pomodoro_completed": log.pomodoro_completed,
-            "break_count": log.break_count,
-            "minutes_remaining": max(0, self.MAX_DAILY_MINUTES - log.total_minutes),
+            "date": date.today().isoformat(),
+            "total_minutes": counts["total_minutes"],
+            "core_tutoring_minutes": counts["core_tutoring_minutes"],
+            "message_count": counts["message_count"],
+            "pomodoro_completed": counts["pomodoro_completed"],
+            "break_count": counts["break_count"],
+            "minutes_remaining": max(0, self.MAX_DAILY_MINUTES - counts["total_minutes"]),
             "daily_limit_minutes": self.MAX_DAILY_MINUTES,
         }
+
+
+async def flush_session_counters(db: AsyncSession, batch_size: int = 500) -> int:
+    """
+    Write dirty Redis session counters to StudentSessionLog.
+
+    Each hash is unmarked before it is read, so an increment racing the
+    flush marks it dirty again for the next run. Stored counters never
+    move backwards (a hash re-seeded after Redis lost it can lag the
+    row). Returns the number of logs written.
+    """
+    from app.redis import get_redis
+
+    redis = get_redis()
+    keys = list(await redis.smembers(_DIRTY_KEY))
+    written = 0
+    for start in range(0, len(keys), batch_size):
+        batch = keys[start:start + batch_size]
+        pipe = redis.pipeline(transaction=False)
+        for key in batch:
+            pipe.srem(_DIRTY_KEY, key)
+            pipe.hgetall(key)
+        results = await pipe.execute()
+
+        pending: Dict[tuple, Dict[str, int]] = {}
+        for key, values in zip(batch, results[1::2]):
+            try:
+                student_id, day = key[len(_KEY_PREFIX):].rsplit(":", 1)
+                pending[(uuid.UUID(student_id), date.fromisoformat(day))] = _counts(values)
+            except ValueError:
+                continue
+        pending = {ident: counts for ident, counts in pending.items() if any(counts.values())}
+        if not pending:
+            continue
+
+        try:
+            written += await _write_logs(db, pending)
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            await redis.sadd(_DIRTY_KEY, *batch)
+            raise
+    return written
+
+
+async def _write_logs(db: AsyncSession, pending: Dict[tuple, Dict[str, int]]) -> int:
+    student_ids: List[UUID] = list({student_id for student_id, _ in pending})
+    days = list({day for _, day in pending})
+    result = await db.execute(
+        select(StudentSessionLog).where(
+            StudentSessionLog.student_id.in_(student_ids),
+            StudentSessionLog.date.in_(days),
+        )
+    )
+    logs = {(log.student_id, log.date): log for log in result.scalars()}
+
+    now = datetime.utcnow()
+    for (student_id, day), counts in pending.items():
+        log = logs.get((student_id, day))
+        if log is None:
+            db.add(StudentSessionLog(student_id=student_id, date=day, updated_at=now, **counts))
+            continue
+        for field, value in counts.items():
+            setattr(log, field, max(getattr(log, field) or 0, value))
+        log.updated_at = now
+    return len(pending)
@@ -0,0 +1,267 @@
+"""
+Student XP Ledger - write-behind XP events
+
+High-frequency XP sources (logins, lessons, quizzes) record events with
+GamificationService.record_xp() instead of awarding them inline; the event
+reaches the ledger once the source's transaction commits. The ledger is a
+BatchedLogWriter (app/utils/log_writer.py) over StudentXPEvent, so events
+get the same buffering, Redis spill/replay and bad-row isolation as audit
+rows; each flushed batch is applied by apply_xp_events() in a single
+transaction:
+
+- one multi-row INSERT for the events
+- one locked read of the batch's StudentLevel rows, updated per student
+  with the summed XP (level-ups follow the service's XP curve)
+- badges from the in-memory BADGE_RULES table, checked against one query
+  of the badges the batch's students already hold
+
+After commit the per-student results are added to the leaderboards and
+pushed to the student over WebSocket as ``xp_update``.
+
+GamificationService.award_xp() applies a single event through the same
+path when the caller needs the result immediately.
+"""
+
+import logging
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+from uuid import UUID
+
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import database
+from app.config import settings
+from app.models.student import Student
+from app.models.student_gamification import StudentBadge, StudentLevel, StudentXPEvent
+from app.utils.log_writer import BatchedLogWriter, DatabaseUnavailable
+
+logger = logging.getLogger(__name__)
+
+EVENT_XP_UPDATE = "xp_update"
+
+# session.info key for events waiting on their transaction's commit
+_PENDING_KEY = "xp_events"
+
+
+@dataclass
+class XPProgress:
+    """One student's result for a batch of XP events."""
+
+    student_id: UUID
+    user_id: Optional[UUID]
+    grade_level: Optional[str]
+    xp_awarded: int = 0
+    total_xp: int = 0
+    current_level: int = 1
+    next_level_xp: int = 0
+    levels_gained: int = 0
+    sources: Set[str] = field(default_factory=set)
+    badges: List[str] = field(default_factory=list)
+
+    @property
+    def leveled_up(self) -> bool:
+        return self.levels_gained > 0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "xp_awarded": self.xp_awarded,
+            "total_xp": self.total_xp,
+            "current_level": self.current_level,
+            "next_level_xp": self.next_level_xp,
+            "progress_to_next_level": (self.total_xp / self.next_level_xp) * 100 if self.next_level_xp else 0,
+            "leveled_up": self.leveled_up,
+            "levels_gained": self.levels_gained,
+            "badges_earned": list(self.badges),
+        }
+
+
+# Badges that follow from XP events alone, keyed by GamificationService.BADGES
+BADGE_RULES: Dict[str, Callable[[XPProgress], bool]] = {
+    "first_lesson": lambda progress: "lesson_complete" in progress.sources,
+    "level_10": lambda progress: progress.current_level >= 10,
+}
+
+
+def _service():
+    from app.services.student.gamification_service import GamificationService
+
+    return GamificationService
+
+
+def xp_for_level(level: int) -> int:
+    """XP required to reach ``level`` (same curve as GamificationService)."""
+    service = _service()
+    return int(service.LEVEL_XP_BASE * (service.LEVEL_XP_MULTIPLIER ** (level - 1)))
+
+
+def build_event(
+    student_id: Any,
+    source: str,
+    description: str,
+    multiplier: float = 1.0,
+    custom_amount: Optional[int] = None,
+) -> Dict[str, Any]:
+    """Build an XP event row; the amount is fixed when the event happens."""
+    base_xp = custom_amount or _service().XP_REWARDS.get(source, 10)
+    return {
+        "id": str(uuid.uuid4()),
+        "student_id": str(student_id),
+        "xp_amount": int(base_xp * multiplier),
+        "source": source,
+        "description": description[:255],
+        "multiplier": multiplier,
+        "timestamp": datetime.utcnow().isoformat(),
+    }
+
+
+async def apply_xp_events(db: AsyncSession, events: List[Dict[str, Any]]) -> Dict[UUID, XPProgress]:
+    """
+    Insert XP events and apply them to levels and badges, without committing.
+
+    ``events`` hold UUID/datetime values (see XPLedger.typed_event). Events for
+    students that no longer exist are dropped.
+    """
+    student_ids = {event["student_id"] for event in events}
+    if not student_ids:
+        return {}
+
+    students = {
+        row.id: row
+        for row in (await db.execute(
+            select(Student.id, Student.user_id, Student.grade_level).where(Student.id.in_(student_ids))
+        )).all()
+    }
+    unknown = len([event for event in events if event["student_id"] not in students])
+    if unknown:
+        logger.warning(f"Dropping {unknown} XP events for unknown students")
+        events = [event for event in events if event["student_id"] in students]
+    if not events:
+        return {}
+
+    await db.execute(insert(StudentXPEvent).values(events))
+
+    progress: Dict[UUID, XPProgress] = {
+        student_id: XPProgress(student_id=student_id, user_id=row.user_id, grade_level=row.grade_level)
+        for student_id, row in students.items()
+    }
+    for event in events:
+        entry = progress[event["student_id"]]
+        entry.xp_awarded += event["xp_amount"]
+        entry.sources.add(event["source"])
+    progress = {student_id: entry for student_id, entry in progress.items() if entry.sources}
+
+    levels = {
+        level.student_id: level
+        for level in (await db.execute(
+            select(StudentLevel).where(StudentLevel.student_id.in_(progress)).with_for_update()
+        )).scalars()
+    }
+    for student_id, entry in progress.items():
+        level = levels.get(student_id)
+        if level is None:
+            level = StudentLevel(student_id=student_id, current_level=1, total_xp=0, next_level_xp=xp_for_level(2))
+            db.add(level)
+        level.total_xp = (level.total_xp or 0) + entry.xp_awarded
+        while level.total_xp >= level.next_level_xp:
+            level.current_level += 1
+            entry.levels_gained += 1
+            level.next_level_xp = xp_for_level(level.current_level + 1)
+        entry.total_xp = level.total_xp
+        entry.current_level = level.current_level
+        entry.next_level_xp = level.next_level_xp
+
+    badge_defs = _service().BADGES
+    names = {badge_defs[key]["name"]: key for key in BADGE_RULES}
+    held = {
+        (student_id, names[badge_name])
+        for student_id, badge_name in (await db.execute(
+            select(StudentBadge.student_id, StudentBadge.badge_name).where(
+                StudentBadge.student_id.in_(progress),
+                StudentBadge.badge_name.in_(names),
+            )
+        )).all()
+    }
+    for student_id, entry in progress.items():
+        for key, rule in BADGE_RULES.items():
+            if (student_id, key) in held or not rule(entry):
+                continue
+            definition = badge_defs[key]
+            db.add(StudentBadge(
+                student_id=student_id,
+                badge_type="achievement",
+                badge_name=definition["name"],
+                description=definition["description"],
+                icon=definition["icon"],
+                rarity=definition["rarity"],
+            ))
+            entry.badges.append(key)
+
+    await db.flush()
+    return progress
+
+
+async def publish_xp_results(progress: Iterable[XPProgress]) -> None:
+    """Rank committed results on the leaderboards and push them to students."""
+    from app.services.student.gamification_service import STUDENT_LEADERBOARD, leaderboard_scopes
+    from app.websocket.connection_manager import ws_manager
+
+    progress = list(progress)
+    await STUDENT_LEADERBOARD.increment_many(
+        (str(entry.student_id), entry.xp_awarded, leaderboard_scopes(entry.grade_level))
+        for entry in progress
+    )
+    for entry in progress:
+        if entry.user_id is None:
+            continue
+        try:
+            await ws_manager.send_personal(str(entry.user_id), EVENT_XP_UPDATE, entry.as_dict())
+        except Exception as e:
+            logger.warning(f"XP update push failed for student {entry.student_id}: {e}")
+
+
+class XPLedger(BatchedLogWriter):
+    """Write-behind queue that applies XP events to levels in batches."""
+
+    def __init__(self):
+        super().__init__(
+            StudentXPEvent,
+            "xp",
+            queue_size=settings.xp_ledger_queue_size,
+            batch_size=settings.xp_ledger_batch_size,
+            flush_ms=settings.xp_ledger_flush_ms,
+        )
+        self.applied = 0
+
+    def new_row(self, **values: Any) -> Dict[str, Any]:
+        return build_event(**values)
+
+    def typed_event(self, **values: Any) -> Dict[str, Any]:
+        """Build an event with UUID/datetime values, ready for apply_xp_events()."""
+        return self._coerce(self.new_row(**values))
+
+    def submit_after_commit(self, session: Any, row: Dict[str, Any]) -> None:
+        """Queue ``row`` once ``session`` commits; a rollback drops it."""
+        session.info.setdefault(_PENDING_KEY, []).append(row)
+        database.on_commit(session, _PENDING_KEY, self._submit_committed)
+
+    async def _submit_committed(self, rows: List[Dict[str, Any]]) -> None:
+        for row in rows:
+            await self.submit(row)
+
+    async def _write_inline(self, row: Dict[str, Any]) -> None:
+        await self._insert([row])
+
+    async def _insert(self, rows: List[Dict[str, Any]]) -> None:
+        if database.AsyncSessionLocal is None:
+            raise DatabaseUnavailable("database not initialized")
+        async with database.AsyncSessionLocal() as session:
+            progress = await apply_xp_events(session, [self._coerce(row) for row in rows])
+            await session.commit()
+        self.applied += len(rows)
+        await publish_xp_results(progress.values())
+
+
+xp_ledger = XPLedger()
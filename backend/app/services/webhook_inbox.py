@@ -0,0 +1,387 @@
+"""
+Payment Webhook Inbox
+
+Gateway callbacks used to be processed inside the HTTP request: payment
+lookup, wallet credit and commit. Under load the gateways timed out and
+retried, so the same event was processed again while the first attempt
+was still running. The endpoints now only verify the callback and call
+record_event(), which:
+
+- stores the raw payload in webhook_events, unique per (gateway,
+  event_key), so a retried event is absorbed by the insert;
+- queues a ``webhook_events`` job for the payment the event belongs to
+  (its ordering key) once the insert commits, and returns.
+
+The job (process_pending) works through the payment's stored events
+oldest first, holding a per-payment lease so only one worker does so at
+a time. Each event goes to its PaymentService handler and is marked
+processed. A failed event stops the run, so later events of that payment
+wait; the job queue retries it with backoff. After
+``webhook_max_attempts`` it is marked failed and later events move on.
+replay_events() re-queues failed (or any) events. A sweep re-queues
+events left unprocessed for ``webhook_stale_seconds`` and refreshes the
+backlog gauges.
+"""
+
+import hashlib
+import json
+import logging
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+
+from sqlalchemy import func, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import database
+from app.config import settings
+from app.models.webhook_event import FAILED, PROCESSED, RECEIVED, WebhookEvent
+
+logger = logging.getLogger(__name__)
+
+GATEWAYS = ("mpesa", "paypal", "stripe")
+
+_LOCK_PREFIX = "webhook:lock:"
+
+# Release the lease only if it is still ours
+_RELEASE = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+# Leases of this process when Redis is not configured
+_local_locks: Set[str] = set()
+
+
+class WebhookBusy(Exception):
+    """Another worker holds the payment's lease; the job retries later."""
+
+
+class WebhookProcessingError(Exception):
+    """An event failed and will be retried; later events of its payment wait."""
+
+
+def _record(gateway: str, result: str, lag: Optional[float] = None) -> None:
+    try:
+        from app.metrics import webhook_events_total, webhook_processing_lag
+
+        webhook_events_total.labels(gateway=gateway, result=result).inc()
+        if lag is not None:
+            webhook_processing_lag.labels(gateway=gateway).observe(lag)
+    except Exception:
+        pass
+
+
+# ── Ingestion ────────────────────────────────────────────────────────
+
+def event_keys(gateway: str, payload: Dict[str, Any]) -> Tuple[str, Optional[str], str]:
+    """
+    (event_key, event_type, ordering_key) of a gateway payload.
+
+    event_key is the gateway's event id (M-Pesa sends one callback per
+    CheckoutRequestID); ordering_key is the payment the event is about.
+    A payload without ids falls back to its hash, which still absorbs
+    byte-identical retries.
+    """
+    digest = hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+    if gateway == "mpesa":
+        callback = payload.get("Body", {}).get("stkCallback", {})
+        checkout_id = callback.get("CheckoutRequestID")
+        return checkout_id or digest, "stk_callback", checkout_id or digest
+    if gateway == "paypal":
+        resource = payload.get("resource") or {}
+        event_id = payload.get("id") or digest
+        return event_id, payload.get("event_type"), resource.get("parent_payment") or resource.get("id") or event_id
+    if gateway == "stripe":
+        event_object = (payload.get("data") or {}).get("object") or {}
+        event_id = payload.get("id") or digest
+        return event_id, payload.get("type"), event_object.get("payment_intent") or event_object.get("id") or event_id
+    raise ValueError(f"Unknown webhook gateway: {gateway}")
+
+
+async def record_event(db: AsyncSession, gateway: str, payload: Dict[str, Any]) -> bool:
+    """
+    Store a verified gateway payload and queue its processing.
+
+    Returns False when the event was already stored (a gateway retry).
+    Commits ``db``; raises if the event could not be stored, in which
+    case the endpoint must not acknowledge it.
+    """
+    from app.services.background_jobs import webhook_events
+
+    event_key, event_type, ordering_key = event_keys(gateway, payload)
+    dialect = (await db.connection()).dialect.name
+    insert_ = pg_insert if dialect == "postgresql" else sqlite_insert
+    stmt = (
+        insert_(WebhookEvent)
+        .values(
+            id=uuid.uuid4(),
+            gateway=gateway,
+            event_key=event_key[:255],
+            event_type=event_type,
+            ordering_key=ordering_key[:255],
+            payload=payload,
+            status=RECEIVED,
+            attempts=0,
+            received_at=datetime.utcnow(),
+        )
+        .on_conflict_do_nothing(index_elements=["gateway", "event_key"])
+        .returning(WebhookEvent.id)
+    )
+    inserted = (await db.execute(stmt)).scalar_one_or_none() is not None
+    if inserted:
+        webhook_events.defer(db, {"gateway": gateway, "ordering_key": ordering_key[:255]})
+    await db.commit()
+
+    _record(gateway, "received" if inserted else "duplicate")
+    if not inserted:
+        logger.info(f"Duplicate {gateway} webhook {event_key} ignored")
+    return inserted
+
+
+# ── Processing ───────────────────────────────────────────────────────
+
+async def _acquire(key: str) -> Optional[str]:
+    token = uuid.uuid4().hex
+    try:
+        from app.redis import get_redis
+
+        redis = get_redis()
+    except RuntimeError:
+        if key in _local_locks:
+            return None
+        _local_locks.add(key)
+        return token
+    acquired = await redis.set(f"{_LOCK_PREFIX}{key}", token, nx=True, ex=settings.webhook_lock_seconds)
+    return token if acquired else None
+
+
+async def _release(key: str, token: str) -> None:
+    try:
+        from app.redis import get_redis
+
+        redis = get_redis()
+    except RuntimeError:
+        _local_locks.discard(key)
+        return
+    try:
+        await redis.eval(_RELEASE, 1, f"{_LOCK_PREFIX}{key}", token)
+    except Exception as e:
+        logger.warning(f"Could not release webhook lease {key}: {e}")
+
+
+async def _apply(db: AsyncSession, gateway: str, payload: Dict[str, Any]) -> Optional[str]:
+    """Run the gateway handler; returns an error message, or None on success."""
+    from app.services.payment_service import PaymentService
+
+    service = PaymentService(db)
+    try:
+        if gateway == "mpesa":
+            result = await service.handle_mpesa_callback(payload)
+        elif gateway == "paypal":
+            result = await service.handle_paypal_webhook(payload)
+        elif gateway == "stripe":
+            result = await service.process_stripe_event(payload)
+        else:
+            return f"Unknown webhook gateway: {gateway}"
+    except Exception as e:
+        await db.rollback()
+        return str(e) or type(e).__name__
+    if result.get("success"):
+        return None
+    return result.get("error") or "Handler reported failure"
+
+
+async def process_pending(gateway: str, ordering_key: str) -> int:
+    """
+    Process a payment's stored events in order; returns how many were
+    processed.
+
+    Raises WebhookBusy when another worker holds the payment's lease and
+    WebhookProcessingError when an event failed but has attempts left.
+    """
+    lock_key = f"{gateway}:{ordering_key}"
+    token = await _acquire(lock_key)
+    if token is None:
+        raise WebhookBusy(f"Webhook events for {lock_key} are being processed elsewhere")
+
+    processed = 0
+    try:
+        while True:
+            async with database.AsyncSessionLocal() as db:
+                row = (await db.execute(
+                    select(WebhookEvent.id, WebhookEvent.payload, WebhookEvent.attempts, WebhookEvent.received_at)
+                    .where(
+                        WebhookEvent.gateway == gateway,
+                        WebhookEvent.ordering_key == ordering_key,
+                        WebhookEvent.status == RECEIVED,
+                    )
+                    .order_by(WebhookEvent.received_at, WebhookEvent.id)
+                    .limit(1)
+                )).one_or_none()
+                if row is None:
+                    return processed
+
+                # Handlers commit their own work; the event is marked after
+                error = await _apply(db, gateway, row.payload)
+                attempts = row.attempts + 1
+                now = datetime.utcnow()
+                if error is None:
+                    values = {"status": PROCESSED, "processed_at": now, "last_error": None}
+                elif attempts >= settings.webhook_max_attempts:
+                    values = {"status": FAILED, "last_error": error}
+                else:
+                    values = {"last_error": error}
+                await db.execute(
+                    update(WebhookEvent).where(WebhookEvent.id == row.id).values(attempts=attempts, **values)
+                )
+                await db.commit()
+
+            if error is None:
+                processed += 1
+                _record(gateway, "processed", (now - row.received_at).total_seconds())
+            elif attempts >= settings.webhook_max_attempts:
+                _record(gateway, "failed")
+                logger.error(f"{gateway} webhook {row.id} failed after {attempts} attempts: {error}")
+            else:
+                _record(gateway, "retrying")
+                raise WebhookProcessingError(f"{gateway} webhook {row.id} attempt {attempts} failed: {error}")
+    finally:
+        await _release(lock_key, token)
+
+
+async def _queue(groups: Sequence[Tuple[str, str]]) -> None:
+    from app.services.background_jobs import webhook_events
+
+    for gateway, ordering_key in groups:
+        await webhook_events.enqueue({"gateway": gateway, "ordering_key": ordering_key})
+
+
+async def replay_events(
+    db: AsyncSession,
+    *,
+    event_ids: Optional[Sequence[uuid.UUID]] = None,
+    gateway: Optional[str] = None,
+    status: str = FAILED,
+    since: Optional[datetime] = None,
+    limit: int = 500,
+) -> int:
+    """
+    Reset matching events to received and queue their payments again.
+
+    Selects ``event_ids`` if given, otherwise up to ``limit`` events with
+    ``status`` (optionally of one ``gateway``, received since ``since``).
+    Replaying processed events runs their handlers again, which skip
+    payments already in the reported state. Returns the number reset.
+    """
+    query = select(WebhookEvent.id, WebhookEvent.gateway, WebhookEvent.ordering_key)
+    if event_ids:
+        query = query.where(WebhookEvent.id.in_(list(event_ids)))
+    else:
+        query = query.where(WebhookEvent.status == status)
+        if gateway:
+            query = query.where(WebhookEvent.gateway == gateway)
+        if since:
+            query = query.where(WebhookEvent.received_at >= since)
+        query = query.order_by(WebhookEvent.received_at).limit(limit)
+    rows = (await db.execute(query)).all()
+    if not rows:
+        return 0
+
+    await db.execute(
+        update(WebhookEvent)
+        .where(WebhookEvent.id.in_([row.id for row in rows]))
+        .values(status=RECEIVED, attempts=0, last_error=None, processed_at=None)
+    )
+    await db.commit()
+    await _queue(sorted({(row.gateway, row.ordering_key) for row in rows}))
+    logger.info(f"Replaying {len(rows)} webhook events")
+    return len(rows)
+
+
+async def sweep_inbox(db: AsyncSession) -> int:
+    """
+    Re-queue payments whose events have waited longer than
+    ``webhook_stale_seconds`` (their job was lost or exhausted) and
+    refresh the backlog gauges. Returns the number of payments queued.
+    """
+    now = datetime.utcnow()
+    backlog = (await db.execute(
+        select(WebhookEvent.gateway, func.count(), func.min(WebhookEvent.received_at))
+        .where(WebhookEvent.status == RECEIVED)
+        .group_by(WebhookEvent.gateway)
+    )).all()
+    try:
+        from app.metrics import webhook_inbox_oldest_pending, webhook_inbox_pending
+
+        pending = {gateway: (count, oldest) for gateway, count, oldest in backlog}
+        for gateway in GATEWAYS:
+            count, oldest = pending.get(gateway, (0, None))
+            webhook_inbox_pending.labels(gateway=gateway).set(count)
+            webhook_inbox_oldest_pending.labels(gateway=gateway).set(
+                (now - oldest).total_seconds() if oldest else 0
+            )
+    except Exception:
+        pass
+
+    stale = (await db.execute(
+        select(WebhookEvent.gateway, WebhookEvent.ordering_key)
+        .where(
+            WebhookEvent.status == RECEIVED,
+            WebhookEvent.received_at < now - timedelta(seconds=settings.webhook_stale_seconds),
+        )
+        .distinct()
+        .limit(500)
+    )).all()
+    await db.commit()
+    await _queue([(row.gateway, row.ordering_key) for row in stale])
+    return len(stale)
+
+
+async def list_events(
+    db: AsyncSession,
+    *,
+    status: Optional[str] = None,
+    gateway: Optional[str] = None,
+    page: int = 1,
+    page_size: int = 20,
+) -> Dict[str, Any]:
+    """Paginated events (newest first) plus per-status counts, for the admin inbox view."""
+    filters = []
+    if status:
+        filters.append(WebhookEvent.status == status)
+    if gateway:
+        filters.append(WebhookEvent.gateway == gateway)
+
+    total = (await db.execute(select(func.count()).select_from(WebhookEvent).where(*filters))).scalar() or 0
+    events = (await db.execute(
+        select(WebhookEvent)
+        .where(*filters)
+        .order_by(WebhookEvent.received_at.desc())
+        .offset((page - 1) * page_size)
+        .limit(page_size)
+    )).scalars().all()
+    counts = dict((await db.execute(
+        select(WebhookEvent.status, func.count()).group_by(WebhookEvent.status)
+    )).all())
+
+    items: List[Dict[str, Any]] = [
+        {
+            "id": str(event.id),
+            "gateway": event.gateway,
+            "event_key": event.event_key,
+            "event_type": event.event_type,
+            "ordering_key": event.ordering_key,
+            "status": event.status,
+            "attempts": event.attempts,
+            "last_error": event.last_error,
+            "received_at": event.received_at.isoformat() if event.received_at else None,
+            "processed_at": event.processed_at.isoformat() if event.processed_at else None,
+        }
+        for event in events
+    ]
+    return {"items": items, "total": total, "page": page, "page_size": page_size, "counts": counts}
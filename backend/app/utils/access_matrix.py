@@ -0,0 +1,375 @@
+"""
+Compiled permission and entitlement matrix.
+
+Authorisation used to cost two or three queries per guarded request
+(user override -> role permission -> is_super_admin for permissions,
+subscription -> plan feature for features). Now:
+
+- The role -> permission and plan -> feature tables are compiled into an
+  immutable AccessMatrix. Each permission name and feature key gets a bit;
+  each role and plan is an int bitmask, so a check is a dict lookup and an
+  AND. Each worker compiles the matrix once and keeps it in memory.
+- Per-user data (permission overrides and the active plan) is loaded into
+  a principal entry cached with @cached (local LRU + Redis), keyed by user
+  id. ``is_super_admin`` is already on the principal returned by
+  get_current_active_user().
+- Session hooks notice commits that touch permissions, role grants, plan
+  features, user overrides or subscriptions. After the commit, the change
+  is published on the ``authz:invalidate`` Redis channel and every worker
+  drops its compiled matrix or the affected principal.
+- As a safety net, the matrix is recompiled every ``authz_matrix_max_age``
+  seconds, and also when a temporary role grant expires. Principals
+  expire after ``authz_principal_ttl`` seconds.
+
+With a warm cache, require_permission() and require_feature() make no
+database round trips.
+"""
+
+import asyncio
+import json
+import logging
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import datetime
+from types import MappingProxyType
+from typing import Any, Dict, Iterable, Mapping, Optional
+
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import on_commit
+from app.models.admin.permission import Permission, RolePermission, UserPermissionOverride
+from app.models.plan_feature import PlanFeature
+from app.models.subscription import Subscription, SubscriptionStatus
+from app.utils.cache import cached, invalidate_tags, local_cache
+
+logger = logging.getLogger(__name__)
+
+INVALIDATION_CHANNEL = "authz:invalidate"
+
+# Targets carried by invalidation messages
+MATRIX = "matrix"
+ALL_PRINCIPALS = "principals"
+_USER_PREFIX = "user:"
+
+# Identifies this worker so it can skip its own broadcasts
+_WORKER_ID = uuid.uuid4().hex
+
+_MATRIX_MODELS = (Permission, RolePermission, PlanFeature)
+_PRINCIPAL_MODELS = (UserPermissionOverride, Subscription)
+
+
+def _timestamp(value: Optional[datetime]) -> Optional[float]:
+    # Expiry columns are naive UTC
+    return (value - datetime(1970, 1, 1)).total_seconds() if value else None
+
+
+@dataclass(frozen=True)
+class AccessMatrix:
+    """Immutable role/plan bitsets compiled from the permission tables."""
+
+    permission_bits: Mapping[str, int]
+    # Role -> mask of grants in force, and of every grant row (expired ones deny)
+    role_live: Mapping[str, int]
+    role_any: Mapping[str, int]
+    feature_bits: Mapping[str, int]
+    plan_features: Mapping[str, int]
+    valid_until: float
+
+    def role_decision(self, role: str, permission_name: str) -> Optional[bool]:
+        """True/False if the role has a grant row for the permission, else None."""
+        bit = self.permission_bits.get(permission_name)
+        if bit is None:
+            return None
+        mask = 1 << bit
+        if not self.role_any.get(role, 0) & mask:
+            return None
+        return bool(self.role_live.get(role, 0) & mask)
+
+    def plan_has_feature(self, plan_id: Optional[str], feature_key: str) -> bool:
+        bit = self.feature_bits.get(feature_key)
+        if plan_id is None or bit is None:
+            return False
+        return bool(self.plan_features.get(plan_id, 0) & (1 << bit))
+
+
+async def compile_access_matrix(db: AsyncSession) -> AccessMatrix:
+    """Build the matrix with one query per table."""
+    now = time.time()
+
+    perm_rows = (await db.execute(
+        select(Permission.id, Permission.name).where(Permission.is_active == True)
+    )).all()
+    permission_bits = {name: bit for bit, (_, name) in enumerate(sorted(perm_rows, key=lambda r: r.name))}
+    bit_by_id = {perm_id: permission_bits[name] for perm_id, name in perm_rows}
+
+    role_live: Dict[str, int] = {}
+    role_any: Dict[str, int] = {}
+    valid_until = now + settings.authz_matrix_max_age
+    role_rows = (await db.execute(
+        select(RolePermission.role, RolePermission.permission_id, RolePermission.expires_at)
+    )).all()
+    for role, permission_id, expires_at in role_rows:
+        bit = bit_by_id.get(permission_id)
+        if bit is None:
+            continue
+        role_any[role] = role_any.get(role, 0) | (1 << bit)
+        expiry = _timestamp(expires_at)
+        if expiry is None or expiry > now:
+            role_live[role] = role_live.get(role, 0) | (1 << bit)
+            if expiry is not None:
+                # Recompile when this temporary grant lapses
+                valid_until = min(valid_until, expiry)
+
+    feature_bits: Dict[str, int] = {}
+    plan_features: Dict[str, int] = {}
+    feature_rows = (await db.execute(
+        select(PlanFeature.plan_id, PlanFeature.feature_key).where(PlanFeature.is_enabled == True)
+    )).all()
+    for plan_id, feature_key in feature_rows:
+        bit = feature_bits.setdefault(feature_key, len(feature_bits))
+        plan_key = str(plan_id)
+        plan_features[plan_key] = plan_features.get(plan_key, 0) | (1 << bit)
+
+    return AccessMatrix(
+        permission_bits=MappingProxyType(permission_bits),
+        role_live=MappingProxyType(role_live),
+        role_any=MappingProxyType(role_any),
+        feature_bits=MappingProxyType(feature_bits),
+        plan_features=MappingProxyType(plan_features),
+        valid_until=valid_until,
+    )
+
+
+_matrix: Optional[AccessMatrix] = None
+_matrix_generation = 0
+_matrix_lock = asyncio.Lock()
+
+
+async def get_access_matrix(db: AsyncSession) -> AccessMatrix:
+    """Return this worker's compiled matrix, compiling it if stale."""
+    global _matrix
+
+    matrix = _matrix
+    if matrix is not None and time.time() < matrix.valid_until:
+        return matrix
+
+    async with _matrix_lock:
+        matrix = _matrix
+        if matrix is not None and time.time() < matrix.valid_until:
+            return matrix
+        generation = _matrix_generation
+        matrix = await compile_access_matrix(db)
+        if generation == _matrix_generation:
+            _matrix = matrix
+        return matrix
+
+
+def reset_access_matrix() -> None:
+    """Drop the compiled matrix; the next check recompiles it."""
+    global _matrix, _matrix_generation
+    _matrix = None
+    _matrix_generation += 1
+
+
+# ── Principals ───────────────────────────────────────────────────────
+
+@cached("authz:principal", ttl=settings.authz_principal_ttl, tags=["authz:principals"])
+async def load_principal(db: AsyncSession, user_id: str) -> Dict[str, Any]:
+    """A user's permission overrides and active plan (cached per user)."""
+    override_rows = (await db.execute(
+        select(Permission.name, UserPermissionOverride.granted, UserPermissionOverride.expires_at)
+        .join(Permission, Permission.id == UserPermissionOverride.permission_id)
+        .where(
+            UserPermissionOverride.user_id == uuid.UUID(str(user_id)),
+            Permission.is_active == True,
+        )
+    )).all()
+
+    plan_id = (await db.execute(
+        select(Subscription.plan_id).where(
+            Subscription.user_id == uuid.UUID(str(user_id)),
+            Subscription.status.in_([SubscriptionStatus.ACTIVE, SubscriptionStatus.TRIALING]),
+        ).limit(1)
+    )).scalar_one_or_none()
+
+    return {
+        "overrides": {
+            name: [granted, _timestamp(expires_at)] for name, granted, expires_at in override_rows
+        },
+        "plan_id": str(plan_id) if plan_id else None,
+    }
+
+
+async def check_permission(
+    db: AsyncSession,
+    user_id: str,
+    user_role: str,
+    permission_name: str,
+) -> bool:
+    """
+    Check if a user has a specific permission.
+
+    Resolution order:
+    1. User-level override (an expired override denies)
+    2. Role-level permission (an expired temporary grant denies)
+    3. Default: admin allowed, everyone else denied
+    """
+    principal = await load_principal(db, str(user_id))
+    override = principal["overrides"].get(permission_name)
+    if override is not None:
+        granted, expires_at = override
+        if expires_at is not None and expires_at < time.time():
+            return False
+        return bool(granted)
+
+    matrix = await get_access_matrix(db)
+    decision = matrix.role_decision(user_role, permission_name)
+    if decision is not None:
+        return decision
+
+    return user_role == "admin"
+
+
+async def check_feature(db: AsyncSession, user_id: str, feature_key: str) -> Optional[bool]:
+    """None if the user has no active plan, else whether the plan includes the feature."""
+    principal = await load_principal(db, str(user_id))
+    if principal["plan_id"] is None:
+        return None
+    matrix = await get_access_matrix(db)
+    return matrix.plan_has_feature(principal["plan_id"], feature_key)
+
+
+# ── Invalidation ─────────────────────────────────────────────────────
+
+def _principal_cache_prefix() -> str:
+    return f"{load_principal.cache_prefix}:"
+
+
+def _apply_locally(targets: Iterable[str]) -> None:
+    for target in targets:
+        if target == MATRIX:
+            reset_access_matrix()
+        elif target == ALL_PRINCIPALS:
+            local_cache.delete_prefix(_principal_cache_prefix())
+        elif target.startswith(_USER_PREFIX):
+            local_cache.delete(load_principal.cache_key(target[len(_USER_PREFIX):]))
+
+
+async def publish_access_change(targets: Iterable[str]) -> None:
+    """
+    Invalidate compiled access data everywhere.
+
+    Applies the change in this worker, clears the shared Redis entries and
+    broadcasts it so other workers drop their in-memory copies.
+    """
+    targets = sorted(set(targets))
+    _apply_locally(targets)
+
+    for target in targets:
+        if target == ALL_PRINCIPALS:
+            await invalidate_tags("authz:principals")
+        elif target.startswith(_USER_PREFIX):
+            await load_principal.invalidate(target[len(_USER_PREFIX):])
+
+    try:
+        from app.redis import get_redis
+
+        await get_redis().publish(
+            INVALIDATION_CHANNEL, json.dumps({"origin": _WORKER_ID, "targets": targets})
+        )
+    except Exception as e:
+        logger.warning(f"Could not broadcast access invalidation {targets}: {e}")
+
+
+# Session hooks: collect what a transaction changed, publish after commit
+
+_INFO_KEY = "authz_invalidations"
+
+
+def _collect(session: Session, target: str) -> None:
+    session.info.setdefault(_INFO_KEY, set()).add(target)
+    on_commit(session, _INFO_KEY, publish_access_change)
+
+
+@event.listens_for(Session, "after_flush")
+def _after_flush(session: Session, flush_context) -> None:
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, _MATRIX_MODELS):
+            _collect(session, MATRIX)
+        elif isinstance(obj, _PRINCIPAL_MODELS) and obj.user_id is not None:
+            _collect(session, f"{_USER_PREFIX}{obj.user_id}")
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _on_bulk_statement(orm_execute_state) -> None:
+    if not (orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    mapper = orm_execute_state.bind_mapper
+    if mapper is None:
+        return
+    if issubclass(mapper.class_, _MATRIX_MODELS):
+        _collect(orm_execute_state.session, MATRIX)
+    elif issubclass(mapper.class_, _PRINCIPAL_MODELS):
+        # Affected users are unknown for bulk statements
+        _collect(orm_execute_state.session, ALL_PRINCIPALS)
+
+
+# ── Cross-worker listener ────────────────────────────────────────────
+
+_listener_task: Optional[asyncio.Task] = None
+
+
+async def _listen() -> None:
+    from app.redis import get_redis
+
+    while True:
+        pubsub = None
+        try:
+            pubsub = get_redis().pubsub()
+            await pubsub.subscribe(INVALIDATION_CHANNEL)
+            # Messages may have been missed while disconnected
+            _apply_locally([MATRIX, ALL_PRINCIPALS])
+            async for message in pubsub.listen():
+                if message["type"] != "message":
+                    continue
+                try:
+                    data = json.loads(message["data"])
+                except (TypeError, ValueError):
+                    logger.error("Invalid access invalidation message")
+                    continue
+                if data.get("origin") != _WORKER_ID:
+                    _apply_locally(data.get("targets", []))
+        except asyncio.CancelledError:
+            break
+        except Exception as e:
+            logger.warning(f"Access invalidation listener error: {e}")
+            await asyncio.sleep(5)
+        finally:
+            if pubsub is not None:
+                try:
+                    await pubsub.close()
+                except Exception:
+                    pass
+
+
+def start_access_listener() -> None:
+    """Subscribe to cross-worker invalidations (called from the lifespan startup)."""
+    global _listener_task
+    if _listener_task is None or _listener_task.done():
+        _listener_task = asyncio.create_task(_listen(), name="authz-invalidation-listener")
+
+
+async def stop_access_listener() -> None:
+    global _listener_task
+    if _listener_task is None:
+        return
+    _listener_task.cancel()
+    try:
+        await _listener_task
+    except asyncio.CancelledError:
+        pass
+    _listener_task = None
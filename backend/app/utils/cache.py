@@ -1,76 +1,518 @@
 """
-Redis cache-aside helper for service layer caching.
+Two-tier cache for service layer results.
 
-Provides simple get/set/delete operations with automatic JSON
-serialization and configurable TTL. All operations fail silently
-(log warning + return None) so cache failures never break the app.
+Tier 1 is a small per-worker LRU (``cache_local_max_entries`` entries,
+each served for at most ``cache_local_ttl`` seconds) that answers hot
+keys without a network round trip. Tier 2 is Redis, shared by every
+worker. Values are serialised with orjson (stdlib json if it is missing).
+
+The @cached decorator adds on top:
+- Single-flight: concurrent misses for one key in a worker share one
+  computation; across workers a short Redis lock lets one worker
+  recompute while the others wait for its result.
+- Stale-while-revalidate: once ``ttl`` has passed a value is still served
+  for ``stale_ttl`` seconds while one background task refreshes it.
+- Tags: every key is added to a Redis set per tag, so invalidate_tags()
+  deletes exactly the affected keys instead of SCANning the keyspace.
+
+Hits (per tier) and misses are counted per key prefix in
+``cache_hits_total`` / ``cache_misses_total``.
+
+All operations fail silently (log warning) so cache failures never break
+the app: with Redis down, @cached falls back to the local tier and then
+to calling the function.
 
 Usage:
-    from app.utils.cache import cache_get, cache_set, cache_delete
+    from app.utils.cache import cached, invalidate_tags
+
+    class DashboardService:
+        @staticmethod
+        @cached("admin:dashboard:overview", ttl=60, stale_ttl=60, tags=["admin:dashboard"])
+        async def get_overview(db: AsyncSession) -> Dict[str, Any]:
+            ...
 
-    cached = await cache_get("admin:dashboard:overview")
-    if cached:
-        return cached
+    await invalidate_tags("admin:dashboard")
 
-    result = await expensive_db_query()
-    await cache_set("admin:dashboard:overview", result, ttl=60)
-    return result
+The low-level cache_get / cache_set / cache_delete helpers remain for
+hand-built keys.
 """
+import asyncio
+import contextlib
+import functools
+import hashlib
 import json
 import logging
-from typing import Any, Optional
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple, Union
+
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.config import settings
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 logger = logging.getLogger(__name__)
 
 # All cache keys are prefixed to avoid collisions with rate limiting, OTP, etc.
 _KEY_PREFIX = "cache:"
+_TAG_PREFIX = "cache:tag:"
+_LOCK_PREFIX = "cache:lock:"
 
+# Marks the envelope {"__c": fresh_until, "v": value} stored for every key
+_ENVELOPE = "__c"
 
-async def cache_get(key: str) -> Optional[Any]:
-    """Get a value from cache. Returns None on miss or error."""
+# How long a worker that lost the lock waits for the winner's result
+_LOCK_WAIT_SECONDS = 3.0
+_LOCK_POLL_SECONDS = 0.05
+
+# Delete the lock only while it still holds our token: a holder whose lock
+# expired must not release the next holder's
+_RELEASE_LOCK = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+# Hashed key suffixes keep long argument lists from producing huge keys
+_MAX_KEY_SUFFIX = 64
+
+TagSpec = Union[Iterable[str], Callable[..., Iterable[str]], None]
+
+
+# ── Serialisation ────────────────────────────────────────────────────
+
+def _dumps(value: Any) -> Union[bytes, str]:
+    if orjson is not None:
+        return orjson.dumps(value, default=str, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(value, default=str)
+
+
+def _loads(data: Union[bytes, str]) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _unwrap(payload: Union[bytes, str]) -> Tuple[Any, float]:
+    """Return (value, fresh_until). Entries written before envelopes count as fresh."""
+    data = _loads(payload)
+    if isinstance(data, dict) and _ENVELOPE in data:
+        return data.get("v"), float(data[_ENVELOPE])
+    return data, float("inf")
+
+
+# ── Tier 1: per-worker LRU ───────────────────────────────────────────
+
+class LocalCache:
+    """Bounded LRU of serialised payloads with per-entry expiry."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._data: "OrderedDict[str, Tuple[float, Union[bytes, str]]]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[Union[bytes, str]]:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        expires_at, payload = entry
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return payload
+
+    def set(self, key: str, payload: Union[bytes, str], ttl: float) -> None:
+        if ttl <= 0:
+            return
+        self._data[key] = (time.monotonic() + ttl, payload)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        self._data.pop(key, None)
+
+    def delete_prefix(self, prefix: str) -> None:
+        for key in [k for k in self._data if k.startswith(prefix)]:
+            del self._data[key]
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+local_cache = LocalCache(settings.cache_local_max_entries)
+
+
+# ── Metrics ──────────────────────────────────────────────────────────
+
+def _metric_prefix(key: str) -> str:
+    """First two key segments, e.g. 'admin:dashboard' for 'admin:dashboard:overview'."""
+    return ":".join(key.split(":")[:2])
+
+
+def _record_hit(prefix: str, tier: str) -> None:
+    try:
+        from app.metrics import cache_hits_total
+
+        cache_hits_total.labels(key_prefix=prefix, tier=tier).inc()
+    except Exception:
+        pass
+
+
+def _record_miss(prefix: str) -> None:
+    try:
+        from app.metrics import cache_misses_total
+
+        cache_misses_total.labels(key_prefix=prefix).inc()
+    except Exception:
+        pass
+
+
+# ── Tier 2: Redis ────────────────────────────────────────────────────
+
+async def _read(key: str, use_local: bool = True) -> Tuple[Optional[str], Any, float]:
+    """Return (tier, value, fresh_until); tier is None on a miss."""
+    if use_local:
+        payload = local_cache.get(key)
+        if payload is not None:
+            value, fresh_until = _unwrap(payload)
+            return "local", value, fresh_until
     try:
         from app.redis import get_redis
-        r = get_redis()
-        data = await r.get(f"{_KEY_PREFIX}{key}")
-        if data:
-            return json.loads(data)
+
+        payload = await get_redis().get(f"{_KEY_PREFIX}{key}")
     except Exception as e:
         logger.warning(f"Cache GET failed for {key}: {e}")
-    return None
+        return None, None, 0.0
+    if payload is None:
+        return None, None, 0.0
+    local_cache.set(key, payload, settings.cache_local_ttl)
+    value, fresh_until = _unwrap(payload)
+    return "redis", value, fresh_until
 
 
-async def cache_set(key: str, value: Any, ttl: Optional[int] = None) -> None:
-    """Set a value in cache with TTL (seconds). Uses redis_cache_ttl default."""
+async def _write(
+    key: str,
+    value: Any,
+    ttl: int,
+    stale_ttl: int = 0,
+    tags: Iterable[str] = (),
+) -> None:
+    lifetime = ttl + stale_ttl
+    payload = _dumps({_ENVELOPE: time.time() + ttl, "v": value})
+    local_cache.set(key, payload, min(settings.cache_local_ttl, lifetime))
     try:
         from app.redis import get_redis
-        r = get_redis()
-        ttl = ttl or settings.redis_cache_ttl
-        await r.setex(f"{_KEY_PREFIX}{key}", ttl, json.dumps(value, default=str))
+
+        pipe = get_redis().pipeline(transaction=False)
+        pipe.set(f"{_KEY_PREFIX}{key}", payload, ex=lifetime)
+        for tag in tags:
+            tag_key = f"{_TAG_PREFIX}{tag}"
+            pipe.sadd(tag_key, key)
+            # A tag set lives as long as its longest-lived member
+            pipe.expire(tag_key, lifetime, nx=True)
+            pipe.expire(tag_key, lifetime, gt=True)
+        await pipe.execute()
     except Exception as e:
         logger.warning(f"Cache SET failed for {key}: {e}")
 
 
+async def cache_get(key: str) -> Optional[Any]:
+    """Get a fresh value from cache. Returns None on miss or error."""
+    tier, value, fresh_until = await _read(key)
+    if tier is None or fresh_until < time.time():
+        _record_miss(_metric_prefix(key))
+        return None
+    _record_hit(_metric_prefix(key), tier)
+    return value
+
+
+async def cache_set(
+    key: str,
+    value: Any,
+    ttl: Optional[int] = None,
+    tags: Iterable[str] = (),
+) -> None:
+    """Set a value in cache with TTL (seconds). Uses redis_cache_ttl default."""
+    await _write(key, value, ttl or settings.redis_cache_ttl, tags=tags)
+
+
 async def cache_delete(key: str) -> None:
     """Delete a single cache key."""
+    local_cache.delete(key)
     try:
         from app.redis import get_redis
-        r = get_redis()
-        await r.delete(f"{_KEY_PREFIX}{key}")
+
+        await get_redis().delete(f"{_KEY_PREFIX}{key}")
     except Exception as e:
         logger.warning(f"Cache DELETE failed for {key}: {e}")
 
 
-async def cache_delete_pattern(pattern: str) -> None:
-    """Delete all cache keys matching a glob pattern (e.g. 'admin:dashboard:*')."""
+async def invalidate_tags(*tags: str) -> int:
+    """
+    Delete every key written with any of ``tags``.
+
+    Reads the tag sets rather than scanning the keyspace, so the cost is
+    proportional to the number of tagged keys. Other workers' local tiers
+    may serve the old value for up to ``cache_local_ttl`` seconds.
+
+    Returns:
+        Number of keys invalidated
+    """
+    if not tags:
+        return 0
+    tag_keys = [f"{_TAG_PREFIX}{tag}" for tag in tags]
     try:
         from app.redis import get_redis
+
         r = get_redis()
-        keys = []
-        async for key in r.scan_iter(f"{_KEY_PREFIX}{pattern}"):
-            keys.append(key)
+        pipe = r.pipeline(transaction=False)
+        for tag_key in tag_keys:
+            pipe.smembers(tag_key)
+        members = await pipe.execute()
+
+        keys = set()
+        for member_set in members:
+            keys.update(member_set or ())
+        for key in keys:
+            local_cache.delete(key)
+
+        pipe = r.pipeline(transaction=False)
         if keys:
-            await r.delete(*keys)
+            pipe.unlink(*[f"{_KEY_PREFIX}{key}" for key in keys])
+        pipe.unlink(*tag_keys)
+        await pipe.execute()
+        return len(keys)
     except Exception as e:
-        logger.warning(f"Cache DELETE pattern failed for {pattern}: {e}")
+        logger.warning(f"Cache invalidation failed for tags {tags}: {e}")
+        return 0
+
+
+# ── Single-flight ────────────────────────────────────────────────────
+
+_inflight: Dict[str, asyncio.Future] = {}
+_refreshing: Dict[str, asyncio.Task] = {}
+
+
+def _consume_exception(future: asyncio.Future) -> None:
+    # Avoid "exception was never retrieved" when no other caller was waiting
+    if not future.cancelled():
+        future.exception()
+
+
+async def _single_flight(key: str, compute: Callable[[], Any]) -> Any:
+    """Run ``compute`` once per key per worker; concurrent callers share the result."""
+    existing = _inflight.get(key)
+    if existing is not None:
+        try:
+            return await asyncio.shield(existing)
+        except asyncio.CancelledError:
+            if not existing.cancelled():
+                raise
+            # The leading caller was cancelled; compute on our own behalf
+            return await compute()
+
+    future = asyncio.get_running_loop().create_future()
+    future.add_done_callback(_consume_exception)
+    _inflight[key] = future
+    try:
+        result = await compute()
+    except asyncio.CancelledError:
+        future.cancel()
+        raise
+    except BaseException as e:
+        future.set_exception(e)
+        raise
+    else:
+        future.set_result(result)
+        return result
+    finally:
+        _inflight.pop(key, None)
+
+
+async def _acquire_lock(key: str) -> Optional[str]:
+    """Take the cross-worker recompute lock; returns its token, or None if held elsewhere."""
+    token = uuid.uuid4().hex
+    try:
+        from app.redis import get_redis
+
+        acquired = await get_redis().set(
+            f"{_LOCK_PREFIX}{key}", token, nx=True, px=settings.cache_lock_ttl_ms,
+        )
+    except Exception:
+        # No Redis: nothing to coordinate with, so this worker may compute
+        return token
+    return token if acquired else None
+
+
+async def _release_lock(key: str, token: str) -> None:
+    """Release the recompute lock if it is still held with ``token``."""
+    try:
+        from app.redis import get_redis
+
+        await get_redis().eval(_RELEASE_LOCK, 1, f"{_LOCK_PREFIX}{key}", token)
+    except Exception:
+        pass
+
+
+# ── Decorator ────────────────────────────────────────────────────────
+
+def _key_part(value: Any) -> str:
+    if isinstance(value, (set, frozenset)):
+        return ",".join(sorted(str(v) for v in value))
+    if isinstance(value, (list, tuple)):
+        return ",".join(str(v) for v in value)
+    return str(value)
+
+
+def _build_key(prefix: str, args: tuple, kwargs: dict) -> str:
+    """``prefix`` plus the call's arguments, skipping database sessions."""
+    parts = [_key_part(a) for a in args if not isinstance(a, AsyncSession)]
+    parts += [
+        f"{name}={_key_part(value)}"
+        for name, value in sorted(kwargs.items())
+        if not isinstance(value, AsyncSession)
+    ]
+    if not parts:
+        return prefix
+    suffix = ":".join(parts)
+    if len(suffix) > _MAX_KEY_SUFFIX:
+        suffix = hashlib.sha1(suffix.encode()).hexdigest()
+    return f"{prefix}:{suffix}"
+
+
+@contextlib.asynccontextmanager
+async def _detached_sessions(args: tuple, kwargs: dict):
+    """
+    Swap request-scoped AsyncSession arguments for a fresh session.
+
+    Background refreshes outlive the request whose session was passed in,
+    so they must not use it.
+    """
+    if not any(isinstance(v, AsyncSession) for v in (*args, *kwargs.values())):
+        yield args, kwargs
+        return
+
+    from app import database
+
+    if database.AsyncSessionLocal is None:
+        raise RuntimeError("database not initialized")
+    async with database.AsyncSessionLocal() as session:
+        yield (
+            tuple(session if isinstance(a, AsyncSession) else a for a in args),
+            {k: session if isinstance(v, AsyncSession) else v for k, v in kwargs.items()},
+        )
+
+
+def cached(
+    prefix: str,
+    ttl: Optional[int] = None,
+    stale_ttl: int = 0,
+    tags: TagSpec = None,
+    key_builder: Optional[Callable[..., str]] = None,
+):
+    """
+    Cache an async function's JSON-serialisable result in both tiers.
+
+    Args:
+        prefix: Key prefix (also the metrics label)
+        ttl: Seconds a value is fresh (defaults to redis_cache_ttl)
+        stale_ttl: Extra seconds a stale value is served while it is refreshed
+        tags: Tags for invalidate_tags(), or a callable taking the call's
+            arguments and returning them
+        key_builder: Callable taking the call's arguments and returning the
+            key suffix; by default every non-session argument is used
+
+    The wrapped function gains ``invalidate(*args, **kwargs)`` to drop the
+    entry for one set of arguments and ``cache_key(*args, **kwargs)`` to
+    compute its key.
+    """
+    def decorator(func):
+        def make_key(args: tuple, kwargs: dict) -> str:
+            if key_builder is not None:
+                return f"{prefix}:{key_builder(*args, **kwargs)}"
+            return _build_key(prefix, args, kwargs)
+
+        def resolve_tags(args: tuple, kwargs: dict) -> Iterable[str]:
+            if tags is None:
+                return ()
+            if callable(tags):
+                return list(tags(*args, **kwargs))
+            return tags
+
+        async def compute_and_store(key: str, args: tuple, kwargs: dict) -> Any:
+            fresh_ttl = ttl or settings.redis_cache_ttl
+            lock = await _acquire_lock(key)
+            if lock is None:
+                # Another worker is computing this key; wait for its result
+                deadline = time.monotonic() + _LOCK_WAIT_SECONDS
+                while time.monotonic() < deadline:
+                    await asyncio.sleep(_LOCK_POLL_SECONDS)
+                    tier, value, fresh_until = await _read(key, use_local=False)
+                    if tier is not None and fresh_until >= time.time():
+                        return value
+            try:
+                value = await func(*args, **kwargs)
+                await _write(key, value, fresh_ttl, stale_ttl, resolve_tags(args, kwargs))
+                return value
+            finally:
+                if lock is not None:
+                    await _release_lock(key, lock)
+
+        async def refresh(key: str, args: tuple, kwargs: dict) -> None:
+            lock = await _acquire_lock(key)
+            if lock is None:
+                return
+            try:
+                async with _detached_sessions(args, kwargs) as (bg_args, bg_kwargs):
+                    value = await func(*bg_args, **bg_kwargs)
+                await _write(
+                    key, value, ttl or settings.redis_cache_ttl, stale_ttl, resolve_tags(args, kwargs),
+                )
+            except Exception as e:
+                logger.warning(f"Background cache refresh failed for {key}: {e}")
+            finally:
+                await _release_lock(key, lock)
+
+        def schedule_refresh(key: str, args: tuple, kwargs: dict) -> None:
+            if key in _refreshing:
+                return
+            task = asyncio.create_task(refresh(key, args, kwargs), name=f"cache-refresh:{key}")
+            _refreshing[key] = task
+            task.add_done_callback(lambda _: _refreshing.pop(key, None))
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            key = make_key(args, kwargs)
+            tier, value, fresh_until = await _read(key)
+            if tier is not None:
+                now = time.time()
+                if fresh_until >= now:
+                    _record_hit(prefix, tier)
+                    return value
+                if stale_ttl and now <= fresh_until + stale_ttl:
+                    _record_hit(prefix, "stale")
+                    schedule_refresh(key, args, kwargs)
+                    return value
+
+            _record_miss(prefix)
+            return await _single_flight(key, lambda: compute_and_store(key, args, kwargs))
+
+        async def invalidate(*args, **kwargs) -> None:
+            await cache_delete(make_key(args, kwargs))
+
+        wrapper.invalidate = invalidate
+        wrapper.cache_key = lambda *args, **kwargs: make_key(args, kwargs)
+        wrapper.cache_prefix = prefix
+        return wrapper
+
+    return decorator
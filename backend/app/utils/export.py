@@ -0,0 +1,538 @@
+"""
+Streaming export engine for CSV and Excel downloads.
+
+Shared by every tabular export in the app (audit logs, users, staff report
+builder, partner impact reports). Instead of loading ORM entities into a
+StringIO/BytesIO and capping the result at an arbitrary row count:
+
+- Rows are pulled through a server-side cursor (``AsyncSession.stream`` with
+  ``yield_per``) from a column-projected ``select()``, so memory stays flat
+  and nothing is silently truncated.
+- CSV is produced as an async byte stream for ``StreamingResponse``.
+- Excel uses openpyxl's write-only workbook (rows are spooled to disk as they
+  are appended); the finished file is streamed back in chunks.
+- Very large exports can run as background jobs that write into the export
+  file store and return a download handle (``start_export_job``).
+
+Usage:
+    from app.utils.export import ExportColumn, stream_rows, csv_streaming_response
+
+    columns = [ExportColumn("Email", "email"), ExportColumn("Role", "role")]
+    stmt = select(User.email, User.role).where(User.is_deleted == False)
+    return csv_streaming_response(stream_rows(db, stmt), columns, "users.csv")
+"""
+
+import asyncio
+import csv
+import enum
+import io
+import logging
+import os
+import tempfile
+import uuid
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import (
+    Any, AsyncIterable, AsyncIterator, Callable, Dict, Iterable, List, Optional, Sequence, Union,
+)
+
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.sql import Select
+
+from app.config import settings
+
+# Optional Excel export dependency
+try:
+    import openpyxl
+except ImportError:
+    openpyxl = None
+
+logger = logging.getLogger(__name__)
+
+CSV_MEDIA_TYPE = "text/csv"
+XLSX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+PDF_MEDIA_TYPE = "application/pdf"
+
+EXPORT_MEDIA_TYPES = {
+    "csv": CSV_MEDIA_TYPE,
+    "xlsx": XLSX_MEDIA_TYPE,
+    "pdf": PDF_MEDIA_TYPE,
+}
+
+# Flush the CSV buffer to the client once it grows past this many bytes
+_CSV_CHUNK_BYTES = 64 * 1024
+# File read size when streaming a finished export back to the client
+_FILE_CHUNK_BYTES = 256 * 1024
+# Hard row limit of a single worksheet; exports roll over onto a new sheet
+_XLSX_MAX_ROWS = 1_048_576
+
+_JOB_KEY_PREFIX = "export:job:"
+_JOB_TTL_SECONDS = 86400
+
+
+@dataclass(frozen=True)
+class ExportColumn:
+    """
+    One output column: a header label, the row attribute/key it reads,
+    and an optional formatter applied to the raw value.
+    """
+
+    header: str
+    key: str
+    formatter: Optional[Callable[[Any], Any]] = None
+
+    def render(self, row: Any) -> Any:
+        if isinstance(row, dict):
+            value = row.get(self.key)
+        else:
+            value = getattr(row, self.key, None)
+        if self.formatter is not None:
+            return self.formatter(value)
+        return format_value(value)
+
+
+def format_value(value: Any) -> Any:
+    """Default cell formatting: ISO dates, plain strings for UUIDs/enums, '' for NULL."""
+    if value is None:
+        return ""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    if isinstance(value, enum.Enum):
+        return value.value
+    return value
+
+
+def yes_no(value: Any) -> str:
+    """Formatter for boolean flags rendered as Yes/No."""
+    return "Yes" if value else "No"
+
+
+RowSource = Union[AsyncIterable[Any], Iterable[Any]]
+
+
+# ------------------------------------------------------------------
+# Row sources
+# ------------------------------------------------------------------
+
+async def stream_rows(
+    db: AsyncSession,
+    stmt: Select,
+    *,
+    batch_size: Optional[int] = None,
+) -> AsyncIterator[Any]:
+    """
+    Iterate a select() through a server-side cursor.
+
+    Rows are fetched ``batch_size`` at a time, so callers should project
+    only the columns they export rather than whole entities.
+    """
+    batch_size = batch_size or settings.export_batch_size
+    result = await db.stream(stmt.execution_options(yield_per=batch_size))
+    try:
+        async for partition in result.partitions(batch_size):
+            for row in partition:
+                yield row
+    finally:
+        await result.close()
+
+
+async def _aiter(rows: RowSource) -> AsyncIterator[Any]:
+    """Adapt a sync or async iterable to an async iterator."""
+    if hasattr(rows, "__aiter__"):
+        async for row in rows:  # type: ignore[union-attr]
+            yield row
+    else:
+        for row in rows:  # type: ignore[union-attr]
+            yield row
+
+
+# ------------------------------------------------------------------
+# CSV
+# ------------------------------------------------------------------
+
+async def iter_csv(rows: RowSource, columns: Sequence[ExportColumn]) -> AsyncIterator[bytes]:
+    """Encode rows as CSV, yielding UTF-8 chunks of roughly 64 KB."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([c.header for c in columns])
+
+    async for row in _aiter(rows):
+        writer.writerow([c.render(row) for c in columns])
+        if buffer.tell() >= _CSV_CHUNK_BYTES:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+def csv_streaming_response(
+    rows: RowSource,
+    columns: Sequence[ExportColumn],
+    filename: str,
+) -> StreamingResponse:
+    """Wrap a row source in a chunked CSV download response."""
+    return StreamingResponse(
+        iter_csv(rows, columns),
+        media_type=CSV_MEDIA_TYPE,
+        headers={"Content-Disposition": f"attachment; filename={filename}"},
+    )
+
+
+async def write_csv(rows: RowSource, columns: Sequence[ExportColumn], path: str) -> int:
+    """Write rows to a CSV file on disk. Returns the number of data rows."""
+    count = 0
+
+    async def counted() -> AsyncIterator[Any]:
+        nonlocal count
+        async for row in _aiter(rows):
+            count += 1
+            yield row
+
+    with open(path, "wb") as fh:
+        async for chunk in iter_csv(counted(), columns):
+            fh.write(chunk)
+    return count
+
+
+# ------------------------------------------------------------------
+# Excel
+# ------------------------------------------------------------------
+
+async def write_xlsx(
+    rows: RowSource,
+    columns: Sequence[ExportColumn],
+    path: str,
+    *,
+    sheet_title: str = "Export",
+) -> int:
+    """
+    Write rows to an .xlsx file using openpyxl's write-only mode.
+
+    Write-only worksheets spool appended rows to a temp file, so memory
+    does not grow with the row count. Rows past the per-sheet limit roll
+    over onto "<title> (2)", "<title> (3)", ... Returns the data row count.
+    """
+    if openpyxl is None:
+        raise RuntimeError("openpyxl is not installed; Excel export unavailable")
+
+    headers = [c.header for c in columns]
+    title = (sheet_title or "Export")[:25]
+
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet(title=title)
+    ws.append(headers)
+    sheet_rows = 1
+    sheet_no = 1
+    count = 0
+
+    async for row in _aiter(rows):
+        if sheet_rows >= _XLSX_MAX_ROWS:
+            sheet_no += 1
+            ws = wb.create_sheet(title=f"{title} ({sheet_no})")
+            ws.append(headers)
+            sheet_rows = 1
+        ws.append([c.render(row) for c in columns])
+        sheet_rows += 1
+        count += 1
+
+    # Zipping the workbook is CPU/disk bound; keep it off the event loop
+    await asyncio.to_thread(wb.save, path)
+    return count
+
+
+async def _iter_file(path: str, *, delete: bool = False) -> AsyncIterator[bytes]:
+    """Stream a file in fixed-size chunks, optionally removing it afterwards."""
+    try:
+        with open(path, "rb") as fh:
+            while True:
+                chunk = await asyncio.to_thread(fh.read, _FILE_CHUNK_BYTES)
+                if not chunk:
+                    break
+                yield chunk
+    finally:
+        if delete:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+async def xlsx_streaming_response(
+    rows: RowSource,
+    columns: Sequence[ExportColumn],
+    filename: str,
+    *,
+    sheet_title: str = "Export",
+) -> StreamingResponse:
+    """Build an .xlsx in a temp file and stream it back as a download."""
+    fd, path = tempfile.mkstemp(suffix=".xlsx")
+    os.close(fd)
+    try:
+        await write_xlsx(rows, columns, path, sheet_title=sheet_title)
+    except Exception:
+        os.remove(path)
+        raise
+
+    return StreamingResponse(
+        _iter_file(path, delete=True),
+        media_type=XLSX_MEDIA_TYPE,
+        headers={"Content-Disposition": f"attachment; filename={filename}"},
+    )
+
+
+async def export_response(
+    rows: RowSource,
+    columns: Sequence[ExportColumn],
+    *,
+    filename: str,
+    export_format: str = "csv",
+    sheet_title: str = "Export",
+) -> StreamingResponse:
+    """Dispatch to the CSV or Excel streaming response by format name."""
+    if export_format in ("xlsx", "excel"):
+        return await xlsx_streaming_response(
+            rows, columns, f"{filename}.xlsx", sheet_title=sheet_title,
+        )
+    if export_format == "csv":
+        return csv_streaming_response(rows, columns, f"{filename}.csv")
+    raise ValueError(f"Unsupported export format: {export_format}")
+
+
+# ------------------------------------------------------------------
+# Background export jobs
+# ------------------------------------------------------------------
+
+# In-process fallback job registry when Redis is unavailable
+_local_jobs: Dict[str, Dict[str, Any]] = {}
+# Strong references so running jobs are not garbage-collected
+_running_jobs: Dict[str, asyncio.Task] = {}
+
+
+def _export_dir() -> str:
+    path = settings.export_dir or os.path.join(settings.upload_dir, "exports")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+async def _save_job(job: Dict[str, Any]) -> None:
+    """Persist job state to Redis so any worker can answer status polls."""
+    _local_jobs[job["id"]] = job
+    try:
+        from app.redis import get_redis
+        r = get_redis()
+        key = f"{_JOB_KEY_PREFIX}{job['id']}"
+        await r.hset(key, mapping={k: "" if v is None else str(v) for k, v in job.items()})
+        await r.expire(key, _JOB_TTL_SECONDS)
+    except Exception as e:
+        logger.warning(f"Export job state not persisted to Redis: {e}")
+
+
+async def get_export_job(job_id: str) -> Optional[Dict[str, Any]]:
+    """Return the job state dict, or None if unknown/expired."""
+    try:
+        from app.redis import get_redis
+        r = get_redis()
+        data = await r.hgetall(f"{_JOB_KEY_PREFIX}{job_id}")
+        if data:
+            job = {k: (v or None) for k, v in data.items()}
+            job["rows"] = int(job["rows"]) if job.get("rows") else 0
+            return job
+    except Exception as e:
+        logger.warning(f"Export job lookup fell back to local registry: {e}")
+    return _local_jobs.get(job_id)
+
+
+def export_job_path(job: Dict[str, Any]) -> Optional[str]:
+    """Absolute path of a completed job's file inside the export store."""
+    if job.get("status") != "completed" or not job.get("stored_name"):
+        return None
+    path = os.path.join(_export_dir(), os.path.basename(job["stored_name"]))
+    return path if os.path.exists(path) else None
+
+
+def iter_export_file(path: str) -> AsyncIterator[bytes]:
+    """Stream a finished job file from the export store."""
+    return _iter_file(path)
+
+
+def _new_job(
+    *,
+    filename: str,
+    export_format: str,
+    owner_id: Optional[str],
+) -> Dict[str, Any]:
+    export_format = "xlsx" if export_format in ("xlsx", "excel") else export_format
+    if export_format not in EXPORT_MEDIA_TYPES:
+        raise ValueError(f"Unsupported export format: {export_format}")
+
+    job_id = str(uuid.uuid4())
+    return {
+        "id": job_id,
+        "status": "queued",
+        "format": export_format,
+        "filename": f"{filename}.{export_format}",
+        "stored_name": f"{job_id}.{export_format}",
+        "owner_id": str(owner_id) if owner_id else None,
+        "rows": 0,
+        "error": None,
+        "created_at": datetime.utcnow().isoformat(),
+        "completed_at": None,
+        "download_url": f"{settings.api_v1_prefix}/exports/{job_id}/download",
+    }
+
+
+async def _write_job_file(
+    job: Dict[str, Any],
+    rows: RowSource,
+    columns: Sequence[ExportColumn],
+    sheet_title: str,
+) -> None:
+    """Write a job's rows into the export store and mark it completed."""
+    if job["format"] not in ("csv", "xlsx"):
+        raise ValueError(f"Unsupported tabular export format: {job['format']}")
+    path = os.path.join(_export_dir(), job["stored_name"])
+    try:
+        if job["format"] == "xlsx":
+            count = await write_xlsx(rows, columns, path, sheet_title=sheet_title)
+        else:
+            count = await write_csv(rows, columns, path)
+    except BaseException:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        raise
+    job.update(
+        status="completed",
+        rows=count,
+        completed_at=datetime.utcnow().isoformat(),
+    )
+
+
+async def _run_export_job(
+    job: Dict[str, Any],
+    stmt: Select,
+    columns: Sequence[ExportColumn],
+    session_factory: async_sessionmaker,
+    sheet_title: str,
+) -> None:
+    job["status"] = "running"
+    await _save_job(job)
+    try:
+        async with session_factory() as db:
+            await _write_job_file(job, stream_rows(db, stmt), columns, sheet_title)
+        logger.info(f"Export job {job['id']} completed: {job['rows']} rows")
+    except asyncio.CancelledError:
+        job.update(status="failed", error="Export cancelled during shutdown")
+        await _save_job(job)
+        raise
+    except Exception as e:
+        logger.error(f"Export job {job['id']} failed: {e}")
+        job.update(status="failed", error=str(e))
+    await _save_job(job)
+
+
+async def start_export_job(
+    stmt: Select,
+    columns: Sequence[ExportColumn],
+    *,
+    filename: str,
+    export_format: str = "csv",
+    owner_id: Optional[str] = None,
+    sheet_title: str = "Export",
+    session_factory: Optional[async_sessionmaker] = None,
+) -> Dict[str, Any]:
+    """
+    Run an export in the background and return a download handle.
+
+    The job opens its own session (read replica when configured) so it
+    outlives the request, writes into the export file store, and records
+    its progress in Redis. Poll ``GET /exports/{job_id}`` and fetch the file
+    from ``download_url`` once ``status == "completed"``.
+    """
+    job = _new_job(filename=filename, export_format=export_format, owner_id=owner_id)
+    if job["format"] not in ("csv", "xlsx"):
+        raise ValueError(f"Unsupported tabular export format: {job['format']}")
+
+    if session_factory is None:
+        from app import database
+        session_factory = database.AsyncReadSessionLocal or database.AsyncSessionLocal
+        if session_factory is None:
+            raise RuntimeError("Database not initialized. Call init_db() during startup.")
+
+    await _save_job(job)
+
+    job_id = job["id"]
+    task = asyncio.create_task(
+        _run_export_job(job, stmt, columns, session_factory, sheet_title)
+    )
+    _running_jobs[job_id] = task
+    task.add_done_callback(lambda _t: _running_jobs.pop(job_id, None))
+    return public_job_view(job)
+
+
+async def store_export(
+    rows: RowSource,
+    columns: Sequence[ExportColumn],
+    *,
+    filename: str,
+    export_format: str = "csv",
+    owner_id: Optional[str] = None,
+    sheet_title: str = "Export",
+) -> Dict[str, Any]:
+    """
+    Write an export into the file store inline and return its download handle.
+
+    For row sources that are already bounded (report summaries, computed
+    aggregates) where a background job would only add latency.
+    """
+    job = _new_job(filename=filename, export_format=export_format, owner_id=owner_id)
+    await _write_job_file(job, rows, columns, sheet_title)
+    await _save_job(job)
+    return public_job_view(job)
+
+
+async def store_export_bytes(
+    content: bytes,
+    *,
+    filename: str,
+    export_format: str,
+    owner_id: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Place an already-rendered file (e.g. a PDF) in the export store."""
+    job = _new_job(filename=filename, export_format=export_format, owner_id=owner_id)
+    path = os.path.join(_export_dir(), job["stored_name"])
+    await asyncio.to_thread(_write_bytes, path, content)
+    job.update(status="completed", completed_at=datetime.utcnow().isoformat())
+    await _save_job(job)
+    return public_job_view(job)
+
+
+def _write_bytes(path: str, content: bytes) -> None:
+    with open(path, "wb") as fh:
+        fh.write(content)
+
+
+def public_job_view(job: Dict[str, Any]) -> Dict[str, Any]:
+    """Job fields safe to return to API clients."""
+    return {
+        k: job.get(k)
+        for k in (
+            "id", "status", "format", "filename", "rows", "error",
+            "created_at", "completed_at", "download_url",
+        )
+    }
+
+
+async def cancel_export_jobs() -> None:
+    """Cancel in-flight export jobs (called on application shutdown)."""
+    tasks: List[asyncio.Task] = list(_running_jobs.values())
+    for task in tasks:
+        task.cancel()
+    if tasks:
+        await asyncio.gather(*tasks, return_exceptions=True)
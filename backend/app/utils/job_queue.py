@@ -0,0 +1,623 @@
+"""
+Durable background job queue on Redis Streams.
+
+Slow work (LLM calls, PDF rendering, embeddings) used to run inside the
+request that triggered it. Handlers registered here run in a separate
+worker process (``python worker.py``) instead:
+
+- A handler is declared with @job_handler and a pydantic payload model.
+  The decorator returns a JobType whose ``enqueue()`` validates the
+  payload, records the job under ``jobs:job:<id>`` and appends it to the
+  stream of its priority (``jobs:stream:high|default|low``).
+  ``defer()`` does the same after the session commits, so a worker never
+  sees a job for rows that are not there yet.
+- An ``idempotency_key`` maps to the first job enqueued with it for
+  ``job_result_ttl`` seconds; enqueueing again returns that job.
+- Workers read with XREADGROUP, higher priorities first. A running job
+  is heartbeated with XCLAIM; an entry whose worker died is reclaimed by
+  another worker (XAUTOCLAIM) after ``job_visibility_timeout`` seconds.
+- A failed attempt is retried after an exponential backoff (a sorted
+  set of due times, moved back onto the stream by the workers) until
+  ``max_attempts``. Raise JobFailed to fail without retrying.
+- Every status change is published on ``jobs:events``; web workers relay
+  it to the owner's WebSocket connections as a ``job.status`` event.
+  Clients can also poll ``GET /jobs/{job_id}``.
+
+Without Redis (development, tests) enqueue() runs the job as a task in
+the current process, with the same retries and status updates.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import random
+import socket
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Type, Union
+
+from pydantic import BaseModel, ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import database
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+PRIORITIES = ("high", "default", "low")
+GROUP = "job-workers"
+EVENTS_CHANNEL = "jobs:events"
+DELAYED_KEY = "jobs:delayed"
+
+_STREAM_PREFIX = "jobs:stream:"
+_JOB_KEY_PREFIX = "jobs:job:"
+_IDEMPOTENCY_PREFIX = "jobs:idem:"
+
+QUEUED = "queued"
+RUNNING = "running"
+RETRYING = "retrying"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+FINISHED = (SUCCEEDED, FAILED)
+
+# Move due retries back onto their streams; members are "<stream>|<job id>"
+_PROMOTE_DUE = """
+local due = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, 100)
+for _, member in ipairs(due) do
+    redis.call('ZREM', KEYS[1], member)
+    local sep = string.find(member, '|', 1, true)
+    redis.call('XADD', string.sub(member, 1, sep - 1), '*', 'job_id', string.sub(member, sep + 1))
+end
+return #due
+"""
+
+
+class JobFailed(Exception):
+    """Raised by a handler to fail its job without further retries."""
+
+
+def stream_key(priority: str) -> str:
+    return f"{_STREAM_PREFIX}{priority}"
+
+
+def _redis():
+    """The shared client, or None when Redis is not configured."""
+    try:
+        from app.redis import get_redis
+
+        return get_redis()
+    except RuntimeError:
+        return None
+
+
+# ── Job types ────────────────────────────────────────────────────────
+
+class JobType:
+    """A registered handler; enqueue work with ``enqueue()`` or ``defer()``."""
+
+    def __init__(
+        self,
+        name: str,
+        func: Callable[[BaseModel], Awaitable[Optional[Dict[str, Any]]]],
+        payload_model: Type[BaseModel],
+        priority: str,
+        max_attempts: int,
+        timeout: float,
+        backoff: float,
+    ):
+        self.name = name
+        self.func = func
+        self.payload_model = payload_model
+        self.priority = priority
+        self.max_attempts = max_attempts
+        self.timeout = timeout
+        self.backoff = backoff
+
+    def retry_delay(self, attempts: int) -> float:
+        """Exponential backoff with full jitter after ``attempts`` failures."""
+        ceiling = min(settings.job_retry_backoff_max, self.backoff * 2 ** (attempts - 1))
+        return random.uniform(ceiling / 2, ceiling)
+
+    async def enqueue(
+        self,
+        payload: Union[BaseModel, Dict[str, Any]],
+        *,
+        owner_id: Optional[Any] = None,
+        idempotency_key: Optional[str] = None,
+        priority: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """Queue a job and return its public view."""
+        return await enqueue(
+            self.name, payload, owner_id=owner_id,
+            idempotency_key=idempotency_key, priority=priority,
+        )
+
+    def defer(
+        self,
+        db: AsyncSession,
+        payload: Union[BaseModel, Dict[str, Any]],
+        **options: Any,
+    ) -> None:
+        """Queue a job once ``db`` commits; dropped if it rolls back."""
+        payload = self._validate(payload)
+        db.info.setdefault(_INFO_KEY, []).append((self.name, payload, options))
+        database.on_commit(db, _INFO_KEY, _enqueue_deferred)
+
+    def _validate(self, payload: Union[BaseModel, Dict[str, Any]]) -> BaseModel:
+        if isinstance(payload, self.payload_model):
+            return payload
+        if isinstance(payload, BaseModel):
+            payload = payload.model_dump()
+        return self.payload_model.model_validate(payload)
+
+
+_handlers: Dict[str, JobType] = {}
+
+
+def job_handler(
+    name: str,
+    payload: Type[BaseModel],
+    *,
+    priority: str = "default",
+    max_attempts: int = 3,
+    timeout: float = 300.0,
+    backoff: float = 10.0,
+):
+    """Register an async handler taking a ``payload`` model; returns its JobType."""
+    if priority not in PRIORITIES:
+        raise ValueError(f"Unknown job priority: {priority}")
+
+    def decorator(func) -> JobType:
+        if name in _handlers:
+            raise ValueError(f"Job handler {name} is already registered")
+        job_type = JobType(name, func, payload, priority, max_attempts, timeout, backoff)
+        _handlers[name] = job_type
+        return job_type
+    return decorator
+
+
+def get_job_type(name: str) -> JobType:
+    try:
+        return _handlers[name]
+    except KeyError:
+        raise ValueError(f"Unknown job type: {name}")
+
+
+# ── Job state ────────────────────────────────────────────────────────
+
+# Jobs run in-process without Redis, and their tasks
+_local_jobs: Dict[str, Dict[str, Any]] = {}
+_local_tasks: Set[asyncio.Task] = set()
+
+
+def _encode(job: Dict[str, Any]) -> Dict[str, str]:
+    return {k: "" if v is None else (json.dumps(v) if k in ("payload", "result") else str(v))
+            for k, v in job.items()}
+
+
+def _decode(data: Dict[str, str]) -> Dict[str, Any]:
+    job: Dict[str, Any] = {k: (v or None) for k, v in data.items()}
+    for key in ("payload", "result"):
+        if job.get(key):
+            job[key] = json.loads(job[key])
+    for key in ("attempts", "max_attempts"):
+        job[key] = int(job[key]) if job.get(key) else 0
+    return job
+
+
+async def _save_job(job: Dict[str, Any], redis=None) -> None:
+    """Persist job state so any process can answer status polls."""
+    if redis is None:
+        _local_jobs[job["id"]] = job
+        return
+    key = f"{_JOB_KEY_PREFIX}{job['id']}"
+    await redis.hset(key, mapping=_encode(job))
+    await redis.expire(key, settings.job_result_ttl)
+
+
+async def get_job(job_id: str) -> Optional[Dict[str, Any]]:
+    """Return the job state dict, or None if unknown/expired."""
+    redis = _redis()
+    if redis is not None:
+        try:
+            data = await redis.hgetall(f"{_JOB_KEY_PREFIX}{job_id}")
+            if data:
+                return _decode(data)
+        except Exception as e:
+            logger.warning(f"Job lookup fell back to local registry: {e}")
+    return _local_jobs.get(job_id)
+
+
+def public_job_view(job: Dict[str, Any]) -> Dict[str, Any]:
+    """Job fields safe to return to API clients."""
+    return {
+        k: job.get(k)
+        for k in (
+            "id", "type", "status", "attempts", "max_attempts", "result", "error",
+            "created_at", "started_at", "finished_at",
+        )
+    }
+
+
+async def _publish(job: Dict[str, Any], redis=None) -> None:
+    """Tell the job's owner about a status change."""
+    if not job.get("owner_id"):
+        return
+    view = public_job_view(job)
+    if redis is None:
+        await push_job_status(job["owner_id"], view)
+        return
+    try:
+        await redis.publish(EVENTS_CHANNEL, json.dumps({"user_id": job["owner_id"], "job": view}))
+    except Exception as e:
+        logger.warning(f"Could not publish status of job {job['id']}: {e}")
+
+
+async def push_job_status(user_id: str, view: Dict[str, Any]) -> None:
+    """Send a job.status event to a user's connections in this process."""
+    from app.websocket.connection_manager import ws_manager
+    from app.websocket.events import WSEventType
+    from app.websocket.instructor_connection_manager import instructor_ws_manager
+    from app.websocket.parent_connection_manager import parent_ws_manager
+
+    event_type = WSEventType.JOB_STATUS.value
+    try:
+        await ws_manager.send_personal(user_id, event_type, view)
+        await parent_ws_manager.send_to_parent(user_id, event_type, view)
+        await instructor_ws_manager.send_to_user(user_id, {"type": event_type, "data": view})
+    except Exception as e:
+        logger.warning(f"Could not push job status to {user_id}: {e}")
+
+
+# ── Enqueueing ───────────────────────────────────────────────────────
+
+def _new_job(job_type: JobType, payload: BaseModel, owner_id: Any, idempotency_key: Optional[str]) -> Dict[str, Any]:
+    return {
+        "id": str(uuid.uuid4()),
+        "type": job_type.name,
+        "status": QUEUED,
+        "payload": payload.model_dump(mode="json"),
+        "owner_id": str(owner_id) if owner_id else None,
+        "idempotency_key": idempotency_key,
+        "attempts": 0,
+        "max_attempts": job_type.max_attempts,
+        "result": None,
+        "error": None,
+        "created_at": datetime.utcnow().isoformat(),
+        "started_at": None,
+        "finished_at": None,
+    }
+
+
+async def enqueue(
+    job_type: str,
+    payload: Union[BaseModel, Dict[str, Any]],
+    *,
+    owner_id: Optional[Any] = None,
+    idempotency_key: Optional[str] = None,
+    priority: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Queue a ``job_type`` job and return its public view.
+
+    Raises ValueError for an unknown job type or priority and pydantic's
+    ValidationError for an invalid payload.
+    """
+    handler = get_job_type(job_type)
+    priority = priority or handler.priority
+    if priority not in PRIORITIES:
+        raise ValueError(f"Unknown job priority: {priority}")
+    job = _new_job(handler, handler._validate(payload), owner_id, idempotency_key)
+
+    redis = _redis()
+    if redis is None:
+        return await _enqueue_local(handler, job)
+
+    if idempotency_key:
+        idem_key = f"{_IDEMPOTENCY_PREFIX}{job_type}:{idempotency_key}"
+        if not await redis.set(idem_key, job["id"], ex=settings.job_result_ttl, nx=True):
+            existing = await get_job(await redis.get(idem_key) or "")
+            if existing:
+                return public_job_view(existing)
+            await redis.set(idem_key, job["id"], ex=settings.job_result_ttl)
+
+    await _save_job(job, redis)
+    await redis.xadd(stream_key(priority), {"job_id": job["id"]})
+    return public_job_view(job)
+
+
+async def _enqueue_local(handler: JobType, job: Dict[str, Any]) -> Dict[str, Any]:
+    if job["idempotency_key"]:
+        for existing in _local_jobs.values():
+            if (existing["type"], existing["idempotency_key"]) == (job["type"], job["idempotency_key"]):
+                return public_job_view(existing)
+    await _save_job(job)
+    task = asyncio.create_task(_run_local(handler, job))
+    _local_tasks.add(task)
+    task.add_done_callback(_local_tasks.discard)
+    return public_job_view(job)
+
+
+async def _run_local(handler: JobType, job: Dict[str, Any]) -> None:
+    while True:
+        delay = await _attempt(handler, job)
+        if delay is None:
+            return
+        # On 3.11 wait_for() drops a cancel that lands as the handler fails,
+        # so the attempt reports a retry instead of raising CancelledError
+        if asyncio.current_task().cancelling():
+            raise asyncio.CancelledError
+        await asyncio.sleep(delay)
+
+
+async def cancel_local_jobs() -> None:
+    """Cancel jobs running in-process (called on application shutdown)."""
+    tasks = list(_local_tasks)
+    for task in tasks:
+        task.cancel()
+    if tasks:
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+# ── Running ──────────────────────────────────────────────────────────
+
+def _record(job_type: str, result: str, seconds: float) -> None:
+    try:
+        from app.metrics import queue_job_duration, queue_jobs_total
+
+        queue_jobs_total.labels(job_type=job_type, result=result).inc()
+        queue_job_duration.labels(job_type=job_type).observe(seconds)
+    except Exception:
+        pass
+
+
+async def _attempt(handler: JobType, job: Dict[str, Any], redis=None) -> Optional[float]:
+    """
+    Run one attempt of ``job`` and record the outcome.
+
+    Returns the delay before the next attempt, or None once the job has
+    succeeded or failed for good.
+    """
+    job.update(status=RUNNING, attempts=job["attempts"] + 1, error=None,
+               started_at=datetime.utcnow().isoformat())
+    await _save_job(job, redis)
+    await _publish(job, redis)
+
+    start = time.perf_counter()
+    retry = True
+    try:
+        payload = handler.payload_model.model_validate(job["payload"])
+        with database.use_workload(database.BACKGROUND, f"job:{handler.name}"):
+            result = await asyncio.wait_for(handler.func(payload), timeout=handler.timeout)
+        job.update(status=SUCCEEDED, result=result)
+    except asyncio.CancelledError:
+        # Interrupted, not failed: the attempt doesn't count
+        job.update(status=QUEUED, attempts=job["attempts"] - 1)
+        await _save_job(job, redis)
+        raise
+    except (JobFailed, ValidationError) as e:
+        retry = False
+        job.update(status=FAILED, error=str(e))
+    except asyncio.TimeoutError:
+        job.update(status=FAILED, error=f"Timed out after {handler.timeout}s")
+    except Exception as e:
+        job.update(status=FAILED, error=str(e) or type(e).__name__)
+
+    delay = None
+    if job["status"] == FAILED and retry and job["attempts"] < handler.max_attempts:
+        delay = handler.retry_delay(job["attempts"])
+        job["status"] = RETRYING
+        logger.warning(f"Job {job['type']} {job['id']} attempt {job['attempts']} failed, "
+                       f"retrying in {delay:.0f}s: {job['error']}")
+    elif job["status"] == FAILED:
+        logger.error(f"Job {job['type']} {job['id']} failed: {job['error']}")
+    if job["status"] in FINISHED:
+        job["finished_at"] = datetime.utcnow().isoformat()
+
+    _record(job["type"], job["status"], time.perf_counter() - start)
+    await _save_job(job, redis)
+    await _publish(job, redis)
+    return delay
+
+
+class JobWorker:
+    """
+    Consumes the job streams; run by worker.py, one per process.
+
+    Up to ``concurrency`` jobs run at a time. stop() stops reading and
+    waits for the running jobs; jobs still running after ``grace``
+    seconds are cancelled and put back on their stream.
+    """
+
+    def __init__(self, concurrency: Optional[int] = None, consumer: Optional[str] = None):
+        self.concurrency = concurrency or settings.job_worker_concurrency
+        self.consumer = consumer or f"{socket.gethostname()}-{os.getpid()}"
+        self._running: Dict[str, asyncio.Task] = {}
+        self._stopping = asyncio.Event()
+
+    def stop(self) -> None:
+        self._stopping.set()
+
+    async def run(self, grace: float = 30.0) -> None:
+        from app.redis import get_redis
+
+        redis = get_redis()
+        for priority in PRIORITIES:
+            try:
+                await redis.xgroup_create(stream_key(priority), GROUP, id="0", mkstream=True)
+            except Exception as e:
+                if "BUSYGROUP" not in str(e):
+                    raise
+        logger.info(f"Job worker {self.consumer} started (concurrency {self.concurrency})")
+
+        while not self._stopping.is_set():
+            try:
+                await self.poll(redis)
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"Job worker poll error: {e}")
+                await asyncio.sleep(1)
+
+        if self._running:
+            logger.info(f"Job worker draining {len(self._running)} running jobs")
+            done, pending = await asyncio.wait(list(self._running.values()), timeout=grace)
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+        logger.info(f"Job worker {self.consumer} stopped")
+
+    async def poll(self, redis, block_ms: int = 1000) -> int:
+        """Promote due retries, reclaim stalled jobs and start new ones."""
+        await redis.eval(_PROMOTE_DUE, 1, DELAYED_KEY, time.time())
+
+        free = self.concurrency - len(self._running)
+        if free <= 0:
+            await asyncio.wait(list(self._running.values()), timeout=block_ms / 1000,
+                               return_when=asyncio.FIRST_COMPLETED)
+            return 0
+
+        entries = await self._reclaim(redis, free)
+        if not entries:
+            entries = await self._read(redis, free, block_ms)
+        for stream, entry_id, fields in entries:
+            task = asyncio.create_task(self._process(redis, stream, entry_id, fields))
+            self._running[entry_id] = task
+            task.add_done_callback(lambda _, key=entry_id: self._running.pop(key, None))
+        return len(entries)
+
+    async def _reclaim(self, redis, count: int) -> List[tuple]:
+        visibility_ms = settings.job_visibility_timeout * 1000
+        entries = []
+        for priority in PRIORITIES:
+            stream = stream_key(priority)
+            reply = await redis.xautoclaim(stream, GROUP, self.consumer, visibility_ms,
+                                           start_id="0-0", count=count - len(entries))
+            for entry_id, fields in reply[1]:
+                if fields:  # None for entries deleted since
+                    logger.warning(f"Reclaimed stalled job entry {entry_id} from {stream}")
+                    entries.append((stream, entry_id, fields))
+            if len(entries) >= count:
+                break
+        return entries
+
+    async def _read(self, redis, count: int, block_ms: int) -> List[tuple]:
+        # Non-blocking pass in priority order, then block on all streams
+        for priority in PRIORITIES:
+            reply = await redis.xreadgroup(GROUP, self.consumer, {stream_key(priority): ">"}, count=count)
+            if reply:
+                break
+        else:
+            reply = await redis.xreadgroup(
+                GROUP, self.consumer, {stream_key(p): ">" for p in PRIORITIES},
+                count=count, block=block_ms,
+            )
+        return [(stream, entry_id, fields) for stream, batch in reply or [] for entry_id, fields in batch]
+
+    async def _heartbeat(self, redis, stream: str, entry_id: str) -> None:
+        # Reset the entry's idle time so no other worker reclaims it
+        while True:
+            await asyncio.sleep(settings.job_visibility_timeout / 3)
+            await redis.xclaim(stream, GROUP, self.consumer, 0, [entry_id], justid=True)
+
+    async def _process(self, redis, stream: str, entry_id: str, fields: Dict[str, str]) -> None:
+        job = await get_job(fields.get("job_id", ""))
+        handler = _handlers.get(job["type"]) if job else None
+        if job is None or job["status"] in FINISHED or handler is None:
+            if job is not None and handler is None and job["status"] not in FINISHED:
+                job.update(status=FAILED, error=f"No handler for job type {job['type']}",
+                           finished_at=datetime.utcnow().isoformat())
+                await _save_job(job, redis)
+                await _publish(job, redis)
+            await self._ack(redis, stream, entry_id)
+            return
+
+        heartbeat = asyncio.create_task(self._heartbeat(redis, stream, entry_id))
+        try:
+            delay = await _attempt(handler, job, redis)
+        except asyncio.CancelledError:
+            # Shutting down: put the job back for another worker
+            await redis.xadd(stream, {"job_id": job["id"]})
+            await self._ack(redis, stream, entry_id)
+            raise
+        finally:
+            heartbeat.cancel()
+
+        if delay is not None:
+            await redis.zadd(DELAYED_KEY, {f"{stream}|{job['id']}": time.time() + delay})
+        await self._ack(redis, stream, entry_id)
+
+    async def _ack(self, redis, stream: str, entry_id: str) -> None:
+        await redis.xack(stream, GROUP, entry_id)
+        await redis.xdel(stream, entry_id)
+
+
+# ── Deferred enqueue: queue after commit ─────────────────────────────
+
+_INFO_KEY = "deferred_jobs"
+
+
+async def _enqueue_deferred(jobs: List[tuple]) -> None:
+    for name, payload, options in jobs:
+        try:
+            await enqueue(name, payload, **options)
+        except Exception as e:
+            logger.error(f"Could not enqueue deferred {name} job: {e}")
+
+
+# ── Status relay to WebSocket clients ────────────────────────────────
+
+_listener_task: Optional[asyncio.Task] = None
+
+
+async def _listen() -> None:
+    from app.redis import get_redis
+
+    while True:
+        pubsub = None
+        try:
+            pubsub = get_redis().pubsub()
+            await pubsub.subscribe(EVENTS_CHANNEL)
+            async for message in pubsub.listen():
+                if message["type"] != "message":
+                    continue
+                try:
+                    data = json.loads(message["data"])
+                except (TypeError, ValueError):
+                    logger.error("Invalid job status message")
+                    continue
+                await push_job_status(data["user_id"], data["job"])
+        except asyncio.CancelledError:
+            break
+        except Exception as e:
+            logger.warning(f"Job status listener error: {e}")
+            await asyncio.sleep(5)
+        finally:
+            if pubsub is not None:
+                try:
+                    await pubsub.close()
+                except Exception:
+                    pass
+
+
+def start_job_status_listener() -> None:
+    """Relay job status events to local WebSocket clients (lifespan startup)."""
+    global _listener_task
+    if _redis() is None:
+        return
+    if _listener_task is None or _listener_task.done():
+        _listener_task = asyncio.create_task(_listen(), name="job-status-listener")
+
+
+async def stop_job_status_listener() -> None:
+    global _listener_task
+    if _listener_task is None:
+        return
+    _listener_task.cancel()
+    try:
+        await _listener_task
+    except asyncio.CancelledError:
+        pass
+    _listener_task = None
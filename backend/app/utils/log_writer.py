@@ -0,0 +1,300 @@
+"""
+Batched writer for audit and error log rows.
+
+Request handling only enqueues a row; a background flusher writes rows
+with multi-row INSERTs every ``log_writer_flush_ms`` or once
+``log_writer_batch_size`` rows are waiting, whichever comes first. No
+request waits on a transaction or holds a pool connection for its own
+log row.
+
+Backpressure and failure handling:
+- The in-memory queue is bounded (``log_writer_queue_size``). When it is
+  full, rows overflow to a Redis list instead of blocking the request.
+- When a batch cannot be written because the database is unreachable,
+  the batch is pushed to the same Redis list and replayed after the next
+  successful flush (and on the next startup).
+- A batch rejected for its content (bad UUID, constraint) is retried row
+  by row so one bad row does not sink the rest.
+- Rows are only dropped, with an error log, when both the database and
+  Redis are unavailable.
+
+Started and drained by app/lifespan.py. When the writer is not running
+(scripts, workers, tests) ``submit`` writes the row inline. Rows are
+written through the pool of the writer's ``workload`` class (background
+by default), never the request pool.
+
+Usage:
+    from app.utils.log_writer import audit_log_writer
+
+    await audit_log_writer.submit({"actor_id": ..., "action": ...})
+"""
+
+import asyncio
+import json
+import logging
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import DateTime, Uuid, insert
+from sqlalchemy.exc import DBAPIError, InterfaceError, OperationalError
+
+from app import database
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+# Errors that mean "database unreachable" (spill and retry later) rather
+# than "this batch is bad" (retry row by row).
+_CONNECTION_ERRORS = (OperationalError, InterfaceError, OSError, asyncio.TimeoutError)
+
+# Seconds shutdown waits for the queue to drain before giving up
+_DRAIN_TIMEOUT = 10.0
+
+
+def _is_connection_error(exc: BaseException) -> bool:
+    if isinstance(exc, DBAPIError) and exc.connection_invalidated:
+        return True
+    return isinstance(exc, _CONNECTION_ERRORS)
+
+
+class DatabaseUnavailable(RuntimeError):
+    """Raised when no session factory exists (init_db() has not run)."""
+
+
+class BatchedLogWriter:
+    """Queue + background flusher for one append-only log table."""
+
+    def __init__(
+        self,
+        model: Any,
+        name: str,
+        queue_size: Optional[int] = None,
+        batch_size: Optional[int] = None,
+        flush_ms: Optional[int] = None,
+        workload: str = database.BACKGROUND,
+    ):
+        self.model = model
+        self.table = model.__table__
+        self.name = name
+        self.workload = workload
+        # Unset limits fall back to the log_writer_* settings when used
+        self._queue_size = queue_size
+        self._batch_size = batch_size
+        self._flush_ms = flush_ms
+        self.spill_key = f"logbuf:{name}"
+        self.dropped = 0
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._accepting = False
+        self._spill_pending = False
+
+        # Rows cross Redis as JSON, so UUID/datetime columns are restored on insert
+        self._uuid_columns = {c.name for c in self.table.columns if isinstance(c.type, Uuid)}
+        self._datetime_columns = {
+            c.name for c in self.table.columns if isinstance(c.type, DateTime)
+        }
+
+    @property
+    def queue_size(self) -> int:
+        return self._queue_size or settings.log_writer_queue_size
+
+    @property
+    def batch_size(self) -> int:
+        return self._batch_size or settings.log_writer_batch_size
+
+    @property
+    def flush_ms(self) -> int:
+        return self._flush_ms or settings.log_writer_flush_ms
+
+    @property
+    def running(self) -> bool:
+        return self._accepting and self._task is not None and not self._task.done()
+
+    def new_row(self, **values: Any) -> Dict[str, Any]:
+        """Build a JSON-safe row with its primary key and timestamp assigned up front."""
+        row = {"id": str(uuid.uuid4()), "created_at": datetime.utcnow().isoformat()}
+        row.update(values)
+        return row
+
+    # ── Lifecycle ────────────────────────────────────────────────────
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._accepting = True
+        # Replay anything a previous process spilled
+        self._spill_pending = True
+        self._task = asyncio.create_task(self._run(), name=f"log-writer:{self.name}")
+
+    async def stop(self) -> None:
+        """Stop accepting rows and flush everything already queued."""
+        if self._task is None:
+            return
+        self._accepting = False
+        task, self._task = self._task, None
+        try:
+            await asyncio.wait_for(self._queue.put(_STOP), timeout=_DRAIN_TIMEOUT)
+            await asyncio.wait_for(task, timeout=_DRAIN_TIMEOUT)
+        except asyncio.TimeoutError:
+            task.cancel()
+            remaining = self._queue.qsize()
+            logger.error(f"{self.name} log writer did not drain in time; {remaining} rows left")
+        except Exception as e:
+            logger.error(f"{self.name} log writer stopped with error: {e}")
+
+    # ── Producer side ────────────────────────────────────────────────
+
+    async def submit(self, row: Dict[str, Any]) -> None:
+        """Queue a row for writing. Never raises and never waits on the database."""
+        try:
+            if not self.running:
+                await self._write_inline(row)
+                return
+            try:
+                self._queue.put_nowait(row)
+            except asyncio.QueueFull:
+                await self._spill([row])
+        except Exception as e:
+            logger.error(f"Failed to submit {self.name} log row: {e}")
+
+    async def _write_inline(self, row: Dict[str, Any]) -> None:
+        if database.AsyncSessionLocal is None:
+            logger.debug(f"Skipping {self.name} log row: database not initialized")
+            return
+        with database.use_workload(self.workload, f"log:{self.name}"):
+            async with database.AsyncSessionLocal() as session:
+                session.add(self.model(**self._coerce(row)))
+                await session.commit()
+
+    # ── Flusher ──────────────────────────────────────────────────────
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        queue = self._queue
+        interval = self.flush_ms / 1000
+        batch_size = self.batch_size
+        stopping = False
+
+        while not stopping:
+            item = await queue.get()
+            if item is _STOP:
+                break
+
+            batch = [item]
+            deadline = loop.time() + interval
+            while len(batch) < batch_size:
+                try:
+                    item = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        item = await asyncio.wait_for(queue.get(), timeout)
+                    except asyncio.TimeoutError:
+                        break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            if await self._flush(batch):
+                while self._spill_pending and await self._replay_spill(batch_size):
+                    pass
+
+    async def _flush(self, rows: List[Dict[str, Any]]) -> bool:
+        """Write rows; returns False if the database was unreachable."""
+        try:
+            await self._insert(rows)
+            return True
+        except Exception as e:
+            if isinstance(e, DatabaseUnavailable) or _is_connection_error(e):
+                logger.warning(f"{self.name} log flush failed, spilling {len(rows)} rows: {e}")
+                await self._spill(rows)
+                return False
+            if len(rows) > 1:
+                for row in rows:
+                    await self._flush([row])
+                return True
+            logger.error(f"Discarding invalid {self.name} log row: {e}")
+            return True
+
+    async def _insert(self, rows: List[Dict[str, Any]]) -> None:
+        if database.AsyncSessionLocal is None:
+            raise DatabaseUnavailable("database not initialized")
+        with database.use_workload(self.workload, f"log:{self.name}"):
+            async with database.AsyncSessionLocal() as session:
+                await session.execute(insert(self.table).values([self._coerce(r) for r in rows]))
+                await session.commit()
+
+    def _coerce(self, row: Dict[str, Any]) -> Dict[str, Any]:
+        values = dict(row)
+        for key, value in row.items():
+            if not isinstance(value, str):
+                continue
+            if key in self._uuid_columns:
+                values[key] = uuid.UUID(value)
+            elif key in self._datetime_columns:
+                values[key] = datetime.fromisoformat(value)
+        return values
+
+    # ── Redis spill ──────────────────────────────────────────────────
+
+    async def _spill(self, rows: List[Dict[str, Any]]) -> None:
+        try:
+            from app.redis import get_redis
+
+            r = get_redis()
+            cap = self.queue_size * 10
+            pipe = r.pipeline(transaction=False)
+            pipe.rpush(self.spill_key, *[json.dumps(row, default=str) for row in rows])
+            pipe.ltrim(self.spill_key, -cap, -1)
+            await pipe.execute()
+            self._spill_pending = True
+        except Exception as e:
+            self.dropped += len(rows)
+            logger.error(f"Dropped {len(rows)} {self.name} log rows (database and Redis unavailable): {e}")
+
+    async def _replay_spill(self, batch_size: int) -> bool:
+        """Write one batch of spilled rows; False when nothing (more) can be replayed."""
+        try:
+            from app.redis import get_redis
+
+            raw = await get_redis().lpop(self.spill_key, batch_size)
+        except Exception as e:
+            logger.warning(f"Could not read spilled {self.name} log rows: {e}")
+            self._spill_pending = False
+            return False
+        if not raw:
+            self._spill_pending = False
+            return False
+        return await self._flush([json.loads(item) for item in raw])
+
+
+def _make_writers():
+    from app.models.admin.audit_log import AuditLog
+    from app.models.admin.error_log import ErrorLog
+
+    return BatchedLogWriter(AuditLog, "audit"), BatchedLogWriter(ErrorLog, "error")
+
+
+audit_log_writer, error_log_writer = _make_writers()
+
+
+def start_log_writers() -> None:
+    """Start the background flushers (called from the lifespan startup)."""
+    audit_log_writer.start()
+    error_log_writer.start()
+    logger.info("Audit/error log writers started")
+
+
+async def stop_log_writers() -> None:
+    """Drain queued rows to the database (called from the lifespan shutdown)."""
+    await audit_log_writer.stop()
+    await error_log_writer.stop()
+    logger.info("Audit/error log writers drained")
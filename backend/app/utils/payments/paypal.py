@@ -1,14 +1,15 @@
 """
 PayPal Payouts Client
 
-PayPal Payouts API for international instructor payments.
+PayPal Payouts API for international instructor payments, and webhook
+signature verification for incoming PayPal events.
 Supports both sandbox and production environments.
 """
 
 import base64
 import logging
 from datetime import datetime
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Mapping
 
 import httpx
 
@@ -161,6 +162,50 @@ class PayPalClient:
             logger.error(f"PayPal get payout item error: {str(e)}")
             raise
 
+    async def verify_webhook_signature(
+        self,
+        headers: Mapping[str, str],
+        event: Dict[str, Any],
+        webhook_id: Optional[str] = None,
+    ) -> bool:
+        """
+        Check a webhook's transmission signature with PayPal.
+
+        Args:
+            headers: Request headers (the ``paypal-*`` transmission headers)
+            event: Parsed webhook body
+            webhook_id: Webhook the event was sent to (settings.paypal_webhook_id)
+
+        Returns:
+            True if PayPal reports the signature as valid
+
+        Raises:
+            httpx.HTTPError: If PayPal could not be reached
+        """
+        token = await self._get_access_token()
+        body = {
+            "auth_algo": headers.get("paypal-auth-algo"),
+            "cert_url": headers.get("paypal-cert-url"),
+            "transmission_id": headers.get("paypal-transmission-id"),
+            "transmission_sig": headers.get("paypal-transmission-sig"),
+            "transmission_time": headers.get("paypal-transmission-time"),
+            "webhook_id": webhook_id or settings.paypal_webhook_id,
+            "webhook_event": event,
+        }
+
+        async with httpx.AsyncClient() as client:
+            response = await client.post(
+                f"{self.base_url}/v1/notifications/verify-webhook-signature",
+                json=body,
+                headers={
+                    "Authorization": f"Bearer {token}",
+                    "Content-Type": "application/json",
+                },
+                timeout=30,
+            )
+            response.raise_for_status()
+            return response.json().get("verification_status") == "SUCCESS"
+
     @staticmethod
     def parse_webhook(webhook_data: Dict[str, Any]) -> Dict[str, Any]:
         """Parse PayPal webhook payload."""
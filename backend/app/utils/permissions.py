@@ -15,11 +15,27 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.database import get_db
 from app.models.admin.permission import Permission, RolePermission, UserPermissionOverride
+from app.utils.access_matrix import check_permission
 from app.utils.security import get_current_active_user
 
 logger = logging.getLogger(__name__)
 
 
+async def _is_super_admin(db: AsyncSession, current_user: dict) -> bool:
+    """Read is_super_admin from the principal; only query if it was not loaded."""
+    if "is_super_admin" in current_user:
+        return bool(current_user["is_super_admin"])
+
+    from uuid import UUID as PyUUID
+    from app.models.user import User
+
+    user_id = current_user.get("id") or current_user.get("user_id")
+    result = await db.execute(
+        select(User.is_super_admin).where(User.id == PyUUID(str(user_id)))
+    )
+    return bool(result.scalar_one_or_none())
+
+
 async def require_super_admin(
     current_user=Depends(get_current_active_user),
     db: AsyncSession = Depends(get_db),
@@ -28,9 +44,6 @@ async def require_super_admin(
     FastAPI dependency that requires the current user to be a super admin.
     Super admin = role 'admin' AND is_super_admin == True.
     """
-    from uuid import UUID as PyUUID
-    from app.models.user import User
-
     role = current_user.get("role", "")
     if role != "admin":
         raise HTTPException(
@@ -38,12 +51,7 @@ async def require_super_admin(
             detail="Super admin access required.",
         )
 
-    user_id = current_user.get("id")
-    result = await db.execute(
-        select(User.is_super_admin).where(User.id == PyUUID(user_id))
-    )
-    is_super = result.scalar_one_or_none()
-    if not is_super:
+    if not await _is_super_admin(db, current_user):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Super admin privileges required.",
@@ -66,60 +74,11 @@ async def _check_permission(
     1. Check user-level overrides (explicit grant/deny per user)
     2. Check role-level permissions
     3. Default: deny
-    """
-    from datetime import datetime
-
-    now = datetime.utcnow()
-
-    # 1. Check user-specific overrides first
-    override_query = (
-        select(UserPermissionOverride)
-        .join(Permission, Permission.id == UserPermissionOverride.permission_id)
-        .where(
-            and_(
-                UserPermissionOverride.user_id == user_id,
-                Permission.name == permission_name,
-                Permission.is_active == True,
-            )
-        )
-    )
 
-    result = await db.execute(override_query)
-    override = result.scalar_one_or_none()
-
-    if override:
-        # Check expiration
-        if override.expires_at and override.expires_at < now:
-            return False  # Expired override, treat as no override
-        return override.granted
-
-    # 2. Check role-level permissions
-    role_query = (
-        select(RolePermission)
-        .join(Permission, Permission.id == RolePermission.permission_id)
-        .where(
-            and_(
-                RolePermission.role == user_role,
-                Permission.name == permission_name,
-                Permission.is_active == True,
-            )
-        )
-    )
-
-    result = await db.execute(role_query)
-    role_perm = result.scalar_one_or_none()
-
-    if role_perm:
-        # Check expiration for temporary role permissions
-        if role_perm.expires_at and role_perm.expires_at < now:
-            return False
-        return True
-
-    # 3. Default: admin role always has access, others denied
-    if user_role == "admin":
-        return True
-
-    return False
+    Answered from the compiled access matrix and the cached principal
+    (see app/utils/access_matrix.py), so a warm check makes no queries.
+    """
+    return await check_permission(db, user_id, user_role, permission_name)
 
 
 async def get_user_permissions(
@@ -212,12 +171,7 @@ def require_permission(permission_name: str):
         if user_role == "admin":
             if permission_name.startswith("finance."):
                 # Super admins always have financial access
-                from uuid import UUID as PyUUID
-                from app.models.user import User
-                sa_result = await db.execute(
-                    select(User.is_super_admin).where(User.id == PyUUID(user_id))
-                )
-                if sa_result.scalar_one_or_none():
+                if await _is_super_admin(db, current_user):
                     return current_user
                 # Regular admins need explicit permission for finance
             else:
@@ -0,0 +1,279 @@
+"""
+Rate limiter engine (GCRA token bucket with local leases).
+
+Each bucket is a single Redis key holding the GCRA "theoretical arrival
+time" (TAT) in milliseconds, updated by one Lua script loaded once and
+invoked with EVALSHA. Memory per client is one key, regardless of the
+request rate.
+
+Workers do not go to Redis on every request. A sync leases up to
+``settings.rate_limit_local_batch`` tokens (fewer for small limits), which
+are then spent from a per-worker cache; a rejection is cached locally
+until its retry-after. Leased tokens expire after the time they represent
+so an idle worker cannot hoard them. Several buckets that need a sync for
+the same request are resolved in one pipelined round trip.
+
+Policies:
+- ``DEFAULT_POLICY`` comes from settings.rate_limit_requests/window.
+- ``ROUTE_POLICIES`` add a stricter bucket for expensive route prefixes.
+- ``ROLE_MULTIPLIERS`` scale limits for authenticated roles; signed-in
+  users are keyed by user id (not IP) so a school NAT does not share one
+  bucket.
+
+Usage:
+    from app.utils.rate_limiter import rate_limiter, policies_for
+
+    decision = await rate_limiter.check(policies_for(path, role), identity)
+    if not decision.allowed:
+        ...  # 429 with Retry-After: decision.retry_after
+"""
+
+import logging
+import math
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Atomic GCRA lease.
+# KEYS[1] = bucket key
+# ARGV[1] = emission interval in ms (window / limit)
+# ARGV[2] = bucket capacity (limit)
+# ARGV[3] = tokens requested
+# Returns: {granted, remaining_after_grant, retry_after_ms}
+_GCRA_LEASE_LUA = """
+local interval = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local wanted = tonumber(ARGV[3])
+
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+
+local stored = redis.call('GET', KEYS[1])
+local tat = stored and tonumber(stored) or now
+if tat < now then
+    tat = now
+end
+
+local available = math.floor((now + capacity * interval - tat) / interval)
+local granted = math.min(wanted, math.max(available, 0))
+
+if granted > 0 then
+    tat = tat + granted * interval
+    redis.call('SET', KEYS[1], tostring(tat), 'PX', math.ceil(tat - now))
+    return {granted, available - granted, 0}
+end
+
+return {0, 0, math.ceil(tat - (capacity - 1) * interval - now)}
+"""
+
+
+@dataclass(frozen=True)
+class RateLimitPolicy:
+    """A named bucket shape: ``limit`` requests per ``window_seconds``."""
+
+    name: str
+    limit: int
+    window_seconds: int
+
+    def scaled(self, multiplier: int) -> "RateLimitPolicy":
+        if multiplier == 1:
+            return self
+        return RateLimitPolicy(self.name, self.limit * multiplier, self.window_seconds)
+
+
+@dataclass
+class RateLimitDecision:
+    allowed: bool
+    limit: int
+    remaining: int
+    retry_after: int = 0  # seconds
+    policy: Optional[str] = None
+
+
+def default_policy() -> RateLimitPolicy:
+    return RateLimitPolicy("global", settings.rate_limit_requests, settings.rate_limit_window)
+
+
+# Extra buckets for expensive endpoints, checked alongside the global one
+ROUTE_POLICIES: Dict[str, RateLimitPolicy] = {
+    f"{settings.api_v1_prefix}/auth/": RateLimitPolicy("auth", 30, 60),
+    f"{settings.api_v1_prefix}/ai-tutor/": RateLimitPolicy("ai", 30, 60),
+    f"{settings.api_v1_prefix}/copilot/": RateLimitPolicy("ai", 30, 60),
+    f"{settings.api_v1_prefix}/public/": RateLimitPolicy("public", 30, 60),
+    f"{settings.api_v1_prefix}/payments/": RateLimitPolicy("payments", 20, 60),
+}
+
+# Staff-facing roles drive dashboards that fan out into many API calls
+ROLE_MULTIPLIERS: Dict[str, int] = {
+    "admin": 5,
+    "staff": 3,
+    "instructor": 2,
+    "partner": 2,
+}
+
+
+def policies_for(path: str, role: Optional[str] = None) -> List[RateLimitPolicy]:
+    """Buckets a request to ``path`` by a user with ``role`` is charged against."""
+    multiplier = ROLE_MULTIPLIERS.get(role or "", 1)
+    policies = [default_policy().scaled(multiplier)]
+    for prefix, policy in ROUTE_POLICIES.items():
+        if path.startswith(prefix):
+            policies.append(policy.scaled(multiplier))
+            break
+    return policies
+
+
+@dataclass
+class _Lease:
+    tokens: int = 0
+    expires_at: float = 0.0
+    remaining: int = 0
+    blocked_until: float = 0.0
+    retry_after: int = 0
+
+
+class RateLimiter:
+    """GCRA limiter with a per-worker lease cache in front of Redis."""
+
+    # Upper bound on cached buckets per worker; the cache is reset past it
+    MAX_LOCAL_ENTRIES = 50_000
+
+    def __init__(self) -> None:
+        self._leases: Dict[str, _Lease] = {}
+        self._script = None
+        self._script_client = None
+
+    def reset(self) -> None:
+        """Drop all local leases (tests, config reloads)."""
+        self._leases.clear()
+
+    @staticmethod
+    def lease_size(policy: RateLimitPolicy) -> int:
+        # Small limits (e.g. 5/hour) must be exact, so lease one token at a time
+        return max(1, min(settings.rate_limit_local_batch, policy.limit // 20))
+
+    def _get_script(self, client):
+        if self._script is None or self._script_client is not client:
+            self._script = client.register_script(_GCRA_LEASE_LUA)
+            self._script_client = client
+        return self._script
+
+    async def check(
+        self, policies: Sequence[RateLimitPolicy], identity: str
+    ) -> RateLimitDecision:
+        """
+        Charge one request against each policy's bucket for ``identity``.
+
+        A request is charged all or nothing: a bucket already known to be
+        blocked rejects it before any other bucket is touched, and when a
+        sync rejects it the tokens taken from the other buckets go back to
+        their leases.
+
+        Raises if Redis is unreachable; callers choose whether to fail open.
+        """
+        now = time.monotonic()
+        keyed = [(f"ratelimit:{p.name}:{p.limit}:{identity}", p) for p in policies]
+
+        blocked = []
+        for key, policy in keyed:
+            lease = self._leases.get(key)
+            if lease is not None and lease.blocked_until > now:
+                blocked.append(RateLimitDecision(
+                    False, policy.limit, 0, lease.retry_after, policy.name,
+                ))
+        if blocked:
+            return self._combine(blocked)
+
+        pending: List[tuple] = []
+        charged: List[tuple] = []
+        for key, policy in keyed:
+            lease = self._leases.get(key)
+            if lease is not None and lease.tokens > 0 and lease.expires_at > now:
+                lease.tokens -= 1
+                charged.append((key, RateLimitDecision(
+                    True, policy.limit, lease.remaining + lease.tokens, 0, policy.name,
+                )))
+            else:
+                pending.append((key, policy))
+
+        if pending:
+            synced = await self._sync(pending, now)
+            charged.extend(zip((key for key, _ in pending), synced))
+
+        decision = self._combine([d for _, d in charged])
+        if not decision.allowed:
+            for key, d in charged:
+                if d.allowed:
+                    self._leases[key].tokens += 1
+        return decision
+
+    async def _sync(self, pending: List[tuple], now: float) -> List[RateLimitDecision]:
+        from app.redis import get_redis
+
+        client = get_redis()
+        script = self._get_script(client)
+
+        if len(pending) == 1:
+            key, policy = pending[0]
+            results = [await script(keys=[key], args=self._script_args(policy))]
+        else:
+            pipe = client.pipeline(transaction=False)
+            for key, policy in pending:
+                await script(keys=[key], args=self._script_args(policy), client=pipe)
+            results = await pipe.execute()
+
+        if len(self._leases) > self.MAX_LOCAL_ENTRIES:
+            self._leases.clear()
+
+        decisions = []
+        for (key, policy), (granted, remaining, retry_after_ms) in zip(pending, results):
+            granted, remaining, retry_after_ms = int(granted), int(remaining), int(retry_after_ms)
+            interval = policy.window_seconds / policy.limit
+            if granted > 0:
+                self._leases[key] = _Lease(
+                    tokens=granted - 1,
+                    expires_at=now + interval * granted,
+                    remaining=remaining,
+                )
+                decisions.append(RateLimitDecision(
+                    True, policy.limit, remaining + granted - 1, 0, policy.name,
+                ))
+            else:
+                retry_after = max(1, math.ceil(retry_after_ms / 1000))
+                self._leases[key] = _Lease(
+                    blocked_until=now + retry_after_ms / 1000,
+                    retry_after=retry_after,
+                )
+                decisions.append(RateLimitDecision(
+                    False, policy.limit, 0, retry_after, policy.name,
+                ))
+        return decisions
+
+    def _script_args(self, policy: RateLimitPolicy) -> list:
+        interval_ms = policy.window_seconds * 1000 / policy.limit
+        return [interval_ms, policy.limit, self.lease_size(policy)]
+
+    @staticmethod
+    def _combine(decisions: List[RateLimitDecision]) -> RateLimitDecision:
+        denied = [d for d in decisions if not d.allowed]
+        if denied:
+            decision = max(denied, key=lambda d: d.retry_after)
+            _record_rejection(decision.policy)
+            return decision
+        return min(decisions, key=lambda d: d.remaining)
+
+
+def _record_rejection(policy: Optional[str]) -> None:
+    try:
+        from app.metrics import rate_limit_rejections_total
+
+        rate_limit_rejections_total.labels(policy=policy or "unknown").inc()
+    except Exception:
+        pass
+
+
+rate_limiter = RateLimiter()
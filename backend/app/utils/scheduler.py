@@ -0,0 +1,514 @@
+"""
+Periodic job scheduler shared by every worker in the cluster.
+
+Background loops used to be ``while True: sleep(n)`` tasks started in
+every gunicorn worker, so with 4 workers on N pods each job ran 4N times
+per period. The scheduler replaces them:
+
+- Workers compete for a leader lease in Redis (``scheduler:leader``,
+  SET NX PX). The leader renews it every tick with a compare-and-extend
+  script; if it dies, another worker takes over once the lease lapses
+  (``scheduler_lease_seconds``).
+- Jobs are registered with a five-field cron expression (minute, hour,
+  day of month, month, day of week, all in UTC) or a fixed interval in
+  seconds. Only the leader fires cluster jobs. Due times live in the
+  ``scheduler:next`` hash, so a new leader continues the old schedule.
+- Each run is pushed back by a random ``jitter`` so jobs sharing a
+  schedule don't start together. A run that starts more than
+  ``misfire_grace`` seconds after its due time (the cluster was down or
+  busy) is skipped; missed runs are coalesced into the next one.
+- A run holds ``scheduler:lock:<job>`` while it executes, so a leader
+  handover never overlaps two runs of the same job.
+- Sharded jobs are split into ``shards`` partitions. When one fires, the
+  leader publishes a new generation and every worker claims at most one
+  unclaimed partition of it at a time, so per-tenant work is spread over
+  the cluster. A partition lost with its worker is claimed again once its
+  claim expires after ``timeout`` seconds.
+- ``per_worker`` jobs run in every worker and skip the election; they are
+  for work on process-local state such as in-memory document rooms.
+
+Runs, run time and start lag are recorded per job in Prometheus.
+Without Redis (development, tests) the single process acts as leader and
+runs every partition itself.
+"""
+
+import asyncio
+import logging
+import math
+import random
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from app import database
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+LEADER_KEY = "scheduler:leader"
+NEXT_KEY = "scheduler:next"
+
+# Extend the lease only while we still hold it
+_RENEW_LEASE = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('PEXPIRE', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+# Delete a lease or lock only if we still hold it
+_RELEASE = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+# ── Cron expressions ─────────────────────────────────────────────────
+
+_CRON_FIELDS = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 7))
+
+
+def _parse_field(field: str, low: int, high: int) -> Tuple[int, ...]:
+    values = set()
+    for part in field.split(","):
+        spec, _, step = part.partition("/")
+        if spec == "*":
+            start, end = low, high
+        elif "-" in spec:
+            start, end = (int(v) for v in spec.split("-", 1))
+        else:
+            start = end = int(spec)
+        stride = int(step) if step else 1
+        if not (low <= start <= end <= high) or stride < 1:
+            raise ValueError(f"Cron field out of range: {field}")
+        values.update(range(start, end + 1, stride))
+    return tuple(sorted(values))
+
+
+class CronSchedule:
+    """A standard five-field cron expression evaluated in UTC."""
+
+    def __init__(self, expression: str):
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError(f"Cron expression needs 5 fields: {expression!r}")
+        try:
+            parsed = [_parse_field(f, low, high) for f, (low, high) in zip(fields, _CRON_FIELDS)]
+        except ValueError as e:
+            raise ValueError(f"Invalid cron expression {expression!r}: {e}") from None
+        self.expression = expression
+        self.minutes, self.hours, self.days, self.months, weekdays = parsed
+        # 0 and 7 are both Sunday
+        self.weekdays = {day % 7 for day in weekdays}
+        self._any_day = fields[2] == "*"
+        self._any_weekday = fields[4] == "*"
+        # Reject expressions that never fire, e.g. "0 0 30 2 *"
+        self.next_after(datetime(2000, 1, 1))
+
+    def _day_matches(self, day: datetime) -> bool:
+        # As in cron: when both day fields are restricted, either may match
+        by_date = day.day in self.days
+        by_weekday = day.isoweekday() % 7 in self.weekdays
+        if self._any_day:
+            return by_weekday
+        if self._any_weekday:
+            return by_date
+        return by_date or by_weekday
+
+    def next_after(self, when: datetime) -> datetime:
+        """The first matching minute strictly after ``when``."""
+        t = when.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = when.year + 9
+        while t.year <= limit:
+            if t.month not in self.months:
+                t = datetime(t.year + t.month // 12, t.month % 12 + 1, 1)
+                continue
+            if not self._day_matches(t):
+                t = datetime(t.year, t.month, t.day) + timedelta(days=1)
+                continue
+            hour = next((h for h in self.hours if h >= t.hour), None)
+            if hour is None:
+                t = datetime(t.year, t.month, t.day) + timedelta(days=1)
+                continue
+            if hour != t.hour:
+                t = t.replace(hour=hour, minute=0)
+            minute = next((m for m in self.minutes if m >= t.minute), None)
+            if minute is None:
+                t = t.replace(minute=0) + timedelta(hours=1)
+                continue
+            return t.replace(minute=minute)
+        raise ValueError(f"Cron expression never fires: {self.expression!r}")
+
+    def __repr__(self) -> str:
+        return f"CronSchedule({self.expression!r})"
+
+
+def _utc(timestamp: float) -> datetime:
+    return datetime.fromtimestamp(timestamp, timezone.utc).replace(tzinfo=None)
+
+
+def _timestamp(when: datetime) -> float:
+    return when.replace(tzinfo=timezone.utc).timestamp()
+
+
+# ── Jobs ─────────────────────────────────────────────────────────────
+
+@dataclass
+class Job:
+    """
+    A registered periodic job.
+
+    ``func`` is called with no arguments, or with ``(shard, shards)`` for a
+    sharded job, and must finish within ``timeout`` seconds.
+    """
+
+    name: str
+    func: Callable[..., Awaitable[Any]]
+    cron: Optional[CronSchedule] = None
+    every: Optional[float] = None
+    jitter: float = 0.0
+    misfire_grace: float = 60.0
+    shards: int = 1
+    timeout: float = 300.0
+    per_worker: bool = False
+    run_on_start: bool = False
+
+    def next_run(self, now: float) -> float:
+        """The next due time after ``now``, jitter included."""
+        if self.every:
+            due = now + self.every
+        else:
+            due = _timestamp(self.cron.next_after(_utc(now)))
+        if self.jitter:
+            due += random.uniform(0, self.jitter)
+        return due
+
+    @property
+    def sharded(self) -> bool:
+        return self.shards > 1
+
+
+def _record(job: str, result: str, seconds: Optional[float] = None) -> None:
+    try:
+        from app.metrics import scheduler_job_duration, scheduler_job_runs_total
+
+        scheduler_job_runs_total.labels(job=job, result=result).inc()
+        if seconds is not None:
+            scheduler_job_duration.labels(job=job).observe(seconds)
+    except Exception:
+        pass
+
+
+def _record_lag(job: str, seconds: float) -> None:
+    try:
+        from app.metrics import scheduler_job_lag
+
+        scheduler_job_lag.labels(job=job).observe(max(0.0, seconds))
+    except Exception:
+        pass
+
+
+def _redis():
+    """The shared client, or None when Redis is not configured."""
+    try:
+        from app.redis import get_redis
+
+        return get_redis()
+    except RuntimeError:
+        return None
+
+
+class Scheduler:
+    """Registry and runner for periodic jobs; see the module docstring."""
+
+    def __init__(self, worker_id: Optional[str] = None) -> None:
+        # Identifies this worker as the holder of leases and claims
+        self.worker_id = worker_id or uuid.uuid4().hex
+        self.jobs: Dict[str, Job] = {}
+        self.is_leader = False
+        # Due times of per-worker jobs, and of cluster jobs without Redis
+        self._next: Dict[str, float] = {}
+        # Runs in progress in this worker, by job name or "<job>#<shard>"
+        self._running: Dict[str, asyncio.Task] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    # ── Registration ─────────────────────────────────────────────────
+
+    def register(
+        self,
+        name: str,
+        func: Callable[..., Awaitable[Any]],
+        *,
+        cron: Optional[str] = None,
+        every: Optional[float] = None,
+        jitter: float = 0.0,
+        misfire_grace: float = 60.0,
+        shards: int = 1,
+        timeout: float = 300.0,
+        per_worker: bool = False,
+        run_on_start: bool = False,
+    ) -> Job:
+        """Register ``func`` to run on a cron expression or every ``every`` seconds."""
+        if (cron is None) == (every is None):
+            raise ValueError(f"Job {name} needs exactly one of cron or every")
+        if every is not None and every <= 0:
+            raise ValueError(f"Job {name} interval must be positive")
+        if shards < 1 or (per_worker and shards > 1):
+            raise ValueError(f"Job {name} has an invalid shard count")
+        if name in self.jobs:
+            raise ValueError(f"Job {name} is already registered")
+        job = Job(
+            name=name,
+            func=func,
+            cron=CronSchedule(cron) if cron else None,
+            every=every,
+            jitter=jitter,
+            misfire_grace=misfire_grace,
+            shards=shards,
+            timeout=timeout,
+            per_worker=per_worker,
+            run_on_start=run_on_start,
+        )
+        self.jobs[name] = job
+        return job
+
+    def job(self, name: str, **options: Any):
+        """Decorator form of register()."""
+        def decorator(func):
+            self.register(name, func, **options)
+            return func
+        return decorator
+
+    # ── Lifecycle ────────────────────────────────────────────────────
+
+    def start(self) -> None:
+        """Start the tick loop (called from the lifespan startup)."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._loop(), name="scheduler")
+
+    async def stop(self) -> None:
+        """Stop ticking, cancel runs in progress and give up the lease."""
+        tasks = [t for t in (self._task, *self._running.values()) if t is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._task = None
+        self._running.clear()
+        if self.is_leader:
+            redis = _redis()
+            if redis is not None:
+                try:
+                    await redis.eval(_RELEASE, 1, LEADER_KEY, self.worker_id)
+                except Exception as e:
+                    logger.warning(f"Could not release scheduler lease: {e}")
+            self._set_leader(False)
+
+    async def _loop(self) -> None:
+        while True:
+            try:
+                await self.tick()
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"Scheduler tick error: {e}")
+            await asyncio.sleep(settings.scheduler_tick_seconds)
+
+    async def tick(self, now: Optional[float] = None) -> None:
+        """Elect, then start every due job this worker is responsible for."""
+        now = time.time() if now is None else now
+        redis = _redis()
+
+        self._fire_local(now)
+        await self._elect(redis)
+        if self.is_leader:
+            await self._fire_cluster(redis, now)
+        if redis is not None:
+            await self._claim_shards(redis)
+
+    # ── Election ─────────────────────────────────────────────────────
+
+    def _set_leader(self, leader: bool) -> None:
+        if leader != self.is_leader:
+            logger.info(f"Scheduler leadership {'acquired' if leader else 'lost'}")
+        self.is_leader = leader
+        try:
+            from app.metrics import scheduler_leader
+
+            scheduler_leader.set(1 if leader else 0)
+        except Exception:
+            pass
+
+    async def _elect(self, redis) -> None:
+        if redis is None:
+            self._set_leader(True)
+            return
+        lease_ms = int(settings.scheduler_lease_seconds * 1000)
+        try:
+            if self.is_leader:
+                held = await redis.eval(_RENEW_LEASE, 1, LEADER_KEY, self.worker_id, lease_ms)
+            else:
+                held = await redis.set(LEADER_KEY, self.worker_id, px=lease_ms, nx=True)
+        except Exception as e:
+            # Without a renewed lease another worker may take over: stand down
+            logger.warning(f"Scheduler election failed: {e}")
+            held = False
+        self._set_leader(bool(held))
+
+    # ── Firing ───────────────────────────────────────────────────────
+
+    def _due(self, job: Job, due: Optional[float], now: float) -> Tuple[bool, Optional[float]]:
+        """(run now, new due time to store) for a job last scheduled at ``due``."""
+        if due is None:
+            if job.run_on_start:
+                return True, job.next_run(now)
+            return False, job.next_run(now)
+        if due > now:
+            return False, None
+        if now - due > job.misfire_grace:
+            logger.warning(f"Scheduled job {job.name} misfired ({now - due:.0f}s late), skipping")
+            _record(job.name, "misfire")
+            return False, job.next_run(now)
+        _record_lag(job.name, now - due)
+        return True, job.next_run(now)
+
+    def _fire_local(self, now: float) -> None:
+        for job in self.jobs.values():
+            if not job.per_worker:
+                continue
+            run, due = self._due(job, self._next.get(job.name), now)
+            if due is not None:
+                self._next[job.name] = due
+            if run:
+                self._spawn(job.name, self._execute(job))
+
+    async def _fire_cluster(self, redis, now: float) -> None:
+        jobs = [job for job in self.jobs.values() if not job.per_worker]
+        if redis is not None:
+            stored = {name: float(due) for name, due in (await redis.hgetall(NEXT_KEY)).items()}
+        else:
+            stored = self._next
+
+        updates: Dict[str, float] = {}
+        fire: List[Job] = []
+        for job in jobs:
+            run, due = self._due(job, stored.get(job.name), now)
+            if due is not None:
+                updates[job.name] = due
+            if run:
+                fire.append(job)
+
+        # Store the next due times first, so a new leader never repeats a run
+        if updates:
+            if redis is not None:
+                await redis.hset(NEXT_KEY, mapping=updates)
+            else:
+                self._next.update(updates)
+
+        for job in fire:
+            if not job.sharded:
+                self._spawn(job.name, self._run_locked(redis, job))
+            elif redis is not None:
+                await self._publish_generation(redis, job)
+            else:
+                for shard in range(job.shards):
+                    self._spawn(f"{job.name}#{shard}", self._execute(job, shard))
+
+    def _spawn(self, key: str, coro: Awaitable[Any]) -> None:
+        if key in self._running:
+            # Still running in this worker; the lock would refuse it anyway
+            coro.close()
+            _record(key.split("#")[0], "overlap")
+            return
+        task = asyncio.create_task(coro, name=f"scheduler:{key}")
+        self._running[key] = task
+        task.add_done_callback(lambda _: self._running.pop(key, None))
+
+    async def _execute(self, job: Job, shard: Optional[int] = None) -> None:
+        args = (shard, job.shards) if shard is not None else ()
+        label = job.name if shard is None else f"{job.name}#{shard}"
+        result = "success"
+        start = time.perf_counter()
+        try:
+            # Sessions opened by the job use the background pool
+            with database.use_workload(database.BACKGROUND, f"job:{job.name}"):
+                await asyncio.wait_for(job.func(*args), timeout=job.timeout)
+        except asyncio.TimeoutError:
+            result = "timeout"
+            logger.error(f"Scheduled job {label} timed out after {job.timeout}s")
+        except asyncio.CancelledError:
+            result = "cancelled"
+            raise
+        except Exception as e:
+            result = "error"
+            logger.error(f"Scheduled job {label} failed: {e}")
+        finally:
+            _record(job.name, result, time.perf_counter() - start)
+
+    async def _run_locked(self, redis, job: Job) -> None:
+        if redis is None:
+            await self._execute(job)
+            return
+        key = f"scheduler:lock:{job.name}"
+        token = uuid.uuid4().hex
+        if not await redis.set(key, token, ex=math.ceil(job.timeout) + 5, nx=True):
+            logger.warning(f"Scheduled job {job.name} is still running elsewhere, skipping")
+            _record(job.name, "overlap")
+            return
+        try:
+            await self._execute(job)
+        finally:
+            try:
+                await redis.eval(_RELEASE, 1, key, token)
+            except Exception as e:
+                logger.warning(f"Could not release lock for {job.name}: {e}")
+
+    # ── Shards ───────────────────────────────────────────────────────
+
+    def _generation_ttl(self, job: Job) -> int:
+        # Long enough for every partition to run back to back on one worker
+        return math.ceil(job.timeout) * job.shards + 60
+
+    async def _publish_generation(self, redis, job: Job) -> None:
+        generation = await redis.incr(f"scheduler:shards:{job.name}:seq")
+        await redis.set(f"scheduler:shards:{job.name}", generation, ex=self._generation_ttl(job))
+
+    async def _claim_shards(self, redis) -> None:
+        jobs = [job for job in self.jobs.values() if job.sharded]
+        if not jobs:
+            return
+        generations = await redis.mget([f"scheduler:shards:{job.name}" for job in jobs])
+        for job, generation in zip(jobs, generations):
+            if generation is None:
+                continue
+            if any(key.startswith(f"{job.name}#") for key in self._running):
+                continue  # one partition of a job per worker at a time
+            claims = [f"scheduler:shards:{job.name}:{generation}:{shard}" for shard in range(job.shards)]
+            owners = await redis.mget(claims)
+            for shard, (claim, owner) in enumerate(zip(claims, owners)):
+                if owner is not None:
+                    continue
+                if await redis.set(claim, self.worker_id, ex=math.ceil(job.timeout) + 5, nx=True):
+                    self._spawn(f"{job.name}#{shard}", self._run_shard(redis, job, shard, claim))
+                    break
+
+    async def _run_shard(self, redis, job: Job, shard: int, claim: str) -> None:
+        try:
+            await self._execute(job, shard)
+        except asyncio.CancelledError:
+            # Shutting down: hand the partition back to the other workers
+            try:
+                await redis.eval(_RELEASE, 1, claim, self.worker_id)
+            except Exception:
+                pass
+            raise
+        try:
+            await redis.set(claim, "done", ex=self._generation_ttl(job))
+        except Exception as e:
+            logger.warning(f"Could not mark {job.name}#{shard} done: {e}")
+
+
+scheduler = Scheduler()
@@ -16,7 +16,7 @@ from datetime import datetime, timedelta, timezone
 from typing import Any, Callable, Dict, List, Optional, Union
 from functools import wraps
 
-from fastapi import HTTPException, status, Depends
+from fastapi import HTTPException, Request, status, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from jose import JWTError, jwt
 import bcrypt as _bcrypt
@@ -273,6 +273,30 @@ def verify_token(token: str, token_type: str = "access") -> Dict[str, Any]:
         raise credentials_exception
 
 
+def verify_request_token(request: Optional[Request], token: str) -> Dict[str, Any]:
+    """
+    Verify an access token, reusing the payload already verified for this request.
+
+    RequestPipelineMiddleware verifies the bearer token once and stores the
+    payload in scope state; auth dependencies call this instead of
+    verify_token() so the JWT is not decoded a second time.
+
+    Args:
+        request: The current request (None outside HTTP handling)
+        token: The JWT token string presented by the client
+
+    Returns:
+        Dictionary containing the decoded token payload
+
+    Raises:
+        HTTPException: If token is invalid, expired, or wrong type
+    """
+    state = request.scope.get("state") if request is not None else None
+    if state and state.get("auth_token") == token and state.get("auth_payload") is not None:
+        return state["auth_payload"]
+    return verify_token(token, token_type="access")
+
+
 def decode_token(token: str) -> Optional[Dict[str, Any]]:
     """
     Decode a JWT token without verification (for inspection purposes only).
@@ -573,6 +597,7 @@ def sanitize_user_data(user_dict: Dict[str, Any]) -> Dict[str, Any]:
 # ============================================================================
 
 async def get_current_user(
+    request: Request,
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db=Depends(get_db)
 ):
@@ -583,6 +608,7 @@ async def get_current_user(
     downstream code to access all user attributes and relationships.
 
     Args:
+        request: Current request (carries the payload verified by middleware)
         credentials: HTTPAuthorizationCredentials from Bearer token
         db: Database session (injected by FastAPI)
 
@@ -608,7 +634,7 @@ async def get_current_user(
 
     try:
         token = credentials.credentials
-        payload = verify_token(token, token_type="access")
+        payload = verify_request_token(request, token)
         user_id: str = payload.get("sub")
 
         if user_id is None:
@@ -642,6 +668,7 @@ async def get_current_user(
 
 
 async def get_current_active_user(
+    request: Request,
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db=Depends(get_db)
 ) -> Dict[str, Any]:
@@ -652,6 +679,7 @@ async def get_current_active_user(
     is still active in the database (not just in the token claims).
 
     Args:
+        request: Current request (carries the payload verified by middleware)
         credentials: HTTPAuthorizationCredentials from Bearer token
         db: Database session (injected by FastAPI)
 
@@ -679,7 +707,7 @@ async def get_current_active_user(
     try:
         # Extract and verify token
         token = credentials.credentials
-        payload = verify_token(token, token_type="access")
+        payload = verify_request_token(request, token)
         user_id: str = payload.get("sub")
 
         if user_id is None:
@@ -695,7 +723,10 @@ async def get_current_active_user(
 
         # Verify user is still active in database (not just token claims)
         result = await db.execute(
-            select(User.id, User.email, User.role, User.is_active, User.is_deleted)
+            select(
+                User.id, User.email, User.role, User.is_active, User.is_deleted,
+                User.is_super_admin,
+            )
             .where(User.id == UUID(user_id))
         )
         user_row = result.first()
@@ -714,6 +745,7 @@ async def get_current_active_user(
             "role": user_row.role,
             "email": user_row.email,
             "is_active": user_row.is_active,
+            "is_super_admin": bool(user_row.is_super_admin),
         }
 
     except HTTPException:
@@ -736,44 +768,34 @@ class RateLimitExceeded(HTTPException):
         )
 
 
-def check_rate_limit(
+async def check_rate_limit(
     identifier: str,
     max_requests: int,
     window_seconds: int,
-    redis_client: Any
+    name: str = "custom",
 ) -> bool:
     """
-    Check if a rate limit has been exceeded using Redis.
+    Check a rate limit using the shared limiter engine (app/utils/rate_limiter.py).
 
     Args:
         identifier: Unique identifier (e.g., user_id or IP address)
         max_requests: Maximum number of requests allowed
         window_seconds: Time window in seconds
-        redis_client: Redis client instance
+        name: Bucket name, so different limits for one identifier don't collide
 
     Returns:
         True if within rate limit, False if exceeded
 
     Example:
-        if not check_rate_limit(user_id, max_requests=100, window_seconds=60, redis_client=redis):
+        if not await check_rate_limit(user_id, max_requests=100, window_seconds=60):
             raise RateLimitExceeded("Too many requests. Try again later.")
     """
-    try:
-        key = f"rate_limit:{identifier}"
-        current = redis_client.get(key)
-
-        if current is None:
-            # First request in window
-            redis_client.setex(key, window_seconds, 1)
-            return True
-
-        current_count = int(current)
-        if current_count >= max_requests:
-            return False
+    from app.utils.rate_limiter import RateLimitPolicy, rate_limiter
 
-        # Increment counter
-        redis_client.incr(key)
-        return True
+    try:
+        policy = RateLimitPolicy(name, max_requests, window_seconds)
+        decision = await rate_limiter.check([policy], identifier)
+        return decision.allowed
 
     except Exception as e:
         # If Redis fails, block the request (fail closed) to prevent abuse
@@ -41,3 +41,6 @@ class WSEventType(str, Enum):
 
     # Notifications
     NOTIFICATION = "notification"
+
+    # Background jobs
+    JOB_STATUS = "job.status"
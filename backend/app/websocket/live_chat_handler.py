@@ -6,8 +6,18 @@ to communicate in real time within the support-ticket system.
 
 Features:
 - Per-ticket chat rooms with multiple participants.
-- Message persistence to ``staff_ticket_messages`` via the
-  ``StaffTicketMessage`` model.
+- Every chat message gets a per-ticket sequence number (``seq``) and is
+  broadcast immediately; a batched writer persists it to
+  ``staff_ticket_messages`` in the background.
+- Resumable replay: the last ``support_chat_ring_size`` messages of each
+  ticket are kept in a Redis ring buffer (in memory if Redis is down).
+  A client that reconnects with ``?last_seq=N`` (or sends
+  ``{"type": "resume", "last_seq": N}``) receives what it missed as a
+  ``chat_replay`` event without a database query. ``truncated`` is set
+  when the gap is larger than the buffer; the client then reloads the
+  thread from the REST API.
+- Internal notes (``is_internal``) are sent and replayed to staff and
+  admin participants only.
 - Typing indicators broadcast to other room participants.
 - Read receipts.
 - AI-suggested reply generation (optional).
@@ -21,16 +31,20 @@ Message envelope: {"type": "event_type", "data": {...}, "timestamp": "..."}
 import json
 import logging
 import asyncio
+from collections import deque
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 from uuid import uuid4
 
 from fastapi import WebSocket
 from starlette.websockets import WebSocketState
 from jose import jwt, JWTError
 
+from app import database
 from app.config import settings
-from app.database import AsyncSessionLocal
+from app.models.staff.ticket import StaffTicketMessage
+from app.services.content_safety import screen_content
+from app.utils.log_writer import BatchedLogWriter
 
 logger = logging.getLogger(__name__)
 
@@ -46,6 +60,27 @@ EVENT_READ_RECEIPT = "read_receipt"
 EVENT_USER_JOINED = "user_joined"
 EVENT_USER_LEFT = "user_left"
 EVENT_ERROR = "error"
+EVENT_RESUME = "resume"
+EVENT_CHAT_REPLAY = "chat_replay"
+
+# Token roles that may see internal notes
+_STAFF_ROLES = ("staff", "admin")
+
+_SEQ_KEY = "chat:seq:{}"
+_RING_KEY = "chat:ring:{}"
+
+# Allocate the next sequence number and append the message to the ring
+_APPEND = """
+local seq = redis.call('INCR', KEYS[1])
+redis.call('RPUSH', KEYS[2], seq .. '|' .. ARGV[1])
+redis.call('LTRIM', KEYS[2], -tonumber(ARGV[2]), -1)
+redis.call('EXPIRE', KEYS[1], ARGV[3])
+redis.call('EXPIRE', KEYS[2], ARGV[3])
+return seq
+"""
+
+# Persists chat messages in batches off the send path
+chat_message_writer = BatchedLogWriter(StaffTicketMessage, "support_chat", workload=database.WEBSOCKET)
 
 
 # ---------------------------------------------------------------------------
@@ -88,14 +123,19 @@ def _verify_ws_token(token: str) -> Optional[Dict[str, Any]]:
 class _ChatRoom:
     """Internal state for a single ticket chat room."""
 
-    __slots__ = ("ticket_id", "connections", "typing_users")
+    __slots__ = ("ticket_id", "connections", "staff", "typing_users", "seq", "ring")
 
     def __init__(self, ticket_id: str) -> None:
         self.ticket_id: str = ticket_id
         # user_id -> WebSocket
         self.connections: Dict[str, WebSocket] = {}
+        # User IDs connected with a staff/admin token
+        self.staff: set = set()
         # Set of user IDs currently typing
         self.typing_users: set = set()
+        # Fallback sequence counter and replay buffer while Redis is down
+        self.seq: int = 0
+        self.ring: deque = deque(maxlen=settings.support_chat_ring_size)
 
 
 # ---------------------------------------------------------------------------
@@ -168,6 +208,10 @@ class LiveChatManager:
                 pass
 
         room.connections[user_id] = websocket
+        if payload.get("role") in _STAFF_ROLES:
+            room.staff.add(user_id)
+        else:
+            room.staff.discard(user_id)
 
         logger.info(
             "LiveChat WS connected: user=%s ticket=%s (participants=%d)",
@@ -186,6 +230,11 @@ class LiveChatManager:
             exclude_user=user_id,
         )
 
+        # Replay what a reconnecting client missed
+        last_seq = websocket.query_params.get("last_seq")
+        if last_seq is not None:
+            await self.resume(ticket_id, user_id, last_seq)
+
         return True
 
     async def disconnect(
@@ -208,6 +257,7 @@ class LiveChatManager:
         # Only remove if it is the same WebSocket (guard against stale refs)
         if room.connections.get(user_id) is websocket:
             del room.connections[user_id]
+            room.staff.discard(user_id)
 
         room.typing_users.discard(user_id)
 
@@ -249,6 +299,7 @@ class LiveChatManager:
         - ``typing``: ``{type, is_typing}``
         - ``read_receipt``: ``{type, last_read_message_id}``
         - ``ai_suggestion_request``: ``{type, message_text}``
+        - ``resume``: ``{type, last_seq}``
 
         Args:
             ticket_id: The ticket room identifier.
@@ -280,6 +331,9 @@ class LiveChatManager:
             if last_read_id:
                 await self._broadcast_read_receipt(ticket_id, user_id, last_read_id)
 
+        elif msg_type == EVENT_RESUME:
+            await self.resume(ticket_id, user_id, payload.get("last_seq"))
+
         elif msg_type == "ai_suggestion_request":
             message_text = payload.get("message_text", "")
             if message_text:
@@ -300,7 +354,7 @@ class LiveChatManager:
         is_internal: bool = False,
     ) -> None:
         """
-        Process and persist a chat message, then broadcast to the room.
+        Sequence and broadcast a chat message, then queue it for persistence.
 
         Args:
             ticket_id: The ticket this message belongs to.
@@ -308,12 +362,8 @@ class LiveChatManager:
             content: Message text content.
             is_internal: Whether this is an internal staff-only note.
         """
-        message_id = str(uuid4())
-        timestamp = datetime.utcnow().isoformat()
-
-        # Persist to database
-        await self._persist_message(
-            message_id=message_id,
+        row = chat_message_writer.new_row(
+            id=str(uuid4()),
             ticket_id=ticket_id,
             author_id=user_id,
             content=content,
@@ -322,33 +372,124 @@ class LiveChatManager:
 
         # Build broadcast payload
         chat_data = {
-            "id": message_id,
+            "id": row["id"],
             "ticket_id": ticket_id,
             "author_id": user_id,
             "content": content,
             "is_internal": is_internal,
-            "timestamp": timestamp,
+            "timestamp": row["created_at"],
         }
+        chat_data["seq"] = await self._append(ticket_id, chat_data)
 
         message = _build_message(EVENT_CHAT_MESSAGE, chat_data)
 
-        # If internal, only broadcast to staff/admin users
-        # For simplicity, broadcast to all room participants; access
-        # control should be enforced at the connection level.
-        await self._broadcast_to_room(ticket_id, message)
+        # Internal notes only reach staff/admin participants
+        await self._broadcast_to_room(ticket_id, message, staff_only=is_internal)
 
         # Clear typing indicator for this user
         room = self._rooms.get(ticket_id)
         if room:
             room.typing_users.discard(user_id)
 
+        # Persist off the send path
+        await chat_message_writer.submit(row)
+        if not is_internal:
+            await screen_content("support_chat", row["id"], user_id, content)
+
         logger.debug(
-            "Chat message sent: ticket=%s user=%s msg_id=%s",
+            "Chat message sent: ticket=%s user=%s msg_id=%s seq=%s",
             ticket_id,
             user_id,
-            message_id,
+            row["id"],
+            chat_data["seq"],
         )
 
+    # ------------------------------------------------------------------
+    # Sequence numbers and replay
+    # ------------------------------------------------------------------
+
+    async def _append(self, ticket_id: str, chat_data: dict) -> int:
+        """Assign the next sequence number and add the message to the ring."""
+        try:
+            from app.redis import get_redis
+
+            seq = await get_redis().eval(
+                _APPEND,
+                2,
+                _SEQ_KEY.format(ticket_id),
+                _RING_KEY.format(ticket_id),
+                json.dumps(chat_data),
+                settings.support_chat_ring_size,
+                settings.support_chat_ring_ttl,
+            )
+            return int(seq)
+        except Exception as exc:
+            logger.warning("LiveChat replay buffer unavailable for ticket %s: %s", ticket_id, exc)
+
+        room = self._rooms.get(ticket_id)
+        if room is None:
+            return 0
+        room.seq += 1
+        room.ring.append(dict(chat_data, seq=room.seq))
+        return room.seq
+
+    async def _recent(self, ticket_id: str) -> Tuple[List[dict], int]:
+        """Return the buffered messages (oldest first) and the latest seq."""
+        try:
+            from app.redis import get_redis
+
+            pipe = get_redis().pipeline(transaction=True)
+            pipe.get(_SEQ_KEY.format(ticket_id))
+            pipe.lrange(_RING_KEY.format(ticket_id), 0, -1)
+            latest, raw = await pipe.execute()
+            messages = []
+            for item in raw:
+                seq, _, body = item.partition("|")
+                messages.append(dict(json.loads(body), seq=int(seq)))
+            return messages, int(latest or 0)
+        except Exception as exc:
+            logger.warning("LiveChat replay buffer unavailable for ticket %s: %s", ticket_id, exc)
+
+        room = self._rooms.get(ticket_id)
+        if room is None:
+            return [], 0
+        return list(room.ring), room.seq
+
+    async def resume(self, ticket_id: str, user_id: str, last_seq: Any) -> None:
+        """
+        Send a user the messages after ``last_seq`` from the replay buffer.
+
+        ``truncated`` in the reply means some missed messages are no longer
+        buffered (or the counter was reset) and the client should reload
+        the thread from the REST API. Internal notes are left out for
+        non-staff participants.
+        """
+        try:
+            last_seq = max(int(last_seq), 0)
+        except (TypeError, ValueError):
+            await self._send_error(ticket_id, user_id, "Invalid last_seq")
+            return
+
+        buffered, latest = await self._recent(ticket_id)
+        if last_seq > latest:
+            # Counter expired or was reset since the client's last message
+            missed, truncated = buffered, True
+        else:
+            missed = [m for m in buffered if m["seq"] > last_seq]
+            oldest = buffered[0]["seq"] if buffered else latest + 1
+            truncated = latest > last_seq and oldest > last_seq + 1
+
+        room = self._rooms.get(ticket_id)
+        if room is None or user_id not in room.staff:
+            missed = [m for m in missed if not m.get("is_internal")]
+
+        await self._send_to_user(ticket_id, user_id, _build_message(EVENT_CHAT_REPLAY, {
+            "ticket_id": ticket_id,
+            "messages": missed,
+            "latest_seq": latest,
+            "truncated": truncated,
+        }))
+
     # ------------------------------------------------------------------
     # Typing indicators
     # ------------------------------------------------------------------
@@ -485,6 +626,7 @@ class LiveChatManager:
         ticket_id: str,
         message: dict,
         exclude_user: Optional[str] = None,
+        staff_only: bool = False,
     ) -> None:
         """
         Broadcast a message to all participants in a ticket room.
@@ -493,6 +635,7 @@ class LiveChatManager:
             ticket_id: The room to broadcast to.
             message: The message envelope to send.
             exclude_user: Optionally exclude this user from receiving the message.
+            staff_only: Only send to staff/admin participants.
         """
         room = self._rooms.get(ticket_id)
         if room is None:
@@ -501,7 +644,7 @@ class LiveChatManager:
         stale_users: List[str] = []
 
         for uid, ws in list(room.connections.items()):
-            if uid == exclude_user:
+            if uid == exclude_user or (staff_only and uid not in room.staff):
                 continue
             ok = await self._safe_send_json(ws, message)
             if not ok:
@@ -517,80 +660,6 @@ class LiveChatManager:
         message = _build_message(EVENT_ERROR, {"detail": detail})
         await self._send_to_user(ticket_id, user_id, message)
 
-    # ------------------------------------------------------------------
-    # Persistence
-    # ------------------------------------------------------------------
-
-    async def _persist_message(
-        self,
-        message_id: str,
-        ticket_id: str,
-        author_id: str,
-        content: str,
-        is_internal: bool = False,
-    ) -> None:
-        """
-        Save a chat message to the ``staff_ticket_messages`` table.
-
-        Attempts to use the ``StaffTicketMessage`` ORM model first; falls
-        back to raw SQL if the model is unavailable.
-        """
-        if AsyncSessionLocal is None:
-            logger.warning("Database not initialised; cannot persist message %s", message_id)
-            return
-
-        try:
-            async with AsyncSessionLocal() as session:
-                # Try ORM-based insert
-                try:
-                    from app.models.staff.ticket import StaffTicketMessage
-
-                    msg = StaffTicketMessage(
-                        id=message_id,
-                        ticket_id=ticket_id,
-                        author_id=author_id,
-                        content=content,
-                        is_internal=is_internal,
-                    )
-                    session.add(msg)
-                    await session.commit()
-                    logger.debug("Chat message persisted (ORM): %s", message_id)
-                    return
-
-                except (ImportError, AttributeError) as orm_exc:
-                    await session.rollback()
-                    logger.debug("ORM save unavailable (%s), trying raw SQL", orm_exc)
-                except Exception as orm_exc:
-                    await session.rollback()
-                    logger.debug("ORM save failed (%s), trying raw SQL", orm_exc)
-
-                # Fallback: raw SQL
-                try:
-                    from sqlalchemy import text as sa_text
-
-                    insert_sql = sa_text("""
-                        INSERT INTO staff_ticket_messages
-                            (id, ticket_id, author_id, content, is_internal, created_at)
-                        VALUES
-                            (:id, :ticket_id, :author_id, :content, :is_internal, NOW())
-                    """)
-                    await session.execute(insert_sql, {
-                        "id": message_id,
-                        "ticket_id": ticket_id,
-                        "author_id": author_id,
-                        "content": content,
-                        "is_internal": is_internal,
-                    })
-                    await session.commit()
-                    logger.debug("Chat message persisted (raw SQL): %s", message_id)
-
-                except Exception as sql_exc:
-                    await session.rollback()
-                    logger.error("Failed to persist chat message %s: %s", message_id, sql_exc)
-
-        except Exception as exc:
-            logger.error("Database session error persisting message %s: %s", message_id, exc)
-
     # ------------------------------------------------------------------
     # Introspection
     # ------------------------------------------------------------------
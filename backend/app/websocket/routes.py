@@ -280,16 +280,13 @@ async def support_chat_websocket(
 
     try:
         from app.websocket.live_chat_handler import live_chat_manager
-        await live_chat_manager.connect(websocket, ticket_id, user_id)
+        if not await live_chat_manager.connect(websocket, ticket_id, user_id):
+            return
 
         try:
             while True:
                 data = await websocket.receive_text()
-                try:
-                    msg = _json.loads(data)
-                    await live_chat_manager.handle_message(ticket_id, user_id, msg)
-                except _json.JSONDecodeError:
-                    pass
+                await live_chat_manager.handle_incoming(ticket_id, user_id, data)
         except WebSocketDisconnect:
             await live_chat_manager.disconnect(websocket, ticket_id, user_id)
         except Exception:
@@ -26,7 +26,7 @@ from starlette.websockets import WebSocketState
 from jose import jwt, JWTError
 
 from app.config import settings
-from app.database import AsyncSessionLocal
+from app import database
 
 logger = logging.getLogger(__name__)
 
@@ -435,62 +435,64 @@ class YjsConnectionManager:
         if not state:
             return
 
-        if AsyncSessionLocal is None:
+        if database.AsyncSessionLocal is None:
             logger.warning("Database not initialised; cannot save Yjs state for doc %s", doc_id)
             return
 
-        try:
-            async with AsyncSessionLocal() as session:
-                # Attempt ORM-based save first
-                try:
-                    from app.models.staff.content_item import StaffCollabSession
-                    from sqlalchemy import select
-
-                    result = await session.execute(
-                        select(StaffCollabSession).where(
-                            StaffCollabSession.document_id == doc_id
-                        )
-                    )
-                    collab = result.scalar_one_or_none()
-
-                    if collab is not None:
-                        collab.yjs_state = state
-                        collab.updated_at = __import__("datetime").datetime.utcnow()
-                    else:
-                        collab = StaffCollabSession(
-                            document_id=doc_id,
-                            yjs_state=state,
+        # Persistence runs on the WebSocket pool
+        with database.use_workload(database.WEBSOCKET, "ws:yjs"):
+            try:
+                async with database.AsyncSessionLocal() as session:
+                    # Attempt ORM-based save first
+                    try:
+                        from app.models.staff.content_item import StaffCollabSession
+                        from sqlalchemy import select
+
+                        result = await session.execute(
+                            select(StaffCollabSession).where(
+                                StaffCollabSession.document_id == doc_id
+                            )
                         )
-                        session.add(collab)
-
-                    await session.commit()
-                    logger.debug("Yjs state saved (ORM) for doc %s (%d bytes)", doc_id, len(state))
-                    return
-
-                except (ImportError, AttributeError, Exception) as orm_exc:
-                    await session.rollback()
-                    logger.debug("ORM save unavailable (%s), trying raw SQL", orm_exc)
+                        collab = result.scalar_one_or_none()
+
+                        if collab is not None:
+                            collab.yjs_state = state
+                            collab.updated_at = __import__("datetime").datetime.utcnow()
+                        else:
+                            collab = StaffCollabSession(
+                                document_id=doc_id,
+                                yjs_state=state,
+                            )
+                            session.add(collab)
+
+                        await session.commit()
+                        logger.debug("Yjs state saved (ORM) for doc %s (%d bytes)", doc_id, len(state))
+                        return
+
+                    except (ImportError, AttributeError, Exception) as orm_exc:
+                        await session.rollback()
+                        logger.debug("ORM save unavailable (%s), trying raw SQL", orm_exc)
+
+                    # Fallback: raw SQL upsert
+                    try:
+                        from sqlalchemy import text as sa_text
+
+                        upsert_sql = sa_text("""
+                            INSERT INTO yjs_documents (document_id, yjs_state, updated_at)
+                            VALUES (:doc_id, :state, NOW())
+                            ON CONFLICT (document_id)
+                            DO UPDATE SET yjs_state = :state, updated_at = NOW()
+                        """)
+                        await session.execute(upsert_sql, {"doc_id": doc_id, "state": state})
+                        await session.commit()
+                        logger.debug("Yjs state saved (raw SQL) for doc %s (%d bytes)", doc_id, len(state))
+
+                    except Exception as sql_exc:
+                        await session.rollback()
+                        logger.error("Failed to persist Yjs state for doc %s: %s", doc_id, sql_exc)
 
-                # Fallback: raw SQL upsert
-                try:
-                    from sqlalchemy import text as sa_text
-
-                    upsert_sql = sa_text("""
-                        INSERT INTO yjs_documents (document_id, yjs_state, updated_at)
-                        VALUES (:doc_id, :state, NOW())
-                        ON CONFLICT (document_id)
-                        DO UPDATE SET yjs_state = :state, updated_at = NOW()
-                    """)
-                    await session.execute(upsert_sql, {"doc_id": doc_id, "state": state})
-                    await session.commit()
-                    logger.debug("Yjs state saved (raw SQL) for doc %s (%d bytes)", doc_id, len(state))
-
-                except Exception as sql_exc:
-                    await session.rollback()
-                    logger.error("Failed to persist Yjs state for doc %s: %s", doc_id, sql_exc)
-
-        except Exception as exc:
-            logger.error("Database session error while saving Yjs state for doc %s: %s", doc_id, exc)
+            except Exception as exc:
+                logger.error("Database session error while saving Yjs state for doc %s: %s", doc_id, exc)
 
     async def _load_state(self, doc_id: str) -> Optional[bytes]:
         """
@@ -498,62 +500,71 @@ class YjsConnectionManager:
 
         Returns raw bytes if found, otherwise ``None``.
         """
-        if AsyncSessionLocal is None:
+        if database.AsyncSessionLocal is None:
             return None
 
-        try:
-            async with AsyncSessionLocal() as session:
-                # Try ORM first
-                try:
-                    from app.models.staff.content_item import StaffCollabSession
-                    from sqlalchemy import select
-
-                    result = await session.execute(
-                        select(StaffCollabSession).where(
-                            StaffCollabSession.document_id == doc_id
+        # Persistence runs on the WebSocket pool
+        with database.use_workload(database.WEBSOCKET, "ws:yjs"):
+            try:
+                async with database.AsyncSessionLocal() as session:
+                    # Try ORM first
+                    try:
+                        from app.models.staff.content_item import StaffCollabSession
+                        from sqlalchemy import select
+
+                        result = await session.execute(
+                            select(StaffCollabSession).where(
+                                StaffCollabSession.document_id == doc_id
+                            )
                         )
-                    )
-                    collab = result.scalar_one_or_none()
-                    if collab and collab.yjs_state:
-                        logger.debug("Loaded Yjs state (ORM) for doc %s", doc_id)
-                        return collab.yjs_state
-                except (ImportError, AttributeError, Exception):
-                    pass
+                        collab = result.scalar_one_or_none()
+                        if collab and collab.yjs_state:
+                            logger.debug("Loaded Yjs state (ORM) for doc %s", doc_id)
+                            return collab.yjs_state
+                    except (ImportError, AttributeError, Exception):
+                        pass
+
+                    # Fallback: raw SQL
+                    try:
+                        from sqlalchemy import text as sa_text
+
+                        result = await session.execute(
+                            sa_text("SELECT yjs_state FROM yjs_documents WHERE document_id = :doc_id"),
+                            {"doc_id": doc_id},
+                        )
+                        row = result.first()
+                        if row and row[0]:
+                            logger.debug("Loaded Yjs state (raw SQL) for doc %s", doc_id)
+                            return bytes(row[0]) if not isinstance(row[0], bytes) else row[0]
+                    except Exception as exc:
+                        logger.debug("Could not load Yjs state from raw SQL: %s", exc)
 
-                # Fallback: raw SQL
-                try:
-                    from sqlalchemy import text as sa_text
-
-                    result = await session.execute(
-                        sa_text("SELECT yjs_state FROM yjs_documents WHERE document_id = :doc_id"),
-                        {"doc_id": doc_id},
-                    )
-                    row = result.first()
-                    if row and row[0]:
-                        logger.debug("Loaded Yjs state (raw SQL) for doc %s", doc_id)
-                        return bytes(row[0]) if not isinstance(row[0], bytes) else row[0]
-                except Exception as exc:
-                    logger.debug("Could not load Yjs state from raw SQL: %s", exc)
+            except Exception as exc:
+                logger.error("Failed to load Yjs state for doc %s: %s", doc_id, exc)
 
-        except Exception as exc:
-            logger.error("Failed to load Yjs state for doc %s: %s", doc_id, exc)
+            return None
 
-        return None
+        # ------------------------------------------------------------------
+        # Background auto-save
+        # ------------------------------------------------------------------
 
-    # ------------------------------------------------------------------
-    # Background auto-save
-    # ------------------------------------------------------------------
+    async def save_dirty_rooms(self) -> int:
+        """Persist every dirty document state; returns how many were saved."""
+        saved = 0
+        for doc_id, room in list(self._rooms.items()):
+            if room.dirty:
+                await self._persist_state(doc_id, room.yjs_state)
+                room.dirty = False
+                room.last_saved = time.monotonic()
+                saved += 1
+        return saved
 
     async def _auto_save_loop(self) -> None:
         """Periodically persist dirty document states."""
         try:
             while True:
                 await asyncio.sleep(SAVE_INTERVAL_SECONDS)
-                for doc_id, room in list(self._rooms.items()):
-                    if room.dirty:
-                        await self._persist_state(doc_id, room.yjs_state)
-                        room.dirty = False
-                        room.last_saved = time.monotonic()
+                await self.save_dirty_rooms()
         except asyncio.CancelledError:
             logger.info("Yjs auto-save loop cancelled")
         except Exception as exc:
@@ -344,6 +344,42 @@ class TestDeactivateUser:
         assert response.status_code == 403
 
 
+# =====================================================================
+# GET /users/export - export users
+# =====================================================================
+
+
+@pytest.mark.unit
+class TestExportUsers:
+    """Tests for the GET /users/export endpoint."""
+
+    @patch(
+        "app.api.v1.admin.users.audit_service.log_action",
+        new_callable=AsyncMock,
+    )
+    async def test_export_users_streams_csv(self, mock_audit, client, admin_headers):
+        """GET /export streams a CSV including every matching user."""
+        response = await client.get(f"{BASE_URL}/export", headers=admin_headers)
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/csv")
+        lines = response.text.strip().splitlines()
+        assert lines[0].startswith("ID,Email,Full Name,Role")
+        assert any("admin-test@tuhs.co.ke" in line for line in lines[1:])
+        mock_audit.assert_awaited_once()
+
+    async def test_export_users_rejects_unknown_format(self, client, admin_headers):
+        """GET /export validates the format parameter."""
+        response = await client.get(
+            f"{BASE_URL}/export", params={"format": "pdf"}, headers=admin_headers,
+        )
+        assert response.status_code == 422
+
+    async def test_export_users_denied_for_student(self, client, non_admin_headers):
+        """GET /export returns 403 for non-admin users."""
+        response = await client.get(f"{BASE_URL}/export", headers=non_admin_headers)
+        assert response.status_code == 403
+
+
 # =====================================================================
 # Cross-cutting access control tests
 # =====================================================================
@@ -315,6 +315,33 @@ class TestPayPalPayment:
             status.HTTP_404_NOT_FOUND
         ]
 
+    async def test_paypal_webhook_with_invalid_signature_is_rejected(self, client, db_session):
+        """A webhook PayPal does not verify is refused and not stored."""
+        from sqlalchemy import select
+        from app.models.webhook_event import WebhookEvent
+
+        headers = {
+            "paypal-auth-algo": "SHA256withRSA",
+            "paypal-transmission-id": "forged-123",
+            "paypal-transmission-time": "2026-01-01T00:00:00Z",
+            "paypal-transmission-sig": "forged",
+            "paypal-cert-url": "https://api.paypal.com/cert.pem",
+        }
+        with patch("app.api.v1.payments.settings.paypal_webhook_id", "WH-TEST"), \
+                patch(
+                    "app.api.v1.payments.PayPalClient.verify_webhook_signature",
+                    new=AsyncMock(return_value=False),
+                ):
+            response = await client.post(
+                "/api/v1/payments/paypal/webhook",
+                headers=headers,
+                json={"id": "WH-EVENT-1", "event_type": "PAYMENT.CAPTURE.COMPLETED"},
+            )
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        stored = await db_session.execute(select(WebhookEvent))
+        assert stored.scalars().all() == []
+
 
 @pytest.mark.payment
 @pytest.mark.unit
@@ -6,9 +6,14 @@ It includes:
 - Test database setup (async SQLite in-memory via aiosqlite for speed)
 - httpx AsyncClient configuration
 - Authentication fixtures (mock users, tokens)
+- In-memory Redis (FakeRedis / fake_redis)
 - Mock external service fixtures (AI providers, payment gateways)
 """
 
+import fnmatch
+import functools
+import inspect
+
 import pytest
 from typing import AsyncGenerator
 from unittest.mock import patch, AsyncMock, MagicMock
@@ -138,6 +143,11 @@ async def client(db_session: AsyncSession) -> AsyncGenerator[AsyncClient, None]:
     # Clear overrides
     app.dependency_overrides.clear()
 
+    # Jobs queued in-process by the requests (e.g. stored webhooks) stop
+    # with the test, as they would at application shutdown
+    from app.utils.job_queue import cancel_local_jobs
+    await cancel_local_jobs()
+
 
 @pytest.fixture
 async def test_user(db_session: AsyncSession) -> User:
@@ -314,6 +324,361 @@ def parent_headers(test_parent: User) -> dict:
     return {"Authorization": f"Bearer {access_token}"}
 
 
+# ── In-memory Redis ──
+# FakeRedis stands in for the async client returned by app.redis.get_redis().
+# Each data type has its own container (strings, lists, hashes, sets, zsets,
+# streams) so tests can assert on them directly; keys never expire, expiry
+# only records the last EXPIRE/EXPIREAT argument per key.
+#
+# Lua cannot run here: a test registers a Python rendition of each script it
+# exercises, fake_redis.scripts[SCRIPT] = fn, and EVAL, register_script() and
+# pipelined scripts call fn(redis, keys, args), which may be a coroutine.
+
+
+def _redis_command(method):
+    """Count a direct call as one round trip (a pipeline or script counts once)."""
+
+    @functools.wraps(method)
+    async def command(self, *args, **kwargs):
+        if not self._nested:
+            self.calls += 1
+        self._nested += 1
+        try:
+            return await method(self, *args, **kwargs)
+        finally:
+            self._nested -= 1
+
+    return command
+
+
+def _redis_range(items: list, start: int, end: int) -> list:
+    """Redis LRANGE/LTRIM slice: inclusive end, negative indexes from the tail."""
+    size = len(items)
+    start = max(start + size if start < 0 else start, 0)
+    end = end + size if end < 0 else end
+    return items[start:end + 1]
+
+
+class FakePipeline:
+    """Queues commands (and scripts) and runs them in order on execute()."""
+
+    def __init__(self, redis: "FakeRedis"):
+        self.redis = redis
+        self.ops = []
+
+    def __getattr__(self, name):
+        method = getattr(self.redis, name)
+
+        def queue(*args, **kwargs):
+            self.ops.append((method, args, kwargs))
+            return self
+        return queue
+
+    async def execute(self):
+        self.redis.calls += 1
+        self.redis._nested += 1
+        ops, self.ops = self.ops, []
+        try:
+            return [await method(*args, **kwargs) for method, args, kwargs in ops]
+        finally:
+            self.redis._nested -= 1
+
+
+class FakeScript:
+    """What FakeRedis.register_script() returns; callable like redis-py's Script."""
+
+    def __init__(self, redis: "FakeRedis", script: str):
+        self.redis = redis
+        self.script = script
+
+    async def __call__(self, keys=(), args=(), client=None):
+        if isinstance(client, FakePipeline):
+            client.ops.append((self.redis._run_script, (self.script, keys, args), {}))
+            return client
+        return await self.redis._run_script(self.script, keys, args)
+
+
+class FakeRedis:
+    """Just the commands the app uses; expiry and blocking are not simulated."""
+
+    def __init__(self):
+        self.strings = {}
+        self.lists = {}
+        self.hashes = {}
+        self.sets = {}
+        self.zsets = {}
+        self.streams = {}
+        self.expiry = {}
+        self.published = []
+        self.scripts = {}
+        self.calls = 0
+        self._nested = 0
+        self._delivered = {}
+        self._seq = 0
+
+    @property
+    def _keyspaces(self):
+        return (self.strings, self.lists, self.hashes, self.sets, self.zsets, self.streams)
+
+    @staticmethod
+    def _encode(value):
+        # redis-py sends numbers as their string form
+        return value if isinstance(value, (str, bytes)) else str(value)
+
+    def _exists(self, key) -> bool:
+        return any(key in space for space in self._keyspaces)
+
+    def pipeline(self, transaction=True) -> FakePipeline:
+        return FakePipeline(self)
+
+    def register_script(self, script: str) -> FakeScript:
+        return FakeScript(self, script)
+
+    @_redis_command
+    async def _run_script(self, script, keys, args):
+        if script not in self.scripts:
+            raise NotImplementedError(f"No Python rendition registered for script {script.strip()[:60]!r}")
+        result = self.scripts[script](self, list(keys), list(args))
+        return await result if inspect.isawaitable(result) else result
+
+    @_redis_command
+    async def eval(self, script, numkeys, *keys_and_args):
+        return await self._run_script(script, keys_and_args[:numkeys], keys_and_args[numkeys:])
+
+    # ── Keys ──
+
+    @_redis_command
+    async def delete(self, *keys):
+        removed = 0
+        for key in keys:
+            for space in self._keyspaces:
+                if key in space:
+                    del space[key]
+                    removed += 1
+            self.expiry.pop(key, None)
+        return removed
+
+    unlink = delete
+
+    @_redis_command
+    async def exists(self, *keys):
+        return sum(self._exists(key) for key in keys)
+
+    @_redis_command
+    async def expire(self, key, seconds, nx=False, xx=False, gt=False, lt=False):
+        if not self._exists(key) or (nx and key in self.expiry):
+            return False
+        self.expiry[key] = seconds
+        return True
+
+    @_redis_command
+    async def expireat(self, key, when):
+        if not self._exists(key):
+            return False
+        self.expiry[key] = when
+        return True
+
+    @_redis_command
+    async def rename(self, src, dst):
+        for space in self._keyspaces:
+            space.pop(dst, None)
+        self.expiry.pop(dst, None)
+        for space in self._keyspaces:
+            if src in space:
+                space[dst] = space.pop(src)
+        if src in self.expiry:
+            self.expiry[dst] = self.expiry.pop(src)
+        return True
+
+    async def scan_iter(self, match=None, count=None):
+        for space in self._keyspaces:
+            for key in list(space):
+                if match is None or fnmatch.fnmatchcase(key, match):
+                    yield key
+
+    # ── Strings ──
+
+    @_redis_command
+    async def get(self, key):
+        return self.strings.get(key)
+
+    @_redis_command
+    async def mget(self, keys, *args):
+        keys = [keys] if isinstance(keys, (str, bytes)) else list(keys)
+        return [self.strings.get(key) for key in [*keys, *args]]
+
+    @_redis_command
+    async def set(self, key, value, ex=None, px=None, nx=False, xx=False, keepttl=False):
+        exists = self._exists(key)
+        if (nx and exists) or (xx and not exists):
+            return None
+        self.strings[key] = self._encode(value)
+        if ex is not None or px is not None:
+            self.expiry[key] = ex if ex is not None else px / 1000
+        elif not keepttl:
+            self.expiry.pop(key, None)
+        return True
+
+    @_redis_command
+    async def incr(self, key, amount=1):
+        value = int(self.strings.get(key, 0)) + amount
+        self.strings[key] = str(value)
+        return value
+
+    # ── Lists ──
+
+    @_redis_command
+    async def rpush(self, key, *values):
+        items = self.lists.setdefault(key, [])
+        items.extend(self._encode(value) for value in values)
+        return len(items)
+
+    @_redis_command
+    async def ltrim(self, key, start, end):
+        kept = _redis_range(self.lists.get(key, []), start, end)
+        if kept:
+            self.lists[key] = kept
+        else:
+            self.lists.pop(key, None)
+        return True
+
+    @_redis_command
+    async def lrange(self, key, start, end):
+        return _redis_range(self.lists.get(key, []), start, end)
+
+    @_redis_command
+    async def lpop(self, key, count=None):
+        items = self.lists.get(key)
+        if not items:
+            return None
+        popped, rest = items[:count or 1], items[count or 1:]
+        if rest:
+            self.lists[key] = rest
+        else:
+            del self.lists[key]
+        return popped if count is not None else popped[0]
+
+    # ── Hashes ──
+
+    @_redis_command
+    async def hset(self, key, field=None, value=None, mapping=None):
+        values = dict(mapping or {})
+        if field is not None:
+            values[field] = value
+        fields = self.hashes.setdefault(key, {})
+        added = len(values.keys() - fields.keys())
+        fields.update({name: self._encode(v) for name, v in values.items()})
+        return added
+
+    @_redis_command
+    async def hsetnx(self, key, field, value):
+        fields = self.hashes.setdefault(key, {})
+        if field in fields:
+            return 0
+        fields[field] = self._encode(value)
+        return 1
+
+    @_redis_command
+    async def hgetall(self, key):
+        return dict(self.hashes.get(key, {}))
+
+    # ── Sets ──
+
+    @_redis_command
+    async def sadd(self, key, *members):
+        members_set = self.sets.setdefault(key, set())
+        added = len(set(members) - members_set)
+        members_set.update(members)
+        return added
+
+    @_redis_command
+    async def srem(self, key, *members):
+        members_set = self.sets.get(key, set())
+        removed = len(members_set & set(members))
+        members_set.difference_update(members)
+        if not members_set:
+            self.sets.pop(key, None)
+        return removed
+
+    @_redis_command
+    async def smembers(self, key):
+        return set(self.sets.get(key, set()))
+
+    # ── Sorted sets ──
+
+    @_redis_command
+    async def zadd(self, key, mapping):
+        board = self.zsets.setdefault(key, {})
+        added = len(mapping.keys() - board.keys())
+        board.update(mapping)
+        return added
+
+    @_redis_command
+    async def zincrby(self, key, amount, member):
+        board = self.zsets.setdefault(key, {})
+        board[member] = board.get(member, 0) + amount
+        return board[member]
+
+    # ── Streams (one consumer group per stream) ──
+
+    @_redis_command
+    async def xadd(self, name, fields, id="*", maxlen=None, approximate=True):
+        self._seq += 1
+        entry_id = f"{self._seq}-0"
+        self.streams.setdefault(name, []).append((entry_id, dict(fields)))
+        return entry_id
+
+    @_redis_command
+    async def xgroup_create(self, name, groupname, id="$", mkstream=False):
+        self.streams.setdefault(name, [])
+        return True
+
+    @_redis_command
+    async def xreadgroup(self, groupname, consumername, streams, count=None, block=None, noack=False):
+        reply = []
+        for name in streams:
+            seen = self._delivered.setdefault(name, set())
+            batch = [(i, f) for i, f in self.streams.get(name, []) if i not in seen][:count]
+            seen.update(i for i, _ in batch)
+            if batch:
+                reply.append((name, batch))
+        return reply
+
+    @_redis_command
+    async def xautoclaim(self, name, groupname, consumername, min_idle_time, start_id="0-0", count=None, justid=False):
+        # Nothing is ever idle long enough to be reclaimed
+        return ["0-0", [], []]
+
+    @_redis_command
+    async def xclaim(self, name, groupname, consumername, min_idle_time, message_ids, justid=False):
+        return list(message_ids) if justid else []
+
+    @_redis_command
+    async def xack(self, name, groupname, *ids):
+        return len(ids)
+
+    @_redis_command
+    async def xdel(self, name, *ids):
+        entries = self.streams.get(name, [])
+        self.streams[name] = [(i, f) for i, f in entries if i not in ids]
+        return len(entries) - len(self.streams[name])
+
+    # ── Pub/sub ──
+
+    @_redis_command
+    async def publish(self, channel, message):
+        self.published.append((channel, message))
+        return 0
+
+
+@pytest.fixture
+def fake_redis():
+    """A FakeRedis installed as app.redis.get_redis() for the test."""
+    redis = FakeRedis()
+    with patch("app.redis.get_redis", return_value=redis):
+        yield redis
+
+
 # Mock AI Provider Responses
 @pytest.fixture
 def mock_gemini_response():
@@ -0,0 +1,128 @@
+"""
+Connection pool usage under concurrent AI chats.
+
+Simulates AI endpoints: each request reads through its session, waits on
+a (simulated) AI provider, then writes the reply; requests arrive evenly
+over one AI call. With ``held`` the
+session keeps its connection through the wait, as request sessions did;
+with ``released`` it calls release_db() first. Alongside the chats, a
+probe runs a quick query every few milliseconds, standing in for the
+rest of the API.
+
+For each concurrency level prints the peak number of checked-out
+connections, pool timeouts among chats and probes, and probe p95
+latency. Held connections grow with concurrent chats until the pool is
+exhausted; released ones stay flat at the few requests between phases.
+
+Defaults to a throwaway SQLite file; pass --database-url to run against a
+scratch PostgreSQL database.
+
+Run from backend/:
+    python -m tests.load.bench_ai_pool --pool-size 20 --concurrency 5 10 20 40 80
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from sqlalchemy import text
+from sqlalchemy.exc import TimeoutError as PoolTimeout
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from app.database import release_db
+
+
+async def _chat(session_factory, release: bool, ai_seconds: float, delay: float) -> bool:
+    await asyncio.sleep(delay)
+    try:
+        async with session_factory() as db:
+            await db.execute(text("SELECT count(*) FROM bench_ai_replies"))
+            if release:
+                await release_db(db)
+            await asyncio.sleep(ai_seconds)
+            await db.execute(text("INSERT INTO bench_ai_replies (body) VALUES (:body)"), {"body": "reply"})
+            await db.commit()
+        return True
+    except PoolTimeout:
+        return False
+
+
+async def _probe(session_factory, stop: asyncio.Event, latencies: list, timeouts: list) -> None:
+    while not stop.is_set():
+        start = time.perf_counter()
+        try:
+            async with session_factory() as db:
+                await db.execute(text("SELECT 1"))
+            latencies.append(time.perf_counter() - start)
+        except PoolTimeout:
+            timeouts.append(1)
+        await asyncio.sleep(0.005)
+
+
+async def _sample(engine, stop: asyncio.Event, peak: list) -> None:
+    while not stop.is_set():
+        peak[0] = max(peak[0], engine.pool.checkedout())
+        await asyncio.sleep(0.002)
+
+
+async def _run(engine, session_factory, mode: str, concurrency: int, ai_seconds: float):
+    stop = asyncio.Event()
+    peak, latencies, probe_timeouts = [0], [], []
+    background = [
+        asyncio.create_task(_sample(engine, stop, peak)),
+        asyncio.create_task(_probe(session_factory, stop, latencies, probe_timeouts)),
+    ]
+    # Arrivals spread over one AI call, so every chat overlaps the others
+    results = await asyncio.gather(*[
+        _chat(session_factory, mode == "released", ai_seconds, ai_seconds * n / concurrency)
+        for n in range(concurrency)
+    ])
+    stop.set()
+    await asyncio.gather(*background)
+
+    latencies.sort()
+    p95 = latencies[int(len(latencies) * 0.95)] * 1000 if latencies else float("nan")
+    print(f"{mode:<9} {concurrency:>5}  peak checked out {peak[0]:>3}"
+          f"  chat timeouts {results.count(False):>3}  probe timeouts {len(probe_timeouts):>3}"
+          f"  probe p95 {p95:8.2f} ms")
+
+
+async def main(database_url: str, pool_size: int, pool_timeout: float, levels, ai_seconds: float) -> None:
+    engine = create_async_engine(
+        database_url,
+        poolclass=AsyncAdaptedQueuePool,
+        pool_size=pool_size,
+        max_overflow=0,
+        pool_timeout=pool_timeout,
+    )
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    async with engine.begin() as conn:
+        await conn.execute(text(
+            "CREATE TABLE IF NOT EXISTS bench_ai_replies (body TEXT)"
+        ))
+
+    print(f"pool size {pool_size}, simulated AI call {ai_seconds:.1f} s")
+    for mode in ("held", "released"):
+        for concurrency in levels:
+            await _run(engine, session_factory, mode, concurrency, ai_seconds)
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--database-url")
+    parser.add_argument("--pool-size", type=int, default=20)
+    parser.add_argument("--pool-timeout", type=float, default=1.0)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[5, 10, 20, 40, 80])
+    parser.add_argument("--ai-seconds", type=float, default=2.0, help="simulated AI call duration")
+    args = parser.parse_args()
+
+    url = args.database_url
+    if url is None:
+        fd, path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+        url = f"sqlite+aiosqlite:///{path}"
+    asyncio.run(main(url, args.pool_size, args.pool_timeout, args.concurrency, args.ai_seconds))
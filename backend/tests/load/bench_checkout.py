@@ -0,0 +1,167 @@
+"""
+Flash-sale checkout stress test.
+
+Seeds one product with limited stock and many customers who each have it
+in their cart, then runs every checkout concurrently, each on its own
+session/connection. Prints checkouts per second and verifies that stock
+was never oversold: orders placed == units reserved == starting stock,
+and inventory ends at zero.
+
+Defaults to a throwaway SQLite file; pass --database-url to run against a
+scratch PostgreSQL database (tables are created if missing).
+
+Run from backend/:
+    python -m tests.load.bench_checkout --customers 500 --stock 100
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+import uuid
+from dataclasses import dataclass
+from decimal import Decimal
+
+from sqlalchemy import func, select
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+import tests.conftest  # noqa: F401  (SQLite shims for JSONB/UUID/ARRAY columns)
+from app.database import Base
+from app.models.store import Cart, CartItem, Order, Product, ShippingAddress
+from app.services.store_service import StoreService
+
+
+@dataclass
+class FlashSaleResult:
+    customers: int
+    stock: int
+    succeeded: int
+    sold_out: int
+    orders: int
+    inventory_left: int
+    seconds: float
+
+    @property
+    def oversold(self) -> int:
+        return max(0, self.orders - self.stock) + max(0, -self.inventory_left)
+
+    @property
+    def checkouts_per_second(self) -> float:
+        return self.customers / self.seconds if self.seconds else 0.0
+
+
+async def _seed(session_factory, customers: int, stock: int):
+    product_id = uuid.uuid4()
+    buyers = []
+    async with session_factory() as db:
+        db.add(Product(
+            id=product_id,
+            name="Flash Sale Backpack",
+            slug=f"flash-sale-{product_id.hex[:8]}",
+            description="Limited stock",
+            price=Decimal("1500.00"),
+            images=[],
+            inventory_count=stock,
+            is_active=True,
+        ))
+        for i in range(customers):
+            user_id, address_id, cart_id = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+            db.add(ShippingAddress(
+                id=address_id, user_id=user_id, full_name=f"Buyer {i}",
+                phone="0700000000", address_line_1="1 Moi Avenue",
+                city="Nairobi", county="Nairobi",
+            ))
+            db.add(Cart(id=cart_id, user_id=user_id))
+            db.add(CartItem(cart_id=cart_id, product_id=product_id, quantity=1,
+                            unit_price=Decimal("1500.00")))
+            buyers.append((user_id, address_id))
+        await db.commit()
+    return product_id, buyers
+
+
+async def _checkout(session_factory, user_id, address_id) -> bool:
+    # SQLite reports writer contention as "database is locked"; retry like a client would
+    for _ in range(20):
+        async with session_factory() as db:
+            try:
+                await StoreService.create_order_from_cart(db, user_id, address_id)
+                await db.commit()
+                return True
+            except ValueError:
+                await db.rollback()
+                return False
+            except OperationalError:
+                await db.rollback()
+                await asyncio.sleep(0.01)
+    raise RuntimeError("checkout kept failing with lock errors")
+
+
+async def flash_sale(session_factory, customers: int, stock: int) -> FlashSaleResult:
+    """Run ``customers`` concurrent checkouts for a product with ``stock`` units."""
+    product_id, buyers = await _seed(session_factory, customers, stock)
+
+    start = time.perf_counter()
+    outcomes = await asyncio.gather(*[
+        _checkout(session_factory, user_id, address_id) for user_id, address_id in buyers
+    ])
+    elapsed = time.perf_counter() - start
+
+    async with session_factory() as db:
+        inventory_left = (await db.execute(
+            select(Product.inventory_count).where(Product.id == product_id)
+        )).scalar_one()
+        orders = (await db.execute(
+            select(func.count()).select_from(Order)
+            .where(Order.user_id.in_([user_id for user_id, _ in buyers]))
+        )).scalar_one()
+
+    succeeded = sum(outcomes)
+    return FlashSaleResult(
+        customers=customers,
+        stock=stock,
+        succeeded=succeeded,
+        sold_out=customers - succeeded,
+        orders=orders,
+        inventory_left=inventory_left,
+        seconds=elapsed,
+    )
+
+
+def make_session_factory(database_url: str):
+    if database_url.startswith("sqlite"):
+        engine = create_async_engine(database_url, connect_args={"timeout": 30})
+    else:
+        engine = create_async_engine(database_url, pool_size=20, max_overflow=20)
+    return engine, async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+
+async def main(database_url: str, customers: int, stock: int) -> None:
+    engine, session_factory = make_session_factory(database_url)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    result = await flash_sale(session_factory, customers, stock)
+    await engine.dispose()
+
+    print(f"customers: {result.customers}  stock: {result.stock}")
+    print(f"orders placed:       {result.orders}")
+    print(f"sold out responses:  {result.sold_out}")
+    print(f"inventory left:      {result.inventory_left}")
+    print(f"oversold units:      {result.oversold}")
+    print(f"checkouts/second:    {result.checkouts_per_second:8.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--customers", type=int, default=500)
+    parser.add_argument("--stock", type=int, default=100)
+    parser.add_argument("--database-url", default=None)
+    args = parser.parse_args()
+
+    url = args.database_url
+    if url is None:
+        path = os.path.join(tempfile.mkdtemp(), "flash_sale.db")
+        url = f"sqlite+aiosqlite:///{path}"
+    asyncio.run(main(url, args.customers, args.stock))
@@ -0,0 +1,157 @@
+"""
+Knowledge base suggestion relevance and latency benchmark.
+
+Seeds a synthetic knowledge base: articles grouped by topic, each with a
+few words only it uses, chunked the way the service chunks them. Ticket
+queries mention two of one article's own words among topic words and
+noise. Each query is answered by a lexical ranker (in-memory BM25,
+standing in for ts_rank_cd), a vector ranker (brute-force cosine over
+chunk embeddings from the local embedding backend, standing in for the
+HNSW index) and their reciprocal rank fusion through HybridRetriever.
+Prints recall@k, MRR and p50/p95 latency per strategy.
+
+Runs offline: no database, Redis or embedding API. The PostgreSQL
+rankers themselves are not exercised; latency here is ranking + fusion.
+
+Run from backend/:
+    python -m tests.load.bench_kb_retrieval --articles 2000 --queries 300
+"""
+
+import argparse
+import asyncio
+import math
+import random
+import string
+import time
+from collections import Counter, defaultdict
+
+from app.services.embeddings import LocalEmbeddingBackend
+from app.services.staff.kb_retrieval import Candidate, HybridRetriever
+from app.services.staff.knowledge_base_service import CHUNK_SIZE, _split_into_chunks
+
+
+def _words(rng: random.Random, count: int):
+    return ["".join(rng.choices(string.ascii_lowercase, k=rng.randint(4, 9))) for _ in range(count)]
+
+
+def _seed(rng: random.Random, articles: int, topics: int, body_words: int):
+    common = _words(rng, 4000)
+    topic_words = [_words(rng, 25) for _ in range(topics)]
+    kb = []
+    for i in range(articles):
+        topic = rng.randrange(topics)
+        own = _words(rng, 4)
+        body = [rng.choice(common) if rng.random() < 0.7 else rng.choice(topic_words[topic])
+                for _ in range(body_words)]
+        for word in own:
+            for _ in range(3):
+                body[rng.randrange(body_words)] = word
+        title = " ".join(rng.sample(topic_words[topic], 3) + own[:1])
+        kb.append({"id": str(i), "title": title, "body": " ".join(body), "topic": topic, "own": own})
+    return kb, common, topic_words
+
+
+def _queries(rng: random.Random, kb, common, topic_words, count: int):
+    queries = []
+    for _ in range(count):
+        article = rng.choice(kb)
+        words = (rng.sample(article["own"], 2) + rng.sample(topic_words[article["topic"]], 3)
+                 + rng.sample(common, 6))
+        rng.shuffle(words)
+        queries.append((" ".join(words), article["id"]))
+    return queries
+
+
+class _BM25:
+    def __init__(self, kb, k1: float = 1.2, b: float = 0.75):
+        self.k1, self.b = k1, b
+        self.docs = {a["id"]: Counter(f"{a['title']} {a['title']} {a['body']}".split()) for a in kb}
+        self.lengths = {i: sum(c.values()) for i, c in self.docs.items()}
+        self.avg = sum(self.lengths.values()) / len(self.lengths)
+        self.postings = defaultdict(list)
+        for doc_id, counts in self.docs.items():
+            for term, tf in counts.items():
+                self.postings[term].append((doc_id, tf))
+        self.articles = {a["id"]: a for a in kb}
+
+    async def rank(self, query: str, limit: int):
+        n = len(self.docs)
+        scores = defaultdict(float)
+        for term in set(query.split()):
+            postings = self.postings.get(term, ())
+            if not postings:
+                continue
+            idf = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+            for doc_id, tf in postings:
+                norm = self.k1 * (1 - self.b + self.b * self.lengths[doc_id] / self.avg)
+                scores[doc_id] += idf * tf * (self.k1 + 1) / (tf + norm)
+        top = sorted(scores, key=scores.get, reverse=True)[:limit]
+        return [Candidate(i, self.articles[i]["title"], i, self.articles[i]["body"][:200]) for i in top]
+
+
+class _BruteForceVectors:
+    def __init__(self, kb, backend: LocalEmbeddingBackend):
+        self.backend = backend
+        self.chunks = []
+        for article in kb:
+            for chunk in _split_into_chunks(article["body"], CHUNK_SIZE):
+                self.chunks.append((article, chunk, backend.vector(chunk)))
+
+    async def rank(self, query: str, limit: int):
+        q = self.backend.vector(query)
+        scored = sorted(
+            self.chunks,
+            key=lambda item: sum(a * b for a, b in zip(q, item[2])),
+            reverse=True,
+        )[:limit * 3]
+        return [Candidate(a["id"], a["title"], a["id"], chunk[:200]) for a, chunk, _ in scored]
+
+
+async def _evaluate(name: str, search, queries, k: int):
+    hits, reciprocal, latencies = 0, 0.0, []
+    for query, relevant in queries:
+        start = time.perf_counter()
+        ranked = await search(query)
+        latencies.append(time.perf_counter() - start)
+        ids = [r["article_id"] if isinstance(r, dict) else r.article_id for r in ranked]
+        ids = list(dict.fromkeys(ids))[:k]
+        if relevant in ids:
+            hits += 1
+            reciprocal += 1.0 / (ids.index(relevant) + 1)
+    latencies.sort()
+    p50 = latencies[len(latencies) // 2] * 1000
+    p95 = latencies[int(len(latencies) * 0.95)] * 1000
+    print(f"{name:<10} recall@{k} {hits / len(queries):6.3f}  MRR {reciprocal / len(queries):6.3f}"
+          f"  p50 {p50:7.2f} ms  p95 {p95:7.2f} ms")
+
+
+async def main(articles: int, topics: int, queries_count: int, body_words: int, k: int) -> None:
+    rng = random.Random(7)
+    kb, common, topic_words = _seed(rng, articles, topics, body_words)
+    queries = _queries(rng, kb, common, topic_words, queries_count)
+
+    start = time.perf_counter()
+    lexical = _BM25(kb)
+    vector = _BruteForceVectors(kb, LocalEmbeddingBackend())
+    print(f"articles: {articles}  chunks: {len(vector.chunks)}  queries: {queries_count}"
+          f"  index build: {time.perf_counter() - start:.1f} s")
+
+    hybrid = HybridRetriever({"vector": vector.rank, "lexical": lexical.rank})
+    await _evaluate("lexical", lambda q: lexical.rank(q, 20), queries, k)
+    await _evaluate("vector", lambda q: vector.rank(q, 20), queries, k)
+
+    async def fused(q):
+        results, _ = await hybrid.search(q, limit=k)
+        return results
+    await _evaluate("hybrid", fused, queries, k)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--articles", type=int, default=500)
+    parser.add_argument("--topics", type=int, default=40)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--body-words", type=int, default=400)
+    parser.add_argument("-k", type=int, default=5, help="suggestions returned")
+    args = parser.parse_args()
+    asyncio.run(main(args.articles, args.topics, args.queries, args.body_words, args.k))
@@ -0,0 +1,123 @@
+"""
+Middleware overhead benchmark.
+
+Drives a trivial endpoint in-process (no network, no server) through the
+legacy BaseHTTPMiddleware stack and through RequestPipelineMiddleware and
+prints the mean per-request cost of each. Rate limiting is disabled so the
+numbers measure middleware overhead, not Redis round-trips.
+
+Run from backend/:
+    python -m tests.load.bench_middleware --requests 5000
+"""
+
+import argparse
+import asyncio
+import time
+
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+from app.config import settings
+from app.middleware.audit_middleware import AuditMiddleware
+from app.middleware.cookie_auth import CookieAuthMiddleware
+from app.middleware.csrf import CSRFMiddleware
+from app.middleware.error_logging_middleware import ErrorLoggingMiddleware
+from app.middleware.pipeline import RequestPipelineMiddleware
+from app.middleware.rate_limit import RateLimitMiddleware
+from app.middleware.security_headers import SecurityHeadersMiddleware
+from app.utils.security import create_access_token
+
+
+async def _ping(request):
+    return JSONResponse({"ok": True})
+
+
+def _cors() -> Middleware:
+    return Middleware(CORSMiddleware, allow_origins=settings.cors_origins_list)
+
+
+def legacy_app() -> Starlette:
+    # Starlette applies the list outermost-first, i.e. the reverse of add_middleware()
+    return Starlette(
+        routes=[Route("/api/v1/ping", _ping)],
+        middleware=[
+            Middleware(AuditMiddleware),
+            Middleware(ErrorLoggingMiddleware),
+            _cors(),
+            Middleware(RateLimitMiddleware),
+            Middleware(CSRFMiddleware),
+            Middleware(CookieAuthMiddleware),
+            Middleware(SecurityHeadersMiddleware),
+        ],
+    )
+
+
+def pipeline_app() -> Starlette:
+    return Starlette(
+        routes=[Route("/api/v1/ping", _ping)],
+        middleware=[_cors(), Middleware(RequestPipelineMiddleware)],
+    )
+
+
+async def _run(app, requests: int, headers) -> float:
+    scope_base = {
+        "type": "http",
+        "method": "GET",
+        "path": "/api/v1/ping",
+        "raw_path": b"/api/v1/ping",
+        "query_string": b"",
+        "headers": headers,
+        "client": ("127.0.0.1", 5000),
+        "server": ("bench", 80),
+        "scheme": "http",
+        "http_version": "1.1",
+        "root_path": "",
+    }
+
+    async def send(message):
+        pass
+
+    async def one_request():
+        delivered = False
+
+        async def receive():
+            nonlocal delivered
+            if not delivered:
+                delivered = True
+                return {"type": "http.request", "body": b"", "more_body": False}
+            # Like a real server: nothing more arrives until the client goes away
+            await asyncio.Event().wait()
+
+        await app(dict(scope_base), receive, send)
+
+    # Warm-up (route compilation, lazy imports)
+    for _ in range(100):
+        await one_request()
+
+    start = time.perf_counter()
+    for _ in range(requests):
+        await one_request()
+    return (time.perf_counter() - start) / requests
+
+
+async def main(requests: int) -> None:
+    settings.rate_limit_enabled = False
+    token = create_access_token({"sub": "bench-user", "role": "student", "email": "b@example.com"})
+    headers = [(b"cookie", f"access_token={token}".encode()), (b"user-agent", b"bench")]
+
+    legacy = await _run(legacy_app(), requests, headers)
+    fused = await _run(pipeline_app(), requests, headers)
+
+    print(f"requests per variant: {requests}")
+    print(f"legacy BaseHTTPMiddleware stack: {legacy * 1e6:8.1f} us/request")
+    print(f"fused ASGI pipeline:             {fused * 1e6:8.1f} us/request")
+    print(f"saved per request:               {(legacy - fused) * 1e6:8.1f} us")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=5000)
+    asyncio.run(main(parser.parse_args().requests))
@@ -0,0 +1,150 @@
+"""
+XP ingestion throughput benchmark.
+
+Seeds a set of students, then fires XP events at them from many concurrent
+producers two ways: inline with GamificationService.award_xp() (one
+transaction per event) and through the write-behind XP ledger (events
+queued and applied in per-student batches). Prints the sustained events
+per second for each and checks both paths end with the same XP totals.
+
+Defaults to a throwaway SQLite file; pass --database-url to run against a
+scratch PostgreSQL database (tables are created if missing).
+
+Run from backend/:
+    python -m tests.load.bench_xp_ledger --students 200 --events 5000
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+import uuid
+from datetime import date
+from unittest.mock import patch
+
+from sqlalchemy import func, select
+from sqlalchemy.exc import OperationalError
+
+import tests.conftest  # noqa: F401  (SQLite shims for JSONB/UUID/ARRAY columns)
+from app.database import Base
+from app.models.student import Student
+from app.models.student_gamification import StudentLevel
+from app.models.user import User
+from app.services.student.gamification_service import GamificationService
+from app.services.student.xp_ledger import XPLedger
+from tests.load.bench_checkout import make_session_factory
+
+SOURCES = ["login", "lesson_complete", "quiz_complete", "challenge_complete"]
+
+
+async def _seed(session_factory, students: int):
+    ids = []
+    async with session_factory() as db:
+        for i in range(students):
+            user_id, student_id = uuid.uuid4(), uuid.uuid4()
+            db.add(User(id=user_id, email=f"bench-{user_id.hex[:12]}@example.com",
+                        password_hash="x", role="student", profile_data={}))
+            db.add(Student(id=student_id, user_id=user_id, admission_number=f"B{user_id.hex[:12]}",
+                           grade_level=f"Grade {i % 9 + 1}", enrollment_date=date(2026, 1, 5)))
+            ids.append(student_id)
+        await db.commit()
+    return ids
+
+
+def _workload(student_ids, events: int):
+    rng = random.Random(42)
+    return [(rng.choice(student_ids), rng.choice(SOURCES)) for _ in range(events)]
+
+
+async def _total_xp(session_factory, student_ids) -> int:
+    async with session_factory() as db:
+        return (await db.execute(
+            select(func.coalesce(func.sum(StudentLevel.total_xp), 0))
+            .where(StudentLevel.student_id.in_(student_ids))
+        )).scalar_one()
+
+
+async def run_inline(session_factory, workload, concurrency: int) -> float:
+    """Award every event with its own transaction; returns seconds taken."""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def award(student_id, source):
+        async with semaphore:
+            # SQLite reports writer contention as "database is locked"; retry like a client would
+            for _ in range(50):
+                async with session_factory() as db:
+                    try:
+                        await GamificationService(db).award_xp(student_id, source, source)
+                        return
+                    except OperationalError:
+                        await db.rollback()
+                        await asyncio.sleep(0.01)
+            raise RuntimeError("award_xp kept failing with lock errors")
+
+    start = time.perf_counter()
+    await asyncio.gather(*[award(student_id, source) for student_id, source in workload])
+    return time.perf_counter() - start
+
+
+async def run_ledger(session_factory, workload, concurrency: int) -> float:
+    """Queue every event on the XP ledger and wait for it to drain."""
+    ledger = XPLedger()
+    chunks = [workload[i::concurrency] for i in range(concurrency)]
+
+    async def produce(chunk):
+        for student_id, source in chunk:
+            await ledger.submit(ledger.new_row(student_id=student_id, source=source, description=source))
+
+    with patch("app.database.AsyncSessionLocal", session_factory):
+        start = time.perf_counter()
+        ledger.start()
+        await asyncio.gather(*[produce(chunk) for chunk in chunks])
+        await ledger.stop()
+        return time.perf_counter() - start
+
+
+async def main(database_url: str, students: int, events: int, concurrency: int) -> None:
+    engine, session_factory = make_session_factory(database_url)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    # No Redis or WebSocket clients here; keep pushes out of the timing
+    with patch("app.services.student.xp_ledger.publish_xp_results", new=_noop), \
+            patch("app.services.student.gamification_service.AIOrchestrator"):
+        inline_ids = await _seed(session_factory, students)
+        ledger_ids = await _seed(session_factory, students)
+        inline_work = _workload(inline_ids, events)
+        ledger_work = [(ledger_ids[inline_ids.index(s)], source) for s, source in inline_work]
+
+        inline_seconds = await run_inline(session_factory, inline_work, concurrency)
+        ledger_seconds = await run_ledger(session_factory, ledger_work, concurrency)
+
+    inline_xp = await _total_xp(session_factory, inline_ids)
+    ledger_xp = await _total_xp(session_factory, ledger_ids)
+    await engine.dispose()
+
+    print(f"students: {students}  events: {events}  producers: {concurrency}")
+    print(f"inline award_xp:  {events / inline_seconds:10.1f} events/second")
+    print(f"XP ledger:        {events / ledger_seconds:10.1f} events/second")
+    print(f"XP totals match:  {inline_xp == ledger_xp} ({inline_xp} / {ledger_xp})")
+
+
+async def _noop(*args, **kwargs):
+    return None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--students", type=int, default=200)
+    parser.add_argument("--events", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--database-url", default=None)
+    args = parser.parse_args()
+
+    url = args.database_url
+    if url is None:
+        path = os.path.join(tempfile.mkdtemp(), "xp_ledger.db")
+        url = f"sqlite+aiosqlite:///{path}"
+    asyncio.run(main(url, args.students, args.events, args.concurrency))
@@ -316,7 +316,7 @@ class TestErrorLoggingMiddlewareDispatch:
 class TestLogErrorMethod:
     """Tests for ErrorLoggingMiddleware._log_error() database interaction."""
 
-    @patch("app.middleware.error_logging_middleware.AsyncSessionLocal")
+    @patch("app.database.AsyncSessionLocal")
     async def test_log_error_writes_to_database(self, mock_session_local):
         """_log_error should create an ErrorLog entry and commit."""
         app = MagicMock()
@@ -346,7 +346,7 @@ class TestLogErrorMethod:
         mock_session.add.assert_called_once()
         mock_session.commit.assert_awaited_once()
 
-    @patch("app.middleware.error_logging_middleware.AsyncSessionLocal", None)
+    @patch("app.database.AsyncSessionLocal", None)
     async def test_log_error_handles_no_database(self):
         """_log_error should silently skip if AsyncSessionLocal is None."""
         app = MagicMock()
@@ -368,7 +368,7 @@ class TestLogErrorMethod:
             user_agent="TestBrowser/1.0",
         )
 
-    @patch("app.middleware.error_logging_middleware.AsyncSessionLocal")
+    @patch("app.database.AsyncSessionLocal")
     async def test_log_error_catches_database_errors(self, mock_session_local):
         """_log_error should catch and log database exceptions without propagating."""
         app = MagicMock()
@@ -0,0 +1,180 @@
+"""
+Request Pipeline Middleware Tests
+
+Tests for app/middleware/pipeline.py:
+- Security headers on every response
+- Cookie token injection and single token verification via scope state
+- CSRF rejection for cookie-authenticated cross-origin mutations
+- Rate limit short-circuit and headers
+- Streaming responses forwarded chunk by chunk
+- Error and audit logging hooks
+"""
+
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from starlette.routing import Route
+
+from app.middleware.pipeline import RequestPipelineMiddleware
+from app.utils.rate_limiter import RateLimitDecision
+from app.utils.security import create_access_token, verify_request_token
+
+
+async def _whoami(request: Request):
+    token = request.headers.get("authorization", "")[7:]
+    payload = verify_request_token(request, token) if token else {}
+    return JSONResponse({"sub": payload.get("sub"), "state_user": getattr(request.state, "user_id", None)})
+
+
+async def _boom(request: Request):
+    return PlainTextResponse("down", status_code=503)
+
+
+async def _admin_update(request: Request):
+    await request.body()
+    return JSONResponse({"ok": True})
+
+
+def _build_app(routes=None):
+    app = Starlette(routes=routes or [
+        Route("/whoami", _whoami),
+        Route("/whoami", _whoami, methods=["POST"]),
+        Route("/boom", _boom),
+        Route("/api/v1/admin/users/reset", _admin_update, methods=["POST"]),
+    ])
+    return RequestPipelineMiddleware(app)
+
+
+async def _call(app, path, method="GET", headers=None, body=b""):
+    """Drive the ASGI app directly and return (start message, body messages)."""
+    scope = {
+        "type": "http",
+        "method": method,
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "headers": [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()],
+        "client": ("10.0.0.1", 1234),
+        "server": ("test", 80),
+        "scheme": "http",
+        "http_version": "1.1",
+        "root_path": "",
+    }
+    messages = []
+    sent_body = False
+
+    async def receive():
+        nonlocal sent_body
+        if not sent_body:
+            sent_body = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        messages.append(message)
+
+    await app(scope, receive, send)
+    return messages[0], [m for m in messages[1:] if m["type"] == "http.response.body"]
+
+
+@pytest.fixture(autouse=True)
+def _no_rate_limit_or_logs():
+    with patch("app.middleware.pipeline.rate_limiter.check", new_callable=AsyncMock) as rl, \
+         patch("app.middleware.pipeline.write_error_log", new_callable=AsyncMock) as err, \
+         patch("app.middleware.pipeline.write_audit_log", new_callable=AsyncMock) as audit:
+        rl.return_value = RateLimitDecision(True, 100, 99)
+        yield {"rate_limit": rl, "error_log": err, "audit_log": audit}
+
+
+@pytest.mark.unit
+class TestRequestPipeline:
+    """Tests for RequestPipelineMiddleware."""
+
+    async def test_adds_security_and_rate_limit_headers(self):
+        start, _ = await _call(_build_app(), "/whoami")
+        headers = dict(start["headers"])
+
+        assert headers[b"x-frame-options"] == b"DENY"
+        assert b"content-security-policy" in headers
+        assert headers[b"x-ratelimit-remaining"] == b"99"
+
+    async def test_cookie_token_is_injected_and_verified_once(self):
+        token = create_access_token({"sub": "user-1", "role": "admin", "email": "a@b.c"})
+
+        # The dependency-side verify_token must not run: the payload comes from scope state
+        with patch("app.utils.security.verify_token") as dependency_verify:
+            start, body = await _call(
+                _build_app(), "/whoami", headers={"cookie": f"access_token={token}"}
+            )
+
+        assert start["status"] == 200
+        assert b'"sub":"user-1"' in body[0]["body"]
+        assert b'"state_user":"user-1"' in body[0]["body"]
+        dependency_verify.assert_not_called()
+
+    async def test_rejects_cross_origin_cookie_mutation(self):
+        token = create_access_token({"sub": "user-1"})
+        start, _ = await _call(
+            _build_app(), "/whoami", method="POST",
+            headers={"cookie": f"access_token={token}", "origin": "https://evil.example"},
+        )
+
+        assert start["status"] == 403
+        assert dict(start["headers"])[b"x-frame-options"] == b"DENY"
+
+    async def test_rate_limited_request_short_circuits(self, _no_rate_limit_or_logs):
+        _no_rate_limit_or_logs["rate_limit"].return_value = RateLimitDecision(False, 100, 0, 4)
+
+        start, _ = await _call(_build_app(), "/whoami")
+
+        headers = dict(start["headers"])
+        assert start["status"] == 429
+        assert headers[b"retry-after"] == b"4"
+
+    async def test_streaming_body_is_not_buffered(self):
+        async def stream(request):
+            async def chunks():
+                for i in range(3):
+                    yield f"data: {i}\n\n"
+            return StreamingResponse(chunks(), media_type="text/event-stream")
+
+        app = _build_app([Route("/events", stream)])
+        _, body = await _call(app, "/events")
+
+        payloads = [m["body"] for m in body if m["body"]]
+        assert payloads == [b"data: 0\n\n", b"data: 1\n\n", b"data: 2\n\n"]
+
+    async def test_logs_server_errors(self, _no_rate_limit_or_logs):
+        start, _ = await _call(_build_app(), "/boom")
+
+        assert start["status"] == 503
+        _no_rate_limit_or_logs["error_log"].assert_awaited_once()
+        assert _no_rate_limit_or_logs["error_log"].call_args.kwargs["level"] == "ERROR"
+
+    async def test_logs_and_reraises_exceptions(self, _no_rate_limit_or_logs):
+        async def explode(request):
+            raise RuntimeError("kaboom")
+
+        app = _build_app([Route("/explode", explode)])
+        with pytest.raises(RuntimeError):
+            await _call(app, "/explode")
+
+        kwargs = _no_rate_limit_or_logs["error_log"].call_args.kwargs
+        assert kwargs["level"] == "CRITICAL"
+        assert kwargs["error_type"] == "RuntimeError"
+
+    async def test_audits_admin_mutations_with_body(self, _no_rate_limit_or_logs):
+        token = create_access_token({"sub": "admin-1", "role": "admin", "email": "a@b.c"})
+        start, _ = await _call(
+            _build_app(), "/api/v1/admin/users/reset", method="POST",
+            headers={"authorization": f"Bearer {token}"}, body=b'{"password": "x"}',
+        )
+
+        assert start["status"] == 200
+        kwargs = _no_rate_limit_or_logs["audit_log"].call_args.kwargs
+        assert kwargs["actor_id"] == "admin-1"
+        assert kwargs["status_code"] == 200
+        assert kwargs["raw_body"] == b'{"password": "x"}'
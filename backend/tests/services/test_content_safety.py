@@ -0,0 +1,151 @@
+"""
+Content Safety Scanner Tests
+
+Tests for app/services/content_safety.py:
+- Normalisation folds accents, homoglyphs, leetspeak and zero-width characters
+- Keywords match whole words only and agree with a brute-force search
+- Risk score and severity follow the matched filters
+- Filters are loaded from the database and flagged content is queued
+- Deferred screening runs only for committed writes
+- Committing a keyword filter change recompiles the scanner
+"""
+
+import random
+import uuid
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from sqlalchemy import select
+
+from app import database
+from app.models.admin.operations import KeywordFilter
+from app.models.staff.moderation_queue import StaffModerationItem
+from app.models.user import User
+from app.services import content_safety
+from app.services.content_safety import SafetyScanner, normalize, screen_content
+from tests.conftest import TestingSessionLocal
+
+FILTERS = [
+    ("idiot", "profanity", "medium"),
+    ("kill yourself", "hate_speech", "critical"),
+    ("shut up", "custom", "low"),
+]
+
+BACKENDS = [
+    False,
+    pytest.param(True, marks=pytest.mark.skipif(
+        content_safety.ahocorasick is None, reason="pyahocorasick not installed",
+    )),
+]
+
+
+@pytest.fixture(autouse=True)
+def fresh_scanner():
+    content_safety._scanner = SafetyScanner()
+    content_safety._loaded = False
+    yield
+    content_safety._scanner = SafetyScanner()
+    content_safety._loaded = False
+
+
+@pytest.mark.unit
+class TestSafetyScanner:
+    """Tests for normalisation and matching."""
+
+    def test_normalize_folds_evasions(self):
+        assert normalize("Kîll  y0ur$elf!!") == " kill yourself "
+        assert normalize("іd​i0t") == " idiot "
+
+    @pytest.mark.parametrize("native", BACKENDS)
+    def test_matches_whole_words_through_evasions(self, native):
+        scanner = SafetyScanner(FILTERS, native=native)
+
+        result = scanner.scan("Just K1LL  y0urs3lf, you 1d!ot")
+
+        assert [m.keyword for m in result.matches] == ["kill yourself", "idiot"]
+        assert (result.severity, result.category) == ("critical", "hate_speech")
+        assert result.risk_score == 1.0
+        assert scanner.scan("the idiotic idiom of shutters") is None
+        assert scanner.scan("") is None
+
+    def test_automaton_agrees_with_brute_force(self):
+        rng = random.Random(7)
+        words = ["ab", "abc", "bca", "cab", "a", "bb", "abcab"]
+        scanner = SafetyScanner([(w, "custom", "low") for w in words], native=False)
+
+        for _ in range(200):
+            text = " ".join(rng.choice(["a", "b", "c", "ab", "bca", "cab", "abcab"]) for _ in range(8))
+            found = {m.keyword for m in (scanner.scan(text) or content_safety.ScanResult([])).matches}
+            expected = {w for w in words if f" {w} " in f" {text} "}
+            assert found == expected, text
+
+    def test_duplicate_keywords_keep_the_highest_severity(self):
+        scanner = SafetyScanner([("idiot", "custom", "low"), ("IDIOT", "profanity", "high")])
+
+        result = scanner.scan("idiot")
+
+        assert scanner.size == 1
+        assert (result.severity, result.risk_score) == ("high", 0.75)
+
+
+@pytest.mark.unit
+class TestScreening:
+    """Tests for loading filters and queueing moderation items."""
+
+    async def _admin(self, db_session) -> User:
+        admin = User(email=f"{uuid.uuid4().hex[:10]}@example.com", password_hash="x",
+                     role="admin", profile_data={})
+        db_session.add(admin)
+        await db_session.commit()
+        return admin
+
+    async def _add_filters(self, db_session, admin, filters):
+        # Add rows directly: the test engine shares one connection, so the
+        # hook's reload must not overlap add_keyword_filter()'s refresh
+        db_session.add_all([
+            KeywordFilter(keyword=keyword, category=category, severity=severity, created_by=admin.id)
+            for keyword, category, severity in filters
+        ])
+        await db_session.commit()
+        for task in list(database._commit_tasks):
+            await task
+
+    @patch("app.database.AsyncSessionLocal", TestingSessionLocal)
+    async def test_flagged_content_is_queued(self, db_session):
+        admin = await self._admin(db_session)
+        await self._add_filters(db_session, admin, FILTERS)
+        content_id = uuid.uuid4()
+
+        result = await screen_content("forum_post", content_id, admin.id, "you idiot", title="Hello")
+        clean = await screen_content("forum_post", uuid.uuid4(), admin.id, "thanks for the help")
+
+        assert result is not None and clean is None
+        item = (await db_session.execute(select(StaffModerationItem))).scalar_one()
+        assert (item.content_id, item.priority, item.ai_risk_score) == (content_id, "medium", 0.5)
+        assert item.ai_flags == ["profanity"]
+        assert item.extra_data["keywords"] == ["idiot"]
+
+    async def test_deferred_screening_waits_for_commit(self, db_session):
+        with patch.object(content_safety, "screen_content", AsyncMock()) as screen:
+            await db_session.execute(select(KeywordFilter.id))
+            content_safety.screen_after_commit(db_session, "forum_post", uuid.uuid4(), uuid.uuid4(), "rolled back")
+            await db_session.rollback()
+
+            content_id = uuid.uuid4()
+            await db_session.execute(select(KeywordFilter.id))
+            content_safety.screen_after_commit(db_session, "forum_reply", content_id, None, "kept")
+            await db_session.commit()
+            for task in list(database._commit_tasks):
+                await task
+
+        screen.assert_awaited_once_with("forum_reply", content_id, None, "kept", title=None)
+
+    @patch("app.database.AsyncSessionLocal", TestingSessionLocal)
+    async def test_filter_changes_recompile_the_scanner(self, db_session):
+        admin = await self._admin(db_session)
+        await content_safety.load_safety_filters()
+        assert content_safety.get_scanner().scan("you idiot") is None
+
+        await self._add_filters(db_session, admin, FILTERS[:1])
+
+        assert content_safety.get_scanner().scan("you idiot") is not None
@@ -0,0 +1,200 @@
+"""
+CoPilot Context and Session Counter Tests
+
+Tests for app/services/copilot_context.py and the Redis counters in
+app/services/student/session_limit_service.py:
+- The rendered system prompt is reused until data it shows is committed
+- Unrelated user updates keep the snapshot
+- Session counters are seeded from StudentSessionLog and incremented in Redis
+- flush_session_counters() writes dirty counters back; without Redis the log row is used
+"""
+
+import asyncio
+import uuid
+from datetime import date
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.orm import selectinload
+
+from app import database
+from app.models.student import Student
+from app.models.student_gamification import StudentLevel
+from app.models.student_mastery import StudentSessionLog
+from app.models.user import User
+from app.services import copilot_context
+from app.services.copilot_service import CopilotService
+from app.services.student import session_limit_service
+from app.services.student.session_limit_service import StudentSessionLimitService, flush_session_counters
+
+
+class _FakeCache:
+    def __init__(self):
+        self.store = {}
+        self.tags = {}
+
+    async def get(self, key):
+        return self.store.get(key)
+
+    async def set(self, key, value, ttl=None, tags=()):
+        self.store[key] = value
+        for tag in tags:
+            self.tags.setdefault(tag, set()).add(key)
+
+    async def invalidate(self, *tags):
+        for tag in tags:
+            for key in self.tags.pop(tag, ()):
+                self.store.pop(key, None)
+
+
+async def _increment(redis, keys, args):
+    """Python rendition of session_limit_service._INCREMENT."""
+    (key, dirty), (minutes, messages, breaks, block, ttl) = keys, args
+    counters = redis.hashes.get(key)
+    if not counters:
+        return None
+
+    def incr(field, amount):
+        counters[field] = str(int(counters.get(field, 0)) + amount)
+        return int(counters[field])
+
+    if minutes > 0:
+        total = incr("total_minutes", minutes)
+        incr("core_tutoring_minutes", minutes)
+        if total // block > (total - minutes) // block:
+            incr("pomodoro_completed", 1)
+    incr("message_count", messages)
+    incr("break_count", breaks)
+    await redis.expire(key, ttl)
+    await redis.sadd(dirty, key)
+    return [item for pair in counters.items() for item in pair]
+
+
+@pytest.fixture
+def fake_cache():
+    cache = _FakeCache()
+    with patch.object(copilot_context, "cache_get", cache.get), \
+            patch.object(copilot_context, "cache_set", cache.set), \
+            patch.object(copilot_context, "invalidate_tags", cache.invalidate):
+        yield cache
+
+
+@pytest.fixture
+def fake_redis(fake_redis):
+    fake_redis.scripts[session_limit_service._INCREMENT] = _increment
+    return fake_redis
+
+
+async def _student_user(db_session) -> User:
+    user_id = uuid.uuid4()
+    db_session.add_all([
+        User(id=user_id, email=f"{user_id.hex[:10]}@example.com", password_hash="x",
+             role="student", profile_data={"full_name": "Amani"}),
+        Student(user_id=user_id, admission_number=user_id.hex[:12], grade_level="Grade 6",
+                enrollment_date=date(2026, 1, 5)),
+    ])
+    await db_session.commit()
+    return (await db_session.execute(
+        select(User).where(User.id == user_id).options(selectinload(User.student_profile))
+    )).scalar_one()
+
+
+async def _settle():
+    await asyncio.gather(*database._commit_tasks)
+
+
+@pytest.mark.unit
+class TestContextSnapshot:
+    """Tests for the cached system prompt."""
+
+    async def test_prompt_is_reused_until_student_data_changes(self, db_session, fake_cache):
+        user = await _student_user(db_session)
+        service = CopilotService()
+        build = AsyncMock(return_value="Grade Level: Grade 6")
+
+        with patch.object(service, "_build_data_context", build):
+            first = await service._system_prompt(db_session, user)
+            await _settle()
+            assert await service._system_prompt(db_session, user) == first
+            assert build.await_count == 1
+            assert "Grade Level: Grade 6" in first
+
+            db_session.add(StudentLevel(student_id=user.student_profile.id, current_level=2, total_xp=160))
+            await db_session.commit()
+            await _settle()
+            await service._system_prompt(db_session, user)
+
+        assert build.await_count == 2
+
+    async def test_unrelated_user_update_keeps_snapshot(self, db_session, fake_cache):
+        user = await _student_user(db_session)
+        service = CopilotService()
+        with patch.object(service, "_build_data_context", AsyncMock(return_value="")) as build:
+            await service._system_prompt(db_session, user)
+            await _settle()
+
+            user.is_verified = True
+            await db_session.commit()
+            await _settle()
+            await service._system_prompt(db_session, user)
+            assert build.await_count == 1
+
+            user.profile_data = {"full_name": "Amani W."}
+            await db_session.commit()
+            await _settle()
+            await service._system_prompt(db_session, user)
+            assert build.await_count == 2
+
+
+async def _log(db_session, student_id):
+    return (await db_session.execute(
+        select(StudentSessionLog).where(StudentSessionLog.student_id == student_id)
+    )).scalar_one_or_none()
+
+
+@pytest.mark.unit
+class TestSessionCounters:
+    """Tests for the Redis session-limit counters."""
+
+    async def test_counters_seed_from_log_and_flush_back(self, db_session, fake_redis):
+        student_id = (await _student_user(db_session)).student_profile.id
+        db_session.add(StudentSessionLog(student_id=student_id, date=date.today(),
+                                         total_minutes=22, message_count=22))
+        await db_session.commit()
+        service = StudentSessionLimitService(db_session)
+
+        assert (await service.check_session_limits(student_id))["minutes_used"] == 22
+        await service.log_interaction(student_id)
+        status = await service.log_interaction(student_id)
+        assert (status["minutes_used"], status["pomodoro_completed"], status["suggest_break"]) == (24, 0, True)
+
+        status = await service.log_interaction(student_id)
+        assert (status["minutes_used"], status["message_count"], status["pomodoro_completed"]) == (25, 25, 1)
+        assert (await _log(db_session, student_id)).total_minutes == 22
+
+        assert await flush_session_counters(db_session) == 1
+        log = await _log(db_session, student_id)
+        await db_session.refresh(log)
+        assert (log.total_minutes, log.message_count, log.pomodoro_completed) == (25, 25, 1)
+        assert not await fake_redis.smembers("session:usage:dirty")
+
+    async def test_checks_do_not_create_log_rows(self, db_session, fake_redis):
+        student_id = (await _student_user(db_session)).student_profile.id
+        service = StudentSessionLimitService(db_session)
+
+        assert (await service.check_session_limits(student_id))["can_continue"]
+        await service.log_break(student_id)
+
+        assert (await service.get_daily_stats(student_id))["break_count"] == 1
+        assert (await db_session.execute(select(func.count(StudentSessionLog.id)))).scalar() == 0
+
+    async def test_without_redis_the_log_row_is_used(self, db_session):
+        student_id = (await _student_user(db_session)).student_profile.id
+        service = StudentSessionLimitService(db_session)
+
+        with patch("app.redis.get_redis", side_effect=RuntimeError("not initialized")):
+            status = await service.log_interaction(student_id, minutes_elapsed=25)
+
+        assert (status["minutes_used"], status["pomodoro_completed"]) == (25, 1)
+        assert (await _log(db_session, student_id)).message_count == 1
@@ -0,0 +1,191 @@
+"""
+Course Catalog Tests
+
+Tests for app/services/course_catalog.py:
+- Pages are cut with limit + 1 rows and carry a cursor for the next one
+- Cursors round-trip and malformed cursors/sorts are rejected
+- Cards carry the pre-joined instructor name
+- Pages are served from the cache on repeat calls
+- The invalidation hook fires on card edits, not on counter updates
+- GET /courses/ sends an ETag and answers a matching If-None-Match with 304
+
+Course.grade_levels is a PostgreSQL ARRAY that SQLite cannot bind, so
+the database is mocked as in test_course_service.py.
+"""
+
+import uuid
+from datetime import datetime, timedelta
+from decimal import Decimal
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from fastapi import status
+
+from app import database
+from app.models.course import Course
+from app.services import course_catalog
+from app.services.course_catalog import (
+    PLATFORM_INSTRUCTOR,
+    catalog_page,
+    decode_cursor,
+    encode_cursor,
+    etag_matches,
+)
+from app.utils.cache import local_cache
+
+
+@pytest.fixture(autouse=True)
+def clean_local_cache():
+    local_cache.clear()
+    yield
+    local_cache.clear()
+
+
+def _row(i: int, **overrides):
+    values = {
+        "id": uuid.uuid4(),
+        "course_code": None,
+        "title": f"Course {i}",
+        "description": "A catalog test course",
+        "learning_area": "Mathematics",
+        "grade_levels": ["Grade 4"],
+        "thumbnail_url": None,
+        "instructor_id": None,
+        "is_platform_created": True,
+        "price": Decimal("100.00"),
+        "currency": "KES",
+        "is_published": True,
+        "is_featured": False,
+        "enrollment_count": 10 - i,
+        "average_rating": Decimal("4.50"),
+        "total_reviews": 3,
+        "estimated_duration_hours": None,
+        "created_at": datetime(2026, 9, 1) - timedelta(days=i),
+        "updated_at": datetime(2026, 9, 1),
+        "published_at": None,
+        "instructor_email": None,
+        "instructor_profile": None,
+    }
+    values.update(overrides)
+    return SimpleNamespace(**values)
+
+
+def _mock_db(total: int, rows):
+    db = MagicMock()
+    count = MagicMock()
+    count.scalar_one.return_value = total
+    page = MagicMock()
+    page.all.return_value = rows
+    db.execute = AsyncMock(side_effect=[count, page])
+    return db
+
+
+@pytest.mark.unit
+class TestCatalogPages:
+    """Tests for the card projection and keyset pagination."""
+
+    async def test_page_has_cursor_for_the_next_one(self):
+        rows = [_row(i) for i in range(3)]
+
+        page = await catalog_page(_mock_db(5, rows), sort="newest", limit=2)
+
+        assert [card["title"] for card in page["courses"]] == ["Course 0", "Course 1"]
+        assert (page["total"], page["has_more"]) == (5, True)
+        assert decode_cursor(page["next_cursor"], "newest") == (rows[1].created_at, rows[1].id)
+        assert page["etag"].startswith('"')
+
+    async def test_cards_carry_instructor_name(self):
+        instructor_id = uuid.uuid4()
+        rows = [
+            _row(0, instructor_id=instructor_id, instructor_email="t@example.com",
+                 instructor_profile={"full_name": "Amina Otieno"}),
+            _row(1),
+        ]
+
+        page = await catalog_page(_mock_db(2, rows), limit=5)
+
+        assert [card["instructor_name"] for card in page["courses"]] == ["Amina Otieno", PLATFORM_INSTRUCTOR]
+        assert page["next_cursor"] is None
+        assert page["courses"][0]["price"] == "100.00" and "syllabus" not in page["courses"][0]
+
+    async def test_repeat_calls_are_served_from_cache(self):
+        db = _mock_db(1, [_row(0)])
+
+        first = await catalog_page(db, learning_area="Mathematics")
+        second = await catalog_page(db, learning_area="Mathematics")
+
+        assert first == second
+        assert db.execute.await_count == 2  # one count and one page query
+
+    async def test_cursors_round_trip_and_reject_garbage(self):
+        course_id = uuid.uuid4()
+
+        assert decode_cursor(encode_cursor(Decimal("4.50"), course_id), "rating") == (Decimal("4.50"), course_id)
+        with pytest.raises(ValueError):
+            decode_cursor("not-a-cursor", "newest")
+        with pytest.raises(ValueError):
+            await catalog_page(MagicMock(), sort="cheapest")
+
+    def test_etag_matching(self):
+        assert etag_matches('"abc", W/"def"', '"def"')
+        assert etag_matches("*", '"abc"')
+        assert not etag_matches(None, '"abc"')
+
+
+@pytest.mark.unit
+class TestCatalogInvalidation:
+    """Tests for the after-flush hook that marks the catalog as changed."""
+
+    def _flush(self, new=(), dirty=()):
+        session = SimpleNamespace(new=list(new), deleted=[], dirty=list(dirty), info={})
+        course_catalog._after_flush(session, None)
+        return session.info.get(course_catalog._INFO_KEY, False)
+
+    def test_new_courses_and_card_edits_mark_the_catalog(self):
+        edited = Course()
+        edited.is_published = False
+
+        assert self._flush(new=[Course()])
+        assert self._flush(dirty=[edited])
+
+    def test_counter_updates_do_not(self):
+        course = Course()
+        course.enrollment_count = 11
+        course.average_rating = Decimal("4.8")
+
+        assert not self._flush(dirty=[course])
+
+    async def test_commit_invalidates_the_catalog_tag(self):
+        session = SimpleNamespace(new=[Course()], deleted=[], dirty=[], info={})
+        course_catalog._after_flush(session, None)
+        with patch("app.services.course_catalog.invalidate_tags", new=AsyncMock()) as invalidate:
+            database._run_commit_callbacks(session)
+            for task in list(database._commit_tasks):
+                await task
+
+        invalidate.assert_awaited_once_with(course_catalog.CATALOG_TAG)
+        assert session.info == {}
+
+
+@pytest.mark.unit
+class TestCatalogEndpoint:
+    """Tests for conditional GET on the course list."""
+
+    async def test_etag_round_trip(self, client):
+        page = {"courses": [], "total": 0, "limit": 20, "skip": 0,
+                "has_more": False, "next_cursor": None, "etag": '"abc123"'}
+        with patch("app.api.v1.courses.catalog_page", new=AsyncMock(return_value=page)):
+            response = await client.get("/api/v1/courses/")
+            repeat = await client.get("/api/v1/courses/", headers={"If-None-Match": '"abc123"'})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.headers["etag"] == '"abc123"'
+        assert "etag" not in response.json()
+        assert repeat.status_code == status.HTTP_304_NOT_MODIFIED
+
+    async def test_bad_cursor_is_a_400(self, client):
+        with patch("app.api.v1.courses.catalog_page", new=AsyncMock(side_effect=ValueError("Invalid cursor"))):
+            response = await client.get("/api/v1/courses/", params={"cursor": "nope"})
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
@@ -431,8 +431,10 @@ class TestUpdateEnrollmentProgress:
     async def test_update_progress_marks_lesson_complete(self):
         """update_enrollment_progress should mark the lesson and update progress."""
         mock_db = AsyncMock()
+        mock_db.info = {}
         enrollment_id = uuid.uuid4()
         enrollment = _make_mock_enrollment(id=enrollment_id)
+        enrollment.completed_lessons = []
 
         mock_result = MagicMock()
         mock_result.scalar_one_or_none.return_value = enrollment
@@ -445,6 +447,8 @@ class TestUpdateEnrollmentProgress:
         enrollment.mark_lesson_complete.assert_called_once_with("lesson_01")
         enrollment.update_progress.assert_called_once_with(10)
         mock_db.commit.assert_awaited_once()
+        # Lesson XP waits on the commit (a mock session never fires it)
+        assert [event["source"] for event in mock_db.info["xp_events"]] == ["lesson_complete"]
 
     async def test_update_progress_returns_none_for_missing(self):
         """update_enrollment_progress should return None if enrollment not found."""
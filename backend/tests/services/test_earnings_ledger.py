@@ -0,0 +1,148 @@
+"""
+Earnings Ledger Tests
+
+Tests for app/services/instructor/earnings_ledger.py and the balance
+reads in app/services/instructor/earnings_service.py:
+- Earning and payout inserts/status changes move the instructor's balance
+- request_payout() checks the materialised balance
+- The bucketed breakdown matches the one aggregated from earning rows
+- reconcile_earnings_ledger() rebuilds instructors changed behind the ORM
+"""
+
+import uuid
+from datetime import datetime
+from decimal import Decimal
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from sqlalchemy import update
+
+from app.models.instructor.instructor_earnings import InstructorEarning, InstructorPayout
+from app.models.user import User
+from app.services.instructor import earnings_ledger, earnings_service
+
+
+async def _instructor(db_session) -> uuid.UUID:
+    user_id = uuid.uuid4()
+    db_session.add(User(id=user_id, email=f"{user_id.hex[:10]}@example.com", password_hash="x",
+                        role="instructor", profile_data={}))
+    await db_session.commit()
+    return user_id
+
+
+def _earning(instructor_id, net, status="confirmed", earning_type="course_sale", course_id=None, created_at=None):
+    return InstructorEarning(
+        instructor_id=instructor_id,
+        course_id=course_id,
+        earning_type=earning_type,
+        gross_amount=Decimal(net) * 2,
+        platform_fee_pct=Decimal("30.00"),
+        partner_fee_pct=Decimal("20.00"),
+        net_amount=Decimal(net),
+        status=status,
+        created_at=created_at or datetime.utcnow(),
+    )
+
+
+def _payout(instructor_id, amount, status="requested"):
+    return InstructorPayout(instructor_id=instructor_id, amount=Decimal(amount), payout_method="mpesa_b2c",
+                            payout_details={"phone_number": "254700000000"}, status=status)
+
+
+@pytest.mark.unit
+class TestBalances:
+    """Tests for the materialised instructor balance."""
+
+    async def test_earnings_and_payouts_move_the_balance(self, db_session):
+        instructor = await _instructor(db_session)
+        pending = _earning(instructor, "100.00", status="pending")
+        db_session.add_all([pending, _earning(instructor, "40.00")])
+        await db_session.commit()
+
+        balance = await earnings_ledger.get_balance(db_session, instructor)
+        assert (balance["total_earned"], balance["pending_earnings"]) == (Decimal("40.00"), Decimal("100.00"))
+
+        pending.status = "confirmed"
+        payout = _payout(instructor, "90.00")
+        db_session.add(payout)
+        await db_session.commit()
+        assert await earnings_service.get_available_balance(db_session, instructor) == Decimal("50.00")
+
+        payout.status = "failed"
+        await db_session.commit()
+        balance = await earnings_ledger.get_balance(db_session, instructor)
+        assert (balance["available"], balance["pending_earnings"]) == (Decimal("140.00"), Decimal("0.00"))
+
+    async def test_rolled_back_earning_leaves_balance(self, db_session):
+        instructor = await _instructor(db_session)
+        db_session.add(_earning(instructor, "25.00"))
+        await db_session.flush()
+        await db_session.rollback()
+
+        assert (await earnings_ledger.get_balance(db_session, instructor))["available"] == Decimal("0")
+
+    async def test_request_payout_checks_ledger_balance(self, db_session):
+        instructor = await _instructor(db_session)
+        db_session.add(_earning(instructor, "60.00"))
+        await db_session.commit()
+        gateway = AsyncMock(return_value={"success": True})
+
+        with patch.object(earnings_service, "_process_payout_gateway", gateway):
+            with pytest.raises(ValueError):
+                await earnings_service.request_payout(db_session, instructor, Decimal("80.00"),
+                                                      "mpesa_b2c", {"phone_number": "254700000000"})
+            payout = await earnings_service.request_payout(db_session, instructor, Decimal("45.00"),
+                                                           "mpesa_b2c", {"phone_number": "254700000000"})
+
+        assert payout.status == "processing"
+        assert await earnings_service.get_available_balance(db_session, instructor) == Decimal("15.00")
+
+
+@pytest.mark.unit
+class TestBreakdownAndReconcile:
+    """Tests for the monthly buckets and reconciliation."""
+
+    async def test_bucketed_breakdown_matches_raw_rows(self, db_session):
+        instructor = await _instructor(db_session)
+        course_id = uuid.uuid4()
+        db_session.add_all([
+            _earning(instructor, "30.00", course_id=course_id, created_at=datetime(2026, 8, 3)),
+            _earning(instructor, "20.00", status="pending", course_id=course_id),
+            _earning(instructor, "5.00", earning_type="bonus"),
+        ])
+        await db_session.commit()
+
+        bucketed = await earnings_service.get_earnings_breakdown(db_session, instructor)
+        raw = await earnings_service.get_earnings_breakdown(
+            db_session, instructor, end_date=datetime(2100, 1, 1),
+        )
+
+        assert bucketed == raw
+        assert bucketed["by_type"]["course_sales"] == 50.0
+        assert bucketed["by_type"]["bonuses"] == 5.0
+        assert bucketed["by_course"] == [{"course_id": str(course_id), "amount": 50.0, "count": 2}]
+
+        august = await earnings_service.get_earnings_breakdown(
+            db_session, instructor, start_date=datetime(2026, 8, 1), end_date=datetime(2026, 8, 31),
+        )
+        assert august["total_net"] == 30.0
+
+    async def test_reconcile_rebuilds_changes_made_behind_the_orm(self, db_session):
+        instructor = await _instructor(db_session)
+        other = await _instructor(db_session)
+        db_session.add_all([_earning(instructor, "70.00", status="pending"), _earning(other, "10.00")])
+        await db_session.commit()
+
+        await db_session.execute(
+            update(InstructorEarning)
+            .where(InstructorEarning.instructor_id == instructor)
+            .values(status="confirmed")
+        )
+        await db_session.commit()
+        assert (await earnings_ledger.get_balance(db_session, instructor))["available"] == Decimal("0")
+
+        assert await earnings_ledger.reconcile_earnings_ledger(db_session) == 1
+        assert (await earnings_ledger.get_balance(db_session, instructor))["available"] == Decimal("70.00")
+        breakdown = await earnings_service.get_earnings_breakdown(db_session, instructor)
+        assert breakdown["total_net"] == 70.0
+        assert await earnings_ledger.reconcile_earnings_ledger(db_session) == 0
@@ -0,0 +1,178 @@
+"""
+Embedding Pipeline Tests
+
+Tests for app/services/embeddings.py and the knowledge base chunk
+pipeline:
+- The local backend is deterministic, normalised and ranks related text higher
+- Texts are embedded in batches
+- Repeated search queries are served from the LRU cache
+- Unchanged chunks keep their vectors; only changed chunks are embedded
+- A failed embedding run is rolled back and raised so the job retries;
+  no chunk is written without a vector
+"""
+
+import math
+import uuid
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from app.services import embeddings
+from app.services.embeddings import (
+    EMBEDDING_DIMENSION,
+    EmbeddingBackend,
+    LocalEmbeddingBackend,
+    content_hash,
+    embed_query,
+)
+
+
+class _RecordingBackend(EmbeddingBackend):
+    model = "test-model"
+    batch_size = 2
+
+    def __init__(self):
+        self.batches = []
+
+    async def _embed_batch(self, texts):
+        self.batches.append(list(texts))
+        return [[float(len(t))] + [0.0] * (EMBEDDING_DIMENSION - 1) for t in texts]
+
+
+def _cosine(a, b):
+    return sum(x * y for x, y in zip(a, b))
+
+
+@pytest.fixture
+def backend():
+    backend = _RecordingBackend()
+    embeddings._query_cache.clear()
+    with patch.object(embeddings, "get_embedding_backend", return_value=backend):
+        yield backend
+
+
+@pytest.mark.unit
+class TestLocalBackend:
+    """Tests for the offline hashing backend."""
+
+    def test_vectors_are_deterministic_and_normalised(self):
+        local = LocalEmbeddingBackend()
+        vector = local.vector("How do I reset my password?")
+
+        assert len(vector) == EMBEDDING_DIMENSION
+        assert vector == LocalEmbeddingBackend().vector("How do I reset my password?")
+        assert math.isclose(math.sqrt(sum(v * v for v in vector)), 1.0)
+
+    def test_related_text_scores_higher(self):
+        local = LocalEmbeddingBackend()
+        query = local.vector("reset password")
+
+        related = local.vector("To reset your password open the login page")
+        unrelated = local.vector("Course certificates are issued after the final exam")
+        assert _cosine(query, related) > _cosine(query, unrelated)
+
+    def test_empty_text_gives_zero_vector(self):
+        assert not any(LocalEmbeddingBackend().vector("  "))
+
+    def test_auto_uses_local_without_api_key(self):
+        with patch.object(embeddings.settings, "kb_embedding_backend", "auto"), \
+                patch.object(embeddings.settings, "openai_api_key", None):
+            assert isinstance(embeddings.get_embedding_backend(), LocalEmbeddingBackend)
+
+        with patch.object(embeddings.settings, "kb_embedding_backend", "openai"), \
+                patch.object(embeddings.settings, "openai_api_key", None):
+            assert embeddings.get_embedding_backend() is None
+
+
+@pytest.mark.unit
+class TestBatchingAndCache:
+    """Tests for batched embedding and the query cache."""
+
+    async def test_texts_are_embedded_in_batches(self, backend):
+        vectors = await backend.embed(["a", "bb", "ccc"])
+
+        assert backend.batches == [["a", "bb"], ["ccc"]]
+        assert [v[0] for v in vectors] == [1.0, 2.0, 3.0]
+
+    async def test_repeated_queries_hit_the_cache(self, backend):
+        first = await embed_query("reset password")
+        second = await embed_query("reset   password")
+
+        assert first == second
+        assert backend.batches == [["reset password"]]
+
+    async def test_failed_query_embedding_returns_none(self, backend):
+        with patch.object(backend, "_embed_batch", side_effect=RuntimeError("down")):
+            assert await embed_query("anything") is None
+
+
+def _result(rows=(), scalars=()):
+    result = MagicMock()
+    result.all.return_value = list(rows)
+    result.scalars.return_value = iter(scalars)
+    return result
+
+
+@pytest.mark.unit
+class TestArticleEmbeddings:
+    """Tests for knowledge_base_service._generate_embeddings."""
+
+    async def test_only_changed_chunks_are_embedded(self, backend):
+        from app.services.staff import knowledge_base_service as kb
+
+        kept = SimpleNamespace(
+            id=uuid.uuid4(), content_hash=content_hash("unchanged", backend.model),
+            chunk_index=1, has_vector=True,
+        )
+        removed = SimpleNamespace(
+            id=uuid.uuid4(), content_hash=content_hash("old text", backend.model),
+            chunk_index=0, has_vector=True,
+        )
+        db = MagicMock()
+        db.execute = AsyncMock(side_effect=[
+            _result(rows=[kept, removed]),  # existing chunks
+            _result(),                      # delete stale
+            _result(),                      # move unchanged chunk to index 0
+            _result(),                      # vectors already stored elsewhere
+            _result(),                      # store new vectors
+        ])
+        db.flush = AsyncMock()
+
+        with patch.object(kb, "get_embedding_backend", return_value=backend), \
+                patch.object(kb, "_split_into_chunks", return_value=["unchanged", "new text"]):
+            await kb._generate_embeddings(db, str(uuid.uuid4()), "ignored")
+
+        assert backend.batches == [["new text"]]
+        added = db.add.call_args.args[0]
+        assert (added.chunk_text, added.chunk_index, added.embedding_model) == ("new text", 1, "test-model")
+        stored = db.execute.await_args_list[-1].args[1]
+        assert [(p["id"], p["embedding"][0]) for p in stored] == [(added.id, 8.0)]
+
+    async def test_backend_failure_rolls_back_and_raises(self, backend):
+        from app.services.staff import knowledge_base_service as kb
+
+        db = MagicMock()
+        db.execute = AsyncMock(side_effect=[_result(), _result()])  # existing chunks, shared vectors
+        db.flush = AsyncMock()
+        db.rollback = AsyncMock()
+
+        with patch.object(kb, "get_embedding_backend", return_value=backend), \
+                patch.object(backend, "_embed_batch", AsyncMock(side_effect=RuntimeError("rate limited"))):
+            with pytest.raises(RuntimeError):
+                await kb._generate_embeddings(db, str(uuid.uuid4()), "some article text")
+
+        db.rollback.assert_awaited_once()
+        assert db.execute.await_count == 2  # no vectors stored
+
+    async def test_without_backend_no_chunks_are_written(self):
+        from app.services.staff import knowledge_base_service as kb
+
+        db = MagicMock()
+        db.execute = AsyncMock(return_value=_result())
+
+        with patch.object(kb, "get_embedding_backend", return_value=None):
+            await kb._generate_embeddings(db, str(uuid.uuid4()), "some article text")
+
+        db.add.assert_not_called()
+        assert "DELETE FROM kb_embeddings" in str(db.execute.await_args.args[0])
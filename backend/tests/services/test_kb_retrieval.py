@@ -0,0 +1,144 @@
+"""
+Knowledge Base Retrieval Tests
+
+Tests for app/services/staff/kb_retrieval.py and cached suggestions:
+- Reciprocal rank fusion favours agreement and counts one chunk per article
+- Rankers run concurrently; a ranker past the budget or failing is left out
+- Only results from every ranker are cached per ticket
+- Committed article updates drop the cached suggestions
+"""
+
+import asyncio
+import time
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from app.api.v1.staff import knowledge_base as kb_api
+from app.services.staff import knowledge_base_service as kb
+from app.services.staff.kb_retrieval import Candidate, HybridRetriever, fuse
+
+
+def _c(article_id, snippet=""):
+    return Candidate(article_id, f"Title {article_id}", f"slug-{article_id}", snippet)
+
+
+def _ranker(ids, delay=0.0, error=None):
+    async def rank(query, limit):
+        await asyncio.sleep(delay)
+        if error:
+            raise error
+        return [_c(i) for i in ids][:limit]
+    return rank
+
+
+@pytest.mark.unit
+class TestFuse:
+    """Tests for reciprocal rank fusion."""
+
+    def test_articles_both_rankers_return_come_first(self):
+        results = fuse({
+            "vector": [_c("a"), _c("b"), _c("c")],
+            "lexical": [_c("d"), _c("c"), _c("b")],
+        }, limit=4)
+
+        assert [r["article_id"] for r in results] == ["b", "c", "a", "d"]
+        assert results[0]["matched_by"] == ["vector", "lexical"]
+        assert 0 < results[-1]["similarity_score"] < results[0]["similarity_score"] < 1
+
+    def test_chunks_of_one_article_count_once(self):
+        results = fuse({
+            "vector": [_c("a", "best chunk"), _c("a", "other chunk"), _c("b")],
+        }, limit=5)
+
+        assert [r["article_id"] for r in results] == ["a", "b"]
+        assert results[0]["snippet"] == "best chunk"
+        assert results[0]["similarity_score"] == 1.0
+
+
+@pytest.mark.unit
+class TestHybridRetriever:
+    """Tests for concurrent ranking."""
+
+    async def test_rankers_run_concurrently(self):
+        retriever = HybridRetriever({
+            "vector": _ranker(["a"], delay=0.05),
+            "lexical": _ranker(["b"], delay=0.05),
+        })
+
+        start = time.perf_counter()
+        results, complete = await retriever.search("query")
+
+        assert time.perf_counter() - start < 0.09
+        assert complete and {r["article_id"] for r in results} == {"a", "b"}
+
+    async def test_slow_ranker_misses_the_budget(self):
+        retriever = HybridRetriever({
+            "vector": _ranker(["a"], delay=0.5),
+            "lexical": _ranker(["b"]),
+        })
+
+        results, complete = await retriever.search("query", budget=0.05)
+
+        assert not complete
+        assert [r["article_id"] for r in results] == ["b"]
+
+    async def test_first_answer_is_awaited_past_the_budget(self):
+        retriever = HybridRetriever({"lexical": _ranker(["b"], delay=0.05)})
+
+        results, complete = await retriever.search("query", budget=0.001)
+
+        assert complete and [r["article_id"] for r in results] == ["b"]
+
+    async def test_failures(self):
+        partial = HybridRetriever({
+            "vector": _ranker([], error=ValueError("no pgvector")),
+            "lexical": _ranker(["b"]),
+        })
+        results, complete = await partial.search("query")
+        assert not complete and len(results) == 1
+
+        failing = HybridRetriever({"lexical": _ranker([], error=ValueError("down"))})
+        with pytest.raises(RuntimeError):
+            await failing.search("query")
+
+
+@pytest.mark.unit
+class TestSuggestionCache:
+    """Tests for knowledge_base_service.suggest_articles."""
+
+    async def test_complete_results_are_cached_per_ticket(self):
+        results = [{"article_id": "a"}]
+        search = AsyncMock(side_effect=[(results, True), (results, False)])
+        with patch.object(kb.kb_retriever, "search", search), \
+                patch.object(kb, "cache_get", AsyncMock(return_value=None)), \
+                patch.object(kb, "cache_set", AsyncMock()) as cache_set:
+            assert await kb.suggest_articles(None, "cannot log in", ticket_id="t1") == results
+            await kb.suggest_articles(None, "cannot log in", ticket_id="t2")
+
+        assert cache_set.await_count == 1
+        key = cache_set.await_args.args[0]
+        assert key.startswith("kb:suggestions:t1:")
+        assert cache_set.await_args.kwargs["tags"] == ["kb:articles"]
+
+    async def test_cached_results_skip_retrieval(self):
+        search = AsyncMock()
+        with patch.object(kb.kb_retriever, "search", search), \
+                patch.object(kb, "cache_get", AsyncMock(return_value=[{"article_id": "a"}])):
+            assert await kb.suggest_articles(None, "cannot log in", ticket_id="t1") == [{"article_id": "a"}]
+        search.assert_not_awaited()
+
+    async def test_article_update_invalidates_suggestions_after_commit(self):
+        db = MagicMock()
+        calls = []
+        db.commit = AsyncMock(side_effect=lambda: calls.append("commit"))
+        invalidate = AsyncMock(side_effect=lambda *tags: calls.append(tags))
+        updated = {"id": "a1", "title": "Reset your password", "status": "archived"}
+
+        with patch.object(kb_api.KnowledgeBaseService, "update_article", AsyncMock(return_value=updated)), \
+                patch.object(kb_api, "invalidate_tags", invalidate):
+            await kb_api.update_article(
+                "a1", kb_api.UpdateArticleRequest(title="Reset your password"), current_user={}, db=db,
+            )
+
+        assert calls == ["commit", ("kb:articles",)]
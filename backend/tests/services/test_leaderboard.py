@@ -0,0 +1,182 @@
+"""
+Leaderboard Tests
+
+Tests for app/services/leaderboard.py and its use by the student
+gamification service:
+- Increments land on every scope and window; windowed buckets expire
+- Weekly buckets roll over with the ISO week
+- standing() returns the top N, the caller's rank and their neighbours
+- award_xp() ranks the award on the school and grade boards
+- A student without a grade level has no grade standing
+- rebuild_student_leaderboards() recomputes the boards from the database
+"""
+
+import uuid
+from datetime import date, datetime, timedelta
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from app.models.student import Student
+from app.models.student_gamification import StudentLevel, StudentXPEvent
+from app.models.user import User
+from app.services import leaderboard
+from app.services.leaderboard import ALL_TIME, MONTHLY, WEEKLY, Leaderboard
+from app.services.student.gamification_service import (
+    STUDENT_LEADERBOARD,
+    GamificationService,
+    rebuild_student_leaderboards,
+)
+
+NOW = datetime(2026, 10, 14, 12, 0)  # Wednesday of ISO week 42
+
+
+def _standing(redis, keys, args):
+    """Python rendition of leaderboard._STANDING."""
+    (key,), (member, limit, around) = keys, args
+    ranked = sorted(redis.zsets.get(key, {}).items(), key=lambda item: (-item[1], item[0]))
+    flat = lambda items: [v for m, s in items for v in (m, str(float(s)))]  # noqa: E731
+    position = next((i for i, (m, _) in enumerate(ranked) if m == member), None)
+    if position is None:
+        return [flat(ranked[:limit]), len(ranked), -1, "", 0, []]
+    first = max(position - around, 0)
+    return [
+        flat(ranked[:limit]), len(ranked), position, str(float(ranked[position][1])),
+        first, flat(ranked[first:position + around + 1]),
+    ]
+
+
+@pytest.fixture
+def fake_redis(fake_redis):
+    fake_redis.scripts[leaderboard._STANDING] = _standing
+    return fake_redis
+
+
+async def _student(db_session, grade_level="Grade 4") -> Student:
+    user_id = uuid.uuid4()
+    user = User(
+        id=user_id,
+        email=f"{user_id.hex[:10]}@example.com",
+        password_hash="x",
+        role="student",
+        profile_data={"full_name": f"Student {user_id.hex[:4]}"},
+    )
+    student = Student(
+        user_id=user_id,
+        admission_number=user_id.hex[:12],
+        grade_level=grade_level,
+        enrollment_date=date(2026, 1, 5),
+    )
+    db_session.add_all([user, student])
+    await db_session.flush()
+    return student
+
+
+@pytest.mark.unit
+class TestLeaderboard:
+    """Tests for the sorted-set engine."""
+
+    async def test_increment_updates_every_window(self, fake_redis):
+        board = Leaderboard("test")
+        await board.increment("a", 30, ["school", "grade:grade_4"], when=NOW)
+        await board.increment("a", 20, ["school"], when=NOW)
+
+        assert fake_redis.zsets["lb:test:school:all_time:all"] == {"a": 50}
+        assert fake_redis.zsets["lb:test:school:weekly:2026-W42"] == {"a": 50}
+        assert fake_redis.zsets["lb:test:school:monthly:2026-10"] == {"a": 50}
+        assert fake_redis.zsets["lb:test:grade:grade_4:weekly:2026-W42"] == {"a": 30}
+        # Windowed buckets expire after the window closes plus retention
+        assert fake_redis.expiry["lb:test:school:weekly:2026-W42"] == datetime(2026, 10, 19) + timedelta(days=7)
+        assert fake_redis.expiry["lb:test:school:monthly:2026-10"] == datetime(2026, 11, 1) + timedelta(days=7)
+        assert "lb:test:school:all_time:all" not in fake_redis.expiry
+
+    async def test_weekly_bucket_rolls_over(self, fake_redis):
+        board = Leaderboard("test")
+        await board.increment("a", 10, ["school"], when=NOW)
+        await board.increment("a", 5, ["school"], when=NOW + timedelta(days=7))
+
+        this_week = await board.standing("school", WEEKLY, member="a", when=NOW)
+        next_week = await board.standing("school", WEEKLY, member="a", when=NOW + timedelta(days=7))
+        all_time = await board.standing("school", ALL_TIME, member="a")
+
+        assert (this_week["me"]["score"], next_week["me"]["score"], all_time["me"]["score"]) == (10, 5, 15)
+
+    async def test_standing_returns_rank_and_neighbours(self, fake_redis):
+        board = Leaderboard("test")
+        for i in range(10):
+            await board.increment(f"s{i}", (i + 1) * 10, ["school"], when=NOW)
+
+        standing = await board.standing("school", MONTHLY, member="s4", limit=3, neighbours=1, when=NOW)
+
+        assert [e["member"] for e in standing["entries"]] == ["s9", "s8", "s7"]
+        assert standing["me"] == {"rank": 6, "member": "s4", "score": 50}
+        assert [(e["rank"], e["member"]) for e in standing["neighbours"]] == [(5, "s5"), (6, "s4"), (7, "s3")]
+        assert standing["total"] == 10
+
+    async def test_redis_unavailable(self):
+        with patch("app.redis.get_redis", side_effect=RuntimeError("Redis not initialized")):
+            board = Leaderboard("test")
+            assert await board.increment("a", 1, ["school"]) is False
+            assert await board.standing("school") is None
+
+
+@pytest.mark.unit
+class TestStudentLeaderboards:
+    """Tests for the student gamification wiring."""
+
+    async def test_award_xp_ranks_student(self, db_session, fake_redis):
+        student = await _student(db_session)
+        await db_session.commit()
+
+        with patch("app.services.student.gamification_service.AIOrchestrator"):
+            service = GamificationService(db_session)
+        await service.award_xp(student.id, "quiz_complete", "Quiz")
+
+        school = await STUDENT_LEADERBOARD.standing("school", WEEKLY, member=str(student.id))
+        grade = await STUDENT_LEADERBOARD.standing("grade:grade_4", ALL_TIME, member=str(student.id))
+        assert school["me"]["score"] == grade["me"]["score"] == 30
+
+        standing = await service.get_leaderboard_standing(student.id, scope="grade")
+        assert standing["my_rank"] == 1
+        assert standing["entries"][0]["is_current_student"]
+        assert standing["entries"][0]["total_xp"] == 30
+
+    @pytest.mark.parametrize("grade_level", [None, ""])
+    async def test_student_without_grade_has_no_grade_standing(self, grade_level, fake_redis):
+        student = SimpleNamespace(id=uuid.uuid4(), grade_level=grade_level)
+        result = MagicMock()
+        result.scalar_one_or_none.return_value = student
+        db = MagicMock()
+        db.execute = AsyncMock(return_value=result)
+
+        with patch("app.services.student.gamification_service.AIOrchestrator"):
+            service = GamificationService(db)
+        standing = await service.get_leaderboard_standing(student.id, scope="grade")
+
+        assert standing == {"entries": [], "my_rank": None, "my_xp": 0, "neighbours": [], "total": 0}
+        assert db.execute.await_count == 1
+
+    async def test_rebuild_from_database(self, db_session, fake_redis):
+        fourth, fifth = await _student(db_session), await _student(db_session, "Grade 5")
+        now = datetime.utcnow()
+        db_session.add_all([
+            StudentLevel(student_id=fourth.id, total_xp=500),
+            StudentLevel(student_id=fifth.id, total_xp=200),
+            StudentXPEvent(student_id=fourth.id, xp_amount=40, source="quiz_complete",
+                           description="old", timestamp=now - timedelta(days=60)),
+            StudentXPEvent(student_id=fifth.id, xp_amount=25, source="login",
+                           description="today", timestamp=now),
+        ])
+        await db_session.commit()
+
+        await rebuild_student_leaderboards(db_session)
+
+        all_time = await STUDENT_LEADERBOARD.standing("school", ALL_TIME)
+        weekly = await STUDENT_LEADERBOARD.standing("school", WEEKLY)
+        grade = await STUDENT_LEADERBOARD.standing("grade:grade_5", ALL_TIME)
+        assert [(e["member"], e["score"]) for e in all_time["entries"]] == [
+            (str(fourth.id), 500), (str(fifth.id), 200),
+        ]
+        assert [(e["member"], e["score"]) for e in weekly["entries"]] == [(str(fifth.id), 25)]
+        assert [e["member"] for e in grade["entries"]] == [str(fifth.id)]
@@ -0,0 +1,144 @@
+"""
+Notification Inbox Tests
+
+Tests for app/services/notification_counters.py and the keyset inbox in
+app/services/notification_service.py:
+- Cursor pages walk the inbox without gaps or repeats, including ties on created_at
+- The unread count is computed once, then served from Redis
+- Committed creates/reads move the counter and push the new value; rollbacks do not
+- Absent counters are not created by increments
+- reconcile_unread_counters() repairs drifted counters
+"""
+
+import asyncio
+import uuid
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from sqlalchemy import select
+
+from app import database
+from app.models.notification import Notification
+from app.services import notification_counters
+from app.services.notification_counters import get_unread_count, reconcile_unread_counters
+from app.services.notification_service import create_notification, get_notifications, mark_as_read
+
+
+def _apply_deltas(redis, keys, args):
+    """Python rendition of notification_counters._APPLY_DELTAS."""
+    out = []
+    for key, delta in zip(keys, args):
+        if key in redis.strings:
+            value = max(int(redis.strings[key]) + int(delta), 0)
+            redis.strings[key] = str(value)
+            out.append(value)
+        else:
+            out.append(-1)
+    return out
+
+
+@pytest.fixture
+def fake_redis(fake_redis):
+    fake_redis.scripts[notification_counters._APPLY_DELTAS] = _apply_deltas
+    return fake_redis
+
+
+@pytest.fixture
+def pushed():
+    with patch.object(notification_counters, "publish_unread_count", new=AsyncMock()) as publish:
+        yield publish
+
+
+async def _settle():
+    await asyncio.gather(*database._commit_tasks)
+
+
+def _key(user):
+    return f"notif:unread:{user.id}"
+
+
+@pytest.mark.unit
+class TestKeysetInbox:
+    """Tests for cursor pagination."""
+
+    async def test_pages_cover_inbox_exactly_once(self, db_session, test_user):
+        now = datetime.utcnow()
+        # Pairs share a timestamp so the id tiebreaker matters
+        db_session.add_all([
+            Notification(
+                user_id=test_user.id, type="system", title=f"n{i}", message="m",
+                created_at=now - timedelta(minutes=i // 2),
+            )
+            for i in range(7)
+        ])
+        await db_session.commit()
+
+        expected = (await db_session.execute(
+            select(Notification.id).order_by(Notification.created_at.desc(), Notification.id.desc())
+        )).scalars().all()
+
+        seen, cursor = [], None
+        while True:
+            page = await get_notifications(db_session, test_user.id, cursor=cursor, limit=3)
+            seen.extend(n.id for n in page["notifications"])
+            cursor = page["next_cursor"]
+            if cursor is None:
+                break
+
+        assert seen == list(expected)
+
+
+@pytest.mark.unit
+class TestUnreadCounters:
+    """Tests for the Redis unread counters."""
+
+    async def test_count_is_cached(self, db_session, test_user, fake_redis, pushed):
+        await create_notification(db_session, test_user.id, "system", "Hi", "Hello")
+        await db_session.commit()
+        await _settle()
+
+        assert await get_unread_count(db_session, test_user.id) == 1
+        assert fake_redis.strings[_key(test_user)] == "1"
+
+        with patch.object(notification_counters, "count_unread", new=AsyncMock()) as count:
+            assert await get_unread_count(db_session, test_user.id) == 1
+        count.assert_not_awaited()
+        # The counter did not exist when the notification was committed
+        pushed.assert_not_awaited()
+
+    async def test_commits_move_counter_and_push(self, db_session, test_user, fake_redis, pushed):
+        assert await get_unread_count(db_session, test_user.id) == 0
+
+        notification = await create_notification(db_session, test_user.id, "system", "Hi", "Hello")
+        await db_session.commit()
+        await _settle()
+        assert fake_redis.strings[_key(test_user)] == "1"
+        pushed.assert_awaited_with(str(test_user.id), 1)
+
+        await mark_as_read(db_session, test_user.id, notification.id)
+        await db_session.commit()
+        await _settle()
+        assert fake_redis.strings[_key(test_user)] == "0"
+        pushed.assert_awaited_with(str(test_user.id), 0)
+
+    async def test_rollback_leaves_counter_alone(self, db_session, test_user, fake_redis, pushed):
+        key = _key(test_user)
+        assert await get_unread_count(db_session, test_user.id) == 0
+
+        await create_notification(db_session, test_user.id, "system", "Hi", "Hello")
+        await db_session.rollback()
+        await _settle()
+
+        assert fake_redis.strings[key] == "0"
+        pushed.assert_not_awaited()
+
+    async def test_reconcile_repairs_drift(self, db_session, test_user, fake_redis, pushed):
+        await create_notification(db_session, test_user.id, "system", "Hi", "Hello")
+        await db_session.commit()
+        await _settle()
+        fake_redis.strings[_key(test_user)] = "9"
+        fake_redis.strings[f"notif:unread:{uuid.uuid4()}"] = "0"
+
+        assert await reconcile_unread_counters(db_session) == 1
+        assert fake_redis.strings[_key(test_user)] == "1"
@@ -0,0 +1,184 @@
+"""
+Notification Fan-out Tests
+
+Tests for app/services/staff/notification_fanout.py:
+- Role audiences are walked in batches; inactive and deleted users are skipped
+- Explicit user id lists are filtered the same way
+- Progress is reported after every batch
+- PushDispatcher bounds in-flight requests and signs VAPID once per push service
+- Subscriptions answered with 404/410 are deactivated
+"""
+
+import asyncio
+import uuid
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy import func, select
+
+from app.models.notification import Notification
+from app.models.staff.notification_preference import PushSubscription
+from app.models.user import User
+from app.services.staff import notification_fanout
+from app.services.staff.notification_fanout import PushDispatcher, fan_out_notification
+
+ANNOUNCEMENT = {"title": "Term dates", "message": "Term starts on Monday", "data": {"term": 2}}
+
+
+def _user(role="student", **kwargs) -> User:
+    user_id = uuid.uuid4()
+    return User(
+        id=user_id,
+        email=f"{user_id.hex[:10]}@example.com",
+        password_hash="x",
+        role=role,
+        is_active=kwargs.pop("is_active", True),
+        is_deleted=kwargs.pop("is_deleted", False),
+        profile_data={},
+    )
+
+
+class _FakePusher:
+    """Stands in for pywebpush.WebPusher; status comes from the endpoint."""
+
+    in_flight = 0
+    peak = 0
+
+    def __init__(self, subscription_info, aiohttp_session=None):
+        self.endpoint = subscription_info["endpoint"]
+
+    async def send_async(self, **kwargs):
+        cls = type(self)
+        cls.in_flight += 1
+        cls.peak = max(cls.peak, cls.in_flight)
+        await asyncio.sleep(0.01)
+        cls.in_flight -= 1
+        return SimpleNamespace(status=int(self.endpoint.rsplit("/", 1)[-1]))
+
+
+class _FakeVapid:
+    signed = []
+
+    @classmethod
+    def from_string(cls, private_key):
+        return cls()
+
+    def sign(self, claims):
+        type(self).signed.append(claims["aud"])
+        return {"Authorization": f"vapid t=token,k=key-{claims['aud']}"}
+
+
+@pytest.fixture
+def fake_push():
+    _FakePusher.in_flight = _FakePusher.peak = 0
+    _FakeVapid.signed = []
+    with patch.object(notification_fanout, "WebPusher", _FakePusher), \
+            patch.object(notification_fanout, "Vapid", _FakeVapid), \
+            patch.object(notification_fanout.settings, "vapid_private_key", "test-key"):
+        yield
+
+
+async def _notification_count(db_session) -> int:
+    return (await db_session.execute(select(func.count(Notification.id)))).scalar()
+
+
+@pytest.mark.unit
+class TestFanOut:
+    """Tests for audience resolution, bulk insert and progress."""
+
+    async def test_role_audience_in_batches(self, db_session):
+        students = [_user() for _ in range(5)]
+        db_session.add_all(students + [
+            _user(is_active=False),
+            _user(is_deleted=True),
+            _user(role="parent"),
+        ])
+        await db_session.commit()
+
+        reports = []
+
+        async def on_progress(progress):
+            reports.append(progress)
+
+        with patch.object(notification_fanout.settings, "notification_fanout_batch_size", 2):
+            result = await fan_out_notification(
+                db_session, ANNOUNCEMENT, roles=["student"], job_id="job-1", on_progress=on_progress,
+            )
+
+        assert result["total_users"] == 5
+        assert result["notifications_created"] == 5
+        assert result["status"] == "completed"
+        assert await _notification_count(db_session) == 5
+        recipients = set((await db_session.execute(select(Notification.user_id))).scalars())
+        assert recipients == {s.id for s in students}
+        # One report per batch (2 + 2 + 1) plus the final one
+        assert [r["notifications_created"] for r in reports] == [2, 4, 5, 5]
+        assert reports[-1]["status"] == "completed"
+
+    async def test_explicit_user_ids_skip_inactive_users(self, db_session):
+        active, inactive = _user(), _user(is_active=False)
+        db_session.add_all([active, inactive])
+        await db_session.commit()
+
+        result = await fan_out_notification(
+            db_session, ANNOUNCEMENT, user_ids=[str(active.id), str(inactive.id), str(active.id)],
+        )
+
+        assert result["notifications_created"] == 1
+        row = (await db_session.execute(select(Notification))).scalar_one()
+        assert row.user_id == active.id
+        assert row.metadata_ == {"term": 2}
+
+    async def test_expired_subscriptions_are_deactivated(self, db_session, fake_push):
+        user = _user()
+        db_session.add(user)
+        await db_session.flush()
+        subscriptions = {
+            status: PushSubscription(
+                user_id=user.id,
+                endpoint=f"https://push.example.com/send/{status}",
+                p256dh_key="p256dh",
+                auth_key="auth",
+            )
+            for status in (201, 410, 500)
+        }
+        db_session.add_all(subscriptions.values())
+        await db_session.commit()
+
+        result = await fan_out_notification(db_session, ANNOUNCEMENT, user_ids=[str(user.id)])
+
+        assert (result["push_sent"], result["push_failed"], result["subscriptions_pruned"]) == (1, 1, 1)
+        active = set((await db_session.execute(
+            select(PushSubscription.endpoint).where(PushSubscription.is_active == True)  # noqa: E712
+        )).scalars())
+        assert active == {subscriptions[201].endpoint, subscriptions[500].endpoint}
+
+
+@pytest.mark.unit
+class TestPushDispatcher:
+    """Tests for bounded-concurrency push delivery."""
+
+    async def test_concurrency_is_bounded(self, fake_push):
+        subscriptions = [
+            SimpleNamespace(id=i, endpoint=f"https://push{i % 2}.example.com/s/201",
+                            p256dh_key="p", auth_key="a")
+            for i in range(20)
+        ]
+
+        async with PushDispatcher(concurrency=4) as dispatcher:
+            for subscription in subscriptions:
+                await dispatcher.submit(subscription, "{}")
+
+        assert dispatcher.sent == 20
+        assert _FakePusher.peak == 4
+        # One signature per push service origin
+        assert sorted(_FakeVapid.signed) == ["https://push0.example.com", "https://push1.example.com"]
+
+    async def test_disabled_without_vapid_key(self):
+        with patch.object(notification_fanout.settings, "vapid_private_key", None):
+            async with PushDispatcher() as dispatcher:
+                await dispatcher.submit(SimpleNamespace(id=1, endpoint="https://x/201"), "{}")
+
+        assert not dispatcher.enabled
+        assert dispatcher.sent == 0
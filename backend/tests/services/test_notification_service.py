@@ -3,7 +3,7 @@ Notification Service Tests
 
 Tests for app/services/notification_service.py:
 - create_notification()
-- get_notifications()
+- get_notifications() (keyset cursor pagination)
 - get_unread_count()
 - mark_as_read()
 - mark_all_as_read()
@@ -18,6 +18,8 @@ import pytest
 
 from app.services.notification_service import (
     create_notification,
+    decode_cursor,
+    encode_cursor,
     get_notifications,
     get_unread_count,
     mark_as_read,
@@ -109,93 +111,72 @@ class TestCreateNotification:
 class TestGetNotifications:
     """Tests for get_notifications()."""
 
-    async def test_returns_paginated_results(self):
-        """get_notifications should return notifications with pagination info."""
+    async def test_returns_first_page_with_cursor(self):
+        """get_notifications should return a page and a cursor when more rows exist."""
         mock_db = AsyncMock()
         user_id = uuid.uuid4()
 
-        # total count
-        total_res = MagicMock()
-        total_res.scalar.return_value = 5
-        # unread count
-        unread_res = MagicMock()
-        unread_res.scalar.return_value = 3
-        # notifications list
+        # limit + 1 rows: another page exists
         items_res = MagicMock()
         items_res.scalars.return_value.all.return_value = [
-            _make_mock_notification(),
-            _make_mock_notification(),
+            _make_mock_notification() for _ in range(3)
         ]
+        # unread count (Redis unavailable, counted in SQL)
+        unread_res = MagicMock()
+        unread_res.scalar.return_value = 3
 
-        mock_db.execute = AsyncMock(side_effect=[total_res, unread_res, items_res])
+        mock_db.execute = AsyncMock(side_effect=[items_res, unread_res])
 
-        result = await get_notifications(mock_db, user_id)
+        result = await get_notifications(mock_db, user_id, limit=2)
 
-        assert result["total"] == 5
-        assert result["unread_count"] == 3
-        assert result["page"] == 1
-        assert result["limit"] == 20
         assert len(result["notifications"]) == 2
+        assert result["unread_count"] == 3
+        assert result["limit"] == 2
+        created_at, notification_id = decode_cursor(result["next_cursor"])
+        assert notification_id == result["notifications"][-1].id
+        assert created_at == result["notifications"][-1].created_at
 
-    async def test_filters_by_is_read(self):
-        """get_notifications should filter by is_read when provided."""
+    async def test_last_page_has_no_cursor(self):
+        """get_notifications should return next_cursor=None on the last page."""
         mock_db = AsyncMock()
-        user_id = uuid.uuid4()
 
-        total_res = MagicMock()
-        total_res.scalar.return_value = 2
-        unread_res = MagicMock()
-        unread_res.scalar.return_value = 2
         items_res = MagicMock()
-        items_res.scalars.return_value.all.return_value = [
-            _make_mock_notification(is_read=False),
-            _make_mock_notification(is_read=False),
-        ]
-
-        mock_db.execute = AsyncMock(side_effect=[total_res, unread_res, items_res])
-
-        result = await get_notifications(mock_db, user_id, is_read=False)
-
-        assert result["total"] == 2
-
-    async def test_filters_by_notification_type(self):
-        """get_notifications should filter by notification type."""
-        mock_db = AsyncMock()
-        user_id = uuid.uuid4()
-
-        total_res = MagicMock()
-        total_res.scalar.return_value = 1
+        items_res.scalars.return_value.all.return_value = [_make_mock_notification()]
         unread_res = MagicMock()
-        unread_res.scalar.return_value = 0
-        items_res = MagicMock()
-        items_res.scalars.return_value.all.return_value = [
-            _make_mock_notification(type="quiz"),
-        ]
+        unread_res.scalar.return_value = 1
 
-        mock_db.execute = AsyncMock(side_effect=[total_res, unread_res, items_res])
+        mock_db.execute = AsyncMock(side_effect=[items_res, unread_res])
 
-        result = await get_notifications(mock_db, user_id, notification_type="quiz")
+        result = await get_notifications(mock_db, uuid.uuid4())
 
-        assert result["total"] == 1
+        assert result["next_cursor"] is None
+        assert result["limit"] == 20
 
-    async def test_returns_empty_for_no_notifications(self):
-        """get_notifications should return empty list when no notifications."""
+    async def test_cursor_filters_by_position(self):
+        """get_notifications should only return rows older than the cursor."""
         mock_db = AsyncMock()
+        anchor = _make_mock_notification()
 
-        total_res = MagicMock()
-        total_res.scalar.return_value = 0
-        unread_res = MagicMock()
-        unread_res.scalar.return_value = 0
         items_res = MagicMock()
         items_res.scalars.return_value.all.return_value = []
+        unread_res = MagicMock()
+        unread_res.scalar.return_value = 0
 
-        mock_db.execute = AsyncMock(side_effect=[total_res, unread_res, items_res])
+        mock_db.execute = AsyncMock(side_effect=[items_res, unread_res])
 
-        result = await get_notifications(mock_db, uuid.uuid4())
+        result = await get_notifications(
+            mock_db, uuid.uuid4(), is_read=False, cursor=encode_cursor(anchor)
+        )
 
-        assert result["total"] == 0
+        query = str(mock_db.execute.await_args_list[0].args[0])
+        assert "(notifications.created_at, notifications.id) <" in query
         assert result["notifications"] == []
 
+    async def test_rejects_malformed_cursor(self):
+        """get_notifications should raise ValueError for a cursor it did not issue."""
+        with pytest.raises(ValueError):
+            await get_notifications(AsyncMock(), uuid.uuid4(), cursor="not-a-cursor")
+
 
 @pytest.mark.unit
 class TestGetUnreadCount:
@@ -281,6 +262,7 @@ class TestMarkAllAsRead:
     async def test_marks_all_unread_as_read(self):
         """mark_all_as_read should update unread notifications and return count."""
         mock_db = AsyncMock()
+        mock_db.info = {}
         user_id = uuid.uuid4()
 
         mock_result = MagicMock()
@@ -291,10 +273,13 @@ class TestMarkAllAsRead:
 
         assert count == 5
         mock_db.flush.assert_awaited_once()
+        # The unread counter drops by 5 once the transaction commits
+        assert mock_db.info["notification_unread_deltas"] == {str(user_id): -5}
 
     async def test_returns_zero_when_none_unread(self):
         """mark_all_as_read should return 0 when there are no unread notifications."""
         mock_db = AsyncMock()
+        mock_db.info = {}
 
         mock_result = MagicMock()
         mock_result.rowcount = 0
@@ -108,19 +108,83 @@ class TestMPesaPaymentService:
         """Test successful M-Pesa payment verification."""
         pass
 
-    @pytest.mark.skip(
-        reason="Transaction model has transaction_reference, but service uses transaction_id for lookups"
-    )
     async def test_handle_mpesa_callback_success(self):
-        """Test successful M-Pesa callback processing."""
-        pass
+        """Test successful M-Pesa callback completes the payment and credits the wallet."""
+        payment = Transaction(
+            id=uuid.uuid4(),
+            user_id=uuid.uuid4(),
+            amount=Decimal("500.00"),
+            currency="KES",
+            gateway="mpesa",
+            status="pending",
+            transaction_reference="ws_CO_123",
+            transaction_metadata={},
+        )
+        wallet = Wallet(
+            user_id=payment.user_id,
+            balance=Decimal("100.00"),
+            currency="KES",
+            total_credited=Decimal("100.00"),
+            total_debited=Decimal("0.00"),
+            total_withdrawn=Decimal("0.00"),
+        )
+        payment_result = MagicMock()
+        payment_result.scalar_one_or_none.return_value = payment
+        wallet_result = MagicMock()
+        wallet_result.scalar_one_or_none.return_value = wallet
+        mock_db = AsyncMock()
+        mock_db.add = MagicMock()
+        mock_db.execute.side_effect = [payment_result, wallet_result]
+
+        service = PaymentService(mock_db)
+        result = await service.handle_mpesa_callback({
+            "Body": {"stkCallback": {
+                "CheckoutRequestID": "ws_CO_123",
+                "ResultCode": 0,
+                "ResultDesc": "The service request is processed successfully.",
+                "CallbackMetadata": {"Item": [
+                    {"Name": "MpesaReceiptNumber", "Value": "QLR123ABC456"},
+                ]},
+            }}
+        })
+
+        assert result["success"] is True
+        assert payment.status == "completed"
+        assert payment.transaction_metadata["MpesaReceiptNumber"] == "QLR123ABC456"
+        assert wallet.balance == Decimal("600.00")
+        mock_db.commit.assert_awaited_once()
 
-    @pytest.mark.skip(
-        reason="Transaction model has transaction_reference, but service uses transaction_id for lookups"
-    )
     async def test_handle_mpesa_callback_payment_failed(self):
         """Test M-Pesa callback for failed payment."""
-        pass
+        payment = Transaction(
+            id=uuid.uuid4(),
+            user_id=uuid.uuid4(),
+            amount=Decimal("500.00"),
+            currency="KES",
+            gateway="mpesa",
+            status="pending",
+            transaction_reference="ws_CO_456",
+            transaction_metadata={},
+        )
+        payment_result = MagicMock()
+        payment_result.scalar_one_or_none.return_value = payment
+        mock_db = AsyncMock()
+        mock_db.execute.return_value = payment_result
+
+        service = PaymentService(mock_db)
+        result = await service.handle_mpesa_callback({
+            "Body": {"stkCallback": {
+                "CheckoutRequestID": "ws_CO_456",
+                "ResultCode": 1032,
+                "ResultDesc": "Request cancelled by user",
+            }}
+        })
+
+        assert result["success"] is True
+        assert payment.status == "failed"
+        assert payment.transaction_metadata["failure_reason"] == "Request cancelled by user"
+        # No wallet lookup for a failed payment
+        assert mock_db.execute.await_count == 1
 
 
 @pytest.mark.unit
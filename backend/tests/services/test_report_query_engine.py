@@ -0,0 +1,207 @@
+"""
+Report Query Engine Tests
+
+Tests for app/services/staff/report_query_engine.py:
+- compile_widget() whitelisting and SQL generation
+- invalid filter values, dates and limits raise ReportQueryError (HTTP 400)
+- definition hashing for the result cache
+- run_report() against the test database
+- long-format flattening used by CSV/Excel exports
+"""
+
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from fastapi import HTTPException
+
+from app.api.v1.staff import reports as reports_api
+from app.models.enrollment import EnrollmentStatus
+from app.models.user import User
+from app.services.staff.report_query_engine import (
+    ReportQueryError,
+    compile_widget,
+    iter_result_rows,
+    result_dimensions,
+    run_report,
+)
+
+
+def _widget(**overrides):
+    widget = {
+        "id": "w1",
+        "title": "Users by role",
+        "widget_type": "bar_chart",
+        "data_source": "users",
+        "config": {"dimensions": ["role"], "measures": ["count"]},
+    }
+    widget.update(overrides)
+    return widget
+
+
+@pytest.mark.unit
+class TestCompileWidget:
+    """Tests for compile_widget()."""
+
+    def test_compiles_grouped_aggregate(self):
+        compiled = compile_widget(_widget())
+        sql = str(compiled.statement)
+
+        assert compiled.dimensions == ["role"]
+        assert compiled.measures == ["count"]
+        assert "GROUP BY users.role" in sql
+        assert "count(*)" in sql
+
+    def test_filter_values_are_bound_parameters(self):
+        compiled = compile_widget(_widget(filters={"role": "student'; DROP TABLE users;--"}))
+        sql = str(compiled.statement)
+
+        assert "DROP TABLE" not in sql
+        assert ":role_1" in sql
+
+    def test_rejects_unknown_source(self):
+        with pytest.raises(ReportQueryError):
+            compile_widget(_widget(data_source="pg_shadow"))
+
+    def test_rejects_unknown_dimension(self):
+        with pytest.raises(ReportQueryError):
+            compile_widget(_widget(config={"dimensions": ["password_hash"]}))
+
+    def test_rejects_aggregate_without_field(self):
+        with pytest.raises(ReportQueryError):
+            compile_widget(_widget(config={"measures": ["sum"]}))
+
+    def test_report_filters_skip_fields_the_source_lacks(self):
+        compiled = compile_widget(_widget(), {"gateway": "mpesa", "role": "student"})
+        sql = str(compiled.statement)
+
+        assert "gateway" not in sql
+        assert "users.role = " in sql
+
+    def test_hash_depends_on_filters(self):
+        a = compile_widget(_widget(), {"role": "student"})
+        b = compile_widget(_widget(), {"role": "parent"})
+        c = compile_widget(_widget(), {"role": "student"})
+
+        assert a.cache_key != b.cache_key
+        assert a.cache_key == c.cache_key
+
+
+@pytest.mark.unit
+class TestCompileValidation:
+    """Bad values are rejected when compiling, not by the database."""
+
+    @pytest.mark.parametrize("widget", [
+        _widget(filters={"date_from": "last tuesday"}),
+        _widget(config={"dimensions": ["role"], "limit": "ten"}),
+        _widget(config={"dimensions": ["role"], "limit": 0}),
+        _widget(filters={"is_active": "maybe"}),
+        _widget(filters={"id": {"op": "in", "value": ["not-a-uuid"]}}),
+        _widget(data_source="transactions", filters={"status": "lost"}),
+        _widget(data_source="enrollments", filters={"status": ["active", "paused"]}),
+        _widget(data_source="courses", filters={"price": {"op": "gt", "value": "cheap"}}),
+    ])
+    def test_rejects_invalid_values(self, widget):
+        with pytest.raises(ReportQueryError):
+            compile_widget(widget)
+
+    def test_enum_filters_accept_values_and_names(self):
+        compiled = compile_widget(_widget(
+            data_source="enrollments",
+            filters={"status": ["active", "COMPLETED"]},
+            config={"dimensions": ["status"]},
+        ))
+
+        params = compiled.statement.compile().params
+        assert [EnrollmentStatus.ACTIVE, EnrollmentStatus.COMPLETED] in params.values()
+
+    async def test_bad_date_range_fails_the_report(self, db_session):
+        config = {"widgets": [_widget()], "date_range": {"from": "2026-13-45"}}
+
+        with pytest.raises(ReportQueryError):
+            await run_report(config, fallback_db=db_session)
+
+    async def test_report_query_error_is_a_bad_request(self):
+        error = ReportQueryError("Invalid date '2026-13-45'")
+        with patch.object(reports_api.ReportService, "get_report_data", AsyncMock(side_effect=error)):
+            with pytest.raises(HTTPException) as exc_info:
+                await reports_api.get_report_data(
+                    "r1", date_from="2026-13-45", date_to=None, current_user={}, db=None,
+                )
+
+        assert exc_info.value.status_code == 400
+
+
+@pytest.mark.unit
+class TestRunReport:
+    """Tests for run_report() against the SQLite test database."""
+
+    @patch("app.services.staff.report_query_engine.cache_set", new_callable=AsyncMock)
+    @patch("app.services.staff.report_query_engine.cache_get", new_callable=AsyncMock, return_value=None)
+    async def test_runs_widgets_and_reports_errors_inline(self, mock_get, mock_set, db_session):
+        for i, role in enumerate(["student", "student", "parent"]):
+            db_session.add(User(
+                email=f"rq{i}@tuhs.co.ke", password_hash="x", role=role,
+                is_active=True, profile_data={},
+            ))
+        await db_session.commit()
+
+        config = {
+            "widgets": [
+                _widget(),
+                {"id": "t", "widget_type": "text_block", "title": "Notes"},
+                _widget(id="bad", data_source="nope"),
+            ]
+        }
+        results = await run_report(config, fallback_db=db_session)
+
+        assert len(results) == 2
+        counts = {row["role"]: row["count"] for row in results[0]["rows"]}
+        assert counts == {"parent": 1, "student": 2}
+        assert "error" in results[1]
+        mock_set.assert_awaited_once()
+
+    @patch("app.services.staff.report_query_engine.cache_get", new_callable=AsyncMock)
+    async def test_serves_cached_result(self, mock_get, db_session):
+        mock_get.return_value = {"rows": [{"role": "student", "count": 7}], "generated_at": "2026-01-01T00:00:00"}
+
+        results = await run_report({"widgets": [_widget()]}, fallback_db=db_session)
+
+        assert results == [{"widget_id": "w1", "title": "Users by role", "data_source": "users",
+                            "dimensions": ["role"], "measures": ["count"],
+                            "rows": [{"role": "student", "count": 7}], "generated_at": "2026-01-01T00:00:00"}]
+
+    async def test_widgets_sharing_a_query_keep_their_own_metadata(self, db_session):
+        cache = {}
+
+        async def fake_get(key):
+            return cache.get(key)
+
+        async def fake_set(key, value, ttl=None):
+            cache[key] = value
+
+        config = {"widgets": [_widget(), _widget(id="w2", title="Role mix")]}
+        with patch("app.services.staff.report_query_engine.cache_get", side_effect=fake_get), \
+                patch("app.services.staff.report_query_engine.cache_set", side_effect=fake_set):
+            results = await run_report(config, fallback_db=db_session)
+
+        assert len(cache) == 1
+        assert [(r["widget_id"], r["title"]) for r in results] == [("w1", "Users by role"), ("w2", "Role mix")]
+
+
+@pytest.mark.unit
+class TestFlattenResults:
+    """Tests for iter_result_rows() and result_dimensions()."""
+
+    def test_long_format_rows(self):
+        results = [
+            {"title": "A", "dimensions": ["role"], "measures": ["count"],
+             "rows": [{"role": "student", "count": 2}]},
+            {"title": "B", "dimensions": ["gateway"], "measures": ["sum_amount", "count"],
+             "rows": [{"gateway": "mpesa", "sum_amount": 10.0, "count": 1}]},
+        ]
+
+        rows = list(iter_result_rows(results))
+
+        assert result_dimensions(results) == ["role", "gateway"]
+        assert rows[0] == {"widget": "A", "role": "student", "measure": "count", "value": 2}
+        assert len(rows) == 3
@@ -0,0 +1,91 @@
+"""
+Report Schedule Tests
+
+Tests for report schedules in app/services/staff/report_builder_service.py:
+- next_run_at follows the schedule's cron expression
+- each due export is emailed to the schedule's recipients
+"""
+
+import uuid
+from datetime import datetime
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from app.services.staff import report_builder_service as builder
+
+
+def _db(*schedules):
+    db = MagicMock()
+    result = MagicMock()
+    result.scalars.return_value.all.return_value = list(schedules)
+    db.execute = AsyncMock(return_value=result)
+    db.add = MagicMock()
+
+    # Stands in for the column default applied on INSERT
+    async def flush():
+        for (row,), _ in db.add.call_args_list:
+            row.created_at = row.created_at or datetime(2026, 3, 4)
+
+    db.flush = AsyncMock(side_effect=flush)
+    return db
+
+
+def _schedule(cron="0 6 * * 1", recipients=({"email": "ops@example.com"},)):
+    return SimpleNamespace(
+        id=uuid.uuid4(),
+        report_id=uuid.uuid4(),
+        schedule_cron=cron,
+        format="csv",
+        recipients=list(recipients),
+        is_active=True,
+        created_by=None,
+        last_run_at=None,
+        next_run_at=datetime(2026, 1, 1),
+    )
+
+
+@pytest.mark.unit
+class TestReportSchedules:
+    """Tests for creating and running report schedules."""
+
+    async def test_create_schedule_seeds_next_run_from_cron(self):
+        db = _db()
+        with patch.object(builder, "datetime") as clock:
+            clock.utcnow.return_value = datetime(2026, 3, 4, 12, 0)  # Wednesday
+            created = await builder.create_schedule(db, {
+                "report_id": uuid.uuid4(),
+                "schedule_cron": "0 6 * * 1",
+                "created_by": uuid.uuid4(),
+            })
+
+        assert created["next_run_at"] == "2026-03-09T06:00:00"
+
+    async def test_create_schedule_rejects_invalid_cron(self):
+        with pytest.raises(ValueError):
+            await builder.create_schedule(_db(), {"report_id": uuid.uuid4(), "schedule_cron": "daily"})
+
+    async def test_due_schedule_is_emailed_and_rescheduled(self):
+        schedule = _schedule()
+        export = {"status": "completed", "filename": "report_ops.csv", "download_url": "/api/v1/exports/x/download"}
+
+        with patch.object(builder, "export_report", AsyncMock(return_value=export)), \
+                patch.object(builder, "send_scheduled_report_email", return_value=True) as send, \
+                patch.object(builder, "datetime") as clock:
+            clock.utcnow.return_value = datetime(2026, 3, 4, 12, 0)
+            outcome = await builder.run_scheduled_reports(_db(schedule))
+
+        assert outcome["reports_run"] == 1
+        send.assert_called_once_with("ops@example.com", "report_ops.csv", "/api/v1/exports/x/download")
+        assert schedule.next_run_at == datetime(2026, 3, 9, 6, 0)
+
+    async def test_failed_export_is_not_emailed(self):
+        schedule = _schedule(cron="0 * * * *")
+
+        with patch.object(builder, "export_report", AsyncMock(side_effect=RuntimeError("boom"))), \
+                patch.object(builder, "send_scheduled_report_email") as send:
+            outcome = await builder.run_scheduled_reports(_db(schedule))
+
+        assert outcome["errors"] == 1
+        send.assert_not_called()
@@ -0,0 +1,226 @@
+"""
+Store Checkout Tests
+
+Tests for the checkout path of app/services/store_service.py:
+- StoreService.create_order_from_cart() reserves stock for every line
+- A line without enough stock fails checkout and leaves inventory untouched
+- StoreService.confirm_order_payment() makes the reservation permanent
+- StoreService.release_expired_reservations() cancels and restocks unpaid orders
+- A completed gateway payment confirms the order it pays for
+- Concurrent flash-sale checkouts never oversell
+"""
+
+import uuid
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import select
+
+from app.database import Base
+from app.models.payment import Transaction, Wallet
+from app.models.store import Cart, CartItem, Order, Product, ShippingAddress
+from app.services.payment_service import PaymentService
+from app.services.store_service import StoreService
+from tests.load.bench_checkout import flash_sale, make_session_factory
+
+
+def _product(stock: int, price: str = "500.00") -> Product:
+    product_id = uuid.uuid4()
+    return Product(
+        id=product_id,
+        name=f"Product {product_id.hex[:6]}",
+        slug=f"product-{product_id.hex[:8]}",
+        description="Test product",
+        price=Decimal(price),
+        images=[],
+        inventory_count=stock,
+        is_active=True,
+    )
+
+
+async def _buyer_with_cart(db_session, lines):
+    """Create an address and a cart holding (product, quantity) lines."""
+    user_id = uuid.uuid4()
+    address = ShippingAddress(
+        user_id=user_id, full_name="Test Buyer", phone="0700000000",
+        address_line_1="1 Moi Avenue", city="Nairobi", county="Nairobi",
+    )
+    cart = Cart(user_id=user_id)
+    db_session.add_all([address, cart])
+    await db_session.flush()
+    for product, quantity in lines:
+        db_session.add(CartItem(
+            cart_id=cart.id, product_id=product.id, quantity=quantity, unit_price=product.price,
+        ))
+    address_id = address.id
+    await db_session.commit()
+    db_session.expire_all()
+    return user_id, address_id
+
+
+async def _stock(db_session, product) -> int:
+    result = await db_session.execute(
+        select(Product.inventory_count)
+        .where(Product.id == product.id)
+        .execution_options(populate_existing=True)
+    )
+    return result.scalar_one()
+
+
+@pytest.mark.unit
+class TestCreateOrderFromCart:
+    """Tests for StoreService.create_order_from_cart()."""
+
+    async def test_reserves_stock_for_every_line(self, db_session):
+        shirt, mug = _product(10, "800.00"), _product(5, "300.00")
+        db_session.add_all([shirt, mug])
+        user_id, address_id = await _buyer_with_cart(db_session, [(shirt, 2), (mug, 3)])
+
+        order = await StoreService.create_order_from_cart(db_session, user_id, address_id)
+        await db_session.commit()
+
+        assert order.status == "pending"
+        assert order.total == Decimal("2500.00")
+        assert order.reserved_until > datetime.utcnow()
+        assert len(order.order_number) == 20
+        assert {item.quantity for item in order.items} == {2, 3}
+        assert await _stock(db_session, shirt) == 8
+        assert await _stock(db_session, mug) == 2
+
+    async def test_insufficient_stock_leaves_inventory_untouched(self, db_session):
+        shirt, mug = _product(10), _product(1)
+        db_session.add_all([shirt, mug])
+        user_id, address_id = await _buyer_with_cart(db_session, [(shirt, 2), (mug, 3)])
+
+        with pytest.raises(ValueError, match="Insufficient stock"):
+            await StoreService.create_order_from_cart(db_session, user_id, address_id)
+        await db_session.commit()
+
+        assert await _stock(db_session, shirt) == 10
+        assert await _stock(db_session, mug) == 1
+        orders = await db_session.execute(select(Order))
+        assert orders.scalars().all() == []
+
+
+@pytest.mark.unit
+class TestReservations:
+    """Tests for payment confirmation and reservation expiry."""
+
+    async def _place_order(self, db_session, product, quantity=2):
+        user_id, address_id = await _buyer_with_cart(db_session, [(product, quantity)])
+        order = await StoreService.create_order_from_cart(db_session, user_id, address_id)
+        await db_session.commit()
+        return order
+
+    async def test_expired_orders_are_cancelled_and_restocked(self, db_session):
+        product = _product(5)
+        db_session.add(product)
+        order = await self._place_order(db_session, product)
+        order.reserved_until = datetime.utcnow() - timedelta(minutes=1)
+        await db_session.commit()
+
+        released = await StoreService.release_expired_reservations(db_session)
+        await db_session.commit()
+
+        await db_session.refresh(order)
+        assert released == 1
+        assert order.status == "cancelled"
+        assert await _stock(db_session, product) == 5
+
+    async def test_live_and_paid_reservations_are_kept(self, db_session):
+        product = _product(5)
+        db_session.add(product)
+        live = await self._place_order(db_session, product, quantity=1)
+        paid = await self._place_order(db_session, product, quantity=1)
+
+        confirmed = await StoreService.confirm_order_payment(db_session, paid.id, "MPESA123")
+        await db_session.commit()
+        released = await StoreService.release_expired_reservations(db_session)
+        await db_session.refresh(live)
+
+        assert confirmed.status == "confirmed"
+        assert confirmed.reserved_until is None
+        assert released == 0
+        assert live.status == "pending"
+        assert await _stock(db_session, product) == 3
+
+    async def test_payment_after_expiry_is_rejected(self, db_session):
+        product = _product(5)
+        db_session.add(product)
+        order = await self._place_order(db_session, product)
+        order.reserved_until = datetime.utcnow() - timedelta(minutes=1)
+        await db_session.commit()
+        await StoreService.release_expired_reservations(db_session)
+
+        assert await StoreService.confirm_order_payment(db_session, order.id, "LATE") is None
+
+    async def test_confirmed_order_survives_sweep_after_its_deadline(self, db_session):
+        product = _product(5)
+        db_session.add(product)
+        order = await self._place_order(db_session, product)
+        order.reserved_until = datetime.utcnow() - timedelta(minutes=1)
+        await db_session.commit()
+
+        # Paid after the deadline but before the sweep got to it
+        assert await StoreService.confirm_order_payment(db_session, order.id, "MPESA456") is not None
+        await db_session.commit()
+        released = await StoreService.release_expired_reservations(db_session)
+        await db_session.refresh(order)
+
+        assert released == 0
+        assert order.status == "confirmed"
+        assert await _stock(db_session, product) == 3
+
+    async def test_completed_payment_confirms_its_order(self, db_session):
+        product = _product(5)
+        db_session.add(product)
+        order = await self._place_order(db_session, product)
+        db_session.add(Transaction(
+            user_id=order.user_id, amount=order.total, currency="KES", gateway="mpesa",
+            status="pending", transaction_reference="ws_CO_ORDER",
+            transaction_metadata={"order_id": str(order.id)},
+        ))
+        await db_session.commit()
+
+        result = await PaymentService(db_session).handle_mpesa_callback({
+            "Body": {"stkCallback": {"CheckoutRequestID": "ws_CO_ORDER", "ResultCode": 0}}
+        })
+        await db_session.refresh(order)
+        released = await StoreService.release_expired_reservations(db_session)
+
+        assert result["success"] is True
+        assert order.status == "confirmed"
+        assert order.payment_reference == "ws_CO_ORDER"
+        assert released == 0
+        assert await _stock(db_session, product) == 3
+        wallets = await db_session.execute(select(Wallet))
+        assert wallets.scalars().all() == []
+
+    def test_sweep_is_scheduled_by_default(self):
+        from app.services import scheduled_jobs
+        from app.utils.scheduler import scheduler
+
+        assert scheduled_jobs.store_reservation_sweep is not None
+        assert "store_reservation_sweep" in scheduler.jobs
+
+
+@pytest.mark.unit
+class TestFlashSale:
+    """Concurrent checkouts against a separate-connection database."""
+
+    async def test_concurrent_checkouts_never_oversell(self, tmp_path):
+        engine, session_factory = make_session_factory(
+            f"sqlite+aiosqlite:///{tmp_path / 'flash_sale.db'}"
+        )
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        try:
+            result = await flash_sale(session_factory, customers=40, stock=10)
+        finally:
+            await engine.dispose()
+
+        assert result.succeeded == 10
+        assert result.orders == 10
+        assert result.inventory_left == 0
+        assert result.oversold == 0
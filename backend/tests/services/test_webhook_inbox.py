@@ -0,0 +1,127 @@
+"""
+Webhook Inbox Tests
+
+Tests for app/services/webhook_inbox.py:
+- Gateway retries of a stored event are absorbed at insert
+- A payment's events are processed oldest first
+- A failing event holds back later events until it succeeds or runs out
+  of attempts
+- replay_events() re-queues failed events
+"""
+
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from sqlalchemy import select
+
+from app.config import settings
+from app.models.webhook_event import FAILED, PROCESSED, RECEIVED, WebhookEvent
+from app.services import webhook_inbox
+from app.services.background_jobs import webhook_events
+from app.services.payment_service import PaymentService
+from tests.conftest import TestingSessionLocal
+
+
+def _stripe_event(event_id: str, intent: str = "pi_1", event_type: str = "payment_intent.succeeded"):
+    return {"id": event_id, "type": event_type, "data": {"object": {"id": intent}}}
+
+
+@pytest.fixture
+def queue():
+    """Capture webhook_events jobs instead of sending them to Redis."""
+    with patch.object(webhook_events, "defer", MagicMock()) as defer, \
+            patch.object(webhook_events, "enqueue", AsyncMock()) as enqueue, \
+            patch("app.database.AsyncSessionLocal", TestingSessionLocal):
+        yield defer, enqueue
+
+
+async def _statuses(db_session):
+    rows = (await db_session.execute(
+        select(WebhookEvent.event_key, WebhookEvent.status, WebhookEvent.attempts)
+        .order_by(WebhookEvent.event_key)
+    )).all()
+    return [tuple(row) for row in rows]
+
+
+@pytest.mark.unit
+class TestRecordEvent:
+    """Tests for storing incoming webhooks."""
+
+    async def test_duplicate_event_is_absorbed(self, db_session, queue):
+        defer, _ = queue
+
+        assert await webhook_inbox.record_event(db_session, "stripe", _stripe_event("evt_1")) is True
+        assert await webhook_inbox.record_event(db_session, "stripe", _stripe_event("evt_1")) is False
+
+        assert await _statuses(db_session) == [("evt_1", RECEIVED, 0)]
+        defer.assert_called_once()
+        assert defer.call_args.args[1] == {"gateway": "stripe", "ordering_key": "pi_1"}
+
+    def test_mpesa_events_are_keyed_by_checkout_request(self):
+        payload = {"Body": {"stkCallback": {"CheckoutRequestID": "ws_CO_1", "ResultCode": 0}}}
+
+        assert webhook_inbox.event_keys("mpesa", payload) == ("ws_CO_1", "stk_callback", "ws_CO_1")
+
+
+@pytest.mark.unit
+class TestProcessPending:
+    """Tests for ordered processing of a payment's events."""
+
+    async def test_events_are_processed_in_order(self, db_session, queue):
+        await webhook_inbox.record_event(db_session, "stripe", _stripe_event("evt_a", event_type="payment_intent.created"))
+        await webhook_inbox.record_event(db_session, "stripe", _stripe_event("evt_b"))
+        handler = AsyncMock(return_value={"success": True})
+
+        with patch.object(PaymentService, "process_stripe_event", handler):
+            assert await webhook_inbox.process_pending("stripe", "pi_1") == 2
+
+        assert [call.args[0]["id"] for call in handler.await_args_list] == ["evt_a", "evt_b"]
+        assert await _statuses(db_session) == [("evt_a", PROCESSED, 1), ("evt_b", PROCESSED, 1)]
+
+    async def test_failure_holds_back_later_events_until_retried(self, db_session, queue):
+        await webhook_inbox.record_event(db_session, "stripe", _stripe_event("evt_a"))
+        await webhook_inbox.record_event(db_session, "stripe", _stripe_event("evt_b"))
+        handler = AsyncMock(side_effect=[{"success": False, "error": "payment not found"}, {"success": True},
+                                         {"success": True}])
+
+        with patch.object(PaymentService, "process_stripe_event", handler):
+            with pytest.raises(webhook_inbox.WebhookProcessingError):
+                await webhook_inbox.process_pending("stripe", "pi_1")
+            assert handler.await_count == 1
+
+            assert await webhook_inbox.process_pending("stripe", "pi_1") == 2
+
+        assert await _statuses(db_session) == [("evt_a", PROCESSED, 2), ("evt_b", PROCESSED, 1)]
+
+    async def test_exhausted_event_is_failed_and_later_events_proceed(self, db_session, queue, monkeypatch):
+        monkeypatch.setattr(settings, "webhook_max_attempts", 1)
+        await webhook_inbox.record_event(db_session, "stripe", _stripe_event("evt_a"))
+        await webhook_inbox.record_event(db_session, "stripe", _stripe_event("evt_b"))
+        handler = AsyncMock(side_effect=[RuntimeError("boom"), {"success": True}])
+
+        with patch.object(PaymentService, "process_stripe_event", handler):
+            assert await webhook_inbox.process_pending("stripe", "pi_1") == 1
+
+        assert await _statuses(db_session) == [("evt_a", FAILED, 1), ("evt_b", PROCESSED, 1)]
+
+
+@pytest.mark.unit
+class TestReplay:
+    """Tests for replaying stored events."""
+
+    async def test_replay_requeues_failed_events(self, db_session, queue, monkeypatch):
+        _, enqueue = queue
+        monkeypatch.setattr(settings, "webhook_max_attempts", 1)
+        await webhook_inbox.record_event(db_session, "stripe", _stripe_event("evt_a"))
+
+        with patch.object(PaymentService, "process_stripe_event", AsyncMock(side_effect=RuntimeError("boom"))):
+            await webhook_inbox.process_pending("stripe", "pi_1")
+        assert await _statuses(db_session) == [("evt_a", FAILED, 1)]
+
+        assert await webhook_inbox.replay_events(db_session, gateway="stripe") == 1
+        db_session.expire_all()
+        assert await _statuses(db_session) == [("evt_a", RECEIVED, 0)]
+        enqueue.assert_awaited_once_with({"gateway": "stripe", "ordering_key": "pi_1"})
+
+        with patch.object(PaymentService, "process_stripe_event", AsyncMock(return_value={"success": True})):
+            assert await webhook_inbox.process_pending("stripe", "pi_1") == 1
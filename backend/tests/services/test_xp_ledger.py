@@ -0,0 +1,157 @@
+"""
+XP Ledger Tests
+
+Tests for app/services/student/xp_ledger.py:
+- A batch sums XP per student, levels up and awards badges once
+- Badges a student already holds are not awarded again
+- Events for unknown students are dropped without sinking the batch
+- The background ledger applies queued events and pushes results
+- award_xp() goes through the same path
+- record_xp() queues its event only once the caller's transaction commits
+"""
+
+import asyncio
+import uuid
+from datetime import date
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from sqlalchemy import func, select
+
+from app.models.student import Student
+from app.models.student_gamification import StudentBadge, StudentLevel, StudentXPEvent
+from app import database
+from app.models.user import User
+from app.services.student.gamification_service import GamificationService
+from app.services.student.xp_ledger import EVENT_XP_UPDATE, XPLedger, apply_xp_events, xp_ledger
+from tests.conftest import TestingSessionLocal
+
+
+async def _student(db_session) -> Student:
+    user_id = uuid.uuid4()
+    student = Student(
+        user_id=user_id,
+        admission_number=user_id.hex[:12],
+        grade_level="Grade 6",
+        enrollment_date=date(2026, 1, 5),
+    )
+    db_session.add_all([
+        User(id=user_id, email=f"{user_id.hex[:10]}@example.com", password_hash="x",
+             role="student", profile_data={}),
+        student,
+    ])
+    await db_session.commit()
+    return student
+
+
+def _events(student, *sources):
+    return [xp_ledger.typed_event(student_id=student.id, source=source, description=source) for source in sources]
+
+
+async def _level(db_session, student) -> StudentLevel:
+    return (await db_session.execute(
+        select(StudentLevel).where(StudentLevel.student_id == student.id)
+    )).scalar_one()
+
+
+@pytest.fixture
+def pushes():
+    with patch("app.websocket.connection_manager.ws_manager.send_personal", new=AsyncMock()) as send:
+        yield send
+
+
+@pytest.mark.unit
+class TestApplyXPEvents:
+    """Tests for the batch apply step."""
+
+    async def test_batch_levels_up_and_awards_badges_once(self, db_session):
+        first, second = await _student(db_session), await _student(db_session)
+        events = (
+            _events(first, "lesson_complete", "lesson_complete", "project_complete")
+            + _events(second, "login")
+        )
+
+        progress = await apply_xp_events(db_session, events)
+        await db_session.commit()
+
+        # 40 + 40 + 100 = 180 XP crosses the 150 XP threshold for level 2
+        assert progress[first.id].xp_awarded == 180
+        assert (progress[first.id].current_level, progress[first.id].levels_gained) == (2, 1)
+        assert progress[first.id].badges == ["first_lesson"]
+        assert (progress[second.id].total_xp, progress[second.id].badges) == (10, [])
+        assert (await _level(db_session, first)).total_xp == 180
+        assert (await db_session.execute(select(func.count(StudentXPEvent.id)))).scalar() == 4
+
+    async def test_held_badges_are_not_awarded_again(self, db_session):
+        student = await _student(db_session)
+        await apply_xp_events(db_session, _events(student, "lesson_complete"))
+        await db_session.commit()
+
+        progress = await apply_xp_events(db_session, _events(student, "lesson_complete"))
+        await db_session.commit()
+
+        assert progress[student.id].badges == []
+        assert (await _level(db_session, student)).total_xp == 80
+        badges = (await db_session.execute(select(func.count(StudentBadge.id)))).scalar()
+        assert badges == 1
+
+    async def test_unknown_students_are_dropped(self, db_session):
+        student = await _student(db_session)
+        ghost = Student(id=uuid.uuid4())
+
+        progress = await apply_xp_events(db_session, _events(student, "login") + _events(ghost, "login"))
+        await db_session.commit()
+
+        assert list(progress) == [student.id]
+        assert (await db_session.execute(select(func.count(StudentXPEvent.id)))).scalar() == 1
+
+
+@pytest.mark.unit
+class TestXPLedger:
+    """Tests for the write-behind queue and award_xp()."""
+
+    @patch("app.database.AsyncSessionLocal", TestingSessionLocal)
+    async def test_queued_events_are_applied_and_pushed(self, db_session, pushes):
+        student = await _student(db_session)
+        ledger = XPLedger()
+        ledger.start()
+        for _ in range(5):
+            await ledger.submit(ledger.new_row(student_id=student.id, source="quiz_complete", description="Quiz"))
+        await ledger.stop()
+
+        assert ledger.applied == 5
+        assert (await _level(db_session, student)).total_xp == 150
+        # Every push carries the student's running total
+        user_id, event_type, data = pushes.await_args.args
+        assert (user_id, event_type, data["total_xp"]) == (str(student.user_id), EVENT_XP_UPDATE, 150)
+
+    async def test_award_xp_applies_immediately(self, db_session, pushes):
+        student = await _student(db_session)
+        with patch("app.services.student.gamification_service.AIOrchestrator"):
+            service = GamificationService(db_session)
+
+        result = await service.award_xp(student.id, "project_complete", "Project", custom_amount=5000)
+
+        assert result["xp_awarded"] == 5000
+        assert result["current_level"] >= 10
+        assert result["badges_earned"] == ["level_10"]
+        pushes.assert_awaited_once()
+
+    async def test_record_xp_waits_for_commit(self, db_session):
+        student_id = (await _student(db_session)).id
+        with patch("app.services.student.gamification_service.AIOrchestrator"):
+            service = GamificationService(db_session)
+
+        with patch.object(xp_ledger, "submit", new=AsyncMock()) as submit:
+            await db_session.execute(select(Student.id))
+            await service.record_xp(student_id, "lesson_complete", "Rolled back")
+            await db_session.rollback()
+            result = await service.record_xp(student_id, "quiz_complete", "Quiz")
+            assert submit.await_count == 0
+            await db_session.commit()
+            await asyncio.gather(*database._commit_tasks)
+
+        assert result == {"xp_awarded": 30, "queued": True}
+        (event,), _ = submit.await_args
+        assert (event["student_id"], event["source"]) == (str(student_id), "quiz_complete")
+        assert submit.await_count == 1
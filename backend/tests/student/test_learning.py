@@ -169,6 +169,27 @@ async def test_browse_courses_success(
     assert "courses" in data
 
 
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_browse_courses_student_not_found(
+    async_client: AsyncClient,
+    override_current_user,
+):
+    """A user without a student profile gets 404 rather than 400."""
+    from app.services.student.learning_service import StudentNotFoundError
+
+    with patch("app.api.v1.student.learning.LearningService") as MockService:
+        instance = MockService.return_value
+        instance.browse_courses = AsyncMock(side_effect=StudentNotFoundError("Student not found"))
+
+        response = await async_client.get(
+            f"{BASE}/browse",
+            headers={"Authorization": "Bearer fake-token"},
+        )
+
+    assert response.status_code == 404
+
+
 @pytest.mark.unit
 @pytest.mark.asyncio
 async def test_browse_courses_invalid_sort_by(
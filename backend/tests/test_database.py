@@ -0,0 +1,260 @@
+"""
+Database Session Tests
+
+Tests for app/database.py:
+- release_db() returns the connection to the pool and keeps loaded objects usable
+- The next statement checks a connection out again
+- Sessions connect through the pool of their workload class
+- Pools record hold time per route, and timeouts name the holding route
+- Reading sessions send plain SELECTs to the replica unless it lags, the
+  session wrote, or the user's last write is newer than the replica
+- on_commit() callbacks run once per commit and are dropped on rollback
+"""
+
+import logging
+import os
+import tempfile
+import time
+
+import pytest
+from prometheus_client import REGISTRY
+from sqlalchemy import text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from app import database
+from app.config import settings
+from app.database import release_db
+
+
+@pytest.fixture
+async def engine():
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}", poolclass=AsyncAdaptedQueuePool, pool_size=2)
+    yield engine
+    await engine.dispose()
+    os.unlink(path)
+
+
+@pytest.mark.unit
+class TestReleaseDb:
+    """Tests for release_db."""
+
+    async def test_connection_returns_to_pool_between_phases(self, engine):
+        session_factory = async_sessionmaker(engine, expire_on_commit=False)
+        async with session_factory() as db:
+            await db.execute(text("CREATE TABLE replies (body TEXT)"))
+            assert engine.pool.checkedout() == 1
+
+            await release_db(db)
+            assert engine.pool.checkedout() == 0
+            await release_db(db)
+
+            await db.execute(text("INSERT INTO replies VALUES ('hi')"))
+            assert engine.pool.checkedout() == 1
+            await db.commit()
+
+            assert (await db.execute(text("SELECT count(*) FROM replies"))).scalar() == 1
+
+
+@pytest.fixture
+async def make_engine():
+    """Instrumented SQLite engines (pool named ``name``), disposed after the test."""
+    created = []
+
+    def make(name, pool_size=2):
+        fd, path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+        engine = database._create_engine(
+            f"sqlite+aiosqlite:///{path}", name, pool_size=pool_size, max_overflow=0, connect_args={},
+        )
+        created.append((engine, path))
+        return engine
+
+    yield make
+    for engine, path in created:
+        await engine.dispose()
+        os.unlink(path)
+
+
+@pytest.mark.unit
+class TestWorkloadPools:
+    """Tests for per-workload pools and pool instrumentation."""
+
+    async def test_sessions_use_their_workload_pool(self, make_engine, monkeypatch):
+        interactive, background = make_engine("t_interactive"), make_engine("t_background")
+        monkeypatch.setattr(database, "engine", interactive)
+        monkeypatch.setattr(database, "_workload_engines", {
+            database.INTERACTIVE: interactive, database.BACKGROUND: background,
+        })
+        session_factory = async_sessionmaker(interactive, sync_session_class=database.RoutingSession)
+
+        with database.use_workload(database.BACKGROUND, "job:test"):
+            async with session_factory() as db:
+                await db.execute(text("SELECT 1"))
+                assert (background.pool.checkedout(), interactive.pool.checkedout()) == (1, 0)
+
+        async with session_factory() as db:
+            await db.execute(text("SELECT 1"))
+            assert (background.pool.checkedout(), interactive.pool.checkedout()) == (0, 1)
+
+    async def test_hold_time_is_recorded_per_route(self, make_engine):
+        engine = make_engine("t_hold")
+        labels = {"pool": "t_hold", "route": "/api/v1/courses"}
+
+        with database.use_workload(database.INTERACTIVE, "/api/v1/courses"):
+            async with engine.connect() as conn:
+                await conn.execute(text("SELECT 1"))
+
+        assert REGISTRY.get_sample_value("db_connection_hold_seconds_count", labels) == 1
+        assert REGISTRY.get_sample_value("db_pool_checkout_wait_seconds_count", {"pool": "t_hold"}) == 1
+
+    async def test_timeout_logs_the_holding_route(self, make_engine, monkeypatch, caplog):
+        monkeypatch.setattr(settings, "database_pool_timeout", 1)
+        engine = make_engine("t_timeout", pool_size=1)
+
+        with database.use_workload(database.INTERACTIVE, "/api/v1/reports/export"):
+            held = await engine.connect()
+        try:
+            with caplog.at_level(logging.WARNING, logger="app.database"):
+                with database.use_workload(database.INTERACTIVE, "/api/v1/courses"):
+                    with pytest.raises(PoolTimeoutError):
+                        await engine.connect()
+        finally:
+            await held.close()
+
+        assert REGISTRY.get_sample_value("db_pool_timeouts_total", {"pool": "t_timeout"}) == 1
+        assert "for /api/v1/courses" in caplog.text
+        assert "held by /api/v1/reports/export x1" in caplog.text
+
+
+@pytest.mark.unit
+class TestOnCommit:
+    """Tests for on_commit()."""
+
+    async def test_callback_runs_once_with_what_was_collected(self, engine):
+        seen = []
+
+        async def publish(tags):
+            seen.append(sorted(tags))
+
+        async with async_sessionmaker(engine)() as db:
+            for tag in ("a", "b"):
+                db.info.setdefault("tags", set()).add(tag)
+                database.on_commit(db, "tags", publish)
+            await db.commit()
+            for task in list(database._commit_tasks):
+                await task
+
+            # The next transaction starts empty
+            await db.execute(text("SELECT 1"))
+            await db.commit()
+
+        assert seen == [["a", "b"]]
+        assert "tags" not in db.info
+
+    async def test_rollback_drops_the_callback(self, engine):
+        seen = []
+        async with async_sessionmaker(engine)() as db:
+            db.info["tags"] = {"a"}
+            database.on_commit(db, "tags", seen.append)
+            await db.execute(text("SELECT 1"))
+            await db.rollback()
+            await db.execute(text("SELECT 1"))
+            await db.commit()
+
+        assert seen == []
+        assert "tags" not in db.info
+
+
+@pytest.fixture
+async def replica(make_engine, monkeypatch):
+    """Primary and replica engines whose ``source`` tables name the database."""
+    primary, replica = make_engine("t_primary"), make_engine("t_replica")
+    for target, name in ((primary, "primary"), (replica, "replica")):
+        async with target.begin() as conn:
+            await conn.execute(text("CREATE TABLE source (name TEXT)"))
+            await conn.execute(text(f"INSERT INTO source VALUES ('{name}')"))
+
+    monkeypatch.setattr(database, "engine", primary)
+    monkeypatch.setattr(database, "read_engine", replica)
+    monkeypatch.setattr(database, "_workload_engines", {database.INTERACTIVE: primary})
+    monkeypatch.setattr(database, "_local_writes", {})
+    monkeypatch.setattr(database, "_replica_lag", 0.0)
+    monkeypatch.setattr(database, "_replica_checked_at", time.time())
+    return async_sessionmaker(primary, sync_session_class=database.RoutingSession, expire_on_commit=False)
+
+
+async def _source(db) -> str:
+    return (await db.execute(text("SELECT name FROM source"))).scalar()
+
+
+def _routed(target, reason) -> float:
+    return REGISTRY.get_sample_value("db_routed_queries_total", {"target": target, "reason": reason}) or 0
+
+
+@pytest.mark.unit
+class TestReplicaRouting:
+    """Tests for routing reads to the read replica."""
+
+    async def test_reads_use_replica_until_the_session_writes(self, replica):
+        before = _routed("replica", "read")
+        async with replica(info={"reads": True}) as db:
+            assert await _source(db) == "replica"
+            await db.execute(text("INSERT INTO source VALUES ('written')"))
+            assert await _source(db) == "primary"
+        assert _routed("replica", "read") == before + 1
+
+        async with replica() as db:
+            assert await _source(db) == "primary"
+
+    async def test_lagging_replica_falls_back_to_primary(self, replica, monkeypatch):
+        monkeypatch.setattr(database, "_replica_lag", settings.database_replica_max_lag_seconds + 1)
+        before = _routed("primary", "lag")
+
+        async with replica(info={"reads": True}) as db:
+            assert await _source(db) == "primary"
+        assert _routed("primary", "lag") == before + 1
+
+    async def test_users_read_their_own_writes(self, replica, monkeypatch):
+        async with replica(info={"user_id": "u1"}) as db:
+            await db.execute(text("INSERT INTO source VALUES ('written')"))
+            await db.commit()
+        assert "u1" in database._local_writes
+
+        async with replica(info={"reads": True, "user_id": "u1"}) as db:
+            assert await _source(db) == "primary"
+        async with replica(info={"reads": True, "user_id": "u2"}) as db:
+            assert await _source(db) == "replica"
+
+        # Once the replica has replayed past the write
+        monkeypatch.setattr(database, "_replica_checked_at", time.time() + 1)
+        async with replica(info={"reads": True, "user_id": "u1"}) as db:
+            assert await _source(db) == "replica"
+
+    async def test_marked_methods_choose_the_database(self, replica):
+        @database.read_only
+        async def report(db):
+            return await _source(db)
+
+        @database.read_primary
+        async def balance(db):
+            return await _source(db)
+
+        async with replica() as db:
+            assert await report(db) == "replica"
+        async with replica(info={"reads": True}) as db:
+            assert await balance(db) == "primary"
+
+    async def test_only_marked_get_routes_read_from_the_replica(self):
+        async def get_or_create_log(): ...
+
+        def scope(endpoint):
+            route = type("Route", (), {"path": "/x", "endpoint": endpoint})()
+            return type("Conn", (), {"scope": {"type": "http", "method": "GET", "route": route}})()
+
+        assert settings.database_replica_auto_reads is False
+        assert (await database._request_info(scope(get_or_create_log)))["reads"] is False
+        assert (await database._request_info(scope(database.read_only(get_or_create_log))))["reads"] is True
@@ -0,0 +1,156 @@
+"""
+Access Matrix Tests
+
+Tests for app/utils/access_matrix.py:
+- Role grants compile into bitsets; expired temporary grants deny
+- User overrides take precedence over role grants
+- Plan features resolve through the compiled matrix
+- Warm checks make no database round trips
+- Committing a permission change drops the compiled matrix and broadcasts it
+"""
+
+import asyncio
+import json
+import uuid
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from sqlalchemy import event
+
+from app import database
+from app.models.admin.permission import Permission, RolePermission, UserPermissionOverride
+from app.models.plan_feature import PlanFeature
+from app.utils import access_matrix
+from app.utils.access_matrix import (
+    check_feature,
+    check_permission,
+    compile_access_matrix,
+    get_access_matrix,
+    reset_access_matrix,
+)
+from app.utils.cache import local_cache
+from tests.conftest import test_engine
+
+
+@pytest.fixture(autouse=True)
+def clean_access_state():
+    local_cache.clear()
+    reset_access_matrix()
+    # Redis is down unless a test provides one; the caches fail open
+    with patch("app.redis.get_redis", side_effect=RuntimeError("no redis")):
+        yield
+    local_cache.clear()
+    reset_access_matrix()
+
+
+async def _permission(db, name, *, role=None, expires_at=None):
+    perm = Permission(name=name, resource=name.split(".")[0], action=name.split(".")[-1])
+    db.add(perm)
+    await db.flush()
+    if role:
+        db.add(RolePermission(role=role, permission_id=perm.id, expires_at=expires_at))
+    await db.commit()
+    return perm
+
+
+@pytest.mark.unit
+class TestCompiledMatrix:
+    """Tests for role and plan decisions from the compiled matrix."""
+
+    async def test_role_grants(self, db_session, test_user):
+        await _permission(db_session, "users.read", role="staff")
+        await _permission(db_session, "users.delete")
+        await _permission(
+            db_session, "finance.view", role="staff",
+            expires_at=datetime.utcnow() - timedelta(hours=1),
+        )
+
+        assert await check_permission(db_session, test_user.id, "staff", "users.read") is True
+        # Expired temporary grant denies, even for admins
+        assert await check_permission(db_session, test_user.id, "staff", "finance.view") is False
+        # No grant row: admins allowed by default, others denied
+        assert await check_permission(db_session, test_user.id, "staff", "users.delete") is False
+        assert await check_permission(db_session, test_user.id, "admin", "users.delete") is True
+
+    async def test_temporary_grant_bounds_matrix_lifetime(self, db_session):
+        expires_at = datetime.utcnow() + timedelta(seconds=30)
+        await _permission(db_session, "reports.export", role="staff", expires_at=expires_at)
+
+        matrix = await compile_access_matrix(db_session)
+
+        assert matrix.role_decision("staff", "reports.export") is True
+        assert matrix.valid_until <= (expires_at - datetime(1970, 1, 1)).total_seconds()
+
+    async def test_user_override_takes_precedence(self, db_session, test_user):
+        perm = await _permission(db_session, "courses.publish", role="student")
+        db_session.add(UserPermissionOverride(user_id=test_user.id, permission_id=perm.id, granted=False))
+        await db_session.commit()
+
+        assert await check_permission(db_session, test_user.id, "student", "courses.publish") is False
+
+    async def test_plan_features(self, db_session, test_user):
+        plan_id = uuid.uuid4()
+        db_session.add_all([
+            PlanFeature(plan_id=plan_id, feature_key="ai_tutor", feature_name="AI Tutor"),
+            PlanFeature(plan_id=plan_id, feature_key="offline", feature_name="Offline", is_enabled=False),
+        ])
+        await db_session.commit()
+
+        matrix = await get_access_matrix(db_session)
+
+        assert matrix.plan_has_feature(str(plan_id), "ai_tutor") is True
+        assert matrix.plan_has_feature(str(plan_id), "offline") is False
+        assert matrix.plan_has_feature(None, "ai_tutor") is False
+        # No active subscription: the guard decides what that means
+        assert await check_feature(db_session, test_user.id, "ai_tutor") is None
+
+    async def test_warm_checks_skip_the_database(self, db_session, test_user):
+        await _permission(db_session, "users.read", role="staff")
+        await check_permission(db_session, test_user.id, "staff", "users.read")
+
+        statements = []
+        listener = lambda *args: statements.append(args[2])  # noqa: E731
+        event.listen(test_engine.sync_engine, "before_cursor_execute", listener)
+        try:
+            for _ in range(5):
+                assert await check_permission(db_session, test_user.id, "staff", "users.read")
+        finally:
+            event.remove(test_engine.sync_engine, "before_cursor_execute", listener)
+
+        assert statements == []
+
+
+@pytest.mark.unit
+class TestInvalidation:
+    """Tests for commit-driven invalidation."""
+
+    async def test_commit_resets_matrix_and_broadcasts(self, db_session, test_user):
+        perm = await _permission(db_session, "users.update")
+        assert await check_permission(db_session, test_user.id, "staff", "users.update") is False
+        await asyncio.gather(*database._commit_tasks)
+
+        redis = MagicMock()
+        redis.publish = AsyncMock()
+        with patch("app.redis.get_redis", return_value=redis):
+            db_session.add(RolePermission(role="staff", permission_id=perm.id))
+            await db_session.commit()
+            await asyncio.gather(*database._commit_tasks)
+
+        assert access_matrix._matrix is None
+        assert await check_permission(db_session, test_user.id, "staff", "users.update") is True
+        channel, payload = redis.publish.await_args.args
+        assert channel == access_matrix.INVALIDATION_CHANNEL
+        assert json.loads(payload)["targets"] == ["matrix"]
+
+    async def test_rollback_discards_pending_changes(self, db_session):
+        perm = await _permission(db_session, "users.export")
+        await asyncio.gather(*database._commit_tasks)
+        await get_access_matrix(db_session)
+
+        db_session.add(RolePermission(role="staff", permission_id=perm.id))
+        await db_session.flush()
+        await db_session.rollback()
+
+        assert access_matrix._matrix is not None
+        assert not database._commit_tasks
@@ -0,0 +1,178 @@
+"""
+Cache Framework Tests
+
+Tests for app/utils/cache.py:
+- @cached serves from the local tier, then Redis, then the function
+- Concurrent misses are collapsed into one computation (single-flight)
+- A worker only releases the recompute lock while it still holds it
+- Stale values are served while one background refresh runs
+- invalidate_tags() deletes only the tagged keys
+- Database sessions are left out of keys; Redis outages fail open
+- Hit/miss counters are emitted per key prefix and tier
+"""
+
+import asyncio
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.metrics import cache_hits_total, cache_misses_total
+from app.utils import cache as cache_module
+from app.utils.cache import cache_get, cache_set, cached, invalidate_tags, local_cache
+
+
+def _release_lock(redis, keys, args):
+    """Python rendition of cache._RELEASE_LOCK."""
+    if redis.strings.get(keys[0]) == args[0]:
+        del redis.strings[keys[0]]
+        return 1
+    return 0
+
+
+@pytest.fixture(autouse=True)
+def clean_local_cache():
+    local_cache.clear()
+    yield
+    local_cache.clear()
+
+
+@pytest.fixture
+def fake_redis(fake_redis):
+    fake_redis.scripts[cache_module._RELEASE_LOCK] = _release_lock
+    return fake_redis
+
+
+def _hits(prefix, tier):
+    return cache_hits_total.labels(key_prefix=prefix, tier=tier)._value.get()
+
+
+def _misses(prefix):
+    return cache_misses_total.labels(key_prefix=prefix)._value.get()
+
+
+@pytest.mark.unit
+class TestCachedDecorator:
+    """Tests for the @cached decorator."""
+
+    async def test_local_then_redis_then_function(self, fake_redis):
+        calls = []
+
+        @cached("test:tiers", ttl=60)
+        async def load(item_id):
+            calls.append(item_id)
+            return {"id": item_id}
+
+        misses = _misses("test:tiers")
+        local_hits = _hits("test:tiers", "local")
+        redis_hits = _hits("test:tiers", "redis")
+
+        assert await load(1) == {"id": 1}
+        assert await load(1) == {"id": 1}
+        local_cache.clear()  # another worker: only Redis has the value
+        assert await load(1) == {"id": 1}
+
+        assert calls == [1]
+        assert "cache:test:tiers:1" in fake_redis.strings
+        assert _misses("test:tiers") == misses + 1
+        assert _hits("test:tiers", "local") == local_hits + 1
+        assert _hits("test:tiers", "redis") == redis_hits + 1
+
+    async def test_concurrent_misses_share_one_computation(self, fake_redis):
+        calls = 0
+
+        @cached("test:flight", ttl=60)
+        async def slow():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.05)
+            return [1, 2, 3]
+
+        results = await asyncio.gather(*[slow() for _ in range(10)])
+
+        assert calls == 1
+        assert all(r == [1, 2, 3] for r in results)
+
+    async def test_expired_holder_does_not_release_the_next_holders_lock(self, fake_redis):
+        @cached("test:lock", ttl=60)
+        async def slow():
+            # Our lock expires mid-computation and another worker takes it
+            fake_redis.strings[lock_key] = "other-worker"
+            return 1
+
+        lock_key = f"cache:lock:{slow.cache_key()}"
+        assert await slow() == 1
+        assert fake_redis.strings[lock_key] == "other-worker"
+
+        await cache_module._release_lock(slow.cache_key(), "other-worker")
+        assert lock_key not in fake_redis.strings
+
+    async def test_stale_value_served_while_refreshing(self, fake_redis):
+        version = 0
+
+        @cached("test:swr", ttl=1, stale_ttl=60)
+        async def load():
+            nonlocal version
+            version += 1
+            return version
+
+        assert await load() == 1
+        local_cache.clear()
+        with patch("app.utils.cache.time.time", return_value=time.time() + 5):
+            assert await load() == 1  # stale, refresh scheduled
+            await asyncio.gather(*cache_module._refreshing.values())
+        local_cache.clear()
+
+        assert await load() == 2
+        assert version == 2
+
+    async def test_session_arguments_are_not_part_of_the_key(self, fake_redis):
+        @cached("test:session", ttl=60)
+        async def load(db, user_id):
+            return str(user_id)
+
+        await load(MagicMock(spec=AsyncSession), "abc")
+
+        assert "cache:test:session:abc" in fake_redis.strings
+
+    async def test_redis_down_fails_open(self):
+        calls = 0
+
+        @cached("test:down", ttl=60)
+        async def load():
+            nonlocal calls
+            calls += 1
+            return "ok"
+
+        with patch("app.redis.get_redis", side_effect=RuntimeError("no redis")):
+            assert await load() == "ok"
+            local_cache.clear()
+            assert await load() == "ok"
+
+        assert calls == 2
+
+
+@pytest.mark.unit
+class TestInvalidation:
+    """Tests for tag-based invalidation and the low-level helpers."""
+
+    async def test_invalidate_tags_removes_only_tagged_keys(self, fake_redis):
+        @cached("test:tagged", ttl=60, tags=lambda course_id: [f"course:{course_id}"])
+        async def load(course_id):
+            return course_id
+
+        await load("a")
+        await load("b")
+
+        assert await invalidate_tags("course:a") == 1
+        assert "cache:test:tagged:a" not in fake_redis.strings
+        assert "cache:test:tagged:b" in fake_redis.strings
+        assert "cache:tag:course:a" not in fake_redis.sets
+
+    async def test_cache_get_set_round_trip(self, fake_redis):
+        await cache_set("report:widget:abc", {"rows": [1, 2]}, ttl=30)
+        local_cache.clear()
+
+        assert await cache_get("report:widget:abc") == {"rows": [1, 2]}
+        assert await cache_get("report:widget:missing") is None
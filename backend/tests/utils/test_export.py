@@ -0,0 +1,155 @@
+"""
+Export Engine Tests
+
+Tests for app/utils/export.py:
+- CSV chunk encoding and column formatting
+- Server-side cursor streaming of column-projected selects
+- Write-only Excel output
+- Background export jobs and inline stored exports
+"""
+
+import asyncio
+import csv
+import io
+import uuid
+from datetime import datetime
+
+import pytest
+from sqlalchemy import select
+
+from app.config import settings
+from app.models.user import User
+from app.utils import export as export_module
+from app.utils.export import (
+    ExportColumn,
+    export_job_path,
+    get_export_job,
+    iter_csv,
+    start_export_job,
+    store_export,
+    stream_rows,
+    write_xlsx,
+    yes_no,
+)
+from tests.conftest import TestingSessionLocal
+
+
+COLUMNS = [
+    ExportColumn("Email", "email"),
+    ExportColumn("Active", "is_active", yes_no),
+    ExportColumn("Created At", "created_at"),
+]
+
+
+async def _collect(chunks) -> str:
+    return b"".join([c async for c in chunks]).decode("utf-8")
+
+
+@pytest.fixture(autouse=True)
+def export_dir(tmp_path, monkeypatch):
+    """Point the export file store at a temp dir."""
+    monkeypatch.setattr(settings, "export_dir", str(tmp_path))
+    return tmp_path
+
+
+@pytest.mark.unit
+class TestIterCsv:
+    """Tests for iter_csv()."""
+
+    async def test_formats_header_and_values(self):
+        created = datetime(2026, 1, 2, 3, 4, 5)
+        rows = [{"email": "a@x.ke", "is_active": True, "created_at": created}]
+
+        text = await _collect(iter_csv(rows, COLUMNS))
+        parsed = list(csv.reader(io.StringIO(text)))
+
+        assert parsed[0] == ["Email", "Active", "Created At"]
+        assert parsed[1] == ["a@x.ke", "Yes", created.isoformat()]
+
+    async def test_large_exports_are_chunked(self):
+        rows = ({"email": f"user{i}@x.ke", "is_active": False, "created_at": None} for i in range(20000))
+
+        chunks = [c async for c in iter_csv(rows, COLUMNS)]
+
+        assert len(chunks) > 1
+        text = b"".join(chunks).decode("utf-8")
+        assert len(text.strip().splitlines()) == 20001
+
+
+@pytest.mark.unit
+class TestStreamRows:
+    """Tests for stream_rows() against the test database."""
+
+    async def test_streams_all_rows_without_limit(self, db_session):
+        for i in range(25):
+            db_session.add(User(
+                email=f"export{i}@tuhs.co.ke",
+                password_hash="x",
+                role="student",
+                is_active=True,
+                profile_data={},
+            ))
+        await db_session.commit()
+
+        stmt = select(User.email, User.is_active, User.created_at).order_by(User.email)
+        rows = [row async for row in stream_rows(db_session, stmt, batch_size=10)]
+
+        assert len(rows) == 25
+        assert rows[0].email == "export0@tuhs.co.ke"
+
+
+@pytest.mark.unit
+class TestExcel:
+    """Tests for write_xlsx()."""
+
+    async def test_write_only_workbook(self, tmp_path):
+        openpyxl = pytest.importorskip("openpyxl")
+        path = str(tmp_path / "out.xlsx")
+        rows = [{"email": "a@x.ke", "is_active": True, "created_at": None}]
+
+        count = await write_xlsx(rows, COLUMNS, path, sheet_title="Users")
+
+        assert count == 1
+        ws = openpyxl.load_workbook(path).active
+        assert [c.value for c in ws[1]] == ["Email", "Active", "Created At"]
+        assert ws["A2"].value == "a@x.ke"
+
+
+@pytest.mark.unit
+class TestExportJobs:
+    """Tests for store_export() and start_export_job()."""
+
+    async def test_store_export_returns_download_handle(self):
+        owner = str(uuid.uuid4())
+        rows = [{"email": "a@x.ke", "is_active": True, "created_at": None}]
+
+        handle = await store_export(rows, COLUMNS, filename="users", owner_id=owner)
+
+        assert handle["status"] == "completed"
+        assert handle["rows"] == 1
+        assert handle["download_url"].endswith(f"/exports/{handle['id']}/download")
+        job = await get_export_job(handle["id"])
+        assert job["owner_id"] == owner
+        assert export_job_path(job) is not None
+
+    async def test_background_job_writes_file(self, db_session):
+        db_session.add(User(
+            email="job@tuhs.co.ke", password_hash="x", role="admin",
+            is_active=True, profile_data={},
+        ))
+        await db_session.commit()
+
+        stmt = select(User.email, User.is_active, User.created_at)
+        handle = await start_export_job(
+            stmt, COLUMNS, filename="users", session_factory=TestingSessionLocal,
+        )
+        await asyncio.gather(*export_module._running_jobs.values())
+
+        job = await get_export_job(handle["id"])
+        assert job["status"] == "completed"
+        with open(export_job_path(job), encoding="utf-8") as fh:
+            assert "job@tuhs.co.ke" in fh.read()
+
+    async def test_rejects_unknown_format(self):
+        with pytest.raises(ValueError):
+            await store_export([], COLUMNS, filename="x", export_format="pdf")
@@ -0,0 +1,178 @@
+"""
+Job Queue Tests
+
+Tests for app/utils/job_queue.py:
+- Without Redis a job runs in-process, retrying failures until it succeeds
+- JobFailed and invalid payloads fail a job without retrying
+- An idempotency key returns the job first queued with it
+- Deferred jobs are queued only when the session commits
+- A worker reads jobs from the streams, acks them and schedules retries
+"""
+
+import asyncio
+from unittest.mock import patch
+
+import pytest
+from pydantic import BaseModel
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from app import database
+from app.utils import job_queue
+from app.utils.job_queue import JobFailed, JobWorker, job_handler
+
+
+class _Payload(BaseModel):
+    value: int
+
+
+_calls = []
+
+
+@job_handler("test_echo", _Payload, max_attempts=3)
+async def echo_job(payload: _Payload):
+    _calls.append(payload.value)
+    if payload.value < 0:
+        raise JobFailed("negative")
+    if len(_calls) < payload.value:
+        raise RuntimeError("flaky")
+    return {"value": payload.value}
+
+
+async def _promote_due(redis, keys, args):
+    """Python rendition of job_queue._PROMOTE_DUE."""
+    delayed = redis.zsets.get(keys[0], {})
+    due = sorted((member for member, score in delayed.items() if score <= args[0]), key=delayed.get)[:100]
+    for member in due:
+        del delayed[member]
+        stream, job_id = member.split("|", 1)
+        await redis.xadd(stream, {"job_id": job_id})
+    return len(due)
+
+
+@pytest.fixture(autouse=True)
+def _reset():
+    _calls.clear()
+    job_queue._local_jobs.clear()
+    with patch.object(echo_job, "retry_delay", return_value=0):
+        yield
+
+
+@pytest.fixture
+def no_redis():
+    with patch("app.redis.get_redis", side_effect=RuntimeError("no redis")), \
+            patch.object(job_queue, "push_job_status") as push:
+        yield push
+
+
+@pytest.fixture
+def fake_redis(fake_redis):
+    fake_redis.scripts[job_queue._PROMOTE_DUE] = _promote_due
+    return fake_redis
+
+
+async def _settle():
+    await asyncio.gather(*list(job_queue._local_tasks))
+
+
+@pytest.mark.unit
+class TestLocalJobs:
+    """Tests for the in-process fallback without Redis."""
+
+    async def test_job_runs_and_reports_status(self, no_redis):
+        view = await echo_job.enqueue({"value": 1}, owner_id="user-1")
+        assert view["status"] == "queued"
+        await _settle()
+
+        job = await job_queue.get_job(view["id"])
+        assert (job["status"], job["result"], job["attempts"]) == ("succeeded", {"value": 1}, 1)
+        pushed = [call.args[1]["status"] for call in no_redis.await_args_list]
+        assert pushed == ["running", "succeeded"]
+
+    async def test_failures_are_retried(self, no_redis):
+        view = await echo_job.enqueue({"value": 3})
+        await _settle()
+
+        job = await job_queue.get_job(view["id"])
+        assert (job["status"], job["attempts"]) == ("succeeded", 3)
+
+    async def test_job_failed_is_not_retried(self, no_redis):
+        view = await echo_job.enqueue({"value": -1})
+        await _settle()
+
+        job = await job_queue.get_job(view["id"])
+        assert (job["status"], job["attempts"], job["error"]) == ("failed", 1, "negative")
+        assert _calls == [-1]
+
+    async def test_invalid_payload_is_rejected(self, no_redis):
+        with pytest.raises(ValueError):
+            await echo_job.enqueue({"value": "not a number"})
+        with pytest.raises(ValueError):
+            await job_queue.enqueue("no_such_job", {})
+
+    async def test_idempotency_key_returns_first_job(self, no_redis):
+        first = await echo_job.enqueue({"value": 1}, idempotency_key="k")
+        second = await echo_job.enqueue({"value": 1}, idempotency_key="k")
+        await _settle()
+
+        assert first["id"] == second["id"]
+        assert _calls == [1]
+
+    async def test_deferred_jobs_wait_for_commit(self, no_redis):
+        session = Session(bind=create_engine("sqlite://"))
+        session.connection()
+        echo_job.defer(session, {"value": -1})
+        session.rollback()
+        session.connection()
+        echo_job.defer(session, {"value": 1})
+        await asyncio.sleep(0)
+        assert job_queue._local_jobs == {}
+
+        session.commit()
+        await asyncio.gather(*list(database._commit_tasks))
+        await _settle()
+        assert _calls == [1]
+
+
+@pytest.mark.unit
+class TestJobWorker:
+    """Tests for the Redis Streams worker."""
+
+    async def _drain(self, worker, redis):
+        await worker.poll(redis, block_ms=0)
+        await asyncio.gather(*list(worker._running.values()))
+
+    async def test_worker_runs_and_acks_jobs(self, fake_redis):
+        view = await echo_job.enqueue({"value": 1}, owner_id="user-1")
+        assert fake_redis.streams["jobs:stream:default"]
+
+        await self._drain(JobWorker(consumer="w1"), fake_redis)
+
+        job = await job_queue.get_job(view["id"])
+        assert (job["status"], job["result"]) == ("succeeded", {"value": 1})
+        assert fake_redis.streams["jobs:stream:default"] == []
+        assert len(fake_redis.published) == 2
+
+    async def test_higher_priority_is_read_first(self, fake_redis):
+        await echo_job.enqueue({"value": 1}, priority="low")
+        await echo_job.enqueue({"value": 2}, priority="high")
+
+        await self._drain(JobWorker(concurrency=1, consumer="w1"), fake_redis)
+
+        assert _calls == [2]
+
+    async def test_failed_attempt_is_scheduled_for_retry(self, fake_redis):
+        view = await echo_job.enqueue({"value": 2})
+
+        await self._drain(JobWorker(consumer="w1"), fake_redis)
+
+        job = await job_queue.get_job(view["id"])
+        assert (job["status"], job["attempts"]) == ("retrying", 1)
+        assert list(fake_redis.zsets[job_queue.DELAYED_KEY]) == [f"jobs:stream:default|{view['id']}"]
+
+    async def test_idempotency_key_returns_first_job(self, fake_redis):
+        first = await echo_job.enqueue({"value": 1}, idempotency_key="k")
+        second = await echo_job.enqueue({"value": 1}, idempotency_key="k")
+
+        assert first["id"] == second["id"]
+        assert len(fake_redis.streams["jobs:stream:default"]) == 1
@@ -0,0 +1,134 @@
+"""
+Rate Limiter Engine Tests
+
+Tests for app/utils/rate_limiter.py:
+- Policy resolution per route and role
+- Local token leases (Redis is only hit once per lease)
+- Rejections cached locally and counted in the Prometheus metric
+- Several buckets synced in one pipelined round trip
+- A request rejected by one bucket is not charged to the others
+"""
+
+import math
+import time
+
+import pytest
+
+from app.metrics import rate_limit_rejections_total
+from app.utils.rate_limiter import (
+    _GCRA_LEASE_LUA,
+    RateLimiter,
+    RateLimitPolicy,
+    default_policy,
+    policies_for,
+)
+
+
+def _gcra_lease(redis, keys, args):
+    """Python rendition of rate_limiter._GCRA_LEASE_LUA, on the fake's clock."""
+    interval, capacity, wanted = float(args[0]), int(args[1]), int(args[2])
+    now = redis.now_ms
+    tat = max(float(redis.strings.get(keys[0], now)), now)
+    available = math.floor((now + capacity * interval - tat) / interval)
+    granted = min(wanted, max(available, 0))
+    if granted > 0:
+        redis.strings[keys[0]] = str(tat + granted * interval)
+        return [granted, available - granted, 0]
+    return [0, 0, math.ceil(tat - (capacity - 1) * interval - now)]
+
+
+@pytest.fixture
+def fake_redis(fake_redis):
+    fake_redis.now_ms = time.time() * 1000
+    fake_redis.scripts[_GCRA_LEASE_LUA] = _gcra_lease
+    return fake_redis
+
+
+@pytest.mark.unit
+class TestPolicies:
+    """Tests for policies_for()."""
+
+    def test_default_policy_from_settings(self):
+        policies = policies_for("/api/v1/courses")
+        assert policies == [default_policy()]
+
+    def test_route_policy_added(self):
+        names = [p.name for p in policies_for("/api/v1/ai-tutor/chat")]
+        assert names == ["global", "ai"]
+
+    def test_role_multiplier_scales_limits(self):
+        student = policies_for("/api/v1/courses", "student")[0]
+        admin = policies_for("/api/v1/courses", "admin")[0]
+        assert admin.limit == student.limit * 5
+
+
+@pytest.mark.unit
+class TestRateLimiter:
+    """Tests for RateLimiter.check()."""
+
+    async def test_leases_tokens_locally(self, fake_redis):
+        limiter = RateLimiter()
+        policy = RateLimitPolicy("global", 200, 60)  # lease size 10
+
+        for _ in range(10):
+            decision = await limiter.check([policy], "ip:1.2.3.4")
+            assert decision.allowed
+
+        assert fake_redis.calls == 1
+
+    async def test_small_limits_are_exact(self, fake_redis):
+        limiter = RateLimiter()
+        policy = RateLimitPolicy("login", 3, 3600)
+
+        results = [(await limiter.check([policy], "ip:1.2.3.4")).allowed for _ in range(4)]
+
+        assert results == [True, True, True, False]
+
+    async def test_rejection_is_cached_and_counted(self, fake_redis):
+        limiter = RateLimiter()
+        policy = RateLimitPolicy("tiny", 1, 60)
+        before = rate_limit_rejections_total.labels(policy="tiny")._value.get()
+
+        await limiter.check([policy], "ip:5.6.7.8")
+        denied = await limiter.check([policy], "ip:5.6.7.8")
+        calls_after_first_denial = fake_redis.calls
+        denied_again = await limiter.check([policy], "ip:5.6.7.8")
+
+        assert not denied.allowed and not denied_again.allowed
+        assert denied.retry_after >= 1
+        assert fake_redis.calls == calls_after_first_denial
+        assert rate_limit_rejections_total.labels(policy="tiny")._value.get() == before + 2
+
+    async def test_multiple_buckets_share_one_round_trip(self, fake_redis):
+        limiter = RateLimiter()
+
+        decision = await limiter.check(policies_for("/api/v1/payments/initiate"), "user:42")
+
+        assert decision.allowed
+        assert fake_redis.calls == 1
+        assert len(fake_redis.strings) == 2
+
+    async def test_rejection_by_one_bucket_refunds_the_others(self, fake_redis):
+        limiter = RateLimiter()
+        tight = RateLimitPolicy("tight", 1, 60)
+        wide = RateLimitPolicy("wide", 200, 60)  # lease size 10
+
+        assert (await limiter.check([wide, tight], "user:7")).allowed
+        for _ in range(5):
+            decision = await limiter.check([wide, tight], "user:7")
+            assert not decision.allowed
+            assert decision.policy == "tight"
+
+        assert limiter._leases["ratelimit:wide:200:user:7"].tokens == 9
+
+    async def test_tokens_refill_over_time(self, fake_redis):
+        limiter = RateLimiter()
+        policy = RateLimitPolicy("refill", 2, 60)
+
+        await limiter.check([policy], "ip:9.9.9.9")
+        await limiter.check([policy], "ip:9.9.9.9")
+        assert not (await limiter.check([policy], "ip:9.9.9.9")).allowed
+
+        fake_redis.now_ms += 30_000
+        limiter.reset()
+        assert (await limiter.check([policy], "ip:9.9.9.9")).allowed
@@ -0,0 +1,173 @@
+"""
+Scheduler Tests
+
+Tests for app/utils/scheduler.py:
+- Cron expressions find the next matching minute
+- One of several workers holds the lease and runs a job once per period
+- Jitter delays runs; late runs past the misfire grace are skipped
+- A run still holding the job lock is not overlapped
+- Partitions of a sharded job are claimed once each across workers
+- Without Redis the process runs every job itself
+"""
+
+import asyncio
+from datetime import datetime, timezone
+from unittest.mock import patch
+
+import pytest
+
+from app.utils import scheduler as scheduler_module
+from app.utils.scheduler import CronSchedule, Job, Scheduler
+
+NOW = datetime(2026, 10, 14, 12, 0, tzinfo=timezone.utc).timestamp()
+
+
+def _renew_lease(redis, keys, args):
+    """Python rendition of scheduler._RENEW_LEASE (expiry is not simulated)."""
+    return int(redis.strings.get(keys[0]) == args[0])
+
+
+def _release(redis, keys, args):
+    """Python rendition of scheduler._RELEASE."""
+    if redis.strings.get(keys[0]) != args[0]:
+        return 0
+    del redis.strings[keys[0]]
+    return 1
+
+
+@pytest.fixture
+def fake_redis(fake_redis):
+    fake_redis.scripts[scheduler_module._RENEW_LEASE] = _renew_lease
+    fake_redis.scripts[scheduler_module._RELEASE] = _release
+    return fake_redis
+
+
+async def _settle(*schedulers):
+    for sched in schedulers:
+        await asyncio.gather(*list(sched._running.values()))
+
+
+def _counting(calls):
+    async def job(*args):
+        calls.append(args)
+    return job
+
+
+@pytest.mark.unit
+class TestCronSchedule:
+    """Tests for cron expression parsing."""
+
+    @pytest.mark.parametrize("expression, after, expected", [
+        ("*/15 * * * *", datetime(2026, 10, 14, 12, 7), datetime(2026, 10, 14, 12, 15)),
+        ("0 5 * * *", datetime(2026, 10, 14, 5, 0), datetime(2026, 10, 15, 5, 0)),
+        ("0 15 * * 0", datetime(2026, 10, 14, 12, 0), datetime(2026, 10, 18, 15, 0)),
+        ("30 9 1,15 * *", datetime(2026, 10, 15, 10, 0), datetime(2026, 11, 1, 9, 30)),
+        ("0 0 29 2 *", datetime(2026, 3, 1), datetime(2028, 2, 29)),
+        # Both day fields restricted: either matches (the 13th or a Friday)
+        ("0 12 13 * 5", datetime(2026, 10, 12, 13, 0), datetime(2026, 10, 13, 12, 0)),
+        ("0 12 13 * 5", datetime(2026, 10, 13, 13, 0), datetime(2026, 10, 16, 12, 0)),
+    ])
+    def test_next_after(self, expression, after, expected):
+        assert CronSchedule(expression).next_after(after) == expected
+
+    @pytest.mark.parametrize("expression", ["* * * *", "60 * * * *", "0 0 30 2 *", "*/0 * * * *"])
+    def test_invalid_expressions_are_rejected(self, expression):
+        with pytest.raises(ValueError):
+            CronSchedule(expression)
+
+    def test_jitter_only_delays(self):
+        job = Job("j", _counting([]), every=60, jitter=10)
+
+        assert all(NOW + 60 <= job.next_run(NOW) <= NOW + 70 for _ in range(50))
+
+
+@pytest.mark.unit
+class TestScheduler:
+    """Tests for election, firing and sharding."""
+
+    def _pair(self, **options):
+        calls = []
+        workers = [Scheduler(worker_id=f"w{i}") for i in range(2)]
+        for sched in workers:
+            sched.register("job", _counting(calls), **options)
+        return workers, calls
+
+    async def test_one_leader_runs_the_job_once(self, fake_redis):
+        (first, second), calls = self._pair(every=60, run_on_start=True)
+
+        await first.tick(NOW)
+        await second.tick(NOW)
+        await _settle(first, second)
+
+        assert (first.is_leader, second.is_leader) == (True, False)
+        assert len(calls) == 1
+
+        for offset in (30, 61):
+            await first.tick(NOW + offset)
+            await second.tick(NOW + offset)
+            await _settle(first, second)
+        assert len(calls) == 2
+
+    async def test_next_leader_continues_the_schedule(self, fake_redis):
+        (first, second), calls = self._pair(every=60)
+
+        await first.tick(NOW)
+        await first.stop()
+        await second.tick(NOW + 30)
+        assert second.is_leader and calls == []
+
+        await second.tick(NOW + 61)
+        await _settle(second)
+        assert len(calls) == 1
+
+    async def test_late_runs_are_skipped_as_misfires(self, fake_redis):
+        (first, _), calls = self._pair(every=60, misfire_grace=10)
+
+        await first.tick(NOW)
+        await first.tick(NOW + 600)
+        await _settle(first)
+
+        assert calls == []
+        assert float(fake_redis.hashes["scheduler:next"]["job"]) == NOW + 660
+
+    async def test_a_held_lock_prevents_overlap(self, fake_redis):
+        (first, _), calls = self._pair(every=60, run_on_start=True)
+        fake_redis.strings["scheduler:lock:job"] = "previous-leader"
+
+        await first.tick(NOW)
+        await _settle(first)
+
+        assert calls == []
+
+    async def test_shards_are_claimed_once_across_workers(self, fake_redis):
+        (first, second), calls = self._pair(cron="0 * * * *", shards=3)
+
+        await first.tick(NOW - 60)
+        for _ in range(3):
+            await first.tick(NOW)
+            await second.tick(NOW)
+            await _settle(first, second)
+
+        assert sorted(calls) == [(0, 3), (1, 3), (2, 3)]
+        claims = [fake_redis.strings[f"scheduler:shards:job:1:{shard}"] for shard in range(3)]
+        assert claims == ["done"] * 3
+
+    async def test_without_redis_the_process_runs_everything(self):
+        calls = []
+        sched = Scheduler()
+        sched.register("job", _counting(calls), every=60, run_on_start=True)
+        sched.register("sharded", _counting(calls), every=60, shards=2, run_on_start=True)
+
+        with patch("app.redis.get_redis", side_effect=RuntimeError("no redis")):
+            await sched.tick(NOW)
+            await _settle(sched)
+
+        assert sched.is_leader
+        assert sorted(calls) == [(), (0, 2), (1, 2)]
+
+    def test_registration_is_validated(self):
+        sched = Scheduler()
+        with pytest.raises(ValueError):
+            sched.register("both", _counting([]), cron="* * * * *", every=60)
+        with pytest.raises(ValueError):
+            sched.register("local", _counting([]), every=60, per_worker=True, shards=2)
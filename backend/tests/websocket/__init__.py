@@ -0,0 +1 @@
+"""WebSocket tests package."""
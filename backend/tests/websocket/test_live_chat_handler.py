@@ -0,0 +1,197 @@
+"""
+Live Support Chat Tests
+
+Tests for app/websocket/live_chat_handler.py:
+- Messages get per-ticket sequence numbers and are broadcast before they are persisted
+- A reconnecting client receives the messages after its last_seq
+- A gap larger than the replay buffer is flagged as truncated
+- Sequencing and replay fall back to memory when Redis is down
+- Internal notes reach and replay to staff participants only
+- Queued messages are written to staff_ticket_messages
+"""
+
+import json
+import uuid
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from sqlalchemy import select
+from starlette.websockets import WebSocketState
+
+from app.models.staff.ticket import StaffTicketMessage
+from app.websocket import live_chat_handler
+from app.websocket.live_chat_handler import (
+    EVENT_CHAT_MESSAGE,
+    EVENT_CHAT_REPLAY,
+    LiveChatManager,
+    _ChatRoom,
+    chat_message_writer,
+)
+from tests.conftest import TestingSessionLocal
+
+
+class _FakeWebSocket:
+    client_state = WebSocketState.CONNECTED
+
+    def __init__(self):
+        self.sent = []
+
+    async def send_json(self, message):
+        self.sent.append(message)
+
+
+async def _append(redis, keys, args):
+    """Python rendition of live_chat_handler._APPEND."""
+    (seq_key, ring_key), (body, size, ttl) = keys, args
+    seq = await redis.incr(seq_key)
+    await redis.rpush(ring_key, f"{seq}|{body}")
+    await redis.ltrim(ring_key, -size, -1)
+    await redis.expire(seq_key, ttl)
+    await redis.expire(ring_key, ttl)
+    return seq
+
+
+@pytest.fixture
+def fake_redis(fake_redis):
+    fake_redis.scripts[live_chat_handler._APPEND] = _append
+    return fake_redis
+
+
+@pytest.fixture
+def persisted():
+    with patch.object(chat_message_writer, "submit", new=AsyncMock()) as submit:
+        yield submit
+
+
+def _room(manager, ticket_id, *user_ids, staff=()):
+    room = manager._rooms[ticket_id] = _ChatRoom(ticket_id)
+    for user_id in user_ids:
+        room.connections[user_id] = _FakeWebSocket()
+    room.staff.update(staff)
+    return room
+
+
+def _chat(ws):
+    return [m["data"] for m in ws.sent if m["type"] == EVENT_CHAT_MESSAGE]
+
+
+def _replay(ws):
+    return [m["data"] for m in ws.sent if m["type"] == EVENT_CHAT_REPLAY][-1]
+
+
+@pytest.mark.unit
+class TestLiveChatSequencing:
+    """Tests for sequence numbers and write-behind persistence."""
+
+    async def test_messages_are_sequenced_and_broadcast_first(self, fake_redis, persisted):
+        manager = LiveChatManager()
+        room = _room(manager, "t1", "staff", "student")
+        watcher = room.connections["student"]
+
+        def assert_broadcast(row):
+            assert _chat(watcher)[-1]["id"] == row["id"]
+
+        persisted.side_effect = assert_broadcast
+
+        for text in ("hello", "are you there?", "bye"):
+            await manager.handle_incoming("t1", "staff", json.dumps({"type": "chat_message", "content": text}))
+
+        assert [(m["seq"], m["content"]) for m in _chat(watcher)] == [
+            (1, "hello"), (2, "are you there?"), (3, "bye"),
+        ]
+        assert persisted.await_count == 3
+
+    async def test_rows_are_written_in_batches(self, db_session):
+        ticket_id, author_id = uuid.uuid4(), uuid.uuid4()
+        rows = [
+            chat_message_writer.new_row(
+                id=str(uuid.uuid4()), ticket_id=str(ticket_id), author_id=str(author_id),
+                content=f"m{i}", is_internal=False,
+            )
+            for i in range(3)
+        ]
+
+        with patch("app.database.AsyncSessionLocal", TestingSessionLocal):
+            assert await chat_message_writer._flush(rows)
+
+        stored = (await db_session.execute(
+            select(StaffTicketMessage.content).where(StaffTicketMessage.ticket_id == ticket_id)
+        )).scalars().all()
+        assert sorted(stored) == ["m0", "m1", "m2"]
+
+
+@pytest.mark.unit
+class TestLiveChatReplay:
+    """Tests for resuming from last_seq."""
+
+    async def test_resume_sends_missed_messages(self, fake_redis, persisted):
+        manager = LiveChatManager()
+        room = _room(manager, "t1", "staff")
+        for i in range(5):
+            await manager.handle_message("t1", "staff", f"m{i}")
+
+        # The student reconnects having seen up to seq 3
+        room.connections["student"] = ws = _FakeWebSocket()
+        await manager.handle_incoming("t1", "student", json.dumps({"type": "resume", "last_seq": 3}))
+
+        replay = _replay(ws)
+        assert [(m["seq"], m["content"]) for m in replay["messages"]] == [(4, "m3"), (5, "m4")]
+        assert (replay["latest_seq"], replay["truncated"]) == (5, False)
+
+    async def test_gap_beyond_buffer_is_truncated(self, fake_redis, persisted):
+        manager = LiveChatManager()
+        room = _room(manager, "t1", "staff", "student")
+        with patch("app.websocket.live_chat_handler.settings.support_chat_ring_size", 3):
+            for i in range(6):
+                await manager.handle_message("t1", "staff", f"m{i}")
+
+        await manager.resume("t1", "student", 1)
+
+        replay = _replay(room.connections["student"])
+        assert [m["seq"] for m in replay["messages"]] == [4, 5, 6]
+        assert replay["truncated"] is True
+
+    async def test_memory_fallback_without_redis(self, persisted):
+        manager = LiveChatManager()
+        room = _room(manager, "t1", "staff", "student")
+        with patch("app.redis.get_redis", side_effect=RuntimeError("Redis not initialized")):
+            await manager.handle_message("t1", "staff", "first")
+            await manager.handle_message("t1", "staff", "second")
+            await manager.resume("t1", "student", 1)
+
+        replay = _replay(room.connections["student"])
+        assert [(m["seq"], m["content"]) for m in replay["messages"]] == [(2, "second")]
+        assert (replay["latest_seq"], replay["truncated"]) == (2, False)
+
+
+@pytest.mark.unit
+class TestLiveChatInternalNotes:
+    """Internal notes stay with staff, live and on replay."""
+
+    async def _post(self, manager):
+        await manager.handle_message("t1", "agent", "public reply")
+        await manager.handle_message("t1", "agent", "customer is abusive", is_internal=True)
+        await manager.handle_message("t1", "agent", "second reply")
+
+    async def test_internal_notes_are_only_broadcast_to_staff(self, fake_redis, persisted):
+        manager = LiveChatManager()
+        room = _room(manager, "t1", "agent", "lead", "student", staff=("agent", "lead"))
+
+        await self._post(manager)
+
+        assert [m["content"] for m in _chat(room.connections["student"])] == ["public reply", "second reply"]
+        assert len(_chat(room.connections["lead"])) == 3
+
+    async def test_non_staff_resume_never_receives_internal_notes(self, fake_redis, persisted):
+        manager = LiveChatManager()
+        room = _room(manager, "t1", "agent", "lead", "student", staff=("agent", "lead"))
+        await self._post(manager)
+
+        await manager.resume("t1", "student", 0)
+        await manager.resume("t1", "lead", 0)
+
+        student = _replay(room.connections["student"])
+        assert [m["seq"] for m in student["messages"]] == [1, 3]
+        assert not any(m["is_internal"] for m in student["messages"])
+        assert (student["latest_seq"], student["truncated"]) == (3, False)
+        assert [m["seq"] for m in _replay(room.connections["lead"])["messages"]] == [1, 2, 3]
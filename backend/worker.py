@@ -0,0 +1,58 @@
+"""
+Urban Home School - Background Job Worker
+
+Runs the handlers in app/services/background_jobs.py against the Redis
+Streams job queue (app/utils/job_queue.py). Run one or more of these
+next to the gunicorn web workers; each process takes up to
+JOB_WORKER_CONCURRENCY jobs at a time.
+
+SIGTERM/SIGINT stop taking new jobs and let running ones finish (up to
+JOB_WORKER_GRACE seconds, default 30); anything still running after that
+goes back on the queue for another worker.
+
+Usage:
+    python worker.py
+"""
+
+import asyncio
+import logging
+import os
+import signal
+import sys
+
+# Add the backend directory to the Python path for imports
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.config import settings  # noqa: E402
+from app.database import close_db, init_db  # noqa: E402
+from app.redis import close_redis, init_redis  # noqa: E402
+
+logger = logging.getLogger("worker")
+
+
+async def main() -> None:
+    import app.models  # noqa: F401  (configure every mapper before jobs query)
+    import app.services.background_jobs  # noqa: F401  (registers the handlers)
+    from app.utils.job_queue import JobWorker
+
+    await init_db()
+    await init_redis()
+
+    worker = JobWorker()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, worker.stop)
+
+    try:
+        await worker.run(grace=float(os.getenv("JOB_WORKER_GRACE", "30")))
+    finally:
+        await close_redis()
+        await close_db()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=getattr(logging, settings.log_level),
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    )
+    asyncio.run(main())